@@ -221,10 +221,10 @@ class AuthWindow(wx.Frame):
     def StartDDRescueGUI(self, Password):
         """Start DDRescue-GUI and exit"""
         if Linux:
-            Cmd = subprocess.Popen("sudo -SH "+ResourcePath+"/DDRescue-GUI.py", stdin=subprocess.PIPE, stdout=sys.stdout, stderr=subprocess.PIPE, shell=True)
+            Cmd = subprocess.Popen(["sudo", "-SH", ResourcePath+"/DDRescue-GUI.py"]+sys.argv[1:], stdin=subprocess.PIPE, stdout=sys.stdout, stderr=subprocess.PIPE)
 
         else:
-            Cmd = subprocess.Popen("sudo -SH "+ResourcePath+"/../MacOS/DDRescue-GUI", stdin=subprocess.PIPE, stdout=sys.stdout, stderr=subprocess.PIPE, shell=True)
+            Cmd = subprocess.Popen(["sudo", "-SH", ResourcePath+"/../MacOS/DDRescue-GUI"]+sys.argv[1:], stdin=subprocess.PIPE, stdout=sys.stdout, stderr=subprocess.PIPE)
 
         #Send the password to sudo through stdin, to avoid showing the user's password in the system/activity monitor.
         Cmd.stdin.write(Password+"\n")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copy Engine benchmark for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Compares the built-in copy engine with ddrescue, copying between two loop devices.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import other modules.
+import os
+import sys
+import time
+import threading
+import logging
+import subprocess
+import tempfile
+import shutil
+import hashlib
+import getopt
+
+#Custom made modules.
+import Tools
+from Tools.copyengine import Main as CopyEngine
+
+def usage():
+    print("\nUsage: CopyEngineBenchmark.py [OPTION]\n\n")
+    print("Options:\n")
+    print("       -h, --help:                   Display this help text.")
+    print("       -s, --size:                   Size of the test image in MB. Default: 256.")
+    print("       -b, --blocksize:              Copy engine block size in KB. Default: 1024.")
+    print("       -n, --buffers:                Number of copy engine buffers. Default: 4.")
+    print("       -r, --runs:                   Number of times to run each test. Default: 3.")
+
+#Exit if not running as root.
+if os.geteuid() != 0:
+    sys.exit("You must run the benchmark as root! Exiting...")
+
+try:
+    opts, args = getopt.getopt(sys.argv[1:], "hs:b:n:r:", ["help", "size=", "blocksize=", "buffers=", "runs="])
+
+except getopt.GetoptError as err:
+    print(unicode(err))
+    usage()
+    sys.exit(2)
+
+Size = 256
+BlockSize = 1024
+Buffers = 4
+Runs = 3
+
+for o, a in opts:
+    if o in ["-s", "--size"]:
+        Size = int(a)
+    elif o in ["-b", "--blocksize"]:
+        BlockSize = int(a)
+    elif o in ["-n", "--buffers"]:
+        Buffers = int(a)
+    elif o in ["-r", "--runs"]:
+        Runs = int(a)
+    elif o in ["-h", "--help"]:
+        usage()
+        sys.exit()
+
+logging.basicConfig(level=logging.CRITICAL)
+
+#Setup custom-made modules (make global variables accessible inside the packages).
+Tools.copyengine.os = os
+Tools.copyengine.threading = threading
+Tools.copyengine.time = time
+Tools.copyengine.logger = logging
+Tools.copyengine.Linux = True
+
+Tools.compressedimage.os = os
+Tools.compressedimage.logger = logging
+
+Tools.segmentedimage.os = os
+Tools.segmentedimage.logger = logging
+
+def SetUpLoopDevice(Image):
+    """Attach Image to a loop device with direct I/O, so reads hit the backing file rather than the loop device's cache"""
+    return subprocess.check_output(["losetup", "-f", "--show", "--direct-io=on", Image]).decode("utf-8").strip()
+
+def DropCaches():
+    """Make sure every run has to read from the disk"""
+    subprocess.call(["sync"])
+
+    with open("/proc/sys/vm/drop_caches", "w") as File:
+        File.write("3\n")
+
+def HashFile(File):
+    """Hash a file the way HashWindow does"""
+    Hasher = hashlib.sha512()
+
+    with open(File, "rb") as Input:
+        for Chunk in iter(lambda: Input.read(1048576), b""):
+            Hasher.update(Chunk)
+
+    return Hasher.hexdigest()
+
+def RunCopyEngine(Source, Destination, MapFile):
+    if os.path.exists(MapFile):
+        os.remove(MapFile)
+
+    Result = CopyEngine().Copy(Source, Destination, MapFile, BlockSize=BlockSize*1024, NumberOfBuffers=Buffers)
+
+    if Result["Result"] != "Success":
+        sys.exit("Copy engine failed: "+Result["Result"])
+
+    return Result["Hash"]
+
+def RunDDRescue(Source, Destination, MapFile):
+    if os.path.exists(MapFile):
+        os.remove(MapFile)
+
+    if subprocess.call(["ddrescue", "-f", "-d", "-q", Source, Destination, MapFile]) != 0:
+        sys.exit("ddrescue failed!")
+
+def RunDDRescueAndHash(Source, Destination, MapFile):
+    #ddrescue can't hash while copying, so the source has to be read again, as HashWindow does.
+    RunDDRescue(Source, Destination, MapFile)
+    DropCaches()
+    return HashFile(Source)
+
+def Benchmark(Name, Function, *Args):
+    Times = []
+
+    for Run in range(Runs):
+        DropCaches()
+        StartTime = time.time()
+        Function(*Args)
+        Times.append(time.time() - StartTime)
+
+    Best = min(Times)
+    print("%-32s best %7.2f s  %8.1f MB/s  (runs: %s)" % (Name, Best, Size / Best, ", ".join("%.2f" % Time for Time in Times)))
+
+if __name__ == "__main__":
+    TempDir = tempfile.mkdtemp()
+    LoopDevices = []
+
+    try:
+        print("Creating a "+unicode(Size)+" MB test image in "+TempDir+"...")
+        SourceImage = os.path.join(TempDir, "source.img")
+        DestinationImage = os.path.join(TempDir, "destination.img")
+        MapFile = os.path.join(TempDir, "mapfile")
+
+        with open(SourceImage, "wb") as File:
+            for Number in range(Size):
+                File.write(os.urandom(1048576))
+
+        with open(DestinationImage, "wb") as File:
+            File.truncate(Size * 1048576)
+
+        Source = SetUpLoopDevice(SourceImage)
+        LoopDevices.append(Source)
+        Destination = SetUpLoopDevice(DestinationImage)
+        LoopDevices.append(Destination)
+
+        print("Copying "+Source+" to "+Destination+", block size "+unicode(BlockSize)+" KB, "+unicode(Buffers)+" buffers.\n")
+
+        SourceHash = HashFile(SourceImage)
+        Benchmark("Copy engine (with SHA-512)", RunCopyEngine, Source, Destination, MapFile)
+
+        if HashFile(Destination) != SourceHash:
+            sys.exit("Copy engine's output doesn't match the source!")
+
+        if subprocess.call(["which", "ddrescue"], stdout=open(os.devnull, "w")) == 0:
+            Benchmark("ddrescue", RunDDRescue, Source, Destination, MapFile)
+            Benchmark("ddrescue, then SHA-512", RunDDRescueAndHash, Source, Destination, MapFile)
+
+            if HashFile(Destination) != SourceHash:
+                sys.exit("ddrescue's output doesn't match the source!")
+
+        else:
+            print("ddrescue isn't installed, so it can't be compared.")
+
+    finally:
+        for LoopDevice in LoopDevices:
+            subprocess.call(["losetup", "-d", LoopDevice])
+
+        shutil.rmtree(TempDir)
@@ -21,7 +21,11 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-#Import other modules
+#Import time first, so we can measure how long startup takes (see --startup-profile).
+import time
+StartTime = time.time()
+
+#Import other modules. Slow modules that are only needed sometimes (bs4, plistlib, hashlib, traceback and the ddrescue tools) are imported when they're first used.
 import wx
 from wx.animate import Animation
 from wx.animate import AnimationCtrl
@@ -30,16 +34,15 @@ import wx.lib.statbmp
 import threading
 import getopt
 import logging
-import time
 import subprocess
 import re
+import select
 import os
 import sys
-import plistlib
-import traceback
-import hashlib
-from bs4 import BeautifulSoup
 import datetime
+import json
+import struct
+import signal
 
 #Define the version number and the release date as global variables.
 Version = "1.7"
@@ -56,8 +59,33 @@ def usage():
     print("       -d, --debug:                  Log lots of boring debug messages, as well as information, warnings, errors and critical errors. Usually used for diagnostic purposes.")
     print("                                     The default, as it's very helpful if problems are encountered, and the user needs help\n")
     print("       -t, --tests                   Run all unit tests.")
+    print("       --startup-profile             Print how long each part of startup takes.")
+    print("       --thermal-file=FILE           Read the temperature (in thousandths of a degree C) from FILE instead of /sys/class/thermal. For testing.")
+    print("       --throttle-file=FILE          Read the Raspberry Pi throttle flags (like 'vcgencmd get_throttled' prints) from FILE instead of the firmware. For testing.")
     print("DDRescue-GUI "+Version+" is released under the GNU GPL Version 3")
     print("Copyright (C) Hamish McIntyre-Bhatty 2013-2017")
+
+#Keep track of how long each part of startup takes.
+StartupPhases = []
+
+def MarkStartupPhase(Phase):
+    """Record that a phase of startup has finished, for --startup-profile"""
+    StartupPhases.append((Phase, time.time()))
+
+def PrintStartupProfile():
+    """Print and log how long each phase of startup took"""
+    print("\nStartup profile:")
+    LastTime = StartTime
+
+    for Phase, Time in StartupPhases:
+        print("       %-30s %8.1f ms" % (Phase+":", (Time - LastTime) * 1000))
+        logger.info("Startup profile: "+Phase+": "+unicode(round((Time - LastTime) * 1000, 1))+" ms.")
+        LastTime = Time
+
+    print("       %-30s %8.1f ms" % ("Total:", (LastTime - StartTime) * 1000))
+
+MarkStartupPhase("Imported modules")
+
 customLenght = 480
 customHeight = 150
 #Determine if running on Linux or Mac.
@@ -87,7 +115,7 @@ elif "wxMac" in wx.PlatformInfo:
 
 #Check all cmdline options are valid.
 try:
-    opts, args = getopt.getopt(sys.argv[1:], "hqvdt", ["help", "quiet", "verbose", "debug", "tests"])
+    opts, args = getopt.getopt(sys.argv[1:], "hqvdt", ["help", "quiet", "verbose", "debug", "tests", "startup-profile", "thermal-file=", "throttle-file="])
 
 except getopt.GetoptError as err:
     #Invalid option. Show the help message and then exit.
@@ -98,6 +126,11 @@ except getopt.GetoptError as err:
 
 #Determine the option(s) given, and change the level of logging based on cmdline options.
 loggerLevel = logging.DEBUG
+StartupProfile = False
+
+#Where the governor reads the temperature and throttle flags from (None means the real sensors).
+ThermalFile = None
+ThrottleFile = None
 
 for o, a in opts:
     if o in ["-q", "--quiet"]:
@@ -111,6 +144,15 @@ for o, a in opts:
         execfile(ResourcePath+"/Tests.py")
         sys.exit()
 
+    elif o == "--startup-profile":
+        StartupProfile = True
+
+    elif o == "--thermal-file":
+        ThermalFile = a
+
+    elif o == "--throttle-file":
+        ThrottleFile = a
+
     elif o in ["-h", "--help"]:
         usage()
         sys.exit()
@@ -124,6 +166,8 @@ if os.geteuid() != 0:
     print("\nSorry, DDRescue-GUI must be run with root (superuser) privileges.\nRestarting as root...")
     sys.exit()
 
+MarkStartupPhase("Checked options")
+
 #Set up logging with default logging mode as debug.
 logger = logging.getLogger('DDRescue-GUI '+Version)
 logging.basicConfig(filename='/tmp/ddrescue-gui.log', format='%(asctime)s - %(name)s - %(levelname)s: %(message)s', datefmt='%d/%m/%Y %I:%M:%S %p')
@@ -145,26 +189,41 @@ import Tools
 
 from GetDevInfo.getdevinfo import Main as DevInfoTools
 from Tools.tools import Main as BackendTools
-import Tools.DDRescueTools.setup as DDRescueTools
+
+#The other Tools modules are slow to import, and most aren't needed for a simple recovery, so they're imported when they're first used with BackendTools().ImportTool().
 
 #Setup custom-made modules (make global variables accessible inside the packages).
 GetDevInfo.getdevinfo.subprocess = subprocess
 GetDevInfo.getdevinfo.re = re
+GetDevInfo.getdevinfo.os = os
+GetDevInfo.getdevinfo.threading = threading
+GetDevInfo.getdevinfo.time = time
+GetDevInfo.getdevinfo.json = json
 GetDevInfo.getdevinfo.logger = logger
 GetDevInfo.getdevinfo.Linux = Linux
-GetDevInfo.getdevinfo.plistlib = plistlib
-GetDevInfo.getdevinfo.BeautifulSoup = BeautifulSoup
 
 Tools.tools.wx = wx
 Tools.tools.os = os
 Tools.tools.subprocess = subprocess
+Tools.tools.re = re
+Tools.tools.select = select
+Tools.tools.threading = threading
 Tools.tools.logger = logger
 Tools.tools.logging = logging
-Tools.tools.plistlib = plistlib
 Tools.tools.time = time
+Tools.tools.struct = struct
+Tools.tools.json = json
 Tools.tools.Linux = Linux
 Tools.tools.ResourcePath = ResourcePath
 
+#plistlib is only needed on OS X.
+if Linux == False:
+    import plistlib
+    GetDevInfo.getdevinfo.plistlib = plistlib
+    Tools.tools.plistlib = plistlib
+
+MarkStartupPhase("Set up custom modules")
+
 #Begin Disk Information Handler thread.
 class GetDiskInformation(threading.Thread):
     def __init__(self, ParentWindow):
@@ -176,7 +235,11 @@ class GetDiskInformation(threading.Thread):
     def run(self):
         """Get Disk Information and return it as a list with embedded lists"""
         #Use a module I've written to collect data about connected Disks, and return it.
-        wx.CallAfter(self.ParentWindow.ReceiveDiskInfo, DevInfoTools().GetInfo())
+        Info = DevInfoTools().GetInfo()
+        wx.CallAfter(self.ParentWindow.ReceiveDiskInfo, Info)
+
+        #Remember it for next time, so known Disks show up straight away.
+        DevInfoTools().SaveCache(Info)
 
 #End Disk Information Handler thread.
 #Begin Starter Class
@@ -184,6 +247,10 @@ class MyApp(wx.App):
     def OnInit(self):
         Splash = ShowSplash()
         Splash.Show()
+        MarkStartupPhase("Showed splash screen")
+
+        #Start MainWindow as soon as we can, rather than waiting for the splash screen to time out.
+        wx.CallAfter(Splash.OnExit)
         return True
 
     def MacReopenApp(self):
@@ -217,8 +284,13 @@ class ShowSplash(wx.SplashScreen):
             MainFrame = MainWindow()
             app.SetTopWindow(MainFrame)
             MainFrame.Show(True)
+            MarkStartupPhase("Started main window")
 
-            #Skip handling the event so the main frame starts.
+            if StartupProfile:
+                PrintStartupProfile()
+
+        #Skip handling the event so the splash screen is destroyed when it times out or is clicked.
+        if Event != None:
             Event.Skip()
 
 #End splash screen
@@ -375,10 +447,10 @@ class MainWindow(wx.Frame):
 
         #Use correct command.
         if Linux:
-            Command = "ddrescue --version"
+            Command = ["ddrescue", "--version"]
 
         else:
-            Command = ResourcePath+"/ddrescue --version"
+            Command = [ResourcePath+"/ddrescue", "--version"]
 
         global DDRescueVersion
         DDRescueVersion = BackendTools().StartProcess(Command=Command, ReturnOutput=True)[1].split("\n")[0].split(" ")[-1]
@@ -402,6 +474,9 @@ class MainWindow(wx.Frame):
         self.SetVars(DDRescueVersion)
         self.Starting = True
 
+        #Look for a recovery that was interrupted by a crash or power cut. It's offered for resuming once we know which Disks are connected.
+        self.UnfinishedSession = BackendTools().ImportTool("session").Main().LoadSession()
+
         #Create a Statusbar in the bottom of the window and set the text.
         logger.debug("MainWindow().__init__(): Creating Status Bar...")
         self.MakeStatusBar()
@@ -430,6 +505,12 @@ class MainWindow(wx.Frame):
         logger.debug("MainWindow().__init__(): Updating Disk info...")
         self.GetDiskInfo()
 
+        #Show any Disks we've seen before straight away, while the new info is confirmed in the background.
+        CachedInfo = DevInfoTools().GetCachedInfo()
+
+        if CachedInfo != {}:
+            self.ReceiveCachedDiskInfo(CachedInfo)
+
         #Set up sizers.
         logger.debug("MainWindow().__init__(): Setting up sizers...")
         self.SetupSizers()
@@ -461,6 +542,8 @@ class MainWindow(wx.Frame):
         Settings["OutputFile"] = None
         Settings["LogFile"] = None
         Settings["RecoveringData"] = False
+        Settings["RecoveryStarted"] = None
+        Settings["RecoveryFinished"] = None
         Settings["CheckedSettings"] = False
         Settings["HashingStatus"] = False
 
@@ -474,8 +557,46 @@ class MainWindow(wx.Frame):
         Settings["MaxErrors"] = ""
         Settings["ClusterSize"] = "-c 128"
 
+        #Areas to leave until last, from SMART data, and the disk they're on.
+        Settings["SMARTSkipRanges"] = []
+        Settings["SMARTSkipDisk"] = None
+
+        #Built-in copy engine, for healthy drives, and the hash of the input it calculates.
+        Settings["UseCopyEngine"] = False
+        Settings["CopyEngineHash"] = None
+
+        #Write a compressed image instead of a raw one (uses the copy engine).
+        Settings["CompressOutput"] = False
+
+        #Split the output image into segments that fit on FAT32 (uses the copy engine).
+        Settings["SplitOutput"] = False
+
+        #Write a second copy at the same time, reading the input only once (uses the copy engine).
+        Settings["SecondOutputFile"] = None
+
+        #Run ddrescue in several stages chosen by the planner, rather than once with the options above.
+        Settings["MultiPass"] = False
+
+        #Leave blocks of zeroes as holes in output files, rather than writing them.
+        Settings["SparseOutput"] = False
+
+        #Read back each part of the output as soon as the copy engine has written it, to catch a faulty destination early.
+        Settings["VerifyWrites"] = False
+
+        #The partitions and gaps to image to separate files (see Tools/regions.py), or None to image the whole input.
+        Settings["SelectedRegions"] = None
+
+        #Only recover the space the filesystems are using (with a domain mapfile), and maybe fill in the rest afterwards.
+        Settings["AllocatedOnly"] = False
+        Settings["FillUnallocated"] = False
+        Settings["DomainMapfile"] = ""
+
         #Local to this function.
         self.AbortedRecovery = False
+
+        #Watches for the board overheating or being throttled while recovering.
+        self.Governor = None
+        self.Throttled = False
         self.RunTimeSecs = 0
 
         #Set the wildcards and make it easy for the user to find his/her home directory (helps make DDRescue-GUI more user friendly).
@@ -869,6 +990,26 @@ class MainWindow(wx.Frame):
         self.MenuDiskInfo.Enable()
         self.MenuSettings.Enable()
 
+        #Offer to resume an interrupted recovery, now the Disks it used can be found again.
+        if self.UnfinishedSession is not None:
+            wx.CallAfter(self.OfferToResume, self.UnfinishedSession)
+            self.UnfinishedSession = None
+
+    def ReceiveCachedDiskInfo(self, Info):
+        """Show cached Disk info until the new Disk info arrives, and let the user pick from it in the meantime"""
+        logger.info("MainWindow().ReceiveCachedDiskInfo(): Showing cached Disk information...")
+        global DiskInfo
+        DiskInfo = Info
+
+        #Update the file choices.
+        self.UpdateFileChoices()
+        self.Starting = False
+
+        #Keep the throbber going, but let the user make a selection.
+        self.InputChoiceBox.Enable()
+        self.OutputChoiceBox.Enable()
+        self.UpdateStatusBar("Confirming Disk information...")
+
     def UpdateFileChoices(self):
         """Update the Disk entries in the choiceboxes"""
         logger.info("MainWindow().UpdateFileChoices(): Updating the GUI with the new Disk information...")
@@ -910,6 +1051,67 @@ class MainWindow(wx.Frame):
         #Notify the user with the statusbar.
         self.UpdateStatusBar("Ready.")
 
+    def OfferToResume(self, Session):
+        """Offer to resume a recovery that was interrupted by a crash or power cut, using the same settings and log file"""
+        logger.info("MainWindow().OfferToResume(): Found an unfinished recovery of "+Session["Settings"]["InputFile"]+" to "+Session["Settings"]["OutputFile"]+". Asking the user whether to resume it...")
+        Restored, Missing = BackendTools().ImportTool("session").Main().RestoreSettings(Session, DiskInfo)
+        LastSaved = time.strftime("%d/%m/%Y %I:%M:%S %p", time.localtime(Session["Updated"]))
+
+        if Missing != []:
+            #Keep the journal, so the user can reconnect the Disks and try again.
+            logger.warning("MainWindow().OfferToResume(): Can't resume the recovery, because "+', '.join(Missing)+" can't be found! Warning user...")
+            dlg = wx.MessageDialog(self.Panel, "DDRescue-GUI was interrupted while recovering "+Session["Settings"]["InputFile"]+" to "+Session["Settings"]["OutputFile"]+" (last saved at "+LastSaved+"), but the recovery can't be resumed because these can't be found:\n\n"+'\n'.join(Missing)+"\n\nPlease reconnect them and restart DDRescue-GUI to resume the recovery.", "DDRescue-GUI - Warning", wx.OK | wx.ICON_EXCLAMATION)
+            dlg.ShowModal()
+            dlg.Destroy()
+            return
+
+        if Session["Resumable"]:
+            Message = "DDRescue-GUI was interrupted while recovering "+Restored["InputFile"]+" to "+Restored["OutputFile"]+" (last saved at "+LastSaved+").\n\nDo you want to resume the recovery now? ddrescue will carry on from where it stopped, using the same settings and log file."
+
+        else:
+            Message = "DDRescue-GUI was interrupted while recovering "+Restored["InputFile"]+" to "+Restored["OutputFile"]+" (last saved at "+LastSaved+").\n\nThis recovery can't carry on from where it stopped, because the built-in copy engine was writing a compressed or split image, or more than one copy. Do you want to start it again from the beginning, with the same settings?"
+
+        dlg = wx.MessageDialog(self.Panel, Message, "DDRescue-GUI - Resume Recovery?", wx.YES_NO | wx.ICON_QUESTION)
+        Answer = dlg.ShowModal()
+        dlg.Destroy()
+
+        if Answer != wx.ID_YES:
+            logger.info("MainWindow().OfferToResume(): User declined to resume the recovery. Forgetting it...")
+            BackendTools().ImportTool("session").Main().ClearSession()
+            return
+
+        logger.info("MainWindow().OfferToResume(): Resuming recovery of "+Restored["InputFile"]+" to "+Restored["OutputFile"]+"...")
+        Settings.update(Restored)
+        Settings["CheckedSettings"] = True
+
+        #Show the restored files in the choiceboxes.
+        self.SelectPath(self.InputChoiceBox, self.CustomInputPathsList, Settings["InputFile"])
+        self.SelectPath(self.OutputChoiceBox, self.CustomOutputPathsList, Settings["OutputFile"])
+
+        if Settings["LogFile"] == "":
+            self.LogChoiceBox.SetStringSelection("None")
+
+        else:
+            self.SelectPath(self.LogChoiceBox, self.CustomLogPaths, Settings["LogFile"])
+
+        self.OnStart()
+
+    def SelectPath(self, ChoiceBox, Paths, Path):
+        """Select Path in ChoiceBox, adding it as a custom path if it isn't a Disk"""
+        if Path in DiskInfo:
+            ChoiceBox.SetStringSelection(Path)
+            return
+
+        for Key in Paths:
+            if Paths[Key] == Path:
+                ChoiceBox.SetStringSelection(Key)
+                return
+
+        Key = BackendTools().CreateUniqueKey(Paths, Path, 30)
+        Paths[Key] = Path
+        ChoiceBox.Append(Key)
+        ChoiceBox.SetStringSelection(Key)
+
     def FileChoiceHandler(self, Type, UserSelection, DefaultDir, Wildcard, Style):
         """Handle file dialogs for SetInputFile, SetOutputFile, and SetLogFile"""
         #Setup.
@@ -1055,6 +1257,17 @@ class MainWindow(wx.Frame):
                 logger.info("MainWindow().FileChoiceHandler(): OutputFile isn't a disk so disabling ddrescue's overwrite mode...")
                 Settings["OverwriteOutputFile"] = ""
 
+        #Partitions and gaps chosen to image separately belong to the old input disk, and would be written next to the old output file, so forget them.
+        if Type in ("Input", "Output") and Settings["SelectedRegions"] != None:
+            logger.info("MainWindow().FileChoiceHandler(): "+Type+"File changed. Forgetting the partitions and gaps chosen to image separately...")
+            Settings["SelectedRegions"] = None
+
+        #Areas to skip from SMART data belong to the old input disk too.
+        if Type == "Input" and Settings["SMARTSkipRanges"] != []:
+            logger.info("MainWindow().FileChoiceHandler(): InputFile changed. Forgetting the areas to skip from the old disk's SMART data...")
+            Settings["SMARTSkipRanges"] = []
+            Settings["SMARTSkipDisk"] = None
+
         #Call Layout() on self.Panel() to ensure it displays properly.
         self.Panel.Layout()
 
@@ -1151,54 +1364,55 @@ class MainWindow(wx.Frame):
             #Attempt to unmount input/output Disks now, if needed.
             logger.info("MainWindow().OnStart(): Unmounting input and output files if needed...")
 
+            DisksToUnmount = []
+
             for Disk in [Settings["InputFile"], Settings["OutputFile"]]:
                 if Disk not in DiskInfo:
                     logger.info("MainWindow().OnStart(): "+Disk+" is a file (or not in collected disk info), ignoring it...")
                     continue
 
-                if BackendTools().IsMounted(Disk) or DevInfoTools().IsPartition(Disk) == False:
-                    #The Disk is mounted, or may have partitions that are mounted.
-                    if DevInfoTools().IsPartition(Disk):
-                        #Unmount the disk.
+                if DevInfoTools().IsPartition(Disk):
+                    if BackendTools().IsMounted(Disk):
                         logger.debug("MainWindow().OnStart(): "+Disk+" is a partition. Unmounting "+Disk+"...")
-                        self.UpdateStatusBar("Unmounting "+Disk+". This may take a few moments...")
-                        wx.Yield()
-                        Retval = BackendTools().UnmountDisk(Disk)
+                        DisksToUnmount.append(Disk)
 
                     else:
-                        #Unmount any partitions belonging to the device.
-                        logger.debug("MainWindow().OnStart(): "+Disk+" is a device. Unmounting any partitions contained by "+Disk+"...")
-                        self.UpdateStatusBar("Unmounting "+Disk+"'s partitions. This may take a few moments...")
-                        wx.Yield()
+                        logger.info("MainWindow().OnStart(): "+Disk+" is not mounted...")
 
-                        Retvals = []
-                        Retval = 0
- 
-                        for Partition in DiskInfo[Disk]["Partitions"]:
-                            logger.info("MainWindow().OnStart(): Unmounting "+Partition+"...")
-                            Retvals.append(BackendTools().UnmountDisk(Partition))
-
-                        #Check the return values, and raise an error if any of them aren't 0.
-                        for Integer in Retvals:
-                            if Integer != 0:
-                                Retval = Integer
-                                break
-
-                    #Check it worked.
-                    if Retval != 0:
-                        #It didn't. Warn the user, and exit the function.
-                        logger.info("MainWindow().OnStart(): Failed! Warning user...")
-                        dlg = wx.MessageDialog(self.Panel, "Could not unmount disk "+Disk+"! Please close all other programs and anything that may be accessing this disk (or any of its partitions), like the file manager perhaps, and try again.", "DDRescue-GUI - Error!", wx.OK | wx.ICON_ERROR)
-                        dlg.ShowModal()
-                        dlg.Destroy()
-                        self.UpdateStatusBar("Ready.")
-                        return 0
+                else:
+                    #Unmount any partitions belonging to the device.
+                    logger.debug("MainWindow().OnStart(): "+Disk+" is a device. Unmounting any partitions contained by "+Disk+"...")
+                    DisksToUnmount += [Partition for Partition in DiskInfo[Disk]["Partitions"] if BackendTools().IsMounted(Partition)]
 
-                    else:
-                        logger.info("MainWindow().OnStart(): Success...")
+            if DisksToUnmount != []:
+                #Unmount them all at once in the background, and keep the GUI responsive until they're all done.
+                self.UpdateStatusBar("Unmounting "+unicode(len(DisksToUnmount))+" partitions. This may take a few moments...")
+                self.ControlButton.Disable()
+
+                Results = {}
+                Unmounter = threading.Thread(target=lambda: Results.update(BackendTools().UnmountDisks(DisksToUnmount)))
+                Unmounter.start()
+
+                while Unmounter.is_alive():
+                    wx.Yield()
+                    Unmounter.join(0.05)
+
+                self.ControlButton.Enable()
+
+                #Check it worked.
+                Failed = sorted([Disk for Disk in Results if Results[Disk] != 0])
+
+                if Failed != []:
+                    #It didn't. Warn the user about all of them at once, and exit the function.
+                    logger.info("MainWindow().OnStart(): Failed to unmount "+', '.join(Failed)+"! Warning user...")
+                    dlg = wx.MessageDialog(self.Panel, "Could not unmount:\n\n"+'\n'.join(Failed)+"\n\nPlease close all other programs and anything that may be accessing these disks (or any of their partitions), like the file manager perhaps, and try again.", "DDRescue-GUI - Error!", wx.OK | wx.ICON_ERROR)
+                    dlg.ShowModal()
+                    dlg.Destroy()
+                    self.UpdateStatusBar("Ready.")
+                    return 0
 
                 else:
-                    logger.info("MainWindow().OnStart(): "+Disk+" is not mounted...")
+                    logger.info("MainWindow().OnStart(): Success...")
 
             #Create the items for self.ListCtrl.
             Width, Height = self.ListCtrl.GetClientSizeTuple()
@@ -1244,12 +1458,19 @@ class MainWindow(wx.Frame):
             self.MenuSettings.Enable(False)
             self.ControlButton.SetLabel("Abort")
 
+            #Record the recovery, so it can be resumed if DDRescue-GUI is interrupted.
+            BackendTools().ImportTool("session").Main().SaveSession(Settings, "Starting", DiskInfo)
+
+            #Watch for throttling, so a slow recovery isn't blamed on the disk when it's the board.
+            self.StartGovernor()
+
             #Handle any unexpected errors.
             try:
                 #Start the backend thread.
                 BackendThread(self)
 
             except:
+                import traceback
                 logger.critical("Unexpected error \n\n"+unicode(traceback.format_exc())+"\n\n while recovering data. Warning user and exiting.")
                 BackendTools().EmergencyExit("There was an unexpected error:\n\n"+unicode(traceback.format_exc())+"\n\nWhile recovering data!")
 
@@ -1280,6 +1501,13 @@ class MainWindow(wx.Frame):
         self.ListCtrl.SetStringItem(index=1, col=1, label=ErrorSize)
 
     def UpdateCurrentReadRate(self, CurrentReadRate):
+        if self.Governor is not None:
+            self.Governor.RecordReadRate(CurrentReadRate)
+
+        #Make it obvious when the read rate is down to the board, not the disk.
+        if self.Throttled:
+            CurrentReadRate += " (throttled)"
+
         self.ListCtrl.SetStringItem(index=2, col=1, label=CurrentReadRate)
 
     def UpdateAverageReadRate(self, AverageReadRate):
@@ -1351,7 +1579,7 @@ class MainWindow(wx.Frame):
         """Abort the recovery"""
         #Ask ddrescue to exit.
         logger.info("MainWindow().OnAbort(): Attempting to kill ddrescue...")
-        BackendTools().StartProcess("killall ddrescue")
+        BackendTools().StartProcess(["killall", "ddrescue"])
         self.AbortedRecovery = True
 
         #Disable control button.
@@ -1389,12 +1617,60 @@ class MainWindow(wx.Frame):
 
             dlg.Destroy()
 
+    def StartGovernor(self):
+        """Start sampling the temperature and throttle flags for this recovery"""
+        Paths = {}
+
+        if ThermalFile is not None:
+            Paths["ThermalPath"] = ThermalFile
+
+        if ThrottleFile is not None:
+            Paths["ThrottlePath"] = ThrottleFile
+
+        self.Throttled = False
+        self.Governor = BackendTools().ImportTool("governor").Governor(ChangeHandler=lambda Sample: wx.CallAfter(self.ThrottlingChanged, Sample), **Paths)
+
+    def ThrottlingChanged(self, Sample):
+        """Mark the board starting or stopping being throttled on the progress display"""
+        #The recovery may have finished since the sample was taken.
+        if self.Governor is None:
+            return
+
+        self.Throttled = Sample["Throttled"]
+
+        if self.Throttled:
+            self.UpdateOutputBox("\nThrottling started ("+self.Governor.DescribeSample(Sample)+"). The read rate may drop because of this, not the disk. Compressed images will use the fastest compression level until it stops...\n")
+
+        else:
+            self.UpdateOutputBox("\nThrottling stopped ("+self.Governor.DescribeSample(Sample)+").\n")
+
+    def StopGovernor(self):
+        """Stop sampling, and log a summary of the throttling during the recovery"""
+        if self.Governor is None:
+            return
+
+        self.Governor.Stop()
+
+        History = self.Governor.History
+        Temperatures = [Sample["Temperature"] for Sample in History if Sample["Temperature"] is not None]
+        Throttled = len([Sample for Sample in History if Sample["Throttled"]])
+
+        logger.info("MainWindow().StopGovernor(): Throttled in "+unicode(Throttled)+" of "+unicode(len(History))+" samples. Highest temperature: "+(unicode(max(Temperatures))+" degrees C" if Temperatures != [] else "unknown")+".")
+
+        for Sample in History:
+            logger.debug("MainWindow().StopGovernor(): "+time.strftime("%H:%M:%S", time.localtime(Sample["Time"]))+": read rate "+unicode(Sample["ReadRate"])+", "+self.Governor.DescribeSample(Sample)+(", throttled" if Sample["Throttled"] else "")+".")
+
+        self.Governor = None
+        self.Throttled = False
+
     def RecoveryEnded(self, Result, DiskCapacity, RecoveredData, ReturnCode=None):
         """Called to show FinishedWindow when a recovery is completed or aborted by the user"""
         #Return immediately if session is ending.
         if SessionEnding:
             return True
 
+        self.StopGovernor()
+
         self.DiskCapacity = DiskCapacity
         self.RecoveredData = RecoveredData
 
@@ -1457,6 +1733,16 @@ class MainWindow(wx.Frame):
             dlg.ShowModal()
             dlg.Destroy()
 
+        #The recovery has ended one way or another, so there's nothing left to resume.
+        if self.AbortedRecovery:
+            BackendTools().ImportTool("session").Main().SaveSession(Settings, "Aborted", DiskInfo)
+
+        elif Result == "Success":
+            BackendTools().ImportTool("session").Main().SaveSession(Settings, "Finished", DiskInfo)
+
+        else:
+            BackendTools().ImportTool("session").Main().SaveSession(Settings, "Failed", DiskInfo)
+
         #Disable the control button.
         self.ControlButton.Disable()
 
@@ -1583,7 +1869,7 @@ class MainWindow(wx.Frame):
 
                         else:
                             #Copy it to the specified path, using a one-liner, and don't bother handling any errors, because this is run as root.
-                            BackendTools().StartProcess(Command="cp /tmp/ddrescue-gui.log "+File, ReturnOutput=False)
+                            BackendTools().StartProcess(Command=["cp", "/tmp/ddrescue-gui.log", File], ReturnOutput=False)
 
                             dlg = wx.MessageDialog(self.Panel, 'Done! DDRescue-GUI will now exit.', 'DDRescue-GUI - Information', wx.OK | wx.ICON_INFORMATION)
                             dlg.ShowModal()
@@ -1830,6 +2116,7 @@ class SettingsWindow(wx.Frame):
         self.FastRecButton = wx.Button(self.Panel, -1, "Set to fastest recovery")
         self.BestRecButton = wx.Button(self.Panel, -1, "Set to best recovery")
         self.DefaultRecButton = wx.Button(self.Panel, -1, "Balanced (default)")
+        self.SMARTRecButton = wx.Button(self.Panel, -1, "Use SMART data")
         self.ExitButton = wx.Button(self.Panel, -1, "Save settings and close") 
 
     def CreateText(self):
@@ -1843,6 +2130,16 @@ class SettingsWindow(wx.Frame):
         """Create all CheckBoxes for SettingsWindow, and set their default states (all unchecked)"""
         self.DirectAccessCB = wx.CheckBox(self.Panel, -1, "Use Direct Disk Access (Recommended)")
         self.OverwriteCB = wx.CheckBox(self.Panel, -1, "Overwrite output file/disk (Enable if recovering to a disk)")
+        self.SparseCB = wx.CheckBox(self.Panel, -1, "Leave blocks of zeroes as holes in the output file (sparse output, saves space and writes)")
+        self.VerifyWritesCB = wx.CheckBox(self.Panel, -1, "Read back and check each part of the output just after it's written (copy engine only, not compressed or split images)")
+        self.CopyEngineCB = wx.CheckBox(self.Panel, -1, "Use the built-in copy engine (faster for healthy disks, uses ddrescue after any errors)")
+        self.CompressCB = wx.CheckBox(self.Panel, -1, "Compress the output image (for slow destinations, skips bad sectors instead of using ddrescue)")
+        self.SplitCB = wx.CheckBox(self.Panel, -1, "Split the output image into 4 GB segments (for FAT32 destinations, skips bad sectors instead of using ddrescue)")
+        self.SecondCopyCB = wx.CheckBox(self.Panel, -1, "Also write a second copy of the output file (reads the input once, skips bad sectors instead of using ddrescue)")
+        self.RegionsCB = wx.CheckBox(self.Panel, -1, "Image chosen partitions and gaps to separate files, in disk order (input must be a whole disk)")
+        self.MultiPassCB = wx.CheckBox(self.Panel, -1, "Recover in stages (fast pass, reverse pass, then trimming, scraping and more retries; for failing disks, needs a log file)")
+        self.AllocatedOnlyCB = wx.CheckBox(self.Panel, -1, "Only recover space used by ext2/3/4, FAT and NTFS filesystems (faster, for triage)")
+        self.FillUnallocatedCB = wx.CheckBox(self.Panel, -1, "Then fill in the unused space (needs a log file)")
         #self.ReverseCB = wx.CheckBox(self.Panel, -1, "Read the input file/disk backwards")
         #self.PreallocCB = wx.CheckBox(self.Panel, -1, "Preallocate space on disc for output file/disk")
         #self.NoSplitCB = wx.CheckBox(self.Panel, -1, "Do a soft run (don't attempt to read bad sectors)")
@@ -1883,6 +2180,7 @@ class SettingsWindow(wx.Frame):
 
         ButtonExtraSizer = wx.BoxSizer(wx.HORIZONTAL)
         ButtonExtraSizer.Add(self.DefaultRecButton, 0, wx.LEFT|wx.ALL, 1)
+        ButtonExtraSizer.Add(self.SMARTRecButton, 0, wx.CENTRE|wx.ALL, 1)
         ButtonExtraSizer.Add(self.ExitButton, 0, wx.RIGHT|wx.ALL, 1)
 
         #Now create and add all objects to the main sizer in order.
@@ -1895,6 +2193,16 @@ class SettingsWindow(wx.Frame):
         #MainSizer.Add(self.PreallocCB, 3, wx.LEFT|wx.ALL, 5)
         #MainSizer.Add(self.NoSplitCB, 3, wx.LEFT|wx.ALL, 5)
         MainSizer.Add(self.OverwriteCB, 0, wx.LEFT|wx.ALL, 1)
+        MainSizer.Add(self.SparseCB, 0, wx.LEFT|wx.ALL, 1)
+        MainSizer.Add(self.VerifyWritesCB, 0, wx.LEFT|wx.ALL, 1)
+        MainSizer.Add(self.CopyEngineCB, 0, wx.LEFT|wx.ALL, 1)
+        MainSizer.Add(self.CompressCB, 0, wx.LEFT|wx.ALL, 1)
+        MainSizer.Add(self.SplitCB, 0, wx.LEFT|wx.ALL, 1)
+        MainSizer.Add(self.SecondCopyCB, 0, wx.LEFT|wx.ALL, 1)
+        MainSizer.Add(self.RegionsCB, 0, wx.LEFT|wx.ALL, 1)
+        MainSizer.Add(self.MultiPassCB, 0, wx.LEFT|wx.ALL, 1)
+        MainSizer.Add(self.AllocatedOnlyCB, 0, wx.LEFT|wx.ALL, 1)
+        MainSizer.Add(self.FillUnallocatedCB, 0, wx.LEFT|wx.ALL, 1)
 
         #Choice box sizers.
         MainSizer.Add(RetryBSSizer, 0, wx.CENTER|wx.ALL, 1)
@@ -1919,7 +2227,11 @@ class SettingsWindow(wx.Frame):
         self.Bind(wx.EVT_BUTTON, self.SetDefaultRec, self.DefaultRecButton)
         self.Bind(wx.EVT_BUTTON, self.SetFastRec, self.FastRecButton)
         self.Bind(wx.EVT_BUTTON, self.SetBestRec, self.BestRecButton)
+        self.Bind(wx.EVT_BUTTON, self.SetSMARTRec, self.SMARTRecButton)
         self.Bind(wx.EVT_BUTTON, self.SaveOptions, self.ExitButton)
+        self.Bind(wx.EVT_CHECKBOX, self.SetSecondOutputFile, self.SecondCopyCB)
+        self.Bind(wx.EVT_CHECKBOX, self.SetRegions, self.RegionsCB)
+        self.Bind(wx.EVT_CHECKBOX, self.SetAllocatedOnly, self.AllocatedOnlyCB)
         self.Bind(wx.EVT_CLOSE, self.SaveOptions)
 
     def SetupOptions(self):
@@ -1938,6 +2250,54 @@ class SettingsWindow(wx.Frame):
         else:
             self.OverwriteCB.SetValue(False)
 
+        #Built-in copy engine setting (Linux only).
+        self.CopyEngineCB.SetValue(Settings["UseCopyEngine"])
+
+        #Compressed output setting (Linux only).
+        self.CompressCB.SetValue(Settings["CompressOutput"])
+
+        #Split output setting (Linux only).
+        self.SplitCB.SetValue(Settings["SplitOutput"])
+
+        #Second copy setting (Linux only).
+        self.SecondOutputFile = Settings["SecondOutputFile"]
+        self.SecondCopyCB.SetValue(self.SecondOutputFile != None)
+
+        if self.SecondOutputFile != None:
+            self.SecondCopyCB.SetLabel("Also write a second copy to: "+self.SecondOutputFile)
+
+        #Chosen partitions and gaps setting.
+        self.SelectedRegions = Settings["SelectedRegions"]
+        self.RegionsCB.SetValue(self.SelectedRegions != None)
+
+        if self.SelectedRegions != None:
+            self.RegionsCB.SetLabel("Image to separate files: "+", ".join(Region["Name"] for Region in self.SelectedRegions))
+
+        #Multi-pass recovery setting.
+        self.MultiPassCB.SetValue(Settings["MultiPass"])
+
+        #Sparse output setting.
+        self.SparseCB.SetValue(Settings["SparseOutput"])
+
+        #Read-back verification setting.
+        self.VerifyWritesCB.SetValue(Settings["VerifyWrites"])
+
+        #Allocated space only settings. Filling in the unused space only makes sense if it was skipped.
+        self.AllocatedOnlyCB.SetValue(Settings["AllocatedOnly"])
+        self.FillUnallocatedCB.SetValue(Settings["FillUnallocated"])
+        self.SetAllocatedOnly()
+
+        #The copy engine hands over to ddrescue with its mapfile after a read error, so it can't be used without one.
+        if Settings["LogFile"] == "":
+            self.CopyEngineCB.SetValue(False)
+            self.CopyEngineCB.Disable()
+
+        if Linux == False:
+            self.CopyEngineCB.Disable()
+            self.CompressCB.Disable()
+            self.SplitCB.Disable()
+            self.SecondCopyCB.Disable()
+
         """#Reverse (read data from the end to the start of the input file) setting.
         if Settings["Reverse"] == "-R":
             self.ReverseCB.SetValue(True)
@@ -2002,6 +2362,96 @@ class SettingsWindow(wx.Frame):
             self.BadSectChoice.Enable()
             self.SetDefaultRec()"""
 
+    def SetSecondOutputFile(self, Event=None):
+        """Ask the user where to write the second copy of the output file, when they tick the checkbox"""
+        if self.SecondCopyCB.IsChecked() == False:
+            logger.info("SettingsWindow().SetSecondOutputFile(): Not writing a second copy...")
+            self.SecondOutputFile = None
+            self.SecondCopyCB.SetLabel("Also write a second copy of the output file (reads the input once, skips bad sectors instead of using ddrescue)")
+            return
+
+        FileDlg = wx.FileDialog(self.Panel, "Select Second Output Path/File...", defaultDir=self.ParentWindow.UserHomeDir, wildcard=self.ParentWindow.OutputWildcard, style=wx.SAVE)
+
+        if FileDlg.ShowModal() != wx.ID_OK:
+            logger.info("SettingsWindow().SetSecondOutputFile(): User declined second output file selection...")
+            self.SecondCopyCB.SetValue(False)
+            return
+
+        SecondOutputFile = FileDlg.GetPath()
+
+        #Automatically add a file extension of .img if there isn't any file extension, like for the output file.
+        if SecondOutputFile[-4] != ".":
+            SecondOutputFile += ".img"
+
+        if SecondOutputFile in [Settings["InputFile"], Settings["OutputFile"]]:
+            logger.warning("SettingsWindow().SetSecondOutputFile(): Second output file is the same as the input or output file! Warning user and declining selection...")
+            dlg = wx.MessageDialog(self.Panel, "The second copy must go somewhere other than the input and output files! Please select a different file.", "DDRescue-GUI - Error!", wx.OK | wx.ICON_ERROR)
+            dlg.ShowModal()
+            dlg.Destroy()
+            self.SecondCopyCB.SetValue(False)
+            return
+
+        logger.info("SettingsWindow().SetSecondOutputFile(): Writing a second copy to "+SecondOutputFile+"...")
+        self.SecondOutputFile = SecondOutputFile
+        self.SecondCopyCB.SetLabel("Also write a second copy to: "+SecondOutputFile)
+
+    def SetRegions(self, Event=None):
+        """Ask the user which partitions and gaps to image, when they tick the checkbox"""
+        if self.RegionsCB.IsChecked() == False:
+            logger.info("SettingsWindow().SetRegions(): Imaging the whole input file...")
+            self.SelectedRegions = None
+            self.RegionsCB.SetLabel("Image chosen partitions and gaps to separate files, in disk order (input must be a whole disk)")
+            return
+
+        #Each region is written to its own file, named after the output file.
+        if Settings["OutputFile"][0:5] == "/dev/":
+            Regions = []
+            Message = "The partitions and gaps have to be imaged to files, not to a disk. Please choose an output file instead."
+
+        else:
+            try:
+                Regions = BackendTools().ImportTool("regions").Main().GetRegions(Settings["InputFile"], BackendTools().ImportTool("copyengine").Main().GetSize(Settings["InputFile"]))
+
+            except (IOError, OSError) as Error:
+                logger.error("SettingsWindow().SetRegions(): Couldn't read the partition table of "+Settings["InputFile"]+"! Error: "+unicode(Error))
+                Regions = []
+
+            Message = "Couldn't find a partition table on "+Settings["InputFile"]+". Please choose a whole disk (not a partition) as the input."
+
+        if Regions == []:
+            logger.warning("SettingsWindow().SetRegions(): Can't image partitions and gaps separately! Warning user...")
+            dlg = wx.MessageDialog(self.Panel, Message, "DDRescue-GUI - Error!", wx.OK | wx.ICON_ERROR)
+            dlg.ShowModal()
+            dlg.Destroy()
+            self.RegionsCB.SetValue(False)
+            return
+
+        Choices = [Region["Name"]+", Filesystem: "+Region["Filesystem"]+", Size: "+DevInfoTools().GetHumanReadableSize(Region["Size"]) for Region in Regions]
+
+        dlg = wx.MultiChoiceDialog(self.Panel, "Please select the partitions and gaps to image. Each one is written to its own file, mapfile and hash file, named after the output file.", "DDRescue-GUI - Select Partitions", Choices)
+        dlg.SetSelections([Number for Number, Region in enumerate(Regions) if Region["Type"] == "Partition"])
+
+        if dlg.ShowModal() != wx.ID_OK or dlg.GetSelections() == []:
+            logger.info("SettingsWindow().SetRegions(): User declined partition selection...")
+            dlg.Destroy()
+            self.RegionsCB.SetValue(False)
+            return
+
+        self.SelectedRegions = [Regions[Number] for Number in dlg.GetSelections()]
+        dlg.Destroy()
+
+        logger.info("SettingsWindow().SetRegions(): Imaging "+", ".join(Region["Name"] for Region in self.SelectedRegions)+" to separate files...")
+        self.RegionsCB.SetLabel("Image to separate files: "+", ".join(Region["Name"] for Region in self.SelectedRegions))
+
+    def SetAllocatedOnly(self, Event=None):
+        """Only let the user fill in the unused space afterwards if it's going to be skipped"""
+        if self.AllocatedOnlyCB.IsChecked():
+            self.FillUnallocatedCB.Enable()
+
+        else:
+            self.FillUnallocatedCB.SetValue(False)
+            self.FillUnallocatedCB.Disable()
+
     def SetDefaultRec(self, Event=None):
         """Set selections for the Choiceboxes to default settings"""
         logger.debug("SettingsWindow().SetDefaultRec(): Setting up SettingsWindow for default recovery settings...")
@@ -2031,6 +2481,66 @@ class SettingsWindow(wx.Frame):
         self.MaxErrorsChoice.SetSelection(0)
         self.ClustSizeChoice.SetSelection(3)
 
+    def SetSMARTRec(self, Event=None):
+        """Set selections for the Choiceboxes using the SMART data for the input disk, and remember which areas to leave until last"""
+        logger.debug("SettingsWindow().SetSMARTRec(): Setting up SettingsWindow using SMART data...")
+
+        if Settings["InputFile"] not in DiskInfo or DiskInfo[Settings["InputFile"]]["Type"] != "Device":
+            dlg = wx.MessageDialog(self.Panel, "SMART data is only available when recovering from a whole disk. Please select one as the input file first.", "DDRescue-GUI - Information", wx.OK | wx.ICON_INFORMATION)
+            dlg.ShowModal()
+            dlg.Destroy()
+            return
+
+        #smartctl can take up to a minute on a failing disk, so don't block the GUI while it runs.
+        wx.BeginBusyCursor()
+        self.SMARTRecButton.Disable()
+        threading.Thread(target=self.GetSMARTRec, args=(Settings["InputFile"],)).start()
+
+    def GetSMARTRec(self, InputFile):
+        """Get the SMART data for InputFile (runs in its own thread), then pass it to SMARTRecReady() in the GUI thread"""
+        SMARTInfo = DevInfoTools().GetSMARTInfo(InputFile)
+
+        #The Disk info cache was saved before we had this, so save it again with the SMART data added.
+        Info = dict(DiskInfo)
+        Info[InputFile] = dict(DiskInfo[InputFile])
+        Info[InputFile].update(SMARTInfo)
+        DevInfoTools().SaveCache(Info)
+
+        wx.CallAfter(self.SMARTRecReady, InputFile, SMARTInfo)
+
+    def SMARTRecReady(self, InputFile, SMARTInfo):
+        """Apply the suggestions from InputFile's SMART data to the settings"""
+        wx.EndBusyCursor()
+        DiskInfo[InputFile].update(SMARTInfo)
+
+        #The window might have been closed while smartctl was running.
+        if not self:
+            return
+
+        self.SMARTRecButton.Enable()
+
+        #SMART error LBAs count logical sectors, which are smaller than physical ones on 512e disks.
+        SectorSize = DiskInfo[InputFile].get("LogicalBlockSize", "512")
+
+        if not SectorSize.isdigit():
+            SectorSize = "512"
+
+        Strategy = DevInfoTools().SuggestStrategy(SMARTInfo, SectorSize=int(SectorSize))
+
+        logger.info("SettingsWindow().SetSMARTRec(): Suggestions from SMART data: "+' '.join(Strategy["Notes"]))
+
+        self.SetDefaultRec()
+
+        if Strategy["BadSectorRetries"] == "-r 0" and self.BadSectChoice.IsEnabled():
+            self.BadSectChoice.SetSelection(0)
+
+        self.SMARTSkipRanges = Strategy["SkipRanges"]
+        self.SMARTSkipDisk = InputFile
+
+        dlg = wx.MessageDialog(self.Panel, "\n".join(Strategy["Notes"]) or "No problems found in the SMART data.", "DDRescue-GUI - SMART Data", wx.OK | wx.ICON_INFORMATION)
+        dlg.ShowModal()
+        dlg.Destroy()
+
     def SaveOptions(self, Event=None):
         """Save all options, and exit SettingsWindow"""
         logger.info("SettingsWindow().SaveOptions(): Saving Options...")
@@ -2054,6 +2564,56 @@ class SettingsWindow(wx.Frame):
 
         logger.info("SettingsWindow().SaveOptions(): Overwriting output file: "+unicode(bool(Settings["OverwriteOutputFile"]))+".")
 
+        #Built-in copy engine setting.
+        Settings["UseCopyEngine"] = self.CopyEngineCB.IsChecked()
+
+        logger.info("SettingsWindow().SaveOptions(): Use built-in copy engine: "+unicode(Settings["UseCopyEngine"])+".")
+
+        #Compressed output setting.
+        Settings["CompressOutput"] = self.CompressCB.IsChecked()
+
+        logger.info("SettingsWindow().SaveOptions(): Compress output file: "+unicode(Settings["CompressOutput"])+".")
+
+        #Split output setting. Compressed images can't be split, so splitting wins if both are chosen.
+        Settings["SplitOutput"] = self.SplitCB.IsChecked()
+
+        if Settings["SplitOutput"] and Settings["CompressOutput"]:
+            logger.warning("SettingsWindow().SaveOptions(): Both compression and splitting were chosen. Only splitting the output file...")
+            Settings["CompressOutput"] = False
+
+        logger.info("SettingsWindow().SaveOptions(): Split output file: "+unicode(Settings["SplitOutput"])+".")
+
+        #Second copy setting.
+        Settings["SecondOutputFile"] = self.SecondOutputFile
+
+        logger.info("SettingsWindow().SaveOptions(): Second output file: "+unicode(Settings["SecondOutputFile"])+".")
+
+        #Chosen partitions and gaps setting.
+        Settings["SelectedRegions"] = self.SelectedRegions
+
+        logger.info("SettingsWindow().SaveOptions(): Partitions and gaps to image separately: "+(", ".join(Region["Name"] for Region in Settings["SelectedRegions"]) if Settings["SelectedRegions"] != None else "None")+".")
+
+        #Multi-pass recovery setting. The planner chooses the reverse, no-split and retry options for each stage itself.
+        Settings["MultiPass"] = self.MultiPassCB.IsChecked()
+
+        logger.info("SettingsWindow().SaveOptions(): Recover in stages: "+unicode(Settings["MultiPass"])+".")
+
+        #Sparse output setting.
+        Settings["SparseOutput"] = self.SparseCB.IsChecked()
+
+        logger.info("SettingsWindow().SaveOptions(): Sparse output file: "+unicode(Settings["SparseOutput"])+".")
+
+        #Read-back verification setting.
+        Settings["VerifyWrites"] = self.VerifyWritesCB.IsChecked()
+
+        logger.info("SettingsWindow().SaveOptions(): Read back output while copying: "+unicode(Settings["VerifyWrites"])+".")
+
+        #Allocated space only settings.
+        Settings["AllocatedOnly"] = self.AllocatedOnlyCB.IsChecked()
+        Settings["FillUnallocated"] = self.FillUnallocatedCB.IsChecked()
+
+        logger.info("SettingsWindow().SaveOptions(): Only recover allocated space: "+unicode(Settings["AllocatedOnly"])+", then fill in the rest: "+unicode(Settings["FillUnallocated"])+".")
+
         #Disk Size setting (OS X only).
         if Linux == False:
             #If the input file is in DiskInfo, use the Capacity from that.
@@ -2132,6 +2692,12 @@ class SettingsWindow(wx.Frame):
 
         logger.info("SettingsWindow().SaveOptions(): ClusterSize is "+Settings["ClusterSize"][3:]+".")
 
+        #Areas to leave until last, if the user asked to use SMART data.
+        if hasattr(self, "SMARTSkipRanges"):
+            Settings["SMARTSkipRanges"] = self.SMARTSkipRanges
+            Settings["SMARTSkipDisk"] = self.SMARTSkipDisk
+            logger.info("SettingsWindow().SaveOptions(): Leaving "+unicode(len(Settings["SMARTSkipRanges"]))+" areas around known bad sectors until last.")
+
         #BlockSize detection.
         logger.info("SettingsWindow().SaveOptions(): Determining blocksize of input file...")
         Settings["InputFileBlockSize"] = DevInfoTools().GetBlockSize(Settings["InputFile"])
@@ -2224,6 +2790,8 @@ class FinishedWindow(wx.Frame):
         self.RecoveredData = RecoveredData
         self.OutputFileType = None
         self.OutputFileMountPoint = None
+        self.NBDDevice = None
+        self.NBDServer = None
         wx.Frame.SetIcon(self, AppIcon)
 
         logger.debug("FinishedWindow().__init__(): Creating buttons...")
@@ -2247,6 +2815,7 @@ class FinishedWindow(wx.Frame):
         """Create all buttons for FinishedWindow"""
         self.RestartButton = wx.Button(self.Panel, -1, "Reset")
         self.HashButton = wx.Button(self.Panel, -1, "Hash Calculation")
+        self.BundleButton = wx.Button(self.Panel, -1, "Export Evidence Bundle")
         self.MountButton = wx.Button(self.Panel, -1, "Mount Image/Disk")
         self.QuitButton = wx.Button(self.Panel, -1, "Quit")
 
@@ -2269,6 +2838,7 @@ class FinishedWindow(wx.Frame):
         ButtonSizer.Add(self.MountButton, 4, wx.ALIGN_CENTER_VERTICAL)
         #ButtonSizer.Add((5,5), 1)
         ButtonSizer.Add(self.HashButton, 4, wx.ALIGN_CENTER_VERTICAL|wx.RIGHT, 10)
+        ButtonSizer.Add(self.BundleButton, 4, wx.ALIGN_CENTER_VERTICAL|wx.RIGHT, 10)
 
         ButtonSizer.Add(self.QuitButton, 4, wx.ALIGN_CENTER_VERTICAL)
 
@@ -2333,6 +2903,7 @@ class FinishedWindow(wx.Frame):
 
         except Exception as Error:
             #An error has occurred!
+            import traceback
             logger.error("Unexpected error: \n\n"+unicode(traceback.format_exc())+"\n\n While mounting output file. Warning user...\n")
             dlg = wx.MessageDialog(self.Panel, "Your output file could not be mounted!\n\nThe most likely reason for this is that the disk image is incomplete. If the disk image is complete, it may use an unsupported filesystem.\n\nIf you were asked which partition to mount, try again and choose a different one.\n\nThe error was:\n\n"+unicode(Error), "DDRescue-GUI - Error!", style=wx.OK | wx.ICON_ERROR, pos=wx.DefaultPosition)
             dlg.ShowModal()
@@ -2363,19 +2934,22 @@ class FinishedWindow(wx.Frame):
                 dlg.Destroy()
                 return False
 
-        #Linux: Pull down loops if the OutputFile is a Device. OS X: Always detach the image's device file.
-        if self.OutputFileType == "Device" and Linux:
-            #This won't error on Linux even if the loop device wasn't set up.
-            logger.debug("FinishedWindow().UnmountOutputFile(): Pulling down loop device...")
-            Command = "kpartx -d "+Settings["OutputFile"]
+        #Linux: Detach compressed and segmented images from their NBD device.
+        if Linux and self.NBDDevice != None:
+            if BackendTools().DetachNBD(self.NBDDevice, self.NBDServer) != 0:
+                logger.warning("FinishedWindow().UnmountOutputFile(): Couldn't detach "+self.NBDDevice+"! Continuing anyway...")
+
+            self.NBDDevice = None
+            self.NBDServer = None
 
-        elif Linux == False and self.OutputFileMountPoint != None:
+        #OS X: Always detach the image's device file. On Linux, the loop device is freed automatically on unmount.
+        if Linux == False and self.OutputFileMountPoint != None:
             #This will error on macOS if the file hasn't been attached, so skip it in that case.
             logger.error("FinishedWindow().UnmountOutputFile(): Detaching the device that represents the image...")
-            Command = "hdiutil detach "+self.OutputFileDeviceName
+            Command = ["hdiutil", "detach", self.OutputFileDeviceName]
 
         else:
-            #Linux and partition, or no command needed. Return True.
+            #Linux, or no command needed. Return True.
             logger.debug("FinishedWindow().UnmountOutputFile(): No further action required.")
             return True
 
@@ -2408,6 +2982,22 @@ class FinishedWindow(wx.Frame):
             dlg.Destroy()
             return False
 
+        #Compressed and segmented images can't be mounted directly, so serve them as a block device first.
+        MountSource = Settings["OutputFile"]
+
+        if Linux and BackendTools().ImportTool("compressedimage").Main().IsVirtualImage(Settings["OutputFile"]):
+            logger.info("FinishedWindow().MountDisk(): Output file is a compressed or segmented image, or an evidence bundle. Attaching it to an NBD device...")
+            self.NBDDevice, self.NBDServer = BackendTools().AttachImageToNBD(Settings["OutputFile"])
+
+            if self.NBDDevice == None:
+                logger.error("FinishedWindow().MountDisk(): Couldn't attach image to an NBD device! Warning the user...")
+                dlg = wx.MessageDialog(self.Panel, "Couldn't mount your output file, because it's a compressed or segmented image and it couldn't be attached to an NBD device. Please make sure nbd-client is installed and your kernel supports NBD.", "DDRescue-GUI - Error!", style=wx.OK | wx.ICON_ERROR, pos=wx.DefaultPosition)
+                dlg.ShowModal()
+                dlg.Destroy()
+                return False
+
+            MountSource = self.NBDDevice
+
         if self.OutputFileType == "Partition":
 			#We have a partition.
             logger.debug("FinishedWindow().MountDisk(): Output file is a partition! Continuing...")
@@ -2417,16 +3007,22 @@ class FinishedWindow(wx.Frame):
             #Attempt to mount the disk.
             if Linux:
                 self.OutputFileMountPoint = "/mnt"+Settings["InputFile"]
-                Retval = BackendTools().MountPartition(Partition=Settings["OutputFile"], MountPoint=self.OutputFileMountPoint)
+                Retval = BackendTools().MountPartition(Partition=MountSource, MountPoint=self.OutputFileMountPoint)
 
             else:
-                Retval, Output = BackendTools().MacRunHdiutil(Options="mount "+Settings["OutputFile"]+" -plist", Disk=Settings["OutputFile"])
+                Retval, Output = BackendTools().MacRunHdiutil(Options=["mount", Settings["OutputFile"], "-plist"], Disk=Settings["OutputFile"])
 
             if Retval != 0:
                 logger.error("FinishedWindow().MountDisk(): Error! Warning the user...")
                 dlg = wx.MessageDialog(self.Panel, "Couldn't mount your output file. Most probably, the filesystem is damaged and you'll need to use another tool to read it from here. It could also be that your OS doesn't support this filesystem, or that the recovery is incomplete, as that can sometimes cause this problem.", "DDRescue-GUI - Error!", style=wx.OK | wx.ICON_ERROR, pos=wx.DefaultPosition)
                 dlg.ShowModal()
                 dlg.Destroy()
+
+                #Don't leave the image attached to its NBD device.
+                if self.NBDDevice != None:
+                    self.OutputFileMountPoint = None
+                    self.UnmountOutputFile()
+
                 return False
 
             elif Linux:
@@ -2453,15 +3049,7 @@ class FinishedWindow(wx.Frame):
             #We have a device.
             logger.debug("FinishedWindow().MountDisk(): Output file isn't a partition! Getting list of contained partitions...")
 
-            if Linux:
-                #Create loop devices for all contained partitions.
-                logger.info("FinishedWindow().MountDisk(): Creating loop device...")
-                BackendTools().StartProcess(Command="kpartx -a "+Settings["OutputFile"], ReturnOutput=False)
-
-                #Get some Disk information.
-                LsblkOutput = BackendTools().StartProcess(Command="lsblk -r -o NAME,FSTYPE,SIZE", ReturnOutput=True)[1].split('\n')
-
-            else:
+            if not Linux:
                 ImageinfoOutput = Output
 
                 #Get the block size of the image.
@@ -2473,16 +3061,13 @@ class FinishedWindow(wx.Frame):
             Choices = []
 
             for Partition in Output:
-                #Skip non-partition things and any "partitions" that don't have numbers (OS X).
-                if (Linux and (Partition[0:12] == "loop deleted" or "/dev/" not in Partition)) or (not Linux and ("partition-number" not in Partition)):
+                #Skip any "partitions" that don't have numbers (OS X).
+                if not Linux and "partition-number" not in Partition:
                     continue
 
                 if Linux:
-                    #Get the info related to this partition.
-                    for Line in LsblkOutput:
-                        if Partition.split()[0] in Line:
-                            #Add stuff, trying to keep it human-readable.
-                            Choices.append("Partition "+Partition.split()[0].split("p")[-1]+", Filesystem: "+Line.split()[-2]+", Size: "+Line.split()[-1])
+                    #Output is the list of partitions read from the image's partition table.
+                    Choices.append("Partition "+unicode(Partition["Number"])+", Filesystem: "+Partition["Filesystem"]+", Size: "+DevInfoTools().GetHumanReadableSize(Partition["Size"]))
 
                 else:
                     Choices.append("Partition "+unicode(Partition["partition-number"])+", with size "+unicode((Partition["partition-length"] * Blocksize) // 1000000)+" MB") #*** Round to best size using Unitlist etc? ***
@@ -2507,16 +3092,16 @@ class FinishedWindow(wx.Frame):
             wx.Yield()
 
             if Linux:
-				#Get the partition to mount by combining the partition number the user selected with the loop device name from the partitions list.
-                PartitionToMount = "/dev/mapper/"+Output[0][0:6]+SelectedPartitionNumber
-                self.OutputFileMountPoint = "/mnt"+PartitionToMount
+                #Mount the partition read-only straight from the image, using its offset and size from the partition table.
+                Partition = [Partition for Partition in Output if unicode(Partition["Number"]) == SelectedPartitionNumber][0]
+                self.OutputFileMountPoint = "/mnt"+Settings["OutputFile"]+"-partition"+SelectedPartitionNumber
 
                 #Attempt to mount the disk.
-                Retval = BackendTools().MountPartition(Partition=PartitionToMount, MountPoint=self.OutputFileMountPoint)
+                Retval = BackendTools().MountPartition(Partition=MountSource, MountPoint=self.OutputFileMountPoint, Options="-o ro,loop,offset="+unicode(Partition["Offset"])+",sizelimit="+unicode(Partition["Size"]))
 
             else:
                 #Attempt to mount the disk (this mounts all partitions inside), and parse the resulting plist.
-                Retval, MountOutput = BackendTools().MacRunHdiutil(Options="mount "+Settings["OutputFile"]+" -plist", Disk=Settings["OutputFile"])
+                Retval, MountOutput = BackendTools().MacRunHdiutil(Options=["mount", Settings["OutputFile"], "-plist"], Disk=Settings["OutputFile"])
                 MountOutput = plistlib.readPlistFromString(MountOutput)
 
             #Handle it if the mount attempt failed.
@@ -2525,6 +3110,12 @@ class FinishedWindow(wx.Frame):
                 dlg = wx.MessageDialog(self.Panel, "Couldn't mount your output file. Most probably, the filesystem is damaged or unsupported and you'll need to use another tool to read it from here. It could also be that your recovery is incomplete, as that can sometimes cause this problem.", "DDRescue-GUI - Error!", style=wx.OK | wx.ICON_ERROR, pos=wx.DefaultPosition)
                 dlg.ShowModal()
                 dlg.Destroy()
+
+                #Don't leave the image attached to its NBD device.
+                if self.NBDDevice != None:
+                    self.OutputFileMountPoint = None
+                    self.UnmountOutputFile()
+
                 return False
 
             elif Linux and Retval == 0:
@@ -2587,9 +3178,83 @@ class FinishedWindow(wx.Frame):
         self.Bind(wx.EVT_BUTTON, self.CloseFinished, self.QuitButton)
         self.Bind(wx.EVT_CLOSE, self.CloseFinished)
         self.Bind(wx.EVT_BUTTON, self.OnHashButton, self.HashButton)
+        self.Bind(wx.EVT_BUTTON, self.OnBundleButton, self.BundleButton)
 
     def OnHashButton(self, Event=None):
         HashWindow(self).Show()
+
+    def OnBundleButton(self, Event=None):
+        """Ask for notes and where to save it, then export an evidence bundle of the output file in the background"""
+        dlg = wx.TextEntryDialog(self.Panel, "Notes to keep with the evidence (for example who did the recovery, and the case number):", "DDRescue-GUI - Evidence Bundle", "", style=wx.OK | wx.CANCEL | wx.TE_MULTILINE)
+
+        if dlg.ShowModal() != wx.ID_OK:
+            dlg.Destroy()
+            return
+
+        Notes = dlg.GetValue()
+        dlg.Destroy()
+
+        FileDlg = wx.FileDialog(self.Panel, "Save evidence bundle as...", defaultDir=self.ParentWindow.UserHomeDir, wildcard="Evidence Bundles (*.ddrb)|*.ddrb|All Files (*)|*", style=wx.SAVE)
+
+        if FileDlg.ShowModal() != wx.ID_OK:
+            FileDlg.Destroy()
+            return
+
+        BundlePath = FileDlg.GetPath()
+        FileDlg.Destroy()
+
+        #The bundle is streamed from the output file, so it can't replace it.
+        if BundlePath in (Settings["OutputFile"], Settings["LogFile"]):
+            logger.warning("FinishedWindow().OnBundleButton(): User tried to save the evidence bundle over the output file or mapfile! Warning user...")
+            dlg = wx.MessageDialog(self.Panel, "The evidence bundle can't be saved over the output file or the mapfile. Please choose a different file.", "DDRescue-GUI - Error!", wx.OK | wx.ICON_ERROR)
+            dlg.ShowModal()
+            dlg.Destroy()
+            return
+
+        logger.info("FinishedWindow().OnBundleButton(): Exporting evidence bundle to "+BundlePath+"...")
+        self.BundleButton.SetLabel("Exporting...")
+        self.BundleButton.Disable()
+        self.RestartButton.Disable()
+        self.QuitButton.Disable()
+
+        threading.Thread(target=self.ExportBundle, args=(BundlePath, Notes)).start()
+
+    def ExportBundle(self, BundlePath, Notes):
+        """Build the evidence bundle (runs in its own thread), and tell the GUI when it's done"""
+        Metadata = {"InputFile": Settings["InputFile"], "OutputFile": Settings["OutputFile"], "Source": DiskInfo.get(Settings["InputFile"], {}),
+                    "Started": Settings["RecoveryStarted"], "Finished": Settings["RecoveryFinished"], "RecoveredData": self.RecoveredData, "DiskCapacity": self.DiskCapacity,
+                    "InputSHA512": Settings["CopyEngineHash"], "DDRescueVersion": Settings["DDRescueVersion"], "DDRescueGUIVersion": Version, "Notes": Notes}
+
+        Files = {"Mapfile": Settings["LogFile"], "Log": "/tmp/ddrescue-gui.log"}
+
+        if Settings["LogFile"] != "":
+            Files["Samples"] = Settings["LogFile"]+".samples"
+
+        try:
+            Contents = BackendTools().ImportTool("bundle").Main().CreateBundle(Settings["OutputFile"], BundlePath, Metadata, Files)
+
+        except (IOError, OSError) as Error:
+            logger.error("FinishedWindow().ExportBundle(): Couldn't export the evidence bundle! Error: "+unicode(Error))
+            wx.CallAfter(self.BundleExported, BundlePath, None, unicode(Error))
+            return
+
+        wx.CallAfter(self.BundleExported, BundlePath, Contents, None)
+
+    def BundleExported(self, BundlePath, Contents, Error):
+        """Tell the user how exporting the evidence bundle went"""
+        self.BundleButton.SetLabel("Export Evidence Bundle")
+        self.BundleButton.Enable()
+        self.RestartButton.Enable()
+        self.QuitButton.Enable()
+
+        if Error is not None:
+            dlg = wx.MessageDialog(self.Panel, "Couldn't export the evidence bundle! Error: "+Error, "DDRescue-GUI - Error!", wx.OK | wx.ICON_ERROR)
+
+        else:
+            dlg = wx.MessageDialog(self.Panel, "Finished exporting the evidence bundle to "+BundlePath+". It holds the image, "+', '.join(Section["Name"] for Section in Contents["Sections"])+" and your notes. SHA-512 of the image: "+Contents["ImageSHA512"], "DDRescue-GUI - Information", wx.OK | wx.ICON_INFORMATION)
+
+        dlg.ShowModal()
+        dlg.Destroy()
     
 #End Finished Window
 #Begin Hash Window
@@ -2629,6 +3294,7 @@ class HashWindow(wx.Frame):
 
     def CreateButtons(self):
         self.HashButton = wx.Button(self.Panel, -1, "Start")
+        self.SampleButton = wx.Button(self.Panel, -1, "Quick Check")
         self.CloseButton = wx.Button(self.Panel, -1, "Close")
 
     def CreateText(self):
@@ -2644,6 +3310,7 @@ class HashWindow(wx.Frame):
         ButtonSizer = wx.BoxSizer(wx.HORIZONTAL)
 
         ButtonSizer.Add(self.HashButton, 4, wx.ALIGN_CENTER_VERTICAL|wx.RIGHT, 10)
+        ButtonSizer.Add(self.SampleButton, 4, wx.ALIGN_CENTER_VERTICAL|wx.LEFT|wx.RIGHT, 10)
         ButtonSizer.Add(self.CloseButton, 4, wx.ALIGN_CENTER_VERTICAL|wx.LEFT, 10)
 
         HashSizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -2674,6 +3341,7 @@ class HashWindow(wx.Frame):
 
     def BindEvents(self):
         self.Bind(wx.EVT_BUTTON, self.HashingControl, self.HashButton)
+        self.Bind(wx.EVT_BUTTON, self.StartSample, self.SampleButton)
         self.Bind(wx.EVT_BUTTON, self.OnClose, self.CloseButton)
         self.Bind(wx.EVT_CLOSE, self.OnClose)
 
@@ -2692,7 +3360,15 @@ class HashWindow(wx.Frame):
         self.Destroy()
 
     def HashFuncSource(self):
+        import hashlib
         self.HashButton.SetLabel("Abort")
+
+        #The built-in copy engine already hashed the input while copying it, so don't read it again.
+        if Settings["CopyEngineHash"] is not None:
+            logger.info("HashWindow().HashFuncSource(): Using the input file's hash from the copy engine...")
+            self.SourceStatusText.SetLabel("Done")
+            return Settings["CopyEngineHash"]
+
         hash_sha = hashlib.sha512()
         self.ThrobberSource.Play()
         fname = Settings["InputFile"]
@@ -2712,12 +3388,15 @@ class HashWindow(wx.Frame):
         return ShaOriginal
 
     def HashFuncOutput(self):
+        import hashlib
         self.ThrobberOutput.Play()
         hash_sha = hashlib.sha512()
         block_size = 512*256
         hr = False
         fname = Settings["OutputFile"]
-        with open(fname, "rb") as f:
+
+        #Hash what's inside compressed and segmented images, so the hash matches the input's.
+        with BackendTools().ImportTool("compressedimage").Main().OpenImage(fname) as f:
             for chunk in iter(lambda: f.read(block_size), b''):
                 hash_sha.update(chunk)
 
@@ -2778,6 +3457,57 @@ class HashWindow(wx.Frame):
             file.write('\n')
         file.close()
         self.ThrobberSource.Stop()
+
+    def StartSample(self, Event=None):
+        """Compare a random sample of the rescued blocks in the input and output, instead of hashing all of them, and say how many blocks could differ"""
+        Sampling = BackendTools().ImportTool("sampling")
+        Seed = Sampling.Main().NewSeed()
+        BlockSize = Sampling.DefaultBlockSize
+
+        logger.info("HashWindow().StartSample(): Comparing a sample of "+unicode(Sampling.DefaultSampleCount)+" blocks of "+Settings["InputFile"]+" and "+Settings["OutputFile"]+" with seed "+unicode(Seed)+"...")
+
+        self.ThrobberSource.Play()
+        self.ThrobberOutput.Play()
+
+        try:
+            Areas = Sampling.Main().GetRescuedAreas(Settings["LogFile"], BackendTools().ImportTool("copyengine").Main().GetSize(Settings["InputFile"]))
+            Sample = Sampling.Main().ChooseSample(Areas, Seed, BlockSize=BlockSize)
+            logger.debug("HashWindow().StartSample(): Sample: "+', '.join(unicode(Offset)+"+"+unicode(Length) for Offset, Length in Sample))
+            Results = Sampling.Main().CompareSample(Settings["InputFile"], Settings["OutputFile"], Sample)
+
+        except (IOError, OSError) as Error:
+            logger.error("HashWindow().StartSample(): Couldn't compare the sample! Error: "+unicode(Error))
+            self.ThrobberSource.Stop()
+            self.ThrobberOutput.Stop()
+            dlg = wx.MessageDialog(self.Panel, "Couldn't compare the input and output files! Error: "+unicode(Error), "DDRescue-GUI - Error!", wx.OK | wx.ICON_ERROR)
+            dlg.ShowModal()
+            dlg.Destroy()
+            return
+
+        self.ThrobberSource.Stop()
+        self.ThrobberOutput.Stop()
+
+        Summary = Sampling.Main().SummariseResults(Results)
+
+        #Record every block checked, so anyone can check the same ones again.
+        if Settings["LogFile"] != "":
+            try:
+                Sampling.Main().WriteSampleFile(Settings["LogFile"]+".samples", Settings["InputFile"], Settings["OutputFile"], Seed, BlockSize, Results)
+
+            except (IOError, OSError) as Error:
+                logger.error("HashWindow().StartSample(): Couldn't write the sample to "+Settings["LogFile"]+".samples! Error: "+unicode(Error))
+
+        Message = unicode(Summary["Mismatches"])+" of "+unicode(Summary["Checked"])+" sampled blocks differ ("+unicode(Summary["Unreadable"])+" couldn't be read from the input). "
+        Message += "With "+unicode(int(Summary["Confidence"] * 100))+"% confidence, at most "+unicode(round(Summary["UpperBound"] * 100, 3))+"% of the rescued blocks differ. Seed: "+unicode(Seed)+"."
+
+        logger.info("HashWindow().StartSample(): "+Message)
+
+        self.SourceStatusText.SetLabel("Sampled")
+        self.OutputStatusText.SetLabel("Match" if Summary["Mismatches"] == 0 else "Does not match")
+
+        dlg = wx.MessageDialog(self.Panel, Message, "DDRescue-GUI - Quick Check", wx.OK | (wx.ICON_INFORMATION if Summary["Mismatches"] == 0 else wx.ICON_WARNING))
+        dlg.ShowModal()
+        dlg.Destroy()
 #Begin Elapsed Time Thread.
 class ElapsedTimeThread(threading.Thread):
     def __init__(self, ParentWindow):
@@ -2829,6 +3559,7 @@ class BackendThread(threading.Thread):
         self.GotInitialStatus = False
         self.UnitList = ['null', 'B', 'k', 'M', 'G', 'T', 'P', 'E', 'Z', 'Y']
         self.InputPos = "0 B"
+        self.ElapsedTime = None
 
         threading.Thread.__init__(self)
         self.start()
@@ -2837,7 +3568,8 @@ class BackendThread(threading.Thread):
         """Main body of the thread, started with self.start()"""
         logger.debug("MainBackendThread(): Setting up ddrescue tools...")
 
-        #Find suitable functions.
+        #Find suitable functions. The tools are imported here, as they aren't needed until we start a recovery.
+        import Tools.DDRescueTools.setup as DDRescueTools
         SuitableFunctions = DDRescueTools.SetupForCorrectDDRescueVersion(Settings["DDRescueVersion"])
 
         #Define all of these functions under their correct names.
@@ -2846,7 +3578,161 @@ class BackendThread(threading.Thread):
 
         #Prepare to start ddrescue.
         logger.debug("MainBackendThread(): Preparing to start ddrescue...")
-        OptionsList = [Settings["DirectAccess"], Settings["OverwriteOutputFile"], Settings["DiskSize"], Settings["Reverse"], Settings["Preallocate"], Settings["NoSplit"], Settings["BadSectorRetries"], Settings["MaxErrors"], Settings["ClusterSize"], Settings["InputFileBlockSize"], Settings["InputFile"], Settings["OutputFile"], Settings["LogFile"]]
+
+        #Work out which parts of the input the filesystems are using, if the user only wants those.
+        Settings["DomainMapfile"] = ""
+
+        if Settings["AllocatedOnly"]:
+            self.PrepareDomainMapfile()
+
+        ExecList = self.GetExecList(Settings)
+
+        #Mark the areas around known bad sectors in a new mapfile, so ddrescue leaves them until last. This needs a mapfile, and the areas must be on the disk we're recovering.
+        if Settings["SMARTSkipRanges"] != [] and Settings["SMARTSkipDisk"] == Settings["InputFile"] and Settings["LogFile"] != "" and Settings["InputFile"] in DiskInfo and DiskInfo[Settings["InputFile"]]["RawCapacity"].isdigit():
+            logger.info("MainBackendThread(): Writing initial mapfile from SMART data...")
+            DevInfoTools().WriteInitialMapfile(Settings["LogFile"], int(DiskInfo[Settings["InputFile"]]["RawCapacity"]), Settings["SMARTSkipRanges"])
+
+        #Set initial values for some variables.
+        self.DiskCapacity = "An unknown amount of"
+        self.DiskCapacityUnit = "data"
+        self.RecoveredData = 0
+        self.RecoveredDataUnit = "B"
+
+        #Start ddrescue.
+        logger.debug("MainBackendThread(): Running ddrescue with: '"+' '.join(ExecList)+"'...")
+
+        #Ensure the rest of the program knows we are recovering data.
+        Settings["RecoveringData"] = True
+        Settings["RecoveryStarted"] = time.time()
+        Settings["RecoveryFinished"] = None
+        Settings["CopyEngineHash"] = None
+
+        #Image the chosen partitions and gaps to separate files, if the user wants to.
+        if Settings["SelectedRegions"] != None:
+            ReturnCode = self.RunRegions()
+            self.FinishRecovery(ReturnCode)
+            return
+
+        #Compressed and segmented images, and second copies, can only be written by the copy engine. ddrescue can't write to them, so bad blocks are skipped instead.
+        #Disks can't be compressed or split.
+        Compression = None
+        SegmentSize = None
+        ExtraOutputs = []
+
+        if Settings["OutputFile"][0:5] != "/dev/":
+            if Settings["CompressOutput"]:
+                Compression = "auto"
+
+            elif Settings["SplitOutput"]:
+                SegmentSize = BackendTools().ImportTool("segmentedimage").DefaultSegmentSize
+
+        if Settings["SecondOutputFile"] != None:
+            ExtraOutputs.append((Settings["SecondOutputFile"], Settings["SecondOutputFile"]+".log"))
+
+        #Like ddrescue, don't write to a device unless the user said we could overwrite it.
+        Devices = [Output for Output in [Settings["OutputFile"]]+[Output[0] for Output in ExtraOutputs] if Output[0:5] == "/dev/"]
+
+        if Linux and (Compression != None or SegmentSize != None or ExtraOutputs != []) and (Devices == [] or Settings["OverwriteOutputFile"] == "-f"):
+            #The copy engine can't carry on from where it stopped with these, so the recovery would have to be restarted.
+            BackendTools().ImportTool("session").Main().SaveSession(Settings, "Recovering", DiskInfo, Resumable=False)
+            Result = self.RunCopyEngine(Compression=Compression, SegmentSize=SegmentSize, ExtraOutputs=ExtraOutputs)
+            Settings["RecoveringData"] = False
+            Settings["RecoveryFinished"] = time.time()
+
+            if Result["Result"] == "Success" or self.ParentWindow.AbortedRecovery:
+                logger.info("MainBackendThread(): Copy engine finished writing compressed or segmented image, or multiple copies. Telling MainWindow and exiting...")
+                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity=unicode(self.DiskCapacity)+" "+self.DiskCapacityUnit, RecoveredData=unicode(int(self.RecoveredData))+" "+self.RecoveredDataUnit, Result="Success", ReturnCode=0)
+
+            else:
+                logger.error("MainBackendThread(): Copy engine failed to write compressed or segmented image, or multiple copies, with result "+Result["Result"]+"! Telling MainWindow and exiting...")
+                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity=unicode(self.DiskCapacity)+" "+self.DiskCapacityUnit, RecoveredData=unicode(int(self.RecoveredData))+" "+self.RecoveredDataUnit, Result="BadReturnCode", ReturnCode=1)
+
+            return
+
+        #Record the command, so it can be run again with the same mapfile if DDRescue-GUI is interrupted.
+        BackendTools().ImportTool("session").Main().SaveSession(Settings, "Recovering", DiskInfo, ExecList=ExecList, Resumable=(Settings["LogFile"] != ""))
+
+        #Copy healthy disks with the built-in engine if the user wants to. Don't use it to resume a recovery, to read backwards, or to read only the allocated space.
+        #It needs a mapfile too, or ddrescue would have to start again from the beginning if the copy engine stopped on a read error.
+        #Like ddrescue, don't write to a device unless the user said we could overwrite it.
+        if Settings["UseCopyEngine"] and Settings["LogFile"] == "":
+            logger.info("MainBackendThread(): Not using the copy engine, because there's no mapfile to hand over to ddrescue with...")
+
+        elif Settings["UseCopyEngine"] and Linux and Settings["Reverse"] == "" and Settings["DomainMapfile"] == "" and not os.path.exists(Settings["LogFile"]) and (Settings["OutputFile"][0:5] != "/dev/" or Settings["OverwriteOutputFile"] == "-f"):
+            Result = self.RunCopyEngine()
+
+            if Result["Result"] == "Success" or self.ParentWindow.AbortedRecovery:
+                Settings["RecoveringData"] = False
+                Settings["RecoveryFinished"] = time.time()
+                logger.info("MainBackendThread(): Copy engine finished. Telling MainWindow and exiting...")
+                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity=unicode(self.DiskCapacity)+" "+self.DiskCapacityUnit, RecoveredData=unicode(int(self.RecoveredData))+" "+self.RecoveredDataUnit, Result="Success", ReturnCode=0)
+                return
+
+            #ddrescue will carry on from where the copy engine stopped, using its mapfile.
+            logger.warning("MainBackendThread(): Copy engine stopped with result "+Result["Result"]+" at byte "+unicode(Result["CopiedBytes"])+". Handing the rest over to ddrescue...")
+            wx.CallAfter(self.ParentWindow.UpdateOutputBox, "Copy engine stopped at byte "+unicode(Result["CopiedBytes"])+" ("+unicode(Result["Error"])+"). Handing over to ddrescue...\n")
+
+        #Run ddrescue in stages if the user wants to. The planner needs a mapfile to see what's left.
+        if Settings["MultiPass"] and Settings["LogFile"] != "":
+            ReturnCode = self.RunPlanner(Settings)
+
+        else:
+            ReturnCode = self.RunDDRescue(ExecList)
+
+        #Fill in the unused space afterwards if the user wants to. The mapfile still says it hasn't been tried, so ddrescue only reads that.
+        if Settings["DomainMapfile"] != "" and Settings["FillUnallocated"] and Settings["LogFile"] != "" and ReturnCode == 0 and not self.ParentWindow.AbortedRecovery:
+            logger.info("MainBackendThread(): Finished recovering the allocated space. Filling in the unused space...")
+            wx.CallAfter(self.ParentWindow.UpdateOutputBox, "Finished recovering the space the filesystems are using. Filling in the unused space...\n")
+            Options = dict(Settings)
+            Options["DomainMapfile"] = ""
+
+            if Settings["MultiPass"]:
+                ReturnCode = self.RunPlanner(Options)
+
+            else:
+                ReturnCode = self.RunDDRescue(self.GetExecList(Options))
+
+        self.FinishRecovery(ReturnCode)
+
+    def FinishRecovery(self, ReturnCode):
+        """Tell MainWindow how the recovery went, from ddrescue's exit status ReturnCode"""
+        #Let the GUI know that we are no longer recovering any data.
+        Settings["RecoveringData"] = False
+        Settings["RecoveryFinished"] = time.time()
+
+        #Check if we got ddrescue's init status, and if ddrescue exited with a status other than 0. Handle errors in case someone is running DDRescue-GUI on an unsupported version of ddrescue.
+        if self.GotInitialStatus == False:
+            logger.error("MainBackendThread(): We didn't get the initial status before ddrescue exited! Something has gone wrong. Telling MainWindow and exiting...")
+
+            try:
+                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity=unicode(self.DiskCapacity)+" "+self.DiskCapacityUnit, RecoveredData=unicode(int(self.RecoveredData))+" "+self.RecoveredDataUnit, Result="NoInitialStatus", ReturnCode=ReturnCode)
+
+            except:
+                logger.error("MainBackendThread(): Unexpected error while trying to send recovery information to RecoveryEnded()! Continuing anyway. Are you running a newer/older version of ddrescue than we support?")
+                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity="Unknown Size", RecoveredData="Unknown Size", Result="NoInitialStatus", ReturnCode=ReturnCode)
+
+        elif ReturnCode != 0:
+            logger.error("MainBackendThread(): ddrescue exited with exit status "+unicode(ReturnCode)+"! Something has gone wrong. Telling MainWindow and exiting...")
+
+            try:
+                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity=unicode(self.DiskCapacity)+" "+self.DiskCapacityUnit, RecoveredData=unicode(int(self.RecoveredData))+" "+self.RecoveredDataUnit, Result="BadReturnCode", ReturnCode=ReturnCode)
+
+            except:
+                logger.error("MainBackendThread(): Unexpected error while trying to send recovery information to RecoveryEnded()! Continuing anyway. Are you running a newer/older version of ddrescue than we support?")
+                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity="Unknown Size", RecoveredData="Unknown Size", Result="BadReturnCode", ReturnCode=ReturnCode)
+        else:
+            logger.info("MainBackendThread(): ddrescue finished recovering data. Telling MainWindow and exiting...")
+
+            try:
+                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity=unicode(self.DiskCapacity)+" "+self.DiskCapacityUnit, RecoveredData=unicode(int(self.RecoveredData))+" "+self.RecoveredDataUnit, Result="Success", ReturnCode=ReturnCode)
+
+            except:
+                logger.error("MainBackendThread(): Unexpected error while trying to send recovery information to RecoveryEnded()! Continuing anyway. Are you running a newer/older version of ddrescue than we support?")
+                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity="Unknown Size", RecoveredData="Unknown Size", Result="Success", ReturnCode=ReturnCode)
+
+    def GetExecList(self, Options):
+        """Get the command to run ddrescue with, using the recovery options in Options (normally Settings)"""
+        OptionsList = [Options["DirectAccess"], Options["OverwriteOutputFile"], Options["DiskSize"], Options["Reverse"], Options["Preallocate"], Options["NoSplit"], Options["BadSectorRetries"], Options["MaxErrors"], Options["ClusterSize"], Options["InputFileBlockSize"], Options["InputFile"], Options["OutputFile"], Options["LogFile"]]
 
         if Linux:
             ExecList = ["ddrescue", "-v"]
@@ -2854,14 +3740,22 @@ class BackendThread(threading.Thread):
         else:
             ExecList = [ResourcePath+"/ddrescue", "-v"]
 
+        #Only read the parts of the input in the domain mapfile, if there is one.
+        if Options["DomainMapfile"] != "":
+            ExecList.append("-m"+Options["DomainMapfile"])
+
+        #Only regular files can be sparse.
+        if Options["SparseOutput"] and Options["OutputFile"][0:5] != "/dev/":
+            ExecList.append("-S")
+
         for Option in OptionsList:
             #Handle direct disk access on OS X.
             if Linux == False and OptionsList.index(Option) == 0 and Option != "":
                 #If we're recovering from a file, don't enable direct disk access (it won't work).
-                if Settings["InputFile"][0:5] == "/dev/":
+                if Options["InputFile"][0:5] == "/dev/":
                     #Remove InputFile and switch it with a string that uses /dev/rdisk (raw disk) instead of /dev/disk.
                     OptionsList.pop(10)
-                    OptionsList.insert(10, "/dev/r" + Settings["InputFile"].split("/dev/")[1])
+                    OptionsList.insert(10, "/dev/r" + Options["InputFile"].split("/dev/")[1])
 
                 else:
                     #Make sure "-d" isn't added to the ExecList (continue to next iteration of loop).
@@ -2870,19 +3764,17 @@ class BackendThread(threading.Thread):
             elif Option != "":
                 ExecList.append(Option)
 
-        #Set initial values for some variables.
-        self.DiskCapacity = "An unknown amount of"
-        self.DiskCapacityUnit = "data"
-        self.RecoveredData = 0
-        self.RecoveredDataUnit = "B"
+        return ExecList
 
-        #Start ddrescue.
-        logger.debug("MainBackendThread(): Running ddrescue with: '"+' '.join(ExecList)+"'...")
+    def RunDDRescue(self, ExecList, TimeBudget=None):
+        """Run ddrescue with ExecList, sending its status to the GUI thread, and return its exit status.
+        If TimeBudget (in seconds) is given, ddrescue is interrupted when it runs out, and self.StoppedForTime is set"""
+        cmd = subprocess.Popen(ExecList, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        self.StoppedForTime = False
 
-        #Ensure the rest of the program knows we are recovering data.
-        Settings["RecoveringData"] = True
+        if TimeBudget is not None:
+            Deadline = time.time() + TimeBudget
 
-        cmd = subprocess.Popen(ExecList, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
         Line = ""
         Char = " " #Set this so the while loop exeutes at least once.
         LineList = []
@@ -2896,6 +3788,12 @@ class BackendThread(threading.Thread):
             Char = cmd.stdout.read(1)
             Line += Char
 
+            #Interrupt ddrescue when it runs out of time. It saves the mapfile and exits, like when Ctrl-C is pressed.
+            if TimeBudget is not None and not self.StoppedForTime and time.time() > Deadline:
+                logger.info("MainBackendThread().RunDDRescue(): Time budget of "+unicode(TimeBudget)+" seconds used up. Interrupting ddrescue...")
+                cmd.send_signal(signal.SIGINT)
+                self.StoppedForTime = True
+
             #If this is the end of the line, process it, and send the results to the GUI thread.
             if Char == "\n":
                 TidyLine = Line.replace("\n", "").replace("\r", "").replace("\x1b[A", "")
@@ -2918,38 +3816,229 @@ class BackendThread(threading.Thread):
             TidyLine = Line.replace("\n", "").replace("\r", "").replace("\x1b[A", "")
             self.ProcessLine(TidyLine)
 
-        #Let the GUI know that we are no longer recovering any data.
-        Settings["RecoveringData"] = False
+        return int(cmd.returncode)
 
-        #Check if we got ddrescue's init status, and if ddrescue exited with a status other than 0. Handle errors in case someone is running DDRescue-GUI on an unsupported version of ddrescue.
-        if self.GotInitialStatus == False:
-            logger.error("MainBackendThread(): We didn't get the initial status before ddrescue exited! Something has gone wrong. Telling MainWindow and exiting...")
+    def RunPlanner(self, BaseOptions):
+        """Run ddrescue in the stages chosen by the planner, each with its own options and time budget, until the mapfile says there's nothing left to try.
+        The options for each stage are based on BaseOptions (normally Settings). Returns ddrescue's exit status from the last stage"""
+        logger.info("MainBackendThread().RunPlanner(): Recovering "+Settings["InputFile"]+" in stages...")
+        Planner = BackendTools().ImportTool("planner").Main()
+        FinishedStages = []
+        ReturnCode = 0
 
-            try:
-                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity=unicode(self.DiskCapacity)+" "+self.DiskCapacityUnit, RecoveredData=unicode(int(self.RecoveredData))+" "+self.RecoveredDataUnit, Result="NoInitialStatus", ReturnCode=int(cmd.returncode))
+        while not self.ParentWindow.AbortedRecovery:
+            Stage = Planner.GetNextStage(Planner.SummariseMapfile(Settings["LogFile"]), FinishedStages)
 
-            except:
-                logger.error("MainBackendThread(): Unexpected error while trying to send recovery information to RecoveryEnded()! Continuing anyway. Are you running a newer/older version of ddrescue than we support?")
-                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity="Unknown Size", RecoveredData="Unknown Size", Result="NoInitialStatus", ReturnCode=int(cmd.returncode))
+            if Stage is None:
+                logger.info("MainBackendThread().RunPlanner(): No stages left with data to work on. Finished...")
+                break
 
-        elif int(cmd.returncode) != 0:
-            logger.error("MainBackendThread(): ddrescue exited with exit status "+unicode(cmd.returncode)+"! Something has gone wrong. Telling MainWindow and exiting...")
+            FinishedStages.append(Stage["Name"])
+
+            Options = dict(BaseOptions)
+            Options.update(Stage["Options"])
+            ExecList = self.GetExecList(Options)
+
+            logger.info("MainBackendThread().RunPlanner(): Starting stage '"+Stage["Name"]+"' with: '"+' '.join(ExecList)+"'...")
+            wx.CallAfter(self.ParentWindow.UpdateStatusBar, "Recovering data: "+Stage["Name"]+"...")
+            wx.CallAfter(self.ParentWindow.UpdateOutputBox, "Starting stage: "+Stage["Name"]+" (for up to "+unicode(Stage["TimeBudget"] // 3600)+" hours)...\n")
+
+            #Record this stage's command, so it can be run again if DDRescue-GUI is interrupted.
+            BackendTools().ImportTool("session").Main().SaveSession(Settings, "Recovering", DiskInfo, ExecList=ExecList)
+
+            ReturnCode = self.RunDDRescue(ExecList, TimeBudget=Stage["TimeBudget"])
+
+            if self.StoppedForTime:
+                #That's fine, the next stage will carry on from the mapfile.
+                logger.info("MainBackendThread().RunPlanner(): Stage '"+Stage["Name"]+"' ran out of time. Moving on...")
+                ReturnCode = 0
+
+            elif ReturnCode != 0:
+                logger.error("MainBackendThread().RunPlanner(): ddrescue exited with exit status "+unicode(ReturnCode)+" in stage '"+Stage["Name"]+"'! Stopping...")
+                break
+
+        return ReturnCode
+
+    def RunRegions(self):
+        """Image each partition and gap the user chose to its own output file and mapfile with ddrescue, then hash it.
+        They're imaged one at a time in the order they are on the disk, so it never seeks backwards. Returns ddrescue's exit status from the last region"""
+        RegionTools = BackendTools().ImportTool("regions").Main()
+        Regions = RegionTools.ScheduleRegions(Settings["SelectedRegions"])
+        ReturnCode = 0
+
+        logger.info("MainBackendThread().RunRegions(): Imaging "+unicode(len(Regions))+" partitions and gaps of "+Settings["InputFile"]+" to separate files...")
+
+        for Number, Region in enumerate(Regions, 1):
+            if self.ParentWindow.AbortedRecovery:
+                break
+
+            OutputFile, LogFile = RegionTools.GetRegionPaths(Region, Settings["OutputFile"], Settings["LogFile"])
+            Options = dict(Settings)
+            Options["OutputFile"] = OutputFile
+            Options["LogFile"] = LogFile
+
+            #The region has its own size, and ddrescue uses the last -s it's given, so don't pass the whole disk's size (set on OS X).
+            Options["DiskSize"] = ""
+
+            #Read only this region of the input, and write it to the start of its own output file. ddrescue keeps input positions in the mapfile.
+            ExecList = self.GetExecList(Options)
+            ExecList[2:2] = ["-i"+unicode(Region["Offset"]), "-o0", "-s"+unicode(Region["Size"])]
+
+            logger.info("MainBackendThread().RunRegions(): Imaging "+Region["Name"]+" ("+unicode(Number)+" of "+unicode(len(Regions))+") with: '"+' '.join(ExecList)+"'...")
+            wx.CallAfter(self.ParentWindow.UpdateOutputBox, "\nImaging "+Region["Name"]+" ("+unicode(Number)+" of "+unicode(len(Regions))+") to "+OutputFile+"...\n")
+
+            #Regions that were finished before will be skipped quickly using their mapfiles if this is resumed.
+            BackendTools().ImportTool("session").Main().SaveSession(Settings, "Recovering", DiskInfo, ExecList=ExecList, Resumable=(Settings["LogFile"] != ""))
+            ReturnCode = self.RunDDRescue(ExecList)
+
+            if ReturnCode != 0:
+                logger.error("MainBackendThread().RunRegions(): ddrescue exited with exit status "+unicode(ReturnCode)+" while imaging "+Region["Name"]+"! Stopping...")
+                break
+
+            if self.ParentWindow.AbortedRecovery:
+                break
 
             try:
-                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity=unicode(self.DiskCapacity)+" "+self.DiskCapacityUnit, RecoveredData=unicode(int(self.RecoveredData))+" "+self.RecoveredDataUnit, Result="BadReturnCode", ReturnCode=int(cmd.returncode))
+                Hash = RegionTools.HashFile(OutputFile)
+                RegionTools.WriteHashFile(OutputFile, Hash)
+
+            except (IOError, OSError) as Error:
+                logger.error("MainBackendThread().RunRegions(): Couldn't hash "+OutputFile+"! Error: "+unicode(Error))
+                wx.CallAfter(self.ParentWindow.UpdateOutputBox, "Couldn't hash "+OutputFile+": "+unicode(Error)+"\n")
+                continue
+
+            logger.info("MainBackendThread().RunRegions(): SHA-512 of "+OutputFile+" ("+Region["Name"]+"): "+Hash)
+            wx.CallAfter(self.ParentWindow.UpdateOutputBox, "Finished "+Region["Name"]+". SHA-512: "+Hash+"\n")
+
+        return ReturnCode
+
+    def PrepareDomainMapfile(self):
+        """Write a domain mapfile covering only the space the filesystems on the input are using, and say how much time that should save.
+        Sets Settings["DomainMapfile"] if there's anything worth skipping"""
+        logger.info("MainBackendThread().PrepareDomainMapfile(): Reading the filesystems' allocation maps...")
+        wx.CallAfter(self.ParentWindow.UpdateStatusBar, "Finding the space the filesystems are using...")
+
+        if Settings["LogFile"] != "":
+            DomainMapfile = Settings["LogFile"]+".domain"
 
-            except:
-                logger.error("MainBackendThread(): Unexpected error while trying to send recovery information to RecoveryEnded()! Continuing anyway. Are you running a newer/older version of ddrescue than we support?")
-                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity="Unknown Size", RecoveredData="Unknown Size", Result="BadReturnCode", ReturnCode=int(cmd.returncode))
         else:
-            logger.info("MainBackendThread(): ddrescue finished recovering data. Telling MainWindow and exiting...")
+            DomainMapfile = Settings["OutputFile"]+".domain"
 
-            try:
-                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity=unicode(self.DiskCapacity)+" "+self.DiskCapacityUnit, RecoveredData=unicode(int(self.RecoveredData))+" "+self.RecoveredDataUnit, Result="Success", ReturnCode=int(cmd.returncode))
+        try:
+            Size = BackendTools().ImportTool("copyengine").Main().GetSize(Settings["InputFile"])
+            Domain, Skipped = BackendTools().ImportTool("allocation").Main().GetDomain(Settings["InputFile"], Size)
 
-            except:
-                logger.error("MainBackendThread(): Unexpected error while trying to send recovery information to RecoveryEnded()! Continuing anyway. Are you running a newer/older version of ddrescue than we support?")
-                wx.CallAfter(self.ParentWindow.RecoveryEnded, DiskCapacity="Unknown Size", RecoveredData="Unknown Size", Result="Success", ReturnCode=int(cmd.returncode))
+        except (IOError, OSError) as Error:
+            logger.error("MainBackendThread().PrepareDomainMapfile(): Couldn't read "+Settings["InputFile"]+"! Recovering everything... Error: "+unicode(Error))
+            Size = Skipped = 0
+
+        if Skipped == 0:
+            logger.info("MainBackendThread().PrepareDomainMapfile(): Nothing can be skipped. Recovering everything...")
+            wx.CallAfter(self.ParentWindow.UpdateOutputBox, "Couldn't find any unused space to skip (no supported filesystems?). Recovering everything...\n")
+            return
+
+        BackendTools().ImportTool("allocation").Main().WriteDomainMapfile(DomainMapfile, Domain, Size)
+        Settings["DomainMapfile"] = DomainMapfile
+
+        Message = "Only recovering the space the filesystems are using: skipping "+DevInfoTools().GetHumanReadableSize(Skipped)+" of "+DevInfoTools().GetHumanReadableSize(Size)+" ("+unicode(Skipped * 100 // Size)+"%)."
+        ReadRate = BackendTools().ImportTool("allocation").Main().MeasureReadRate(Settings["InputFile"], Size)
+
+        if ReadRate is not None:
+            Saved = Skipped / ReadRate
+
+            if Saved >= 3600:
+                Message += " At about "+DevInfoTools().GetHumanReadableSize(int(ReadRate))+"/s, that should save about "+unicode(round(Saved / 3600, 1))+" hours."
+
+            else:
+                Message += " At about "+DevInfoTools().GetHumanReadableSize(int(ReadRate))+"/s, that should save about "+unicode(int(Saved // 60))+" minutes."
+
+        logger.info("MainBackendThread().PrepareDomainMapfile(): "+Message)
+        wx.CallAfter(self.ParentWindow.UpdateOutputBox, Message+"\n")
+
+    def RunCopyEngine(self, Compression=None, SegmentSize=None, ExtraOutputs=[]):
+        """Copy the input file with the built-in copy engine, keeping the GUI up to date like ddrescue's output does.
+        If Compression or SegmentSize is given, write a compressed or segmented image, skipping any bad blocks.
+        If ExtraOutputs (a list of (OutputFile, MapFile) pairs) is given, write those copies too, also skipping any bad blocks"""
+        logger.info("MainBackendThread().RunCopyEngine(): Copying "+Settings["InputFile"]+" with the built-in copy engine...")
+        wx.CallAfter(self.ParentWindow.UpdateStatusBar, "Copying data with the built-in copy engine...")
+        wx.CallAfter(self.ParentWindow.UpdateOutputBox, "Copying "+Settings["InputFile"]+" to "+Settings["OutputFile"]+" with DDRescue-GUI's built-in copy engine...\n")
+
+        #Set up the progress bar using the same units ddrescue would.
+        #(ddrescue and ChangeUnits() use "kB" rather than "KB").
+        self.DiskCapacity, self.DiskCapacityUnit = DevInfoTools().GetHumanReadableSize(BackendTools().ImportTool("copyengine").Main().GetSize(Settings["InputFile"])).replace("KB", "kB").split()
+        self.DiskCapacity = int(self.DiskCapacity)
+        wx.CallAfter(self.ParentWindow.SetProgressBarRange, self.DiskCapacity)
+
+        self.ElapsedTime = ElapsedTimeThread(self.ParentWindow)
+
+        #Blocks with read errors are re-read down to the input's logical sector size, so only the sectors that really fail are lost.
+        SectorSize = DiskInfo.get(Settings["InputFile"], {}).get("LogicalBlockSize", "512")
+        SectorSize = int(SectorSize) if SectorSize.isdigit() else 512
+
+        Result = BackendTools().ImportTool("copyengine").Main().Copy(InputFile=Settings["InputFile"], OutputFile=Settings["OutputFile"], MapFile=Settings["LogFile"], ProgressHandler=self.CopyEngineProgress, ShouldAbort=lambda: self.ParentWindow.AbortedRecovery, IsThrottled=lambda: self.ParentWindow.Throttled, Sparse=Settings["SparseOutput"], Verify=Settings["VerifyWrites"], SectorSize=SectorSize, Compression=Compression, SegmentSize=SegmentSize, SkipBadBlocks=(Compression is not None or SegmentSize is not None or ExtraOutputs != []), ExtraOutputs=ExtraOutputs)
+
+        #Show the final figures.
+        self.CopyEngineProgress(Result["CopiedBytes"], Result["Size"], 0, Result["CopiedBytes"] / max(Result["Time"], 0.001))
+
+        #Say how much of the input was empty, and how much of that didn't need writing.
+        ZeroMessage = DevInfoTools().GetHumanReadableSize(Result["ZeroBytes"])+" of the data read was all zeroes, and "+DevInfoTools().GetHumanReadableSize(Result["DataBytes"])+" wasn't"
+
+        if Result["Destinations"][0]["SparseBytes"] > 0:
+            ZeroMessage += " ("+DevInfoTools().GetHumanReadableSize(Result["Destinations"][0]["SparseBytes"])+" left as holes in the output file)"
+
+        logger.info("MainBackendThread().RunCopyEngine(): "+ZeroMessage+".")
+        wx.CallAfter(self.ParentWindow.UpdateOutputBox, ZeroMessage+".\n")
+
+        if Result["BadRanges"] != []:
+            BadBytes = DevInfoTools().GetHumanReadableSize(sum(Length for Start, Length in Result["BadRanges"]))
+            logger.warning("MainBackendThread().RunCopyEngine(): "+BadBytes+" of unreadable sectors in "+unicode(len(Result["BadRanges"]))+" places were filled with zeroes. See the mapfile for where they are.")
+            wx.CallAfter(self.ParentWindow.UpdateOutputBox, BadBytes+" of unreadable sectors in "+unicode(len(Result["BadRanges"]))+" places were filled with zeroes (marked bad in the mapfile).\n")
+
+        #Say how much of each destination read back correctly, and where it didn't, while the input is still attached.
+        if Settings["VerifyWrites"]:
+            for Destination in Result["Destinations"]:
+                if Destination["VerifiedBytes"] == 0 and Destination["UnverifiedBytes"] == 0 and Destination["BadRegions"] == []:
+                    continue
+
+                logger.info("MainBackendThread().RunCopyEngine(): "+Destination["OutputFile"]+": "+unicode(Destination["VerifiedBytes"])+" bytes read back correctly, "+unicode(Destination["UnverifiedBytes"])+" bytes unverified, bad regions: "+unicode(Destination["BadRegions"]))
+                wx.CallAfter(self.ParentWindow.UpdateOutputBox, Destination["OutputFile"]+": "+DevInfoTools().GetHumanReadableSize(Destination["VerifiedBytes"])+" read back and checked.\n")
+
+                if Destination["UnverifiedBytes"] > 0:
+                    wx.CallAfter(self.ParentWindow.UpdateOutputBox, "WARNING: "+DevInfoTools().GetHumanReadableSize(Destination["UnverifiedBytes"])+" of "+Destination["OutputFile"]+" couldn't be checked, because its filesystem doesn't let the read-back bypass the page cache.\n")
+
+                for Start, Length in Destination["BadRegions"]:
+                    wx.CallAfter(self.ParentWindow.UpdateOutputBox, "WARNING: "+DevInfoTools().GetHumanReadableSize(Length)+" at byte "+unicode(Start)+" of "+Destination["OutputFile"]+" didn't read back as it was written! The destination may be faulty.\n")
+
+        #Say how each destination did, so slow ones can be spotted.
+        if len(Result["Destinations"]) > 1:
+            for Destination in Result["Destinations"]:
+                logger.info("MainBackendThread().RunCopyEngine(): "+Destination["OutputFile"]+": "+Destination["Result"]+", "+DevInfoTools().GetHumanReadableSize(int(Destination["Throughput"]))+"/s.")
+                wx.CallAfter(self.ParentWindow.UpdateOutputBox, Destination["OutputFile"]+": "+Destination["Result"]+", wrote "+DevInfoTools().GetHumanReadableSize(Destination["CopiedBytes"])+" at "+DevInfoTools().GetHumanReadableSize(int(Destination["Throughput"]))+"/s.\n")
+
+                if Destination["Hash"] is not None:
+                    logger.info("MainBackendThread().RunCopyEngine(): SHA-512 of what was written to "+Destination["OutputFile"]+": "+Destination["Hash"])
+                    wx.CallAfter(self.ParentWindow.UpdateOutputBox, "SHA-512 of what was written to "+Destination["OutputFile"]+": "+Destination["Hash"]+"\n")
+
+        if Result["Hash"] is not None:
+            Settings["CopyEngineHash"] = Result["Hash"]
+            logger.info("MainBackendThread().RunCopyEngine(): SHA-512 of input file: "+Result["Hash"])
+            wx.CallAfter(self.ParentWindow.UpdateOutputBox, "Finished. SHA-512 of input: "+Result["Hash"]+"\n")
+
+        return Result
+
+    def CopyEngineProgress(self, CopiedBytes, Size, CurrentReadRate, AverageReadRate):
+        """Send the copy engine's progress to the GUI thread"""
+        self.RecoveredData, self.RecoveredDataUnit = self.ChangeUnits(float(CopiedBytes), "B", self.DiskCapacityUnit)
+        self.RecoveredData = round(self.RecoveredData, 3)
+        self.AverageReadRate, self.AverageReadRateUnit = AverageReadRate, "B/s"
+        self.TimeRemaining = self.CalculateTimeRemaining()
+
+        wx.CallAfter(self.ParentWindow.UpdateRecoveredData, unicode(self.RecoveredData)+" "+self.RecoveredDataUnit)
+        wx.CallAfter(self.ParentWindow.UpdateProgress, self.RecoveredData, self.DiskCapacity)
+        wx.CallAfter(self.ParentWindow.UpdateIpos, DevInfoTools().GetHumanReadableSize(CopiedBytes))
+        wx.CallAfter(self.ParentWindow.UpdateCurrentReadRate, DevInfoTools().GetHumanReadableSize(int(CurrentReadRate))+"/s")
+        wx.CallAfter(self.ParentWindow.UpdateAverageReadRate, DevInfoTools().GetHumanReadableSize(int(AverageReadRate))+"/s")
+        wx.CallAfter(self.ParentWindow.UpdateTimeRemaining, self.TimeRemaining)
 
     def ProcessLine(self, Line):
         """Process a given line to get ddrescue's current status and recovery information and send it to the GUI Thread""" 
@@ -2964,8 +4053,9 @@ class BackendThread(threading.Thread):
 
             wx.CallAfter(self.ParentWindow.SetProgressBarRange, self.DiskCapacity)
 
-            #Start time elapsed thread.
-            ElapsedTimeThread(self.ParentWindow)
+            #Start time elapsed thread, unless the copy engine already did.
+            if self.ElapsedTime is None:
+                self.ElapsedTime = ElapsedTimeThread(self.ParentWindow)
 
         elif SplitLine[0] == "ipos:" and Settings["DDRescueVersion"] not in ("1.21", "1.22"): #Versions 1.14 - 1.20.
             self.InputPos, self.NumErrors, self.AverageReadRate, self.AverageReadRateUnit = self.GetIPosNumErrorsandAverageReadRate(SplitLine)
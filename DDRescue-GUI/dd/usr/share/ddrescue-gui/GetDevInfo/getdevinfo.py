@@ -110,22 +110,13 @@ class Main():
                 except AttributeError:
                     return "Unknown", "Unknown"
 
-            #Round the sizes to make them human-readable.
-            UnitList = [None, "B", "KB", "MB", "GB", "TB", "PB", "EB"]
-            Unit = "B"
-            HumanSize = int(RawCapacity)
+            HumanSize = self.GetHumanReadableSize(RawCapacity)
 
-            try:
-                while len(unicode(HumanSize)) > 3:
-                    #Shift up one unit.
-                    Unit = UnitList[UnitList.index(Unit)+1]
-                    HumanSize = HumanSize//1000
-
-            except IndexError:
+            if HumanSize == "Unknown":
                 return "Unknown", "Unknown"
 
             #Include the unit in the result for both exact and human-readable sizes.
-            return RawCapacity, unicode(HumanSize)+" "+Unit
+            return RawCapacity, HumanSize
 
         else:
             try:
@@ -139,6 +130,23 @@ class Main():
 
             return Size
 
+    def GetHumanReadableSize(self, RawCapacity):
+        """Round the given size in bytes to make it human-readable, and include the unit"""
+        UnitList = [None, "B", "KB", "MB", "GB", "TB", "PB", "EB"]
+        Unit = "B"
+        HumanSize = int(RawCapacity)
+
+        try:
+            while len(unicode(HumanSize)) > 3:
+                #Shift up one unit.
+                Unit = UnitList[UnitList.index(Unit)+1]
+                HumanSize = HumanSize//1000
+
+        except IndexError:
+            return "Unknown"
+
+        return unicode(HumanSize)+" "+Unit
+
     def GetDescription(self, Disk):
         """Find description information for the given Disk. (OS X Only)"""
         logger.info("GetDevInfo: Main().GetDescription(): Getting description info for Disk: "+Disk+"...")
@@ -273,7 +281,290 @@ class Main():
                 DiskInfo[Volume]["HostPartition"] = Line.split()[-1]
                 DiskInfo[Volume]["HostDevice"] = DiskInfo[DiskInfo[Volume]["HostPartition"]]["HostDevice"]
 
-    def GetInfo(self, Standalone=False):
+    def RunCommand(self, Command, Timeout):
+        """Run the given command (a list) and return its output, or None if it didn't finish within Timeout seconds.
+        A process stuck on a dying drive may not even die when killed, so we stop waiting for it rather than relying on that."""
+        Environment = dict(os.environ)
+        Environment["LC_ALL"] = "C"
+
+        try:
+            Process = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=Environment)
+
+        except OSError as Error:
+            logger.error("GetDevInfo: Main().RunCommand(): Couldn't run '"+' '.join(Command)+"': "+unicode(Error))
+            return ""
+
+        Output = []
+        Errors = []
+
+        def Communicate():
+            try:
+                Output.append(Process.communicate()[0])
+
+            except Exception as Error:
+                Errors.append(Error)
+
+        ReaderThread = threading.Thread(target=Communicate)
+        ReaderThread.daemon = True
+        ReaderThread.start()
+        ReaderThread.join(Timeout)
+
+        if ReaderThread.is_alive():
+            logger.error("GetDevInfo: Main().RunCommand(): '"+' '.join(Command)+"' didn't finish within "+unicode(Timeout)+" seconds! Killing it...")
+
+            try:
+                Process.kill()
+
+            except OSError:
+                pass
+
+            return None
+
+        if Output == []:
+            #communicate() raised, so we have no output to return.
+            logger.error("GetDevInfo: Main().RunCommand(): Couldn't get the output of '"+' '.join(Command)+"': "+unicode(Errors[0]))
+            return ""
+
+        return Output[0]
+
+    def ListDevices(self, SysBlockPath="/sys/block"):
+        """List the devices to probe, using sysfs (Linux only). Loop, RAM, device mapper, optical and floppy devices are left to lshw and lvdisplay"""
+        Devices = []
+
+        try:
+            Entries = os.listdir(SysBlockPath)
+
+        except OSError:
+            logger.warning("GetDevInfo: Main().ListDevices(): Couldn't read "+SysBlockPath+"! Returning no devices...")
+            return Devices
+
+        for Entry in sorted(Entries):
+            if Entry.startswith(("loop", "ram", "zram", "dm-", "sr", "fd")):
+                continue
+
+            Devices.append("/dev/"+Entry.replace("!", "/"))
+
+        return Devices
+
+    def ReadSysfsFile(self, SysPath, FileName):
+        """Read a single value from a sysfs file, or return "Unknown" if we can't"""
+        try:
+            with open(os.path.join(SysPath, FileName)) as File:
+                Value = unicode(File.read().strip())
+
+        except IOError:
+            return "Unknown"
+
+        if Value == "":
+            return "Unknown"
+
+        return Value
+
+    def ProbeDevice(self, Disk, SysBlockPath="/sys/block", Timeout=30, SMART=False):
+        """Get the capacity, vendor, product and partitions of a device from sysfs (Linux only), asking udev and the device itself for anything sysfs doesn't have.
+        Optionally get a SMART summary too. Run on the probe pool, so a slow device doesn't hold up any others."""
+        logger.debug("GetDevInfo: Main().ProbeDevice(): Probing "+Disk+"...")
+
+        SysPath = os.path.join(SysBlockPath, Disk.replace("/dev/", "", 1).replace("/", "!"))
+
+        Result = {}
+        Result["Vendor"] = self.ReadSysfsFile(SysPath, "device/vendor")
+        Result["Product"] = self.ReadSysfsFile(SysPath, "device/model")
+        Result["Serial"] = self.GetSerial(SysPath)
+
+        #sysfs always counts sizes in 512-byte sectors.
+        Size = self.ReadSysfsFile(SysPath, "size")
+
+        if Size.isdigit():
+            Result["RawCapacity"] = unicode(int(Size) * 512)
+
+        else:
+            Result["RawCapacity"] = "Unknown"
+
+        if "Unknown" in (Result["Vendor"], Result["Product"]):
+            Properties = self.GetUdevProperties(Disk, Timeout=Timeout)
+
+            if Result["Vendor"] == "Unknown" and "ID_VENDOR" in Properties:
+                Result["Vendor"] = Properties["ID_VENDOR"].replace("_", " ")
+
+            if Result["Product"] == "Unknown" and "ID_MODEL" in Properties:
+                Result["Product"] = Properties["ID_MODEL"].replace("_", " ")
+
+        if Result["RawCapacity"] == "Unknown":
+            #This has to open the device, so it can hang on a dying drive.
+            Size = self.RunCommand(["blockdev", "--getsize64", Disk], Timeout=Timeout)
+
+            if Size != None and Size.strip().isdigit():
+                Result["RawCapacity"] = unicode(Size.strip())
+
+        #Partitions are subdirectories with a "partition" file in them.
+        Result["Partitions"] = {}
+
+        for Entry in sorted(os.listdir(SysPath)):
+            if os.path.isfile(os.path.join(SysPath, Entry, "partition")):
+                Size = self.ReadSysfsFile(os.path.join(SysPath, Entry), "size")
+
+                if Size.isdigit():
+                    Result["Partitions"]["/dev/"+Entry.replace("!", "/")] = unicode(int(Size) * 512)
+
+                else:
+                    Result["Partitions"]["/dev/"+Entry.replace("!", "/")] = "Unknown"
+
+        if SMART:
+            Result["SMART"] = self.GetSMARTInfo(Disk, Timeout=Timeout)
+
+        logger.debug("GetDevInfo: Main().ProbeDevice(): Finished probing "+Disk+"...")
+
+        return Result
+
+    def GetUdevProperties(self, Disk, Timeout=30):
+        """Get the udev properties of a device as a dictionary, or an empty one if udevadm fails or times out"""
+        Output = self.RunCommand(["udevadm", "info", "--query=property", "--name="+Disk], Timeout=Timeout)
+        Properties = {}
+
+        if Output == None:
+            logger.error("GetDevInfo: Main().GetUdevProperties(): udevadm timed out for "+Disk+"!")
+            return Properties
+
+        for Line in Output.split("\n"):
+            if "=" in Line:
+                Properties[Line.split("=", 1)[0]] = unicode(Line.split("=", 1)[1].strip())
+
+        return Properties
+
+    def ProbeDevices(self, Disks, Probe, Timeout=30, MaxWorkers=4):
+        """Run Probe(Disk) for each of the given disks on a pool of at most MaxWorkers threads, with a timeout of Timeout seconds for each probe.
+        Returns a dictionary of results keyed by disk. Probes that take too long get "probe timed out", and probes that fail get "probe failed"."""
+        logger.info("GetDevInfo: Main().ProbeDevices(): Probing "+unicode(len(Disks))+" devices with up to "+unicode(MaxWorkers)+" workers...")
+
+        Pending = list(Disks)
+        StartTimes = {}
+        Results = {}
+        Condition = threading.Condition()
+
+        def Worker():
+            while True:
+                with Condition:
+                    if Pending == []:
+                        return
+
+                    Disk = Pending.pop(0)
+                    StartTimes[Disk] = time.time()
+
+                try:
+                    Result = Probe(Disk)
+
+                except Exception as Error:
+                    logger.error("GetDevInfo: Main().ProbeDevices(): Probe of "+Disk+" failed! Error: "+unicode(Error))
+                    Result = "probe failed"
+
+                with Condition:
+                    #Ignore the result if we already gave up on this probe.
+                    if Disk not in Results:
+                        Results[Disk] = Result
+
+                    else:
+                        #Our replacement is already running, so stop here to keep the pool bounded.
+                        Condition.notify()
+                        return
+
+                    Condition.notify()
+
+        def StartWorker():
+            #Use daemon threads so a hung probe can't stop us from exiting.
+            Thread = threading.Thread(target=Worker)
+            Thread.daemon = True
+            Thread.start()
+
+        for Number in range(min(MaxWorkers, len(Disks))):
+            StartWorker()
+
+        with Condition:
+            while len(Results) < len(Disks):
+                Now = time.time()
+                NextDeadline = Now + Timeout
+
+                for Disk in StartTimes:
+                    if Disk in Results:
+                        continue
+
+                    if Now - StartTimes[Disk] >= Timeout:
+                        #Give up on it, and start a new worker to replace the one that's stuck.
+                        logger.warning("GetDevInfo: Main().ProbeDevices(): Probe of "+Disk+" timed out after "+unicode(Timeout)+" seconds!")
+                        Results[Disk] = "probe timed out"
+                        StartWorker()
+
+                    else:
+                        NextDeadline = min(NextDeadline, StartTimes[Disk] + Timeout)
+
+                if len(Results) < len(Disks):
+                    Condition.wait(max(NextDeadline - time.time(), 0.01))
+
+        logger.info("GetDevInfo: Main().ProbeDevices(): Finished probing devices.")
+
+        return Results
+
+    def AddProbeResults(self, ProbeResults):
+        """Add the results from ProbeDevices() to DiskInfo, making new entries for any devices lshw didn't find (or if it timed out)"""
+        for Disk in ProbeResults:
+            Result = ProbeResults[Disk]
+
+            if Disk not in DiskInfo:
+                DiskInfo[Disk] = {}
+                DiskInfo[Disk]["Name"] = Disk
+                DiskInfo[Disk]["Type"] = "Device"
+                DiskInfo[Disk]["HostDevice"] = "N/A"
+                DiskInfo[Disk]["Partitions"] = []
+                DiskInfo[Disk]["Vendor"] = "Unknown"
+                DiskInfo[Disk]["Product"] = "Unknown"
+                DiskInfo[Disk]["RawCapacity"], DiskInfo[Disk]["Capacity"] = ("Unknown", "Unknown")
+                DiskInfo[Disk]["Description"] = "Unknown"
+
+                if not isinstance(Result, dict):
+                    DiskInfo[Disk]["Description"] = "Unknown ("+Result+")"
+
+                else:
+                    DiskInfo[Disk]["Vendor"] = Result["Vendor"]
+                    DiskInfo[Disk]["Product"] = Result["Product"]
+
+                    if Result["RawCapacity"] != "Unknown":
+                        DiskInfo[Disk]["RawCapacity"], DiskInfo[Disk]["Capacity"] = Result["RawCapacity"], self.GetHumanReadableSize(Result["RawCapacity"])
+
+                    for Volume in sorted(Result["Partitions"]):
+                        DiskInfo[Volume] = {}
+                        DiskInfo[Volume]["Name"] = Volume
+                        DiskInfo[Volume]["Type"] = "Partition"
+                        DiskInfo[Volume]["HostDevice"] = Disk
+                        DiskInfo[Volume]["Partitions"] = []
+                        DiskInfo[Disk]["Partitions"].append(Volume)
+                        DiskInfo[Volume]["Vendor"] = "Unknown"
+                        DiskInfo[Volume]["Product"] = "Host Device: "+DiskInfo[Disk]["Product"]
+                        DiskInfo[Volume]["RawCapacity"], DiskInfo[Volume]["Capacity"] = ("Unknown", "Unknown")
+                        DiskInfo[Volume]["Description"] = "Unknown"
+
+                        if Result["Partitions"][Volume] != "Unknown":
+                            DiskInfo[Volume]["RawCapacity"], DiskInfo[Volume]["Capacity"] = Result["Partitions"][Volume], self.GetHumanReadableSize(Result["Partitions"][Volume])
+
+            elif isinstance(Result, dict):
+                #Fill in anything lshw couldn't tell us.
+                for Key in ["Vendor", "Product"]:
+                    if DiskInfo[Disk][Key] == "Unknown":
+                        DiskInfo[Disk][Key] = Result[Key]
+
+                if DiskInfo[Disk]["RawCapacity"] == "Unknown" and Result["RawCapacity"] != "Unknown":
+                    DiskInfo[Disk]["RawCapacity"], DiskInfo[Disk]["Capacity"] = Result["RawCapacity"], self.GetHumanReadableSize(Result["RawCapacity"])
+
+            if isinstance(Result, dict):
+                DiskInfo[Disk]["Serial"] = Result["Serial"]
+                DiskInfo[Disk]["ProbeStatus"] = "OK"
+
+                if "SMART" in Result:
+                    DiskInfo[Disk].update(Result["SMART"])
+
+            else:
+                DiskInfo[Disk]["ProbeStatus"] = Result
+
+    def GetInfo(self, Standalone=False, ProbeTimeout=30, LshwTimeout=60, MaxWorkers=4, SMART=False):
         """Get Disk Information."""
         logger.info("GetDevInfo: Main().GetInfo(): Preparing to get Disk info...")
 
@@ -281,16 +572,38 @@ class Main():
         DiskInfo = {}
 
         if Linux:
-            #Run lshw to try and get disk information.
+            #Run lshw in the background to try and get disk information.
             logger.debug("GetDevInfo: Main().GetInfo(): Running 'LC_ALL=C lshw -sanitize -class disk -class volume -xml'...")
-            runcmd = subprocess.Popen("LC_ALL=C lshw -sanitize -class disk -class volume -xml", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
+            LshwOutput = []
+            LshwThread = threading.Thread(target=lambda: LshwOutput.append(self.RunCommand(["lshw", "-sanitize", "-class", "disk", "-class", "volume", "-xml"], Timeout=LshwTimeout)))
+            LshwThread.daemon = True
+            LshwThread.start()
 
-            #Get the output.
-            stdout, stderr = runcmd.communicate()
+            #Meanwhile, probe each device on its own, so one dying drive can't hold up discovery of the others.
+            #Each probe runs up to 2 commands (3 with SMART), each with its own timeout.
+            Probe = lambda Disk: self.ProbeDevice(Disk, Timeout=ProbeTimeout, SMART=SMART)
+            ProbeResults = self.ProbeDevices(self.ListDevices(), Probe, Timeout=ProbeTimeout * (3 if SMART else 2), MaxWorkers=MaxWorkers)
+
+            #We have the essential info now, so give lshw only a little longer. If a probe timed out, lshw is almost certainly stuck on the same device.
+            if "probe timed out" not in ProbeResults.values():
+                LshwThread.join(ProbeTimeout)
+
+            if LshwThread.is_alive():
+                logger.error("GetDevInfo: Main().GetInfo(): lshw is taking too long, so not waiting for it! Using only the info from probing each device...")
+                stdout = ""
+
+            elif LshwOutput[0] == None:
+                logger.error("GetDevInfo: Main().GetInfo(): lshw timed out! Using only the info from probing each device...")
+                stdout = ""
+
+            else:
+                stdout = LshwOutput[0]
 
             logger.debug("GetDevInfo: Main().GetInfo(): Done.")
 
             #Parse XML as HTML to support Ubuntu 12.04 LTS. Otherwise output is cut off.
+            #BeautifulSoup is imported here because it's slow to import, and we're usually running in the background by now.
+            from bs4 import BeautifulSoup
             self.Output = BeautifulSoup(stdout, "html.parser")
 
             #Support for Ubuntu 12.04 LTS as that lshw outputs XML differently in that release.
@@ -321,12 +634,23 @@ class Main():
 
             #Find any LVM disks. Don't use -c because it doesn't give us enough information.
             logger.debug("GetDevInfo: Main().GetInfo(): Running 'LC_ALL=C lvdisplay --maps'...")
-            cmd = subprocess.Popen("LC_ALL=C lvdisplay --maps", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
-            self.LVMOutput = cmd.communicate()[0].split("\n")
+            LVMOutput = self.RunCommand(["lvdisplay", "--maps"], Timeout=LshwTimeout)
+
+            if LVMOutput == None:
+                logger.error("GetDevInfo: Main().GetInfo(): lvdisplay timed out! Ignoring any LVM disks...")
+                LVMOutput = ""
+
+            self.LVMOutput = LVMOutput.split("\n")
             logger.debug("GetDevInfo: Main().GetInfo(): Done!")
 
+            #Add the results from the device probes, including any SMART info.
+            self.AddProbeResults(ProbeResults)
+
             self.ParseLVMOutput()
 
+            #Add block size and geometry info from sysfs, all in one go.
+            self.AddGeometryInfo(self.GetGeometryInfo())
+
         else:
             #Run diskutil list to get Disk names.
             logger.debug("GetDevInfo: Main().GetInfo(): Running 'diskutil list -plist'...")
@@ -420,6 +744,9 @@ class Main():
                 else:
                     DiskInfo["/dev/"+Disk]["Description"] = "Unknown"
 
+                #We already have the plist, so keep the block size info too.
+                DiskInfo["/dev/"+Disk].update(self.GetGeometryFromPlist())
+
         #Check we found some disks.
         if len(DiskInfo) == 0:
             logger.info("GetDevInfo: Main().GetInfo(): Didn't find any disks, throwing RuntimeError!")
@@ -429,10 +756,96 @@ class Main():
 
         return DiskInfo
 
+    def GetGeometryInfo(self, SysBlockPath="/sys/block"):
+        """Read the block size and geometry info of every block device from sysfs in one sweep, without running any commands (Linux only).
+        Returns a dictionary of geometry info, keyed by device name (eg /dev/sda)."""
+        logger.debug("GetDevInfo: Main().GetGeometryInfo(): Reading geometry info from "+SysBlockPath+"...")
+
+        GeometryInfo = {}
+
+        try:
+            Devices = os.listdir(SysBlockPath)
+
+        except OSError:
+            logger.warning("GetDevInfo: Main().GetGeometryInfo(): Couldn't read "+SysBlockPath+"! Returning no geometry info...")
+            return GeometryInfo
+
+        for Device in Devices:
+            #Device mapper devices (eg LVM volumes) are known by their /dev/mapper names elsewhere.
+            try:
+                with open(os.path.join(SysBlockPath, Device, "dm", "name")) as File:
+                    Name = "/dev/mapper/"+File.read().strip()
+
+            except IOError:
+                #sysfs uses '!' in place of '/' in device names (eg cciss!c0d0).
+                Name = "/dev/"+Device.replace("!", "/")
+
+            GeometryInfo[Name] = self.ReadGeometry(os.path.join(SysBlockPath, Device))
+
+        logger.debug("GetDevInfo: Main().GetGeometryInfo(): Done.")
+
+        return GeometryInfo
+
+    def ReadGeometry(self, SysPath):
+        """Read the geometry info for one device from its sysfs directory"""
+        Geometry = {}
+
+        for Key, FileName in (("PhysicalBlockSize", "physical_block_size"), ("LogicalBlockSize", "logical_block_size"), ("OptimalIOSize", "optimal_io_size"), ("MaxSectorsKB", "max_sectors_kb"), ("Rotational", "rotational")):
+            try:
+                with open(os.path.join(SysPath, "queue", FileName)) as File:
+                    Geometry[Key] = unicode(File.read().strip())
+
+            except IOError:
+                Geometry[Key] = "Unknown"
+
+        return Geometry
+
+    def AddGeometryInfo(self, GeometryInfo):
+        """Add geometry info to each DiskInfo entry. Partitions use the info from their host device"""
+        for Disk in DiskInfo:
+            if Disk in GeometryInfo:
+                DiskInfo[Disk].update(GeometryInfo[Disk])
+
+            elif DiskInfo[Disk].get("HostDevice") in GeometryInfo:
+                DiskInfo[Disk].update(GeometryInfo[DiskInfo[Disk]["HostDevice"]])
+
+            else:
+                DiskInfo[Disk].update(dict.fromkeys(("PhysicalBlockSize", "LogicalBlockSize", "OptimalIOSize", "MaxSectorsKB", "Rotational"), "Unknown"))
+
+    def GetGeometryFromPlist(self):
+        """Get geometry info from the current diskutil plist (OS X only)"""
+        Geometry = dict.fromkeys(("PhysicalBlockSize", "LogicalBlockSize", "OptimalIOSize", "MaxSectorsKB", "Rotational"), "Unknown")
+
+        for Key in ("DeviceBlockSize", "VolumeBlockSize"):
+            if Key in self.Plist:
+                Geometry["PhysicalBlockSize"] = Geometry["LogicalBlockSize"] = unicode(self.Plist[Key])
+                break
+
+        if "SolidState" in self.Plist:
+            Geometry["Rotational"] = unicode(int(not self.Plist["SolidState"]))
+
+        return Geometry
+
     def GetBlockSize(self, Disk):
-        """Run the command to get the block size, and pass it to ComputeBlockSize()"""
+        """Get the block size, from DiskInfo or sysfs if we can, otherwise run the command to get it and pass it to ComputeBlockSize()"""
         logger.debug("GetDevInfo: Main().GetBlockSize(): Finding blocksize for Disk: "+Disk+"...")
 
+        #Use the geometry info we already have if possible.
+        if "DiskInfo" in globals() and DiskInfo.get(Disk, {}).get("PhysicalBlockSize", "Unknown") != "Unknown":
+            logger.info("GetDevInfo: Main().GetBlockSize(): Blocksize for Disk: "+Disk+": "+DiskInfo[Disk]["PhysicalBlockSize"]+". Returning it...")
+            return DiskInfo[Disk]["PhysicalBlockSize"]
+
+        if Linux and Disk[0:5] == "/dev/":
+            #Look it up in sysfs. Partitions don't have a queue directory, so use the host device's.
+            SysPath = "/sys/class/block/"+os.path.basename(os.path.realpath(Disk))
+
+            for Path in (SysPath, os.path.dirname(os.path.realpath(SysPath))):
+                Result = self.ReadGeometry(Path)["PhysicalBlockSize"]
+
+                if Result != "Unknown":
+                    logger.info("GetDevInfo: Main().GetBlockSize(): Blocksize for Disk: "+Disk+": "+Result+". Returning it...")
+                    return Result
+
         if Linux:
     	    #Run /sbin/blockdev to try and get blocksize information.
             Command = "blockdev --getpbsz "+Disk
@@ -490,14 +903,327 @@ class Main():
 
                 return Result
 
+    def GetSerial(self, SysPath):
+        """Get the serial number of a device from sysfs (Linux only), without touching the device itself"""
+        for FileName in ["serial", "device/serial", "device/vpd_pg80", "device/wwid"]:
+            Serial = self.ReadSysfsFile(SysPath, FileName)
+
+            if FileName == "device/vpd_pg80" and Serial != "Unknown":
+                #Skip the 4-byte VPD page header.
+                Serial = Serial[4:].strip()
+
+            if Serial not in ("Unknown", ""):
+                return Serial
+
+        return "Unknown"
+
+    def GetCacheKey(self, Serial, RawCapacity):
+        """Get the key to store a device under in the cache, or None if it can't be identified well enough"""
+        if Serial == "Unknown" or RawCapacity in ("Unknown", "N/A"):
+            return None
+
+        return Serial+"-"+RawCapacity
+
+    def LoadCache(self, CachePath):
+        """Load the device info cache from CachePath, or return an empty one if it's missing or damaged"""
+        try:
+            with open(CachePath) as CacheFile:
+                Cache = json.load(CacheFile)
+
+            if Cache["Version"] == 1 and isinstance(Cache["Devices"], dict):
+                return Cache
+
+            logger.warning("GetDevInfo: Main().LoadCache(): Ignoring cache with unknown version...")
+
+        except (IOError, OSError):
+            logger.info("GetDevInfo: Main().LoadCache(): No device info cache at "+CachePath+"...")
+
+        except (ValueError, KeyError, TypeError):
+            logger.warning("GetDevInfo: Main().LoadCache(): Device info cache at "+CachePath+" is damaged! Ignoring it...")
+
+        return {"Version": 1, "Devices": {}}
+
+    def GetCachedInfo(self, CachePath="/var/cache/ddrescue-gui/devinfo.json", SysBlockPath="/sys/block"):
+        """Quickly get info for devices we've seen before, by matching serial number and size from sysfs against the cache (Linux only).
+        The cached entries are marked with a ProbeStatus of "cached" until GetInfo() confirms them."""
+        logger.info("GetDevInfo: Main().GetCachedInfo(): Getting cached Disk info...")
+        CachedInfo = {}
+
+        if not Linux:
+            return CachedInfo
+
+        Cache = self.LoadCache(CachePath)
+
+        for Disk in self.ListDevices(SysBlockPath):
+            SysPath = os.path.join(SysBlockPath, Disk.replace("/dev/", "", 1).replace("/", "!"))
+            Size = self.ReadSysfsFile(SysPath, "size")
+
+            if not Size.isdigit():
+                continue
+
+            Key = self.GetCacheKey(self.GetSerial(SysPath), unicode(int(Size) * 512))
+
+            if Key not in Cache["Devices"]:
+                continue
+
+            #The device may have a different name this time, so rename it and its partitions.
+            OldName = Cache["Devices"][Key]["Name"]
+
+            for Entry in Cache["Devices"][Key]["Entries"].values():
+                Name = self.RenamePartition(Entry["Name"], OldName, Disk)
+                CachedInfo[Name] = dict(Entry)
+                CachedInfo[Name]["Name"] = Name
+                CachedInfo[Name]["Partitions"] = [self.RenamePartition(Partition, OldName, Disk) for Partition in Entry["Partitions"]]
+                CachedInfo[Name]["ProbeStatus"] = "cached"
+
+                if Entry["HostDevice"] != "N/A":
+                    CachedInfo[Name]["HostDevice"] = Disk
+
+        logger.info("GetDevInfo: Main().GetCachedInfo(): Found "+unicode(len(CachedInfo))+" cached Disks and partitions.")
+
+        return CachedInfo
+
+    def RenamePartition(self, Partition, OldDisk, NewDisk):
+        """Get the name Partition (or OldDisk itself) has now that OldDisk is called NewDisk.
+        Disks with names ending in a number (e.g. /dev/mmcblk0 and /dev/nvme0n1) have a "p" before their partition numbers, so this works if, for example, an SD card moves from a USB reader (/dev/sdb1) to a built-in one (/dev/mmcblk0p1)"""
+        Number = Partition[len(OldDisk):]
+
+        if Number == "":
+            return NewDisk
+
+        if OldDisk[-1].isdigit() and Number[0] == "p":
+            Number = Number[1:]
+
+        if NewDisk[-1].isdigit():
+            return NewDisk+"p"+Number
+
+        return NewDisk+Number
+
+    def SaveCache(self, Info, CachePath="/var/cache/ddrescue-gui/devinfo.json", MaxDevices=64):
+        """Save the info for each identifiable device and its partitions to the cache, keeping only the MaxDevices most recently seen devices (Linux only)"""
+        if not Linux:
+            return
+
+        logger.info("GetDevInfo: Main().SaveCache(): Saving Disk info to "+CachePath+"...")
+        Cache = self.LoadCache(CachePath)
+
+        for Disk in Info:
+            #Don't cache anything we couldn't probe properly.
+            if Info[Disk]["Type"] != "Device" or Info[Disk].get("ProbeStatus") != "OK":
+                continue
+
+            Key = self.GetCacheKey(Info[Disk].get("Serial", "Unknown"), Info[Disk]["RawCapacity"])
+
+            if Key == None:
+                continue
+
+            Entries = {}
+
+            for Name in [Disk] + Info[Disk]["Partitions"]:
+                if Name in Info:
+                    Entries[Name] = Info[Name]
+
+            Cache["Devices"][Key] = {"Name": Disk, "LastSeen": time.time(), "Entries": Entries}
+
+        #Forget the devices we haven't seen for longest.
+        for Key in sorted(Cache["Devices"], key=lambda Key: Cache["Devices"][Key]["LastSeen"])[:-MaxDevices]:
+            del Cache["Devices"][Key]
+
+        #Write to a temporary file first, so we never leave a half-written cache behind.
+        try:
+            if not os.path.isdir(os.path.dirname(CachePath)):
+                os.makedirs(os.path.dirname(CachePath))
+
+            with open(CachePath+".tmp", "w") as CacheFile:
+                json.dump(Cache, CacheFile)
+
+            os.rename(CachePath+".tmp", CachePath)
+
+        except (IOError, OSError) as Error:
+            logger.warning("GetDevInfo: Main().SaveCache(): Couldn't save Disk info cache! Error: "+unicode(Error))
+
+    def GetSMARTInfo(self, Disk, Timeout=60):
+        """Get a summary of the SMART data for the given Disk from smartctl"""
+        logger.info("GetDevInfo: Main().GetSMARTInfo(): Getting SMART info for "+Disk+"...")
+        Output = self.RunCommand(["smartctl", "-x", Disk], Timeout=Timeout)
+
+        if Output == None:
+            logger.error("GetDevInfo: Main().GetSMARTInfo(): smartctl timed out for "+Disk+"!")
+            Output = ""
+
+        return self.ParseSMARTOutput(Output)
+
+    def ParseSMARTOutput(self, Output):
+        """Parse the output of 'smartctl -a' or 'smartctl -x' into a summary of the things that matter for a recovery"""
+        SMARTInfo = {}
+        SMARTInfo["SMARTStatus"] = "Unavailable"
+        SMARTInfo["SMARTHealth"] = "Unknown"
+        SMARTInfo["ReallocatedSectors"] = "Unknown"
+        SMARTInfo["PendingSectors"] = "Unknown"
+        SMARTInfo["OfflineUncorrectable"] = "Unknown"
+        SMARTInfo["UDMACRCErrors"] = "Unknown"
+        SMARTInfo["SMARTErrorLBAs"] = []
+
+        Attributes = {"5": "ReallocatedSectors", "197": "PendingSectors", "198": "OfflineUncorrectable", "199": "UDMACRCErrors"}
+        InAttributeTable = False
+
+        for Line in Output.split("\n"):
+            if "self-assessment test result:" in Line:
+                SMARTInfo["SMARTStatus"] = "OK"
+                SMARTInfo["SMARTHealth"] = Line.split(":")[-1].strip()
+
+            elif "ID# ATTRIBUTE_NAME" in Line:
+                SMARTInfo["SMARTStatus"] = "OK"
+                InAttributeTable = True
+
+            elif InAttributeTable:
+                Parts = Line.split()
+
+                #The attribute table ends at the first line that doesn't look like an attribute.
+                if len(Parts) < 8 or not Parts[0].isdigit() or not Parts[3].isdigit():
+                    InAttributeTable = False
+                    continue
+
+                if Parts[0] in Attributes:
+                    #'smartctl -a' has extra columns, and its FLAG column is in hex.
+                    if Parts[2][0:2] == "0x":
+                        RawValue = Parts[9]
+
+                    else:
+                        RawValue = Parts[7]
+
+                    SMARTInfo[Attributes[Parts[0]]] = unicode(int(re.match("[0-9]*", RawValue).group() or 0))
+
+            #Errors in the error log (eg "Error: UNC at LBA = 0x1d4c2a38 = 491526712").
+            ErrorLBA = re.search("at LBA = 0x[0-9a-fA-F]+ = ([0-9]+)", Line)
+
+            if ErrorLBA != None:
+                SMARTInfo["SMARTErrorLBAs"].append(int(ErrorLBA.group(1)))
+
+            #Failed self-tests (eg "# 1  Short offline  Completed: read failure  90%  17895  491526720").
+            SelfTestLBA = re.search("^#\s*[0-9]+\s.*failure.*\s([0-9]+)\s*$", Line)
+
+            if SelfTestLBA != None:
+                SMARTInfo["SMARTErrorLBAs"].append(int(SelfTestLBA.group(1)))
+
+        SMARTInfo["SMARTErrorLBAs"] = sorted(set(SMARTInfo["SMARTErrorLBAs"]))
+
+        return SMARTInfo
+
+    def SuggestStrategy(self, SMARTInfo, SectorSize=512, SkipSize=1048576):
+        """Suggest ddrescue settings from the SMART info for a disk, so healthy areas get rescued before known-bad ones.
+        SMART reports error LBAs in logical sectors, so SectorSize must be the disk's logical (not physical) sector size.
+        Returns a dictionary with the suggested retries, the byte ranges to leave until later, and notes to show the user."""
+        Strategy = {}
+        Strategy["BadSectorRetries"] = None
+        Strategy["SkipRanges"] = []
+        Strategy["Notes"] = []
+
+        if SMARTInfo["SMARTStatus"] != "OK":
+            Strategy["Notes"].append("No SMART data available.")
+            return Strategy
+
+        Counts = {}
+
+        for Key in ["ReallocatedSectors", "PendingSectors", "OfflineUncorrectable", "UDMACRCErrors"]:
+            if SMARTInfo[Key].isdigit():
+                Counts[Key] = int(SMARTInfo[Key])
+
+            else:
+                Counts[Key] = 0
+
+        #Don't retry bad sectors while the rest of the disk is still unread, if there's any sign of them.
+        Reasons = []
+
+        if SMARTInfo["SMARTHealth"] not in ("PASSED", "Unknown"):
+            Strategy["Notes"].append("The disk is failing its SMART health check, so get the data off it as quickly as possible.")
+            Reasons.append("the disk is failing its health check")
+
+        if Counts["PendingSectors"] + Counts["OfflineUncorrectable"] > 0:
+            Reasons.append("it has "+unicode(Counts["PendingSectors"])+" pending and "+unicode(Counts["OfflineUncorrectable"])+" uncorrectable sectors")
+
+        if SMARTInfo["SMARTErrorLBAs"] != []:
+            Reasons.append("its error log has "+unicode(len(SMARTInfo["SMARTErrorLBAs"]))+" read errors")
+
+        if Reasons != []:
+            Strategy["BadSectorRetries"] = "-r 0"
+            Strategy["Notes"].append("Bad sectors won't be retried, because "+", and ".join(Reasons)+".")
+
+        if Counts["ReallocatedSectors"] > 0:
+            Strategy["Notes"].append(unicode(Counts["ReallocatedSectors"])+" sectors have been reallocated.")
+
+        if Counts["UDMACRCErrors"] > 0:
+            Strategy["Notes"].append(unicode(Counts["UDMACRCErrors"])+" UDMA CRC errors, so check the cable.")
+
+        #Leave the area around each known bad sector until the rest of the disk has been read.
+        for LBA in SMARTInfo["SMARTErrorLBAs"]:
+            Start = (LBA * SectorSize // SkipSize) * SkipSize
+
+            if Strategy["SkipRanges"] != [] and Strategy["SkipRanges"][-1][0] + Strategy["SkipRanges"][-1][1] >= Start:
+                #Merge it with the previous range.
+                Strategy["SkipRanges"][-1] = (Strategy["SkipRanges"][-1][0], Start + SkipSize - Strategy["SkipRanges"][-1][0])
+
+            else:
+                Strategy["SkipRanges"].append((Start, SkipSize))
+
+        if Strategy["SkipRanges"] != []:
+            Strategy["Notes"].append(unicode(len(Strategy["SkipRanges"]))+" areas around known bad sectors will be left until last.")
+
+        return Strategy
+
+    def WriteInitialMapfile(self, MapFile, DiskSize, SkipRanges):
+        """Write a ddrescue mapfile that marks the given byte ranges as non-trimmed, so ddrescue skips them on its first pass and comes back to them later.
+        Ranges past the end of the disk are ignored. Does nothing if MapFile already exists, so a recovery can still be resumed, or if it's empty (the user chose not to use a mapfile)."""
+        if MapFile == "":
+            logger.info("GetDevInfo: Main().WriteInitialMapfile(): No mapfile, so there's nowhere to mark the areas to skip. Doing nothing...")
+            return False
+
+        if os.path.exists(MapFile):
+            logger.info("GetDevInfo: Main().WriteInitialMapfile(): "+MapFile+" already exists. Leaving it alone...")
+            return False
+
+        logger.info("GetDevInfo: Main().WriteInitialMapfile(): Writing initial mapfile to "+MapFile+"...")
+        Blocks = []
+        Position = 0
+
+        for Start, Size in sorted(SkipRanges):
+            Start = max(Start, Position)
+            Size = min(Start + Size, DiskSize) - Start
+
+            if Size <= 0:
+                continue
+
+            if Start > Position:
+                Blocks.append((Position, Start - Position, "?"))
+
+            Blocks.append((Start, Size, "*"))
+            Position = Start + Size
+
+        if Position < DiskSize:
+            Blocks.append((Position, DiskSize - Position, "?"))
+
+        with open(MapFile, "w") as File:
+            File.write("# Rescue Logfile. Created by DDRescue-GUI from SMART data\n")
+            File.write("# current_pos  current_status\n")
+            File.write("0x00000000     ?\n")
+            File.write("#      pos        size  status\n")
+
+            for Start, Size, Status in Blocks:
+                File.write("0x%08X  0x%08X  %s\n" % (Start, Size, Status))
+
+        return True
+
 #End Main Class.
 if __name__ == "__main__":
     #Import modules.
     import subprocess
     import re
+    import os
+    import threading
+    import time
+    import json
     import platform
     import logging
-    from bs4 import BeautifulSoup
     import plistlib
 
     #Set up basic logging to stdout.
@@ -26,13 +26,16 @@ import unittest
 import wx
 import subprocess
 import re
+import select
 import logging
 import plistlib
 import os
 import time
+import threading
+import json
+import struct
 import getopt
 import sys
-from bs4 import BeautifulSoup
 
 #Global vars.
 Version = "1.7"
@@ -40,15 +43,35 @@ Version = "1.7"
 #Custom made modules.
 import GetDevInfo
 import Tools
+import Tools.segmentedimage
+import Tools.session
+import Tools.planner
+import Tools.allocation
+import Tools.governor
+import Tools.regions
+import Tools.sampling
+import Tools.bundle
 
 from GetDevInfo.getdevinfo import Main as DevInfoTools
 from Tools.tools import Main as BackendTools
+from Tools.copyengine import Main as CopyEngine
+from Tools.compressedimage import Main as CompressedImageTools
 
 #Import test modules.
 import Tests
 
 from Tests import GetDevInfoTests
 from Tests import BackendToolsTests
+from Tests import CopyEngineTests
+from Tests import CompressedImageTests
+from Tests import SegmentedImageTests
+from Tests import SessionTests
+from Tests import PlannerTests
+from Tests import AllocationTests
+from Tests import GovernorTests
+from Tests import RegionsTests
+from Tests import SamplingTests
+from Tests import BundleTests
 
 def usage():
     print("\nUsage: Tests.py [OPTION]\n\n")
@@ -57,6 +80,16 @@ def usage():
     print("       -d, --debug:                  Set logging level to debug, to show all logging messages. Default: show only critical logging messages.")
     print("       -g, --getdevinfo:             Run tests for GetDevInfo module.")
     print("       -b, --backendtools:           Run tests for BackendTools module.")
+    print("       -c, --copyengine:             Run tests for CopyEngine module.")
+    print("       -z, --compressedimage:        Run tests for CompressedImage module.")
+    print("       -s, --segmentedimage:         Run tests for SegmentedImage module.")
+    print("       -j, --session:                Run tests for Session module.")
+    print("       -p, --planner:                Run tests for Planner module.")
+    print("       -l, --allocation:             Run tests for Allocation module.")
+    print("       -e, --governor:               Run tests for Governor module.")
+    print("       -r, --regions:                Run tests for Regions module.")
+    print("       -u, --sampling:               Run tests for Sampling module.")
+    print("       -n, --bundle:                 Run tests for Bundle module.")
     print("       -m, --main:                   Run tests for main file (DDRescue-GUI.py).")
     print("       -a, --all:                    Run all the tests. The default.\n")
     print("       -t, --tests:                  Ignored.")
@@ -69,7 +102,7 @@ if os.geteuid() != 0:
 
 #Check all cmdline options are valid.
 try:
-    opts, args = getopt.getopt(sys.argv[1:], "hdgbmat", ["help", "debug", "getdevinfo", "backendtools", "main", "all", "tests"])
+    opts, args = getopt.getopt(sys.argv[1:], "hdgbczsjplerunmat", ["help", "debug", "getdevinfo", "backendtools", "copyengine", "compressedimage", "segmentedimage", "session", "planner", "allocation", "governor", "regions", "sampling", "bundle", "main", "all", "tests"])
 
 except getopt.GetoptError as err:
     #Invalid option. Show the help message and then exit.
@@ -79,7 +112,7 @@ except getopt.GetoptError as err:
     sys.exit(2)
 
 #Set up which tests to run based on options given.
-TestSuites = [GetDevInfoTests, BackendToolsTests] #*** Set up full defaults when finished ***
+TestSuites = [GetDevInfoTests, BackendToolsTests, CopyEngineTests, CompressedImageTests, SegmentedImageTests, SessionTests, PlannerTests, AllocationTests, GovernorTests, RegionsTests, SamplingTests, BundleTests] #*** Set up full defaults when finished ***
 
 #Log only critical message by default.
 loggerLevel = logging.CRITICAL
@@ -89,11 +122,31 @@ for o, a in opts:
         TestSuites = [GetDevInfoTests]
     elif o in ["-b", "--backendtools"]:
         TestSuites = [BackendToolsTests]
+    elif o in ["-c", "--copyengine"]:
+        TestSuites = [CopyEngineTests]
+    elif o in ["-z", "--compressedimage"]:
+        TestSuites = [CompressedImageTests]
+    elif o in ["-s", "--segmentedimage"]:
+        TestSuites = [SegmentedImageTests]
+    elif o in ["-j", "--session"]:
+        TestSuites = [SessionTests]
+    elif o in ["-p", "--planner"]:
+        TestSuites = [PlannerTests]
+    elif o in ["-l", "--allocation"]:
+        TestSuites = [AllocationTests]
+    elif o in ["-e", "--governor"]:
+        TestSuites = [GovernorTests]
+    elif o in ["-r", "--regions"]:
+        TestSuites = [RegionsTests]
+    elif o in ["-u", "--sampling"]:
+        TestSuites = [SamplingTests]
+    elif o in ["-n", "--bundle"]:
+        TestSuites = [BundleTests]
     elif o in ["-m", "--main"]:
         #TestSuites = [MainTests]
         assert False, "Not implemented yet"
     elif o in ["-a", "--all"]:
-        TestSuites = [GetDevInfoTests, BackendToolsTests]
+        TestSuites = [GetDevInfoTests, BackendToolsTests, CopyEngineTests, CompressedImageTests, SegmentedImageTests, SessionTests, PlannerTests, AllocationTests, GovernorTests, RegionsTests, SamplingTests, BundleTests]
         #TestSuites.append(MainTests)
     elif o in ["-t", "--tests"]:
         pass
@@ -137,20 +190,65 @@ elif "wxMac" in wx.PlatformInfo:
 #Setup custom-made modules (make global variables accessible inside the packages).
 GetDevInfo.getdevinfo.subprocess = subprocess
 GetDevInfo.getdevinfo.re = re
+GetDevInfo.getdevinfo.os = os
+GetDevInfo.getdevinfo.threading = threading
+GetDevInfo.getdevinfo.time = time
+GetDevInfo.getdevinfo.json = json
 GetDevInfo.getdevinfo.logger = logger
 GetDevInfo.getdevinfo.Linux = Linux
 GetDevInfo.getdevinfo.plistlib = plistlib
-GetDevInfo.getdevinfo.BeautifulSoup = BeautifulSoup
 
 Tools.tools.wx = wx
 Tools.tools.os = os
 Tools.tools.subprocess = subprocess
+Tools.tools.re = re
+Tools.tools.select = select
+Tools.tools.threading = threading
 Tools.tools.logger = logger
 Tools.tools.logging = logging
 Tools.tools.time = time
+Tools.tools.struct = struct
+Tools.tools.json = json
 Tools.tools.Linux = Linux
 Tools.tools.ResourcePath = ResourcePath
 
+Tools.copyengine.os = os
+Tools.copyengine.threading = threading
+Tools.copyengine.time = time
+Tools.copyengine.logger = logger
+Tools.copyengine.Linux = Linux
+
+Tools.compressedimage.os = os
+Tools.compressedimage.logger = logger
+
+Tools.segmentedimage.os = os
+Tools.segmentedimage.logger = logger
+
+Tools.session.os = os
+Tools.session.json = json
+Tools.session.time = time
+Tools.session.logger = logger
+
+Tools.allocation.os = os
+Tools.allocation.time = time
+Tools.allocation.struct = struct
+Tools.allocation.logger = logger
+
+Tools.governor.os = os
+Tools.governor.time = time
+Tools.governor.logger = logger
+
+Tools.regions.os = os
+Tools.regions.logger = logger
+
+Tools.sampling.os = os
+Tools.sampling.logger = logger
+
+Tools.bundle.os = os
+Tools.bundle.json = json
+Tools.bundle.time = time
+Tools.bundle.logger = logger
+
 #Setup test modules.
 GetDevInfoTests.DevInfoTools = DevInfoTools
 GetDevInfoTests.GetDevInfo = GetDevInfo
@@ -158,6 +256,32 @@ GetDevInfoTests.GetDevInfo = GetDevInfo
 BackendToolsTests.BackendTools = BackendTools
 BackendToolsTests.Tools = Tools
 
+CopyEngineTests.CopyEngine = CopyEngine
+CopyEngineTests.CompressedImageTools = CompressedImageTools
+
+CompressedImageTests.CompressedImage = Tools.compressedimage
+
+SegmentedImageTests.SegmentedImage = Tools.segmentedimage
+
+SessionTests.SessionTools = Tools.session.Main
+SessionTests.Session = Tools.session
+
+PlannerTests.Planner = Tools.planner.Main
+PlannerTests.PlannerModule = Tools.planner
+
+AllocationTests.Allocation = Tools.allocation.Main
+
+GovernorTests.GovernorTools = Tools.governor.Main
+GovernorTests.GovernorModule = Tools.governor
+
+RegionsTests.RegionTools = Tools.regions.Main
+
+SamplingTests.SamplingTools = Tools.sampling.Main
+
+BundleTests.BundleTools = Tools.bundle.Main
+BundleTests.Bundle = Tools.bundle
+BundleTests.CompressedImageTools = CompressedImageTools
+
 if __name__ == "__main__":
     for SuiteModule in TestSuites:
         print("\n\n---------------------------- Tests for "+unicode(SuiteModule)+" ----------------------------\n\n")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Allocation test data for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules
+import struct
+
+#Functions to return test data. The filesystems are as small as their formats allow, with only the structures that are read filled in.
+def ReturnFakeFAT16Image():
+    """A 32 MiB FAT16 filesystem with 2 KiB clusters. Clusters 2 to 4 and 10000 are in use"""
+    Image = bytearray(161 * 512)
+
+    #Boot sector: 512 byte sectors, 4 per cluster, 1 reserved sector, 2 FATs of 64 sectors, 512 root directory entries, 65536 sectors.
+    Image[0:3] = b"\xeb\x3c\x90"
+    Image[11:24] = struct.pack(b"<HBHBHHBH", 512, 4, 1, 2, 512, 0, 0xF8, 64)
+    Image[32:36] = struct.pack(b"<I", 65536)
+    Image[54:62] = b"FAT16   "
+    Image[510:512] = b"\x55\xaa"
+
+    FAT = [0xFFF8, 0xFFFF, 3, 4, 0xFFFF]
+
+    for Number, Entry in enumerate(FAT):
+        Image[512+Number*2:514+Number*2] = struct.pack(b"<H", Entry)
+
+    Image[512+10000*2:514+10000*2] = struct.pack(b"<H", 0xFFFF)
+    return bytes(Image)
+
+def ReturnFakeFAT16Domain():
+    return [(0, 161 * 512 + 3 * 2048), (161 * 512 + 9998 * 2048, 2048)]
+
+def ReturnFakeFAT12Image():
+    """A 1.44 MB floppy disk. Clusters 2, 3 and 5 are in use"""
+    Image = bytearray(33 * 512)
+
+    #Boot sector: 512 byte sectors, 1 per cluster, 1 reserved sector, 2 FATs of 9 sectors, 224 root directory entries, 2880 sectors.
+    Image[0:3] = b"\xeb\x3c\x90"
+    Image[11:24] = struct.pack(b"<HBHBHHBH", 512, 1, 1, 2, 224, 2880, 0xF0, 9)
+    Image[54:62] = b"FAT12   "
+    Image[510:512] = b"\x55\xaa"
+
+    #Two 12-bit entries are packed into every 3 bytes.
+    FAT = [0xFF0, 0xFFF, 3, 0xFFF, 0, 0xFFF]
+
+    for Pair in range(len(FAT) // 2):
+        First, Second = FAT[Pair*2], FAT[Pair*2+1]
+        Image[512+Pair*3:515+Pair*3] = bytearray([First & 0xFF, (First >> 8) | ((Second & 0xF) << 4), Second >> 4])
+
+    return bytes(Image)
+
+def ReturnFakeFAT12Ranges():
+    return [(0, 33 * 512), (33 * 512, 2 * 512), (36 * 512, 512)]
+
+def ReturnFakeExt2Image():
+    """An 8 MiB ext2 filesystem with 1 KiB blocks in one block group. Blocks 1 to 80 and 1001 are in use"""
+    Image = bytearray(4 * 1024)
+
+    #Superblock: 8192 blocks, first data block 1, 1 KiB blocks, 8192 blocks per group, magic number, sparse_super.
+    Superblock = 1024
+    Image[Superblock+4:Superblock+8] = struct.pack(b"<I", 8192)
+    Image[Superblock+20:Superblock+28] = struct.pack(b"<II", 1, 0)
+    Image[Superblock+32:Superblock+36] = struct.pack(b"<I", 8192)
+    Image[Superblock+56:Superblock+58] = b"\x53\xef"
+    Image[Superblock+100:Superblock+104] = struct.pack(b"<I", 0x1)
+
+    #Group descriptor in block 2, with the block bitmap in block 3.
+    Image[2048:2052] = struct.pack(b"<I", 3)
+
+    #The bitmap starts at the first data block.
+    Image[3072:3082] = b"\xff" * 10
+    Image[3072+125] = 0x01
+    return bytes(Image)
+
+def ReturnFakeExt2Ranges():
+    return [(0, 2048), (1024, 80 * 1024), (1001 * 1024, 1024)]
+
+def ReturnFakeNTFSImage():
+    """An 8 MiB NTFS filesystem with 4 KiB clusters and 1 KiB MFT records, with only the $Bitmap record and its data.
+    Clusters 0 to 15 and 96 are in use"""
+    Image = bytearray(101 * 4096)
+
+    #Boot sector: 512 byte sectors, 8 per cluster, 16383 sectors, MFT at cluster 4, 2^10 byte records.
+    Image[3:11] = b"NTFS    "
+    Image[11:14] = struct.pack(b"<HB", 512, 8)
+    Image[40:56] = struct.pack(b"<QQ", 16383, 4)
+    Image[64:65] = struct.pack(b"<b", -10)
+    Image[510:512] = b"\x55\xaa"
+
+    #$Bitmap (MFT record 6), with a non-resident $DATA attribute in cluster 100.
+    Record = bytearray(1024)
+    Record[0:8] = b"FILE" + struct.pack(b"<HH", 48, 3)
+    Record[20:22] = struct.pack(b"<H", 56)
+    Record[56:66] = struct.pack(b"<IIBB", 0x80, 72, 1, 0)
+    Record[56+32:56+34] = struct.pack(b"<H", 64)
+    Record[56+48:56+56] = struct.pack(b"<Q", 256)
+    Record[56+64:56+68] = b"\x11\x01\x64\x00"
+    Record[128:132] = b"\xff\xff\xff\xff"
+
+    #Fixups: the last 2 bytes of each sector are replaced with the update sequence number.
+    Record[48:54] = b"\x01\x00" + Record[510:512] + Record[1022:1024]
+    Record[510:512] = b"\x01\x00"
+    Record[1022:1024] = b"\x01\x00"
+
+    Image[4*4096+6*1024:4*4096+7*1024] = Record
+
+    Image[100*4096:100*4096+2] = b"\xff\xff"
+    Image[100*4096+12] = 0x01
+    return bytes(Image)
+
+def ReturnFakeNTFSRanges():
+    return [(0, 16 * 4096), (96 * 4096, 4096), (2047 * 4096, 4096)]
+
+def ReturnFakeDomainMapfile():
+    return """# Domain mapfile. Created by DDRescue-GUI from the filesystems' allocation maps
+# current_pos  current_status
+0x00000000     ?
+#      pos        size  status
+0x00000000  0x00001000  +
+0x00001000  0x0000F000  ?
+0x00010000  0x00010000  +
+0x00020000  0x000E0000  ?
+"""
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Allocation tests for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules
+import unittest
+import os
+import tempfile
+import shutil
+
+#Import test data.
+from . import AllocationTestData as Data
+
+class TestAllocation(unittest.TestCase):
+    def setUp(self):
+        self.TempDir = tempfile.mkdtemp()
+        self.Image = os.path.join(self.TempDir, "image.img")
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.Image
+
+    def WriteImage(self, Contents, Size):
+        """Write Contents to the start of a sparse image Size bytes long"""
+        with open(self.Image, "wb") as File:
+            File.write(Contents)
+            File.truncate(Size)
+
+    def testBitmapToRanges(self):
+        #Whole bytes, single bits, and bits past the end that should be ignored.
+        self.assertEqual(Allocation().BitmapToRanges(b"\xff\xff\x00\x05\x00\xff", 44, 4096, 1024), [(1024, 16 * 4096), (1024 + 24 * 4096, 4096), (1024 + 26 * 4096, 4096), (1024 + 40 * 4096, 4 * 4096)])
+        self.assertEqual(Allocation().BitmapToRanges(b"\x80\x01\x00", 24, 512, 0), [(7 * 512, 2 * 512)])
+        self.assertEqual(Allocation().BitmapToRanges(b"\x00" * 100, 800, 512, 0), [])
+
+    def testMergeRanges(self):
+        self.assertEqual(Allocation().MergeRanges([(100, 10), (0, 50), (40, 20), (200, 0)], 0), [(0, 60), (100, 10)])
+        self.assertEqual(Allocation().MergeRanges([(100, 10), (0, 50), (40, 20)], 40), [(0, 110)])
+        self.assertEqual(Allocation().MergeRanges([(0, 100), (10, 10)], 0), [(0, 100)])
+
+    def testDecodeDataRuns(self):
+        #A run, a sparse run, and a run before the first one.
+        self.assertEqual(Allocation().DecodeDataRuns(b"\x21\x10\x00\x01\x01\x08\x11\x04\xfe\x00"), [(256, 16), (None, 8), (254, 4)])
+
+    def testGetFAT16Allocation(self):
+        self.WriteImage(Data.ReturnFakeFAT16Image(), 32 * 1024 * 1024)
+
+        with open(self.Image, "rb") as Image:
+            Ranges, Size = Allocation().GetFATAllocation(Image, 0)
+
+        self.assertEqual(Allocation().MergeRanges(Ranges, 0), Data.ReturnFakeFAT16Domain())
+        self.assertEqual(Size, 32 * 1024 * 1024)
+
+    def testGetFAT12Allocation(self):
+        self.WriteImage(Data.ReturnFakeFAT12Image(), 2880 * 512)
+
+        with open(self.Image, "rb") as Image:
+            self.assertEqual(Allocation().GetFATAllocation(Image, 0), (Data.ReturnFakeFAT12Ranges(), 2880 * 512))
+
+    def testGetExtAllocation(self):
+        self.WriteImage(Data.ReturnFakeExt2Image(), 8 * 1024 * 1024)
+
+        with open(self.Image, "rb") as Image:
+            self.assertEqual(Allocation().GetExtAllocation(Image, 0), (Data.ReturnFakeExt2Ranges(), 8 * 1024 * 1024))
+
+    def testGetNTFSAllocation(self):
+        self.WriteImage(Data.ReturnFakeNTFSImage(), 8 * 1024 * 1024)
+
+        with open(self.Image, "rb") as Image:
+            self.assertEqual(Allocation().GetNTFSAllocation(Image, 0), (Data.ReturnFakeNTFSRanges(), 8 * 1024 * 1024))
+
+    def testTornMFTRecord(self):
+        Image = bytearray(Data.ReturnFakeNTFSImage())
+        Image[4*4096+6*1024+510] = 0x02
+        self.WriteImage(bytes(Image), 8 * 1024 * 1024)
+
+        #A torn record can't be trusted, so the whole filesystem is kept.
+        with open(self.Image, "rb") as Image:
+            self.assertRaises(ValueError, Allocation().GetNTFSAllocation, Image, 0)
+            self.assertEqual(Allocation().GetAllocatedRanges(Image, 0, 8 * 1024 * 1024, "ntfs"), None)
+
+    def testGetDomain(self):
+        #An unpartitioned FAT16 filesystem, with 1 MiB of space after it.
+        self.WriteImage(Data.ReturnFakeFAT16Image(), 33 * 1024 * 1024)
+
+        Domain, Skipped = Allocation().GetDomain(self.Image, 33 * 1024 * 1024)
+        self.assertEqual(Domain, Data.ReturnFakeFAT16Domain() + [(32 * 1024 * 1024, 1024 * 1024)])
+        self.assertEqual(Skipped, 32 * 1024 * 1024 - sum(Length for Start, Length in Data.ReturnFakeFAT16Domain()))
+
+    def testGetDomainUnsupportedFilesystem(self):
+        #Nothing can be skipped if the filesystem can't be read.
+        self.WriteImage(b"", 4 * 1024 * 1024)
+        self.assertEqual(Allocation().GetDomain(self.Image, 4 * 1024 * 1024), ([(0, 4 * 1024 * 1024)], 0))
+
+    def testWriteDomainMapfile(self):
+        MapFile = os.path.join(self.TempDir, "image.log.domain")
+        Allocation().WriteDomainMapfile(MapFile, [(0, 0x1000), (0x10000, 0x10000)], 0x100000)
+
+        with open(MapFile, "r") as File:
+            self.assertEqual(File.read(), Data.ReturnFakeDomainMapfile())
+
+        self.assertFalse(os.path.exists(MapFile+".tmp"))
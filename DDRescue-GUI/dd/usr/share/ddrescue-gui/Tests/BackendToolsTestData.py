@@ -21,6 +21,8 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import struct
+
 #Functions to return test data.
 def ReturnFakeCommands():
     Dict = {}
@@ -51,3 +53,91 @@ def ReturnFakeFilenames():
     Dict["/home/hamish/Desktop/img2.img"]["Result"] = ["...Desktop/img.img", "...esktop/img2.img", "...Desktop/img.i~2"]
 
     return Dict
+
+def ReturnFakeMountInfo():
+    return """21 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw,errors=remount-ro
+22 21 0:20 / /sys rw,nosuid,nodev,noexec,relatime shared:7 - sysfs sysfs rw
+23 21 0:21 / /proc rw,nosuid,nodev,noexec,relatime shared:12 - proc proc rw
+45 21 8:17 / /media/hamish/My\\040Backup\\040Disk rw,nosuid,nodev,relatime shared:30 - vfat /dev/sdb1 rw,fmask=0022
+46 21 8:17 / /tmp/ddrescueguimtpt rw,relatime shared:31 - vfat /dev/sdb1 rw,fmask=0022
+47 46 8:18 / /tmp/ddrescueguimtpt rw,relatime shared:32 - ext4 /dev/sdb2 rw
+48 21 253:0 / /mnt/caf\\303\\251 rw,relatime - ext4 /dev/mapper/fedora-root rw
+"""
+
+def ReturnFakeMountTable():
+    BySource = {}
+    BySource["/dev/sda1"] = ["/"]
+    BySource["sysfs"] = ["/sys"]
+    BySource["proc"] = ["/proc"]
+    BySource["/dev/sdb1"] = ["/media/hamish/My Backup Disk", "/tmp/ddrescueguimtpt"]
+    BySource["/dev/sdb2"] = ["/tmp/ddrescueguimtpt"]
+    BySource["/dev/mapper/fedora-root"] = ["/mnt/café"]
+
+    ByMountPoint = {}
+    ByMountPoint["/"] = "/dev/sda1"
+    ByMountPoint["/sys"] = "sysfs"
+    ByMountPoint["/proc"] = "proc"
+    ByMountPoint["/media/hamish/My Backup Disk"] = "/dev/sdb1"
+    ByMountPoint["/tmp/ddrescueguimtpt"] = "/dev/sdb2"
+    ByMountPoint["/mnt/café"] = "/dev/mapper/fedora-root"
+
+    return BySource, ByMountPoint
+
+def ReturnFakeBootSector(Entries):
+    #Build an MBR/EBR from a list of (Status, Type, StartSector, Sectors) tuples.
+    Sector = b"\x00" * 446
+
+    for Status, Type, Start, Length in Entries:
+        Sector += struct.pack(b"<B3xB3xII", Status, Type, Start, Length)
+
+    return Sector + b"\x00" * (64 - 16 * len(Entries)) + b"\x55\xaa"
+
+def ReturnFakeFATBootSector():
+    return b"\xeb\x3c\x90MSDOS5.0" + b"\x00" * 43 + b"FAT16   " + b"\x00" * 448 + b"\x55\xaa"
+
+def ReturnFakeExtSuperblock():
+    #ext4 magic number, with the has_journal and extents features.
+    return b"\x00" * 1080 + b"\x53\xef" + b"\x00" * 34 + struct.pack(b"<I4xI", 0x4, 0x40)
+
+def ReturnFakeDiskImages():
+    Dict = {}
+
+    #MBR with a primary partition, an extended partition containing two logical partitions, and an empty slot.
+    Dict["MBR"] = {}
+    Dict["MBR"]["Writes"] = [(0, ReturnFakeBootSector([(0x80, 0x0c, 2048, 2048), (0x00, 0x05, 4096, 4096), (0x00, 0x00, 0, 0)])),
+                             (1048576, ReturnFakeFATBootSector()),
+                             (4096 * 512, ReturnFakeBootSector([(0x00, 0x83, 1, 1023), (0x00, 0x05, 1024, 1024)])),
+                             (4097 * 512, ReturnFakeExtSuperblock()),
+                             (5120 * 512, ReturnFakeBootSector([(0x00, 0x82, 1, 1023)])),
+                             (8192 * 512 - 1, b"\x00")]
+
+    Dict["MBR"]["Partitions"] = [{"Number": 1, "Offset": 1048576, "Size": 1048576, "Scheme": "MBR", "Filesystem": "vfat"},
+                                 {"Number": 5, "Offset": 4097 * 512, "Size": 1023 * 512, "Scheme": "MBR", "Filesystem": "ext4"},
+                                 {"Number": 6, "Offset": 5121 * 512, "Size": 1023 * 512, "Scheme": "MBR", "Filesystem": "Unknown"}]
+
+    #GPT with entries 1 and 3 in use.
+    Header = b"EFI PART" + b"\x00" * 64 + struct.pack(b"<QII", 2, 128, 128)
+    Entry1 = b"\x01" * 16 + b"\x00" * 16 + struct.pack(b"<QQ", 2048, 4095) + b"\x00" * 80
+    Entry3 = b"\x02" * 16 + b"\x00" * 16 + struct.pack(b"<QQ", 4096, 8158) + b"\x00" * 80
+
+    Dict["GPT"] = {}
+    Dict["GPT"]["Writes"] = [(0, ReturnFakeBootSector([(0x00, 0xee, 1, 8191)])),
+                             (512, Header),
+                             (1024, Entry1 + b"\x00" * 128 + Entry3),
+                             (4096 * 512, ReturnFakeExtSuperblock()),
+                             (8192 * 512 - 1, b"\x00")]
+
+    Dict["GPT"]["Partitions"] = [{"Number": 1, "Offset": 1048576, "Size": 1048576, "Scheme": "GPT", "Filesystem": "Unknown"},
+                                 {"Number": 3, "Offset": 4096 * 512, "Size": 4063 * 512, "Scheme": "GPT", "Filesystem": "ext4"}]
+
+    #An image of a single FAT partition. The boot sector ends in 0x55AA, but isn't a partition table.
+    Dict["Partition"] = {}
+    Dict["Partition"]["Writes"] = [(0, ReturnFakeFATBootSector()), (1048575, b"\x00")]
+    Dict["Partition"]["Partitions"] = []
+
+    #A blank image (eg from an unfinished recovery).
+    Dict["Blank"] = {}
+    Dict["Blank"]["Writes"] = [(1048575, b"\x00")]
+    Dict["Blank"]["Partitions"] = []
+
+    return Dict
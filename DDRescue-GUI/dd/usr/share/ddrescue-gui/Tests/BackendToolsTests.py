@@ -27,6 +27,8 @@ import wx
 import os
 import subprocess
 import time
+import tempfile
+import shutil
 
 #Import test data and functions.
 from . import BackendToolsTestData as Data
@@ -80,6 +82,139 @@ class TestStartProcess(unittest.TestCase):
             self.assertEqual(Retval, self.Commands[Command]["Retval"])
             self.assertEqual(Output, self.Commands[Command]["Output"])
 
+    def testStartProcessList(self):
+        #Arguments in a list aren't interpreted by a shell.
+        self.assertEqual(BackendTools().StartProcess(Command=["echo", "Don't $HOME; exit 2"], ReturnOutput=True), (0, "Don't $HOME; exit 2\n"))
+        self.assertEqual(BackendTools().StartProcess(Command=["sh", "-c", "exit 2"]), 2)
+
+    def testStartProcessByteStrings(self):
+        #Non-ASCII byte strings (eg file names from os.listdir()) must be passed on unchanged.
+        self.assertEqual(BackendTools().StartProcess(Command=[b"echo", b"caf\xc3\xa9"], ReturnOutput=True), (0, "caf\xe9\n"))
+        self.assertEqual(BackendTools().StartProcess(Command=b"echo caf\xc3\xa9", ReturnOutput=True), (0, "caf\xe9\n"))
+
+    def testStartProcessLocale(self):
+        self.assertEqual(BackendTools().StartProcess(Command=["sh", "-c", "echo $LC_ALL"], ReturnOutput=True)[1], "C\n")
+
+    def testStartProcessMissingProgram(self):
+        self.assertEqual(BackendTools().StartProcess(Command=["ddrescueguinonexistentprogram"]), 127)
+
+    def testStartProcessTimeout(self):
+        StartTime = time.time()
+        Retval, Output = BackendTools().StartProcess(Command="echo 'Started'; sleep 30; echo 'Finished'", ReturnOutput=True, Timeout=1)
+
+        self.assertTrue(time.time() - StartTime < 5)
+        self.assertEqual(Retval, -9)
+        self.assertEqual(Output, "Started\n")
+
+    def testStartProcessOutputHandler(self):
+        #Lines must be passed on as they arrive, not when the process exits.
+        Lines = []
+        BackendTools().StartProcess(Command="echo 'One'; sleep 1; echo 'Two'", OutputHandler=lambda Line: Lines.append((Line, time.time())))
+
+        self.assertEqual([Line for Line, Time in Lines], ["One\n", "Two\n"])
+        self.assertTrue(Lines[1][1] - Lines[0][1] > 0.5)
+
+    def testStartProcessLargeOutput(self):
+        #This would fill the pipe and deadlock if the output wasn't read as it arrived.
+        Retval, Output = BackendTools().StartProcess(Command=["head", "-c", "1048576", "/dev/zero"], ReturnOutput=True)
+
+        self.assertEqual(Retval, 0)
+        self.assertEqual(len(Output), 1048576)
+
+class TestParseMountInfo(unittest.TestCase):
+    def setUp(self):
+        self.MountInfo = Data.ReturnFakeMountInfo()
+        self.CorrectMountTable = Data.ReturnFakeMountTable()
+
+    def tearDown(self):
+        del self.MountInfo
+        del self.CorrectMountTable
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testParseMountInfo(self):
+        self.assertEqual(BackendTools().ParseMountInfo(self.MountInfo), self.CorrectMountTable)
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testGetMountTableIsCached(self):
+        #Nothing has been mounted or unmounted in between, so we should get the same table back.
+        self.assertIs(BackendTools().GetMountTable(), BackendTools().GetMountTable())
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testGetMountTableNoticesChanges(self):
+        MountPoint = tempfile.mkdtemp()
+
+        try:
+            self.assertFalse(BackendTools().IsMounted(MountPoint))
+            self.assertEqual(BackendTools().StartProcess("mount -t tmpfs ddrescueguitest "+MountPoint), 0)
+            self.assertTrue(BackendTools().IsMounted(MountPoint))
+            self.assertEqual(BackendTools().GetMountPointOf("ddrescueguitest"), MountPoint)
+
+        finally:
+            BackendTools().StartProcess("umount "+MountPoint)
+
+        self.assertFalse(BackendTools().IsMounted(MountPoint))
+        os.rmdir(MountPoint)
+
+class TestReadPartitionTable(unittest.TestCase):
+    def setUp(self):
+        self.TempDir = tempfile.mkdtemp()
+        self.Images = Data.ReturnFakeDiskImages()
+
+        for Name in self.Images:
+            with open(os.path.join(self.TempDir, Name), "wb") as Image:
+                for Offset, Bytes in self.Images[Name]["Writes"]:
+                    Image.seek(Offset)
+                    Image.write(Bytes)
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.Images
+
+    def testReadPartitionTable(self):
+        for Name in self.Images:
+            self.assertEqual(BackendTools().ReadPartitionTable(os.path.join(self.TempDir, Name)), self.Images[Name]["Partitions"])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testDetermineOutputFileType(self):
+        for Name, Type in (("MBR", "Device"), ("GPT", "Device"), ("Partition", "Partition"), ("Blank", "Partition")):
+            OutputFileType, Retval, Output = BackendTools().DetermineOutputFileType(Settings={"InputFile": "/dev/sdz", "OutputFile": os.path.join(self.TempDir, Name)}, DiskInfo={})
+            self.assertEqual((OutputFileType, Retval, Output), (Type, 0, self.Images[Name]["Partitions"]))
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testMissingImage(self):
+        self.assertEqual(BackendTools().DetermineOutputFileType(Settings={"InputFile": "/dev/sdz", "OutputFile": os.path.join(self.TempDir, "None")}, DiskInfo={}), ("Partition", 1, []))
+
+class TestUnmountDisks(unittest.TestCase):
+    def setUp(self):
+        #Mount some filesystems to unmount, with one inside another.
+        self.TempDir = tempfile.mkdtemp()
+        self.MountPoints = [os.path.join(self.TempDir, "1"), os.path.join(self.TempDir, "2")]
+
+        for MountPoint in self.MountPoints:
+            os.mkdir(MountPoint)
+            BackendTools().StartProcess(["mount", "-t", "tmpfs", "ddrescueguitest", MountPoint])
+
+        self.MountPoints.append(os.path.join(self.MountPoints[0], "nested"))
+        os.mkdir(self.MountPoints[2])
+        BackendTools().StartProcess(["mount", "-t", "tmpfs", "ddrescueguitest", self.MountPoints[2]])
+
+    def tearDown(self):
+        for MountPoint in reversed(self.MountPoints):
+            if BackendTools().IsMounted(MountPoint):
+                BackendTools().StartProcess(["umount", MountPoint])
+
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.MountPoints
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testUnmountDisks(self):
+        self.assertEqual(BackendTools().UnmountDisks(self.MountPoints), dict((MountPoint, 0) for MountPoint in self.MountPoints))
+
+        for MountPoint in self.MountPoints:
+            self.assertFalse(BackendTools().IsMounted(MountPoint))
+
 class TestCreateUniqueKey(unittest.TestCase):
     def setUp(self):
         self.KeysDict = {}
@@ -95,6 +230,15 @@ class TestCreateUniqueKey(unittest.TestCase):
             self.assertTrue(Key in self.Filenames[File]["Result"])
             self.KeysDict[Key] = ""
 
+class TestImportTool(unittest.TestCase):
+    def testImportTool(self):
+        #The module we get back, and any other Tools modules it imported, should be able to use our global variables.
+        Module = BackendTools().ImportTool("sampling")
+
+        self.assertEqual(Module.__name__, "Tools.sampling")
+        self.assertEqual(Module.logger, Tools.tools.logger)
+        self.assertEqual(Tools.compressedimage.os, Tools.tools.os)
+
 class TestSendNotification(unittest.TestCase):
     def setUp(self):
         self.app = wx.App()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Governor test data for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+
+#Import modules.
+import os
+
+#Functions to return test data.
+def ReturnFakeImage():
+    """A 300000 byte image (not a multiple of the chunk size) with random data, and a run of zeroes that fills some chunks"""
+    return os.urandom(100000) + b"\x00" * 150000 + os.urandom(50000)
+
+def ReturnFakeMapfile():
+    """A finished ddrescue mapfile for ReturnFakeImage()"""
+    return """# Mapfile. Created by GNU ddrescue version 1.19
+# current_pos  current_status
+0x000493E0     +
+#      pos        size  status
+0x00000000  0x000493E0  +
+"""
+
+def ReturnFakeMetadata():
+    """Details of the source disk, timings and notes, like the GUI saves"""
+    return {"InputFile": "/dev/sdb", "Source": {"Vendor": "ATA", "Product": "FakeDisk 300K", "Capacity": "300000"},
+            "Started": 1500000000.0, "Finished": 1500003600.5, "Notes": "Case 42. Imaged by J. Smith.\nDrive was clicking."}
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Bundle tests for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+import hashlib
+
+#Import test data.
+from . import BundleTestData as Data
+
+class TestBundle(unittest.TestCase):
+    def setUp(self):
+        self.TempDir = tempfile.mkdtemp()
+        self.ImageFile = os.path.join(self.TempDir, "image.img")
+        self.MapFile = os.path.join(self.TempDir, "image.log")
+        self.BundleFile = os.path.join(self.TempDir, "evidence.ddrb")
+        self.Data = Data.ReturnFakeImage()
+
+        with open(self.ImageFile, "wb") as File:
+            File.write(self.Data)
+
+        with open(self.MapFile, "w") as File:
+            File.write(Data.ReturnFakeMapfile())
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.ImageFile
+        del self.MapFile
+        del self.BundleFile
+        del self.Data
+
+    def CreateBundle(self, **Args):
+        return BundleTools().CreateBundle(self.ImageFile, self.BundleFile, Data.ReturnFakeMetadata(), {"Mapfile": self.MapFile, "Log": os.path.join(self.TempDir, "missing.log")}, ChunkSize=65536, **Args)
+
+    def testCreateBundle(self):
+        Progress = []
+        Contents = self.CreateBundle(ProgressHandler=lambda *Args: Progress.append(Args))
+
+        self.assertEqual(Contents["Size"], 300000)
+        self.assertEqual(Contents["ImageSHA512"], hashlib.sha512(self.Data).hexdigest())
+        self.assertEqual(Progress[-1], (300000, 300000))
+
+        #The missing log is skipped.
+        self.assertEqual([Section["Name"] for Section in Contents["Sections"]], ["Mapfile"])
+
+        #The chunk that's all zeroes takes no space.
+        with Bundle.BundleReader(self.BundleFile) as Reader:
+            self.assertEqual([Entry[2] for Entry in Reader.Index], [65536, 65536, 0, 65536, 37856])
+
+        self.assertTrue(BundleTools().IsBundle(self.BundleFile))
+        self.assertFalse(BundleTools().IsBundle(self.ImageFile))
+
+    def testReadBundle(self):
+        self.CreateBundle()
+
+        with Bundle.BundleReader(self.BundleFile) as Reader:
+            self.assertEqual(Reader.read(), self.Data)
+
+            #Random access by offset, across chunk boundaries.
+            Reader.seek(65000)
+            self.assertEqual(Reader.read(1000), self.Data[65000:66000])
+            self.assertEqual(Reader.pread(50, 299980), self.Data[299980:])
+
+            self.assertEqual(Reader.GetSection("Mapfile"), Data.ReturnFakeMapfile().encode("utf-8"))
+            self.assertEqual(Reader.Contents["Metadata"], Data.ReturnFakeMetadata())
+            self.assertRaises(KeyError, Reader.GetSection, "Log")
+            self.assertEqual(Reader.Verify(), [])
+
+    def testOpenImage(self):
+        #Bundles can be read (and mounted) like any other image.
+        self.CreateBundle(Compression="zlib")
+
+        self.assertTrue(CompressedImageTools().IsVirtualImage(self.BundleFile))
+
+        with CompressedImageTools().OpenImage(self.BundleFile) as Image:
+            self.assertEqual(Image.read(), self.Data)
+
+    def testOpenImageWithoutImportTool(self):
+        #compressedimage imports the bundle module itself when it's never been imported, so that has to work too.
+        self.CreateBundle()
+        Package = sys.modules["Tools"]
+        OldBundle = sys.modules.pop("Tools.bundle")
+        del Package.bundle
+
+        try:
+            with CompressedImageTools().OpenImage(self.BundleFile) as Image:
+                self.assertEqual(Image.read(), self.Data)
+                self.assertEqual(Image.Verify(), [])
+
+        finally:
+            sys.modules["Tools.bundle"] = OldBundle
+            Package.bundle = OldBundle
+
+    def testDamagedChunk(self):
+        self.CreateBundle()
+
+        with Bundle.BundleReader(self.BundleFile) as Reader:
+            Position = Reader.Index[1][1]
+
+        #Change a byte in the second chunk.
+        with open(self.BundleFile, "r+b") as File:
+            File.seek(Position + 10)
+            Byte = File.read(1)
+            File.seek(Position + 10)
+            File.write(b"\x00" if Byte != b"\x00" else b"\x01")
+
+        with Bundle.BundleReader(self.BundleFile) as Reader:
+            self.assertEqual(Reader.Verify(), [65536])
+            self.assertEqual(Reader.pread(100, 0), self.Data[:100])
+            self.assertRaises(IOError, Reader.pread, 100, 65536)
+
+    def testAbort(self):
+        self.assertEqual(self.CreateBundle(ShouldAbort=lambda: True), None)
+        self.assertFalse(os.path.exists(self.BundleFile))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# CompressedImage test data for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+
+ChunkSize = 65536
+
+#Functions to return test data.
+def ReturnFakeDiskData():
+    """Returns some disk-like data, and the method each chunk should be stored with (0: zero, 1: raw, 2: zlib)"""
+    Data = b""
+    Methods = []
+
+    #Empty space.
+    Data += b"\x00" * ChunkSize * 2
+    Methods += [0, 0]
+
+    #Text, which compresses well.
+    Text = b"The quick brown fox jumps over the lazy dog. " * (ChunkSize * 2 // 45 + 1)
+    Data += Text[:ChunkSize * 2]
+    Methods += [2, 2]
+
+    #Random data (eg already compressed files), which doesn't compress at all.
+    Data += os.urandom(ChunkSize)
+    Methods += [1]
+
+    #A partial chunk at the end.
+    Data += Text[:ChunkSize // 3]
+    Methods += [2]
+
+    return Data, Methods
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# CompressedImage tests for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules
+import unittest
+import os
+import random
+import tempfile
+import shutil
+import struct
+
+#Import test data.
+from . import CompressedImageTestData as Data
+
+class TestCompressedImage(unittest.TestCase):
+    def setUp(self):
+        self.TempDir = tempfile.mkdtemp()
+        self.ImageFile = os.path.join(self.TempDir, "image")
+        self.Data, self.Methods = Data.ReturnFakeDiskData()
+
+        #Write in odd-sized pieces, so chunks have to be joined and split.
+        Image = CompressedImage.ImageWriter(self.ImageFile, Compression="zlib", ChunkSize=Data.ChunkSize, Processes=1)
+
+        for Offset in range(0, len(self.Data), 100000):
+            self.assertEqual(Image.write(self.Data[Offset:Offset+100000]), len(self.Data[Offset:Offset+100000]))
+
+        Image.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.ImageFile
+        del self.Data
+        del self.Methods
+
+    def testIsCompressedImage(self):
+        self.assertTrue(CompressedImage.Main().IsCompressedImage(self.ImageFile))
+
+        with open(os.path.join(self.TempDir, "raw"), "wb") as File:
+            File.write(self.Data[:4096])
+
+        self.assertFalse(CompressedImage.Main().IsCompressedImage(os.path.join(self.TempDir, "raw")))
+        self.assertFalse(CompressedImage.Main().IsCompressedImage(os.path.join(self.TempDir, "None")))
+
+    def testRead(self):
+        with CompressedImage.Main().OpenImage(self.ImageFile) as Image:
+            self.assertEqual(Image.Size, len(self.Data))
+            self.assertEqual([Entry[4] for Entry in Image.Index], self.Methods)
+            self.assertEqual(Image.read(), self.Data)
+            self.assertEqual(Image.read(), b"")
+
+    def testSeek(self):
+        Random = random.Random(1)
+
+        with CompressedImage.Main().OpenImage(self.ImageFile) as Image:
+            for Number in range(100):
+                Offset = Random.randint(0, len(self.Data) + 1000)
+                Length = Random.randint(0, Data.ChunkSize * 2)
+
+                self.assertEqual(Image.seek(Offset), Offset)
+                self.assertEqual(Image.read(Length), self.Data[Offset:Offset+Length])
+                self.assertEqual(Image.tell(), min(Offset + Length, max(Offset, len(self.Data))))
+                self.assertEqual(Image.pread(Length, Offset), self.Data[Offset:Offset+Length])
+
+            self.assertEqual(Image.seek(-10, os.SEEK_END), len(self.Data) - 10)
+            self.assertEqual(Image.read(), self.Data[-10:])
+
+    def testRebuildIndex(self):
+        #Cut off the index and the last, incomplete chunk, as if the recovery was interrupted.
+        with open(self.ImageFile, "rb") as File:
+            Image = File.read()
+
+        IndexPosition = struct.unpack(CompressedImage.TrailerFormat, Image[-struct.calcsize(CompressedImage.TrailerFormat):])[1]
+
+        with open(self.ImageFile, "wb") as File:
+            File.write(Image[:IndexPosition - 10])
+
+        with CompressedImage.Main().OpenImage(self.ImageFile) as Image:
+            self.assertEqual(Image.Size, Data.ChunkSize * (len(self.Methods) - 1))
+            self.assertEqual(Image.read(), self.Data[:Image.Size])
+
+    def testOpenRawImage(self):
+        with open(os.path.join(self.TempDir, "raw"), "wb") as File:
+            File.write(self.Data)
+
+        with CompressedImage.Main().OpenImage(os.path.join(self.TempDir, "raw")) as Image:
+            Image.seek(12345)
+            self.assertEqual(Image.read(100), self.Data[12345:12445])
+
+    def testThrottledWrite(self):
+        #Chunks compressed at different levels can be mixed in one image.
+        Image = CompressedImage.ImageWriter(os.path.join(self.TempDir, "throttled"), Compression="zlib", Level=9, ChunkSize=Data.ChunkSize, Processes=1)
+
+        for Number, Offset in enumerate(range(0, len(self.Data), Data.ChunkSize)):
+            Image.SetThrottled(Number % 2 == 1)
+            self.assertEqual(Image.Level, CompressedImage.FastestLevels["zlib"] if Number % 2 == 1 else 9)
+            Image.write(self.Data[Offset:Offset+Data.ChunkSize])
+
+        Image.close()
+
+        with CompressedImage.Main().OpenImage(os.path.join(self.TempDir, "throttled")) as Image:
+            self.assertEqual(Image.read(), self.Data)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# CopyEngine test data for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Functions to return test data.
+def ReturnFakeMapfiles():
+    Dict = {}
+
+    #Everything copied.
+    Dict[(5243003, 5243003)] = """# Rescue Logfile. Created by DDRescue-GUI's copy engine
+# current_pos  current_status
+0x0050007B     +
+#      pos        size  status
+0x00000000  0x0050007B  +
+"""
+
+    #Stopped after two blocks.
+    Dict[(2097152, 5243003)] = """# Rescue Logfile. Created by DDRescue-GUI's copy engine
+# current_pos  current_status
+0x00200000     ?
+#      pos        size  status
+0x00000000  0x00200000  +
+0x00200000  0x0030007B  ?
+"""
+
+    #Nothing copied yet.
+    Dict[(0, 5243003)] = """# Rescue Logfile. Created by DDRescue-GUI's copy engine
+# current_pos  current_status
+0x00000000     ?
+#      pos        size  status
+0x00000000  0x0050007B  ?
+"""
+
+    return Dict
+
+def ReturnFakeMapfilesWithBadRanges():
+    Dict = {}
+
+    #Two unreadable blocks, one at the very start.
+    Dict[((0, 1048576), (3145728, 1048576))] = """# Rescue Logfile. Created by DDRescue-GUI's copy engine
+# current_pos  current_status
+0x0050007B     +
+#      pos        size  status
+0x00000000  0x00100000  -
+0x00100000  0x00200000  +
+0x00300000  0x00100000  -
+0x00400000  0x0010007B  +
+"""
+
+    #The last, partial block is unreadable.
+    Dict[((4194304, 1048699),)] = """# Rescue Logfile. Created by DDRescue-GUI's copy engine
+# current_pos  current_status
+0x0050007B     +
+#      pos        size  status
+0x00000000  0x00400000  +
+0x00400000  0x0010007B  -
+"""
+
+    return Dict
@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# CopyEngine tests for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules
+import unittest
+import wx
+import os
+import tempfile
+import shutil
+import hashlib
+import Queue
+import mmap
+import io
+import threading
+import time
+
+#Import test data.
+from . import CopyEngineTestData as Data
+
+#Set up resource path and determine OS.
+if "wxGTK" in wx.PlatformInfo:
+    Linux = True
+
+elif "wxMac" in wx.PlatformInfo:
+    Linux = False
+
+class FakeFailingInput():
+    """Acts like an input file that can't read the (Start, End) ranges in BadRanges"""
+    def __init__(self, Data, BadRanges):
+        self.Data = Data
+        self.BadRanges = BadRanges
+        self.Position = 0
+
+    def seek(self, Position):
+        self.Position = Position
+
+    def readinto(self, Buffer):
+        End = self.Position + len(Buffer)
+
+        if any(Start < End and self.Position < BadEnd for Start, BadEnd in self.BadRanges):
+            raise IOError(5, "Input/output error")
+
+        Data = self.Data[self.Position:End]
+        Buffer[:len(Data)] = Data
+        self.Position += len(Data)
+        return len(Data)
+
+class TestCopy(unittest.TestCase):
+    def setUp(self):
+        #Use a size that isn't a multiple of the block size, to check the last partial block is copied.
+        self.TempDir = tempfile.mkdtemp()
+        self.InputFile = os.path.join(self.TempDir, "input")
+        self.OutputFile = os.path.join(self.TempDir, "output")
+        self.MapFile = os.path.join(self.TempDir, "mapfile")
+        self.Mapfiles = Data.ReturnFakeMapfiles()
+        self.BadRangeMapfiles = Data.ReturnFakeMapfilesWithBadRanges()
+
+        with open(self.InputFile, "wb") as File:
+            File.write(os.urandom(5243003))
+
+        with open(self.InputFile, "rb") as File:
+            self.Data = File.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.InputFile
+        del self.OutputFile
+        del self.MapFile
+        del self.Mapfiles
+        del self.BadRangeMapfiles
+        del self.Data
+
+    def ReadFile(self, File):
+        with open(File, "rb") as File:
+            return File.read()
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testCopy(self):
+        Progress = []
+        Result = CopyEngine().Copy(self.InputFile, self.OutputFile, self.MapFile, BlockSize=1048576, ProgressHandler=lambda *Args: Progress.append(Args))
+
+        self.assertEqual(Result["Result"], "Success")
+        self.assertEqual(Result["CopiedBytes"], 5243003)
+        self.assertEqual(Result["Hash"], hashlib.sha512(self.Data).hexdigest())
+        self.assertEqual(self.ReadFile(self.OutputFile), self.Data)
+        self.assertEqual(self.ReadFile(self.MapFile), self.Mapfiles[(5243003, 5243003)])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testCopyOverLongerFile(self):
+        #The end of the old file mustn't be left behind.
+        with open(self.OutputFile, "wb") as File:
+            File.write(b"\xff" * 6291456)
+
+        Result = CopyEngine().Copy(self.InputFile, self.OutputFile, self.MapFile, BlockSize=1048576)
+
+        self.assertEqual(Result["Result"], "Success")
+        self.assertEqual(self.ReadFile(self.OutputFile), self.Data)
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testMapfileWrittenAfterSync(self):
+        #Blocks should only be marked as finished in the mapfile once they're on the disk.
+        Events = []
+        Engine = CopyEngine()
+        RealSyncOutput, RealWriteMapfile = Engine.SyncOutput, Engine.WriteMapfile
+        Engine.SyncOutput = lambda Output: Events.append("Sync") or RealSyncOutput(Output)
+        Engine.WriteMapfile = lambda *Args: Events.append("Mapfile") or RealWriteMapfile(*Args)
+
+        Result = Engine.Copy(self.InputFile, self.OutputFile, self.MapFile, BlockSize=1048576, MapfileInterval=0)
+
+        self.assertEqual(Result["Result"], "Success")
+        self.assertEqual(Events[:2], ["Sync", "Mapfile"])
+        self.assertEqual(Events.count("Sync"), Events.count("Mapfile") - 1)
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testAbort(self):
+        #Abort before the third block is read.
+        Calls = []
+        Result = CopyEngine().Copy(self.InputFile, self.OutputFile, self.MapFile, BlockSize=1048576, ShouldAbort=lambda: Calls.append(None) or len(Calls) > 2)
+
+        self.assertEqual(Result["Result"], "Aborted")
+        self.assertEqual(Result["CopiedBytes"], 2097152)
+        self.assertEqual(Result["Hash"], None)
+        self.assertEqual(self.ReadFile(self.OutputFile), self.Data[:2097152])
+        self.assertEqual(self.ReadFile(self.MapFile), self.Mapfiles[(2097152, 5243003)])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testSparseCopy(self):
+        #Zero out the second and last blocks, so the output ends with a hole.
+        self.Data = self.Data[:1048576] + b"\x00" * 1048576 + self.Data[2097152:4194304] + b"\x00" * 1048699
+
+        with open(self.InputFile, "wb") as File:
+            File.write(self.Data)
+
+        Result = CopyEngine().Copy(self.InputFile, self.OutputFile, self.MapFile, BlockSize=1048576, Sparse=True)
+
+        self.assertEqual(Result["Result"], "Success")
+        self.assertEqual(Result["ZeroBytes"], 2097275)
+        self.assertEqual(Result["DataBytes"], 3145728)
+        self.assertEqual(Result["Destinations"][0]["SparseBytes"], 2097275)
+        self.assertEqual(Result["Hash"], hashlib.sha512(self.Data).hexdigest())
+        self.assertEqual(self.ReadFile(self.OutputFile), self.Data)
+
+        #A file we copy over is emptied first, so holes can be left in it too, without old data showing through.
+        Result = CopyEngine().Copy(self.InputFile, self.OutputFile, self.MapFile, BlockSize=1048576, Sparse=True)
+
+        self.assertEqual(Result["ZeroBytes"], 2097275)
+        self.assertEqual(Result["Destinations"][0]["SparseBytes"], 2097275)
+        self.assertEqual(self.ReadFile(self.OutputFile), self.Data)
+
+    def testVerifiedCopy(self):
+        #Use small regions, so there are several, and the last one is shorter.
+        Result = CopyEngine().Copy(self.InputFile, self.OutputFile, self.MapFile, BlockSize=1048576, Verify=True, VerifyRegionSize=2097152)
+
+        self.assertEqual(Result["Result"], "Success")
+        self.assertEqual(Result["Destinations"][0]["VerifiedBytes"], 5243003)
+        self.assertEqual(Result["Destinations"][0]["BadRegions"], [])
+        self.assertEqual(self.ReadFile(self.OutputFile), self.Data)
+
+    def testVerifyRegionsFindsCorruption(self):
+        with open(self.OutputFile, "wb") as File:
+            File.write(self.Data)
+
+        Engine = CopyEngine()
+        Engine.Result = {"Destinations": [{"OutputFile": self.OutputFile, "VerifiedBytes": 0, "UnverifiedBytes": 0, "BadRegions": []}]}
+
+        #The second region doesn't match what was "written", and the third is past the end of the file.
+        Regions = Queue.Queue()
+        Regions.put((0, 1048576, hashlib.md5(self.Data[:1048576]).digest()))
+        Regions.put((1048576, 1048576, hashlib.md5(b"\x00" * 1048576).digest()))
+        Regions.put((5242880, 1048576, hashlib.md5(self.Data[5242880:] + b"\x00" * 1048453).digest()))
+        Regions.put(None)
+
+        Engine.VerifyRegions(0, Regions, 1048576)
+
+        self.assertEqual(Engine.Result["Destinations"][0]["VerifiedBytes"], 1048576)
+        self.assertEqual(Engine.Result["Destinations"][0]["BadRegions"], [(1048576, 1048576), (5242880, 1048576)])
+
+    def testVerifyRegionsWithoutBypassingCache(self):
+        with open(self.OutputFile, "wb") as File:
+            File.write(self.Data)
+
+        #Act like a filesystem without O_DIRECT, on an OS without posix_fadvise().
+        Engine = CopyEngine()
+        Engine.OpenInput = lambda Path: os.open(Path, os.O_RDONLY)
+        Engine.DropCache = lambda *Args: False
+        Engine.Result = {"Destinations": [{"OutputFile": self.OutputFile, "VerifiedBytes": 0, "UnverifiedBytes": 0, "BadRegions": []}]}
+
+        Regions = Queue.Queue()
+        Regions.put((0, 1048576, hashlib.md5(self.Data[:1048576]).digest()))
+        Regions.put(None)
+
+        Engine.VerifyRegions(0, Regions, 1048576)
+
+        #A match from the page cache proves nothing.
+        self.assertEqual(Engine.Result["Destinations"][0]["VerifiedBytes"], 0)
+        self.assertEqual(Engine.Result["Destinations"][0]["UnverifiedBytes"], 1048576)
+
+    def testWriteBlocksHashesWhatWasWritten(self):
+        #The destination's hash should come from the blocks it was given (the hole included), not from the input.
+        Engine = CopyEngine()
+        Engine.Result = {"BadRanges": [], "Destinations": [{"OutputFile": self.OutputFile, "MapFile": "", "Result": "Success", "CopiedBytes": 0, "SparseBytes": 0, "Time": 0, "Throughput": 0, "Error": None, "Hash": None}]}
+        Engine.BufferUsers = {}
+        Engine.BufferLock = threading.Lock()
+
+        Blocks = Queue.Queue()
+        FreeBuffers = Queue.Queue()
+        Written = b""
+
+        for Position, Block in ((0, self.Data[:1048576]), (1048576, b"\x00" * 1048576), (2097152, self.Data[2097152:2097252])):
+            Buffer = mmap.mmap(-1, 1048576)
+            Buffer[:len(Block)] = Block
+            Engine.BufferUsers[id(Buffer)] = 1
+            Blocks.put((Position, Buffer, len(Block), Block == b"\x00" * len(Block)))
+            Written += Block
+
+        Blocks.put((2097252, None, "Success", False))
+
+        Engine.WriteBlocks(0, io.FileIO(self.OutputFile, "wb"), 2097252, FreeBuffers, Blocks, 5, time.time(), Sparse=True)
+
+        self.assertEqual(Engine.Result["Destinations"][0]["SparseBytes"], 1048576)
+        self.assertEqual(self.ReadFile(self.OutputFile), Written)
+        self.assertEqual(Engine.Result["Destinations"][0]["Hash"], hashlib.sha512(Written).hexdigest())
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testDropCache(self):
+        with open(self.InputFile, "rb") as File:
+            self.assertTrue(CopyEngine().DropCache(File.fileno(), 0, 5243003))
+
+    def testReadBadBlock(self):
+        #Sectors 3 and 4, and the last one, can't be read. Everything else in the block should be salvaged.
+        Input = FakeFailingInput(self.Data, [(1536, 2560), (7680, 8192)])
+        Buffer = mmap.mmap(-1, 8192)
+
+        BadRanges = CopyEngine().ReadBadBlock(Input, Buffer, 0, 8192, 512)
+
+        self.assertEqual(BadRanges, [(1536, 1024), (7680, 512)])
+        self.assertEqual(Buffer[:1536], self.Data[:1536])
+        self.assertEqual(Buffer[1536:2560], b"\x00" * 1024)
+        self.assertEqual(Buffer[2560:7680], self.Data[2560:7680])
+        self.assertEqual(Buffer[7680:], b"\x00" * 512)
+
+    def testWriteMapfile(self):
+        for CopiedBytes, Size in self.Mapfiles:
+            CopyEngine().WriteMapfile(self.MapFile, CopiedBytes, Size)
+            self.assertEqual(self.ReadFile(self.MapFile), self.Mapfiles[(CopiedBytes, Size)])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testCopyCompressed(self):
+        Result = CopyEngine().Copy(self.InputFile, self.OutputFile, self.MapFile, BlockSize=1048576, Compression="zlib", SkipBadBlocks=True)
+
+        self.assertEqual(Result["Result"], "Success")
+        self.assertEqual(Result["BadRanges"], [])
+        self.assertEqual(Result["Hash"], hashlib.sha512(self.Data).hexdigest())
+        self.assertTrue(CompressedImageTools().IsCompressedImage(self.OutputFile))
+
+        with CompressedImageTools().OpenImage(self.OutputFile) as Image:
+            self.assertEqual(Image.read(), self.Data)
+
+        self.assertEqual(self.ReadFile(self.MapFile), self.Mapfiles[(5243003, 5243003)])
+
+    def testWriteMapfileWithBadRanges(self):
+        for BadRanges in self.BadRangeMapfiles:
+            CopyEngine().WriteMapfile(self.MapFile, 5243003, 5243003, BadRanges)
+            self.assertEqual(self.ReadFile(self.MapFile), self.BadRangeMapfiles[BadRanges])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testCopySegmented(self):
+        Result = CopyEngine().Copy(self.InputFile, self.OutputFile, self.MapFile, BlockSize=1048576, SegmentSize=2097152, SkipBadBlocks=True)
+
+        self.assertEqual(Result["Result"], "Success")
+        self.assertEqual(Result["Hash"], hashlib.sha512(self.Data).hexdigest())
+        self.assertEqual(self.ReadFile(self.OutputFile+".003"), self.Data[4194304:])
+
+        with CompressedImageTools().OpenImage(self.OutputFile) as Image:
+            self.assertEqual(Image.read(), self.Data)
+
+        self.assertEqual(self.ReadFile(self.MapFile), self.Mapfiles[(5243003, 5243003)])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testCopyToTwoDestinations(self):
+        Result = CopyEngine().Copy(self.InputFile, self.OutputFile, self.MapFile, BlockSize=1048576, ExtraOutputs=[(self.OutputFile+"2", self.MapFile+"2")])
+
+        self.assertEqual(Result["Result"], "Success")
+        self.assertEqual(Result["Hash"], hashlib.sha512(self.Data).hexdigest())
+        self.assertEqual([Destination["OutputFile"] for Destination in Result["Destinations"]], [self.OutputFile, self.OutputFile+"2"])
+
+        for Destination in Result["Destinations"]:
+            self.assertEqual(Destination["Result"], "Success")
+            self.assertEqual(Destination["CopiedBytes"], 5243003)
+            self.assertEqual(Destination["Hash"], Result["Hash"])
+            self.assertTrue(Destination["Throughput"] > 0)
+            self.assertEqual(self.ReadFile(Destination["OutputFile"]), self.Data)
+            self.assertEqual(self.ReadFile(Destination["MapFile"]), self.Mapfiles[(5243003, 5243003)])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testOneDestinationFails(self):
+        #Writing to /dev/full always fails, but the other destination should still get everything.
+        Result = CopyEngine().Copy(self.InputFile, self.OutputFile, self.MapFile, BlockSize=1048576, ExtraOutputs=[("/dev/full", self.MapFile+"2")])
+
+        self.assertEqual(Result["Result"], "WriteError")
+        self.assertEqual(Result["Hash"], None)
+        self.assertEqual(Result["Destinations"][0]["Result"], "Success")
+        self.assertEqual(Result["Destinations"][0]["Hash"], hashlib.sha512(self.Data).hexdigest())
+        self.assertEqual(Result["Destinations"][1]["Result"], "WriteError")
+        self.assertEqual(Result["Destinations"][1]["Hash"], None)
+        self.assertEqual(self.ReadFile(self.OutputFile), self.Data)
+        self.assertEqual(self.ReadFile(self.MapFile), self.Mapfiles[(5243003, 5243003)])
+        self.assertEqual(self.ReadFile(self.MapFile+"2"), self.Mapfiles[(0, 5243003)])
@@ -775,3 +775,156 @@ def ReturnFakeLVMOutput():
 
 def ReturnFakeBlockDevOutput():
     return ["No such file or device", "512", "1024", "2048", "4096", "8192"]
+
+def ReturnFakeSysBlockTree():
+    #Files to create under a fake /sys/block, relative to it.
+    Tree = {}
+    Tree["sda/queue/physical_block_size"] = "4096\n"
+    Tree["sda/queue/logical_block_size"] = "512\n"
+    Tree["sda/queue/optimal_io_size"] = "0\n"
+    Tree["sda/queue/max_sectors_kb"] = "1280\n"
+    Tree["sda/queue/rotational"] = "1\n"
+    Tree["sda/size"] = "1953525168\n"
+    Tree["sda/device/vendor"] = "ATA     \n"
+    Tree["sda/device/model"] = "ST1000DM003-1CH1\n"
+    Tree["sda/device/vpd_pg80"] = "\x00\x00\x00\x14            Z1D5ABCD"
+    Tree["sda/sda1/size"] = "2048\n"
+    Tree["sda/sda1/partition"] = "1\n"
+    Tree["mmcblk0/queue/physical_block_size"] = "512\n"
+    Tree["mmcblk0/queue/logical_block_size"] = "512\n"
+    Tree["mmcblk0/queue/rotational"] = "0\n"
+    Tree["dm-0/dm/name"] = "fedora-root\n"
+    Tree["dm-0/queue/physical_block_size"] = "4096\n"
+    Tree["dm-0/queue/logical_block_size"] = "4096\n"
+    Tree["dm-0/queue/optimal_io_size"] = "0\n"
+    Tree["dm-0/queue/max_sectors_kb"] = "512\n"
+    Tree["dm-0/queue/rotational"] = "1\n"
+
+    return Tree
+
+def ReturnFakeGeometryInfo():
+    GeometryInfo = {}
+
+    GeometryInfo["/dev/sda"] = {}
+    GeometryInfo["/dev/sda"]["PhysicalBlockSize"] = "4096"
+    GeometryInfo["/dev/sda"]["LogicalBlockSize"] = "512"
+    GeometryInfo["/dev/sda"]["OptimalIOSize"] = "0"
+    GeometryInfo["/dev/sda"]["MaxSectorsKB"] = "1280"
+    GeometryInfo["/dev/sda"]["Rotational"] = "1"
+
+    #Missing files should be "Unknown".
+    GeometryInfo["/dev/mmcblk0"] = {}
+    GeometryInfo["/dev/mmcblk0"]["PhysicalBlockSize"] = "512"
+    GeometryInfo["/dev/mmcblk0"]["LogicalBlockSize"] = "512"
+    GeometryInfo["/dev/mmcblk0"]["OptimalIOSize"] = "Unknown"
+    GeometryInfo["/dev/mmcblk0"]["MaxSectorsKB"] = "Unknown"
+    GeometryInfo["/dev/mmcblk0"]["Rotational"] = "0"
+
+    #Device mapper devices should use their /dev/mapper names.
+    GeometryInfo["/dev/mapper/fedora-root"] = {}
+    GeometryInfo["/dev/mapper/fedora-root"]["PhysicalBlockSize"] = "4096"
+    GeometryInfo["/dev/mapper/fedora-root"]["LogicalBlockSize"] = "4096"
+    GeometryInfo["/dev/mapper/fedora-root"]["OptimalIOSize"] = "0"
+    GeometryInfo["/dev/mapper/fedora-root"]["MaxSectorsKB"] = "512"
+    GeometryInfo["/dev/mapper/fedora-root"]["Rotational"] = "1"
+
+    return GeometryInfo
+
+def ReturnFakeProbeResults():
+    ProbeResults = {}
+
+    ProbeResults["/dev/sda"] = {}
+    ProbeResults["/dev/sda"]["Vendor"] = "ATA"
+    ProbeResults["/dev/sda"]["Product"] = "ST1000DM003-1CH1"
+    ProbeResults["/dev/sda"]["Serial"] = "Z1D5ABCD"
+    ProbeResults["/dev/sda"]["RawCapacity"] = "1000204886016"
+    ProbeResults["/dev/sda"]["Partitions"] = {"/dev/sda1": "1048576"}
+
+    ProbeResults["/dev/mmcblk0"] = {}
+    ProbeResults["/dev/mmcblk0"]["Vendor"] = "Unknown"
+    ProbeResults["/dev/mmcblk0"]["Product"] = "Unknown"
+    ProbeResults["/dev/mmcblk0"]["Serial"] = "Unknown"
+    ProbeResults["/dev/mmcblk0"]["RawCapacity"] = "Unknown"
+    ProbeResults["/dev/mmcblk0"]["Partitions"] = {}
+
+    return ProbeResults
+
+def ReturnFakeSMARTOutput():
+    return """smartctl 6.6 2016-05-31 r4324 [x86_64-linux-4.9.0-3-amd64] (local build)
+Copyright (C) 2002-16, Bruce Allen, Christian Franke, www.smartmontools.org
+
+=== START OF INFORMATION SECTION ===
+Model Family:     Seagate Barracuda 7200.14 (AF)
+Device Model:     ST1000DM003-1CH162
+Serial Number:    Z1D5ABCD
+LU WWN Device Id: 5 000c50 0652e1c8b
+Firmware Version: CC47
+User Capacity:    1,000,204,886,016 bytes [1.00 TB]
+Sector Sizes:     512 bytes logical, 4096 bytes physical
+Rotation Rate:    7200 rpm
+Device is:        In smartctl database [for details use: -P show]
+ATA Version is:   ACS-2, ACS-3 T13/2161-D revision 3b
+SATA Version is:  SATA 3.1, 6.0 Gb/s (current: 3.0 Gb/s)
+Local Time is:    Sat Jul  1 14:20:11 2017 BST
+SMART support is: Available - device has SMART capability.
+SMART support is: Enabled
+
+=== START OF READ SMART DATA SECTION ===
+SMART overall-health self-assessment test result: PASSED
+
+SMART Attributes Data Structure revision number: 10
+Vendor Specific SMART Attributes with Thresholds:
+ID# ATTRIBUTE_NAME          FLAGS    VALUE WORST THRESH FAIL RAW_VALUE
+  1 Raw_Read_Error_Rate     POSR--   108   099   006    -    18937256
+  3 Spin_Up_Time            PO----   095   094   000    -    0
+  5 Reallocated_Sector_Ct   PO--CK   098   098   010    -    1672
+  9 Power_On_Hours          -O--CK   080   080   000    -    17904
+194 Temperature_Celsius     -O---K   035   046   000    -    35 (0 15 0 0 0)
+197 Current_Pending_Sector  -O--C-   100   099   000    -    16
+198 Offline_Uncorrectable   ----C-   100   099   000    -    16
+199 UDMA_CRC_Error_Count    -OSRCK   200   200   000    -    3
+                            ||||||_ K auto-keep
+                            |||||__ C event count
+                            ||||___ R error rate
+                            |||____ S speed/performance
+                            ||_____ O updated online
+                            |______ P prefailure warning
+
+SMART Extended Comprehensive Error Log Version: 1 (5 sectors)
+Device Error Count: 2
+    CR     = Command Register
+    FEATR  = Features Register
+
+Error 2 [1] occurred at disk power-on lifetime: 17890 hours (745 days + 10 hours)
+  When the command that caused the error occurred, the device was active or idle.
+
+  After command completion occurred, registers were:
+  ER -- ST COUNT  LBA_48  LH LM LL DV DC
+  -- -- -- == -- == == == -- -- -- -- --
+  40 -- 51 00 00 00 00 1d 4c 2a 38 00 00  Error: UNC at LBA = 0x1d4c2a38 = 491526712
+
+Error 1 [0] occurred at disk power-on lifetime: 17889 hours (745 days + 9 hours)
+  When the command that caused the error occurred, the device was active or idle.
+
+  After command completion occurred, registers were:
+  ER -- ST COUNT  LBA_48  LH LM LL DV DC
+  -- -- -- == -- == == == -- -- -- -- --
+  40 -- 51 00 00 00 00 00 00 08 00 00 00  Error: UNC at LBA = 0x00000800 = 2048
+
+SMART Extended Self-test Log Version: 1 (1 sectors)
+Num  Test_Description    Status                  Remaining  LifeTime(hours)  LBA_of_first_error
+# 1  Short offline       Completed: read failure       90%     17895         491526720
+# 2  Short offline       Completed without error       00%     17000         -
+"""
+
+def ReturnFakeSMARTInfo():
+    SMARTInfo = {}
+    SMARTInfo["SMARTStatus"] = "OK"
+    SMARTInfo["SMARTHealth"] = "PASSED"
+    SMARTInfo["ReallocatedSectors"] = "1672"
+    SMARTInfo["PendingSectors"] = "16"
+    SMARTInfo["OfflineUncorrectable"] = "16"
+    SMARTInfo["UDMACRCErrors"] = "3"
+    SMARTInfo["SMARTErrorLBAs"] = [2048, 491526712, 491526720]
+
+    return SMARTInfo
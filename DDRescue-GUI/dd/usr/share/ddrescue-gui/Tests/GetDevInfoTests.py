@@ -26,6 +26,9 @@ import unittest
 import wx
 import os
 import plistlib
+import tempfile
+import shutil
+import time
 
 #import test data.
 from . import GetDevInfoTestData as Data
@@ -286,3 +289,300 @@ class TestComputeBlockSize(unittest.TestCase):
     def testComputeBlockSize(self):
         for Data in self.BlockSizes:
             self.assertEqual(DevInfoTools().ComputeBlockSize("FakeDisk", Data), self.CorrectResults[self.BlockSizes.index(Data)])
+
+class TestGetGeometryInfo(unittest.TestCase):
+    def setUp(self):
+        #Create a fake /sys/block to read from.
+        self.SysBlockPath = tempfile.mkdtemp()
+        Tree = Data.ReturnFakeSysBlockTree()
+
+        for File in Tree:
+            if not os.path.isdir(os.path.dirname(os.path.join(self.SysBlockPath, File))):
+                os.makedirs(os.path.dirname(os.path.join(self.SysBlockPath, File)))
+
+            with open(os.path.join(self.SysBlockPath, File), "w") as FileObj:
+                FileObj.write(Tree[File])
+
+        self.CorrectGeometryInfo = Data.ReturnFakeGeometryInfo()
+        GetDevInfo.getdevinfo.DiskInfo = Data.ReturnFakeDiskInfoLinux()
+
+    def tearDown(self):
+        shutil.rmtree(self.SysBlockPath)
+        del self.SysBlockPath
+        del self.CorrectGeometryInfo
+        del GetDevInfo.getdevinfo.DiskInfo
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testGetGeometryInfo(self):
+        self.assertEqual(DevInfoTools().GetGeometryInfo(SysBlockPath=self.SysBlockPath), self.CorrectGeometryInfo)
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testAddGeometryInfo(self):
+        DevInfoTools().AddGeometryInfo(self.CorrectGeometryInfo)
+
+        #Partitions should get the info from their host device.
+        for Disk in ["/dev/sda", "/dev/sda1", "/dev/sda2", "/dev/sda3"]:
+            self.assertEqual(GetDevInfo.getdevinfo.DiskInfo[Disk]["PhysicalBlockSize"], "4096")
+            self.assertEqual(GetDevInfo.getdevinfo.DiskInfo[Disk]["MaxSectorsKB"], "1280")
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testGetBlockSizeFromDiskInfo(self):
+        DevInfoTools().AddGeometryInfo(self.CorrectGeometryInfo)
+        self.assertEqual(DevInfoTools().GetBlockSize("/dev/sda1"), "4096")
+
+class TestProbeDevices(unittest.TestCase):
+    def setUp(self):
+        #Create a fake /sys/block to read from.
+        self.SysBlockPath = tempfile.mkdtemp()
+        Tree = Data.ReturnFakeSysBlockTree()
+
+        for File in Tree:
+            if not os.path.isdir(os.path.dirname(os.path.join(self.SysBlockPath, File))):
+                os.makedirs(os.path.dirname(os.path.join(self.SysBlockPath, File)))
+
+            with open(os.path.join(self.SysBlockPath, File), "w") as FileObj:
+                FileObj.write(Tree[File])
+
+        self.CorrectProbeResults = Data.ReturnFakeProbeResults()
+        GetDevInfo.getdevinfo.DiskInfo = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.SysBlockPath)
+        del self.SysBlockPath
+        del self.CorrectProbeResults
+        del GetDevInfo.getdevinfo.DiskInfo
+
+    def FakeProbe(self, Disk):
+        if Disk == "/dev/sdb":
+            #Pretend to be a dying drive.
+            time.sleep(5)
+
+        elif Disk == "/dev/sdc":
+            raise IOError("Input/output error")
+
+        return Disk
+
+    def FakeRunCommand(self, Command, Timeout):
+        if Command[0] == "udevadm":
+            return "DEVNAME=/dev/mmcblk0\nID_VENDOR=Generic\nID_MODEL=SD_Card\n"
+
+        elif Command[0] == "blockdev":
+            return "15931539456\n"
+
+        elif Command[0] == "smartctl":
+            return Data.ReturnFakeSMARTOutput()
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testListDevices(self):
+        #Device mapper devices are left to lvdisplay.
+        self.assertEqual(DevInfoTools().ListDevices(SysBlockPath=self.SysBlockPath), ["/dev/mmcblk0", "/dev/sda"])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testProbeDevice(self):
+        #Don't ask the real udev or devices about anything.
+        Tools = DevInfoTools()
+        Tools.RunCommand = lambda Command, Timeout: ""
+
+        for Disk in ["/dev/sda", "/dev/mmcblk0"]:
+            self.assertEqual(Tools.ProbeDevice(Disk, SysBlockPath=self.SysBlockPath), self.CorrectProbeResults[Disk])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testProbeDeviceQueriesDevice(self):
+        #Anything missing from sysfs should come from udev and the device itself, and SMART info too if asked for.
+        Tools = DevInfoTools()
+        Tools.RunCommand = self.FakeRunCommand
+        Result = Tools.ProbeDevice("/dev/mmcblk0", SysBlockPath=self.SysBlockPath, SMART=True)
+
+        self.assertEqual(Result["Vendor"], "Generic")
+        self.assertEqual(Result["Product"], "SD Card")
+        self.assertEqual(Result["RawCapacity"], "15931539456")
+        self.assertEqual(Result["SMART"], Data.ReturnFakeSMARTInfo())
+
+    def testRunCommandCommunicateFails(self):
+        #If communicate() raises, we should get no output rather than an IndexError.
+        class FakeProcess(object):
+            def communicate(self):
+                raise IOError("Input/output error")
+
+        RealPopen = GetDevInfo.getdevinfo.subprocess.Popen
+        GetDevInfo.getdevinfo.subprocess.Popen = lambda *Args, **Kwargs: FakeProcess()
+
+        try:
+            self.assertEqual(DevInfoTools().RunCommand(["lshw"], Timeout=5), "")
+
+        finally:
+            GetDevInfo.getdevinfo.subprocess.Popen = RealPopen
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testProbeDevices(self):
+        #The slow probe must not hold up the others, or use up the pool.
+        StartTime = time.time()
+        Results = DevInfoTools().ProbeDevices(["/dev/sda", "/dev/sdb", "/dev/sdc", "/dev/sdd", "/dev/sde"], self.FakeProbe, Timeout=0.5, MaxWorkers=2)
+
+        self.assertTrue(time.time() - StartTime < 3)
+        self.assertEqual(Results, {"/dev/sda": "/dev/sda", "/dev/sdb": "probe timed out", "/dev/sdc": "probe failed", "/dev/sdd": "/dev/sdd", "/dev/sde": "/dev/sde"})
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testAddProbeResults(self):
+        self.CorrectProbeResults["/dev/sdb"] = "probe timed out"
+        DevInfoTools().AddProbeResults(self.CorrectProbeResults)
+        DiskInfo = GetDevInfo.getdevinfo.DiskInfo
+
+        self.assertEqual(DiskInfo["/dev/sda"]["Capacity"], "1 TB")
+        self.assertEqual(DiskInfo["/dev/sda"]["Partitions"], ["/dev/sda1"])
+        self.assertEqual(DiskInfo["/dev/sda1"]["HostDevice"], "/dev/sda")
+        self.assertEqual(DiskInfo["/dev/sda1"]["Capacity"], "1 MB")
+        self.assertEqual(DiskInfo["/dev/sda"]["ProbeStatus"], "OK")
+        self.assertEqual(DiskInfo["/dev/sdb"]["ProbeStatus"], "probe timed out")
+        self.assertEqual(DiskInfo["/dev/sdb"]["Description"], "Unknown (probe timed out)")
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testAddProbeResultsFillsInLshwInfo(self):
+        #Devices lshw found should get anything it couldn't tell us from the probes.
+        DiskInfo = GetDevInfo.getdevinfo.DiskInfo
+        DiskInfo["/dev/sda"] = {"Name": "/dev/sda", "Type": "Device", "HostDevice": "N/A", "Partitions": [], "Vendor": "Unknown", "Product": "Disk", "RawCapacity": "Unknown", "Capacity": "Unknown", "Description": "ATA Disk"}
+        self.CorrectProbeResults["/dev/sda"]["SMART"] = Data.ReturnFakeSMARTInfo()
+
+        DevInfoTools().AddProbeResults(self.CorrectProbeResults)
+
+        self.assertEqual(DiskInfo["/dev/sda"]["Vendor"], "ATA")
+        self.assertEqual(DiskInfo["/dev/sda"]["Product"], "Disk")
+        self.assertEqual(DiskInfo["/dev/sda"]["Capacity"], "1 TB")
+        self.assertEqual(DiskInfo["/dev/sda"]["SMARTStatus"], Data.ReturnFakeSMARTInfo()["SMARTStatus"])
+
+class TestDeviceInfoCache(unittest.TestCase):
+    def setUp(self):
+        #Create a fake /sys/block to read from.
+        self.SysBlockPath = tempfile.mkdtemp()
+        self.CachePath = os.path.join(self.SysBlockPath, "cache", "devinfo.json")
+        Tree = Data.ReturnFakeSysBlockTree()
+
+        for File in Tree:
+            if not os.path.isdir(os.path.dirname(os.path.join(self.SysBlockPath, File))):
+                os.makedirs(os.path.dirname(os.path.join(self.SysBlockPath, File)))
+
+            with open(os.path.join(self.SysBlockPath, File), "w") as FileObj:
+                FileObj.write(Tree[File])
+
+        GetDevInfo.getdevinfo.DiskInfo = {}
+        DevInfoTools().AddProbeResults(Data.ReturnFakeProbeResults())
+
+    def tearDown(self):
+        shutil.rmtree(self.SysBlockPath)
+        del self.SysBlockPath
+        del self.CachePath
+        del GetDevInfo.getdevinfo.DiskInfo
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testGetCacheKey(self):
+        self.assertEqual(DevInfoTools().GetCacheKey("Z1D5ABCD", "1000204886016"), "Z1D5ABCD-1000204886016")
+        self.assertEqual(DevInfoTools().GetCacheKey("Unknown", "1000204886016"), None)
+        self.assertEqual(DevInfoTools().GetCacheKey("Z1D5ABCD", "Unknown"), None)
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testNoCache(self):
+        self.assertEqual(DevInfoTools().GetCachedInfo(CachePath=self.CachePath, SysBlockPath=self.SysBlockPath), {})
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testDamagedCache(self):
+        os.makedirs(os.path.dirname(self.CachePath))
+
+        with open(self.CachePath, "w") as CacheFile:
+            CacheFile.write("{\"Version\": 1, \"Devi")
+
+        self.assertEqual(DevInfoTools().GetCachedInfo(CachePath=self.CachePath, SysBlockPath=self.SysBlockPath), {})
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testSaveAndGetCachedInfo(self):
+        DevInfoTools().SaveCache(GetDevInfo.getdevinfo.DiskInfo, CachePath=self.CachePath)
+
+        #Pretend the disk has come back with a new name. mmcblk0 has no serial number, so it can't be cached.
+        os.rename(os.path.join(self.SysBlockPath, "sda"), os.path.join(self.SysBlockPath, "sdb"))
+        os.rename(os.path.join(self.SysBlockPath, "sdb", "sda1"), os.path.join(self.SysBlockPath, "sdb", "sdb1"))
+        CachedInfo = DevInfoTools().GetCachedInfo(CachePath=self.CachePath, SysBlockPath=self.SysBlockPath)
+
+        self.assertEqual(sorted(CachedInfo.keys()), ["/dev/sdb", "/dev/sdb1"])
+        self.assertEqual(CachedInfo["/dev/sdb"]["Partitions"], ["/dev/sdb1"])
+        self.assertEqual(CachedInfo["/dev/sdb"]["Product"], "ST1000DM003-1CH1")
+        self.assertEqual(CachedInfo["/dev/sdb"]["ProbeStatus"], "cached")
+        self.assertEqual(CachedInfo["/dev/sdb1"]["Name"], "/dev/sdb1")
+        self.assertEqual(CachedInfo["/dev/sdb1"]["HostDevice"], "/dev/sdb")
+        self.assertEqual(CachedInfo["/dev/sdb1"]["Capacity"], "1 MB")
+
+    def testRenamePartition(self):
+        self.assertEqual(DevInfoTools().RenamePartition("/dev/sda1", "/dev/sda", "/dev/sdb"), "/dev/sdb1")
+        self.assertEqual(DevInfoTools().RenamePartition("/dev/sda", "/dev/sda", "/dev/sdb"), "/dev/sdb")
+        self.assertEqual(DevInfoTools().RenamePartition("/dev/nvme0n1p2", "/dev/nvme0n1", "/dev/nvme1n1"), "/dev/nvme1n1p2")
+
+        #The same SD card in a USB reader, then a built-in one, and back again.
+        self.assertEqual(DevInfoTools().RenamePartition("/dev/sdb1", "/dev/sdb", "/dev/mmcblk0"), "/dev/mmcblk0p1")
+        self.assertEqual(DevInfoTools().RenamePartition("/dev/mmcblk0p1", "/dev/mmcblk0", "/dev/sdb"), "/dev/sdb1")
+
+class TestSMART(unittest.TestCase):
+    def setUp(self):
+        self.TempDir = tempfile.mkdtemp()
+        self.CorrectSMARTInfo = Data.ReturnFakeSMARTInfo()
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.CorrectSMARTInfo
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testParseSMARTOutput(self):
+        self.assertEqual(DevInfoTools().ParseSMARTOutput(Data.ReturnFakeSMARTOutput()), self.CorrectSMARTInfo)
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testParseNoSMARTOutput(self):
+        #eg when smartctl isn't installed.
+        self.assertEqual(DevInfoTools().ParseSMARTOutput("")["SMARTStatus"], "Unavailable")
+        self.assertEqual(DevInfoTools().SuggestStrategy(DevInfoTools().ParseSMARTOutput(""))["SkipRanges"], [])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testSuggestStrategy(self):
+        Strategy = DevInfoTools().SuggestStrategy(self.CorrectSMARTInfo, SectorSize=512, SkipSize=1048576)
+
+        self.assertEqual(Strategy["BadSectorRetries"], "-r 0")
+
+        #The two nearby LBAs should share one range.
+        self.assertEqual(Strategy["SkipRanges"], [(1048576, 1048576), (251661385728, 1048576)])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testSuggestStrategyNoRetriesReason(self):
+        #Only the error log has problems, so that's the reason given.
+        self.CorrectSMARTInfo["PendingSectors"] = "0"
+        self.CorrectSMARTInfo["OfflineUncorrectable"] = "0"
+
+        Strategy = DevInfoTools().SuggestStrategy(self.CorrectSMARTInfo)
+
+        self.assertEqual(Strategy["BadSectorRetries"], "-r 0")
+        self.assertIn("Bad sectors won't be retried, because its error log has "+unicode(len(self.CorrectSMARTInfo["SMARTErrorLBAs"]))+" read errors.", Strategy["Notes"])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testSuggestStrategyHealthyDisk(self):
+        self.CorrectSMARTInfo["PendingSectors"] = "0"
+        self.CorrectSMARTInfo["OfflineUncorrectable"] = "0"
+        self.CorrectSMARTInfo["SMARTErrorLBAs"] = []
+
+        Strategy = DevInfoTools().SuggestStrategy(self.CorrectSMARTInfo)
+
+        self.assertEqual(Strategy["BadSectorRetries"], None)
+        self.assertEqual(Strategy["SkipRanges"], [])
+
+    @unittest.skipUnless(Linux, "Linux-specific test")
+    def testWriteInitialMapfile(self):
+        MapFile = os.path.join(self.TempDir, "mapfile")
+
+        self.assertTrue(DevInfoTools().WriteInitialMapfile(MapFile, 4194304, [(0, 1048576), (2097152, 1048576)]))
+
+        with open(MapFile) as File:
+            Lines = [Line for Line in File.read().split("\n") if Line != "" and Line[0] != "#"]
+
+        self.assertEqual(Lines, ["0x00000000     ?", "0x00000000  0x00100000  *", "0x00100000  0x00100000  ?", "0x00200000  0x00100000  *", "0x00300000  0x00100000  ?"])
+
+        #An existing mapfile must be left alone, so the recovery can be resumed.
+        self.assertFalse(DevInfoTools().WriteInitialMapfile(MapFile, 4194304, []))
+
+    def testWriteInitialMapfileWithoutMapfile(self):
+        #The user can choose not to use a mapfile, and then there's nowhere to mark the areas to skip.
+        self.assertFalse(DevInfoTools().WriteInitialMapfile("", 4194304, [(0, 1048576)]))
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Governor test data for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+
+#Functions to return test data.
+def ReturnFakeThermalZones():
+    """Temperatures of a Raspberry Pi 3's thermal zones, in thousandths of a degree C, like /sys/class/thermal has them"""
+    return {"thermal_zone0": "62838\n", "thermal_zone1": "81500\n", "cooling_device0": "0\n"}
+
+def ReturnFakeThrottleFlags():
+    """Throttle flags as vcgencmd and the firmware's sysfs file print them, with what they should be read as, and the conditions happening now"""
+    return [("throttled=0x50005\n", 0x50005, ["under-voltage", "throttled"]),
+            ("0x50000\n", 0x50000, []),
+            ("e0008\n", 0xE0008, ["soft temperature limit"]),
+            ("throttled=0x0\n", 0x0, [])]
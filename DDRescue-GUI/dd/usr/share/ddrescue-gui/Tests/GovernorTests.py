@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Governor tests for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules
+import unittest
+import os
+import tempfile
+import shutil
+
+#Import test data.
+from . import GovernorTestData as Data
+
+class TestGovernor(unittest.TestCase):
+    def setUp(self):
+        #Stand-ins for /sys/class/thermal and the firmware's throttle flags.
+        self.TempDir = tempfile.mkdtemp()
+        self.ThermalPath = os.path.join(self.TempDir, "thermal")
+        self.ThrottlePath = os.path.join(self.TempDir, "get_throttled")
+
+        for Zone, Temperature in Data.ReturnFakeThermalZones().items():
+            os.makedirs(os.path.join(self.ThermalPath, Zone))
+            self.WriteFile(os.path.join(self.ThermalPath, Zone, "temp"), Temperature)
+
+        self.WriteFile(self.ThrottlePath, "throttled=0x0\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.ThermalPath
+        del self.ThrottlePath
+
+    def WriteFile(self, Path, Contents):
+        with open(Path, "w") as File:
+            File.write(Contents)
+
+    def testReadTemperature(self):
+        #The hottest zone counts.
+        self.assertEqual(GovernorTools().ReadTemperature(self.ThermalPath), 81.5)
+        self.assertEqual(GovernorTools().ReadTemperature(os.path.join(self.ThermalPath, "thermal_zone0", "temp")), 62.838)
+        self.assertEqual(GovernorTools().ReadTemperature(os.path.join(self.TempDir, "None")), None)
+
+    def testReadThrottleFlags(self):
+        for Contents, Flags, Conditions in Data.ReturnFakeThrottleFlags():
+            self.WriteFile(self.ThrottlePath, Contents)
+            self.assertEqual(GovernorTools().ReadThrottleFlags(self.ThrottlePath), Flags)
+            self.assertEqual(GovernorTools().DescribeThrottleFlags(Flags), Conditions)
+
+        self.WriteFile(self.ThrottlePath, "error=1\n")
+        self.assertEqual(GovernorTools().ReadThrottleFlags(self.ThrottlePath), None)
+        self.assertEqual(GovernorTools().ReadThrottleFlags(os.path.join(self.TempDir, "None")), None)
+
+    def testIsThrottled(self):
+        #Throttling in the past doesn't count.
+        self.assertFalse(GovernorTools().IsThrottled(60.0, 0x50000))
+        self.assertTrue(GovernorTools().IsThrottled(60.0, 0x50005))
+
+        #Too hot, even if the flags can't be read.
+        self.assertTrue(GovernorTools().IsThrottled(85.0, None))
+        self.assertFalse(GovernorTools().IsThrottled(None, None))
+
+    def testGovernor(self):
+        Changes = []
+        Governor = GovernorModule.Governor(ThermalPath=os.path.join(self.ThermalPath, "thermal_zone0", "temp"), ThrottlePath=self.ThrottlePath, Interval=3600, ChangeHandler=Changes.append)
+
+        #Take the samples by hand from here on.
+        Governor.Stop()
+        Governor.join()
+        del Changes[:]
+        del Governor.History[:]
+
+        Governor.RecordReadRate("30 MB/s")
+        self.assertFalse(Governor.Sample()["Throttled"])
+
+        self.WriteFile(self.ThrottlePath, "throttled=0x50005\n")
+        Governor.RecordReadRate("12 MB/s")
+        self.assertTrue(Governor.Sample()["Throttled"])
+        self.assertTrue(Governor.Throttled)
+        self.assertTrue(Governor.Sample()["Throttled"])
+
+        self.WriteFile(self.ThrottlePath, "throttled=0x50000\n")
+        self.assertFalse(Governor.Sample()["Throttled"])
+
+        #Only starting and stopping are reported, and the read rate is kept with each sample.
+        self.assertEqual([Sample["Throttled"] for Sample in Changes], [True, False])
+        self.assertEqual([Sample["ReadRate"] for Sample in Governor.History], ["30 MB/s", "12 MB/s", "12 MB/s", "12 MB/s"])
+        self.assertEqual(Governor.DescribeSample(Changes[0]), "under-voltage, throttled, 62.8 degrees C")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Planner test data for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Functions to return test data.
+def ReturnFakeMapfile():
+    """A mapfile from ddrescue 1.22 part way through a recovery, with hashes from HashWindow added to the end"""
+    return """# Mapfile. Created by GNU ddrescue version 1.22
+# Command line: ddrescue -v -d -n -r 0 /dev/sdb /mnt/image.img /mnt/image.log
+# Start time:   2017-05-01 10:00:00
+# Current time: 2017-05-01 10:30:00
+# Copying non-tried blocks... Pass 1 (forwards)
+# current_pos  current_status  current_pass
+0x00A00000     ?               1
+#      pos        size  status
+0x00000000  0x00100000  +
+0x00100000  0x00010000  *
+0x00110000  0x00001000  -
+0x00111000  0x000EF000  +
+0x00200000  0x00020000  /
+0x00220000  0x007E0000  +
+0x00A00000  0x00600000  ?
+
+Starting time: 2017-05-01 11:00:00.000000
+Original Sha512 
+0123456789abcdef
+"""
+
+def ReturnFakeOldMapfile():
+    """The same mapfile, from ddrescue 1.14"""
+    return """# Rescue Logfile. Created by GNU ddrescue version 1.14
+# current_pos  current_status
+0x00A00000     ?
+#      pos        size  status
+0x00000000  0x00100000  +
+0x00100000  0x00010000  *
+0x00110000  0x00001000  -
+0x00111000  0x000EF000  +
+0x00200000  0x00020000  /
+0x00220000  0x007E0000  +
+0x00A00000  0x00600000  ?
+"""
+
+def ReturnFakeBlocks():
+    return [(0x00000000, 0x00100000, "+"), (0x00100000, 0x00010000, "*"), (0x00110000, 0x00001000, "-"), (0x00111000, 0x000EF000, "+"),
+            (0x00200000, 0x00020000, "/"), (0x00220000, 0x007E0000, "+"), (0x00A00000, 0x00600000, "?")]
+
+def ReturnFakeSummary():
+    return {"?": 0x00600000, "*": 0x00010000, "/": 0x00020000, "-": 0x00001000, "+": 0x009CF000}
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Planner tests for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules
+import unittest
+import os
+import tempfile
+import shutil
+
+#Import test data.
+from . import PlannerTestData as Data
+
+class TestPlanner(unittest.TestCase):
+    def setUp(self):
+        self.TempDir = tempfile.mkdtemp()
+        self.MapFile = os.path.join(self.TempDir, "image.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.MapFile
+
+    def WriteMapfile(self, Contents):
+        with open(self.MapFile, "w") as File:
+            File.write(Contents)
+
+    def GetStageNames(self, Summary):
+        """Get the names of the stages the planner would run, in order, if the mapfile didn't change"""
+        Names = []
+
+        while True:
+            Stage = Planner().GetNextStage(Summary, Names)
+
+            if Stage is None:
+                return Names
+
+            Names.append(Stage["Name"])
+
+    def testReadMapfile(self):
+        self.WriteMapfile(Data.ReturnFakeMapfile())
+        self.assertEqual(Planner().ReadMapfile(self.MapFile), Data.ReturnFakeBlocks())
+
+        self.WriteMapfile(Data.ReturnFakeOldMapfile())
+        self.assertEqual(Planner().ReadMapfile(self.MapFile), Data.ReturnFakeBlocks())
+
+    def testSummariseMapfile(self):
+        self.WriteMapfile(Data.ReturnFakeMapfile())
+        self.assertEqual(Planner().SummariseMapfile(self.MapFile), Data.ReturnFakeSummary())
+
+        #There's no mapfile before ddrescue has started.
+        self.assertEqual(Planner().SummariseMapfile(os.path.join(self.TempDir, "None")), None)
+
+    def testGetNextStageNewRecovery(self):
+        #With no mapfile, start with the fast pass and go through every stage.
+        self.assertEqual(Planner().GetNextStage(None)["Name"], "Fast pass")
+        self.assertEqual(self.GetStageNames(None), [Stage["Name"] for Stage in PlannerModule.Stages])
+
+    def testGetNextStagePartRecovered(self):
+        #Both passes over the non-tried area still run if there's some left.
+        self.assertEqual(self.GetStageNames(Data.ReturnFakeSummary()), [Stage["Name"] for Stage in PlannerModule.Stages])
+
+        #Once the copying passes are done, only trimming, scraping and retries are left.
+        Summary = Data.ReturnFakeSummary()
+        Summary["?"] = 0
+        self.assertEqual(Planner().GetNextStage(Summary)["Name"], "Trimming and scraping")
+
+        #Only bad sectors are left, so only the retries are worth running.
+        Summary["*"] = 0
+        Summary["/"] = 0
+        self.assertEqual(self.GetStageNames(Summary), ["Retrying bad sectors once", "Retrying bad sectors 3 times", "Retrying bad sectors 8 times"])
+
+    def testGetNextStageFinished(self):
+        self.assertEqual(Planner().GetNextStage({"?": 0, "*": 0, "/": 0, "-": 0, "+": 0x1000000}), None)
+
+    def testStageOptions(self):
+        #The retry budget never shrinks from one stage to the next.
+        Retries = [int(Stage["Options"]["BadSectorRetries"].split()[1]) for Stage in PlannerModule.Stages]
+        self.assertEqual(Retries, sorted(Retries))
+
+        for Stage in PlannerModule.Stages:
+            self.assertEqual(sorted(Stage["Options"].keys()), ["BadSectorRetries", "NoSplit", "Reverse"])
+            self.assertTrue(Stage["TimeBudget"] > 0)
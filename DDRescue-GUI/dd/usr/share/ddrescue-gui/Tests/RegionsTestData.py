@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Governor test data for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules.
+import struct
+
+#Functions to return test data.
+def ReturnFakeDisk():
+    """A 1 MiB disk image with an MBR partition table. Partition 2 comes before partition 1 on the disk, and there's space before, between and after them"""
+    BootSector = bytearray(512)
+
+    #Status, type, start sector and length in sectors.
+    BootSector[446:462] = struct.pack(b"<B3xB3xII", 0x00, 0x83, 1024, 512)
+    BootSector[462:478] = struct.pack(b"<B3xB3xII", 0x80, 0x07, 128, 512)
+    BootSector[510:512] = b"\x55\xaa"
+
+    Disk = bytearray(1048576)
+    Disk[0:512] = BootSector
+
+    #Something in each region, so their hashes differ.
+    Disk[65536:65540] = b"NTFS"
+    Disk[524288:524292] = b"ext4"
+    Disk[1048572:1048576] = b"tail"
+
+    return bytes(Disk)
+
+def ReturnExpectedRegions():
+    """The regions in ReturnFakeDisk(), with their Type, Number, Offset and Size"""
+    return [("Gap", 1, 0, 65536),
+            ("Partition", 2, 65536, 262144),
+            ("Gap", 2, 327680, 196608),
+            ("Partition", 1, 524288, 262144),
+            ("Gap", 3, 786432, 262144)]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Regions tests for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules
+import unittest
+import os
+import tempfile
+import shutil
+import hashlib
+
+#Import test data.
+from . import RegionsTestData as Data
+
+class TestRegions(unittest.TestCase):
+    def setUp(self):
+        self.TempDir = tempfile.mkdtemp()
+        self.Disk = os.path.join(self.TempDir, "disk.img")
+
+        with open(self.Disk, "wb") as File:
+            File.write(Data.ReturnFakeDisk())
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.Disk
+
+    def testGetRegions(self):
+        Regions = RegionTools().GetRegions(self.Disk, os.path.getsize(self.Disk))
+        self.assertEqual([(Region["Type"], Region["Number"], Region["Offset"], Region["Size"]) for Region in Regions], Data.ReturnExpectedRegions())
+        self.assertEqual(Regions[1]["Name"], "Partition 2")
+        self.assertEqual(Regions[4]["Name"], "Unpartitioned space 3")
+
+        #The regions cover the whole disk, with no overlaps.
+        self.assertEqual(sum(Region["Size"] for Region in Regions), os.path.getsize(self.Disk))
+
+    def testGetRegionsNoPartitionTable(self):
+        with open(self.Disk, "wb") as File:
+            File.write(b"\x00" * 65536)
+
+        self.assertEqual(RegionTools().GetRegions(self.Disk, 65536), [])
+
+    def testScheduleRegions(self):
+        Regions = RegionTools().GetRegions(self.Disk, os.path.getsize(self.Disk))
+
+        #The order they were chosen in doesn't matter, they're imaged in the order they are on the disk.
+        Chosen = [Regions[3], Regions[0], Regions[1]]
+        self.assertEqual([Region["Offset"] for Region in RegionTools().ScheduleRegions(Chosen)], [0, 65536, 524288])
+
+    def testGetRegionPaths(self):
+        Regions = RegionTools().GetRegions(self.Disk, os.path.getsize(self.Disk))
+
+        self.assertEqual(RegionTools().GetRegionPaths(Regions[1], "/media/backup/image.img", "/media/backup/image.log"),
+                         ("/media/backup/image-partition2.img", "/media/backup/image-partition2.log"))
+
+        self.assertEqual(RegionTools().GetRegionPaths(Regions[4], "/media/backup/image", ""), ("/media/backup/image-gap3", ""))
+
+    def testHashFile(self):
+        with open(self.Disk, "rb") as File:
+            Expected = hashlib.sha512(File.read()).hexdigest()
+
+        #Use a small block size so it's hashed in several pieces.
+        self.assertEqual(RegionTools().HashFile(self.Disk, BlockSize=4096), Expected)
+        self.assertEqual(RegionTools().HashFile(self.Disk, HashName="md5"), hashlib.md5(Data.ReturnFakeDisk()).hexdigest())
+
+    def testWriteHashFile(self):
+        Hash = RegionTools().HashFile(self.Disk)
+        RegionTools().WriteHashFile(self.Disk, Hash)
+
+        #sha512sum -c expects "<hash>  <file name>".
+        with open(self.Disk+".sha512", "r") as File:
+            self.assertEqual(File.read(), Hash+"  disk.img\n")
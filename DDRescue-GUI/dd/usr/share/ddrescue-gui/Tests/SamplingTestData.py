@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Governor test data for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+
+#Functions to return test data.
+def ReturnFakeMapfile():
+    """A ddrescue mapfile for a 1 MiB disk, with two rescued areas (256 KiB and 64 KiB long) and some that weren't"""
+    return """# Mapfile. Created by GNU ddrescue version 1.19
+# current_pos  current_status
+0x00080000     +
+#      pos        size  status
+0x00000000  0x00040000  +
+0x00040000  0x00010000  -
+0x00050000  0x00030000  ?
+0x00080000  0x00010000  +
+0x00090000  0x00070000  *
+"""
+
+def ReturnRescuedAreas():
+    """The (Start, Size) areas rescued according to ReturnFakeMapfile()"""
+    return [(0, 262144), (524288, 65536)]
+
+def ReturnUpperBounds():
+    """(Checked, Mismatches, the 95% upper bound on the fraction of blocks that differ). Worked out from the beta distribution"""
+    return [(2000, 0, 0.0014967), (2000, 1, 0.0023697), (100, 5, 0.1022534), (0, 0, 1.0)]
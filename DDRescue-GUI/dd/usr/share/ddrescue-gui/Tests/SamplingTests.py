@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Sampling tests for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules
+import unittest
+import os
+import tempfile
+import shutil
+
+#Import test data.
+from . import SamplingTestData as Data
+
+class TestSampling(unittest.TestCase):
+    def setUp(self):
+        self.TempDir = tempfile.mkdtemp()
+        self.InputFile = os.path.join(self.TempDir, "input.img")
+        self.OutputFile = os.path.join(self.TempDir, "output.img")
+        self.MapFile = os.path.join(self.TempDir, "mapfile.log")
+
+        self.Data = os.urandom(1048576)
+
+        for Path, Contents in ((self.InputFile, self.Data), (self.OutputFile, self.Data)):
+            with open(Path, "wb") as File:
+                File.write(Contents)
+
+        with open(self.MapFile, "w") as File:
+            File.write(Data.ReturnFakeMapfile())
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.InputFile
+        del self.OutputFile
+        del self.MapFile
+        del self.Data
+
+    def testGetRescuedAreas(self):
+        self.assertEqual(SamplingTools().GetRescuedAreas(self.MapFile, 1048576), Data.ReturnRescuedAreas())
+
+        #Without a mapfile, the whole input is used.
+        self.assertEqual(SamplingTools().GetRescuedAreas("", 1048576), [(0, 1048576)])
+
+    def testChooseSample(self):
+        Areas = Data.ReturnRescuedAreas()
+        Sample = SamplingTools().ChooseSample(Areas, 1234, Count=10, BlockSize=16384)
+
+        #The same seed always gives the same blocks, in order.
+        self.assertEqual(Sample, SamplingTools().ChooseSample(Areas, 1234, Count=10, BlockSize=16384))
+        self.assertEqual(Sample, sorted(Sample))
+        self.assertEqual(len(set(Sample)), 10)
+
+        #Only rescued areas are sampled.
+        for Offset, Length in Sample:
+            self.assertTrue(any(Start <= Offset and Offset + Length <= Start + Size for Start, Size in Areas))
+
+        #Asking for more blocks than there are gives all of them. The last one of an area can be shorter.
+        self.assertEqual(SamplingTools().ChooseSample([(0, 40000), (65536, 16384)], 1, Count=100, BlockSize=16384),
+                         [(0, 16384), (16384, 16384), (32768, 7232), (65536, 16384)])
+
+    def testCompareSample(self):
+        #Change one byte in the output.
+        with open(self.OutputFile, "r+b") as File:
+            File.seek(20000)
+            File.write(b"\x00" if self.Data[20000:20001] != b"\x00" else b"\x01")
+
+        Results = SamplingTools().CompareSample(self.InputFile, self.OutputFile, [(0, 16384), (16384, 16384), (32768, 16384)])
+        self.assertEqual([Result for Offset, Length, Result in Results], ["Match", "Mismatch", "Match"])
+
+        Summary = SamplingTools().SummariseResults(Results)
+        self.assertEqual((Summary["Checked"], Summary["Mismatches"], Summary["Unreadable"]), (3, 1, 0))
+
+    def testGetUpperBound(self):
+        for Checked, Mismatches, UpperBound in Data.ReturnUpperBounds():
+            self.assertAlmostEqual(SamplingTools().GetUpperBound(Checked, Mismatches), UpperBound, places=6)
+
+    def testSampleFile(self):
+        Sample = SamplingTools().ChooseSample(Data.ReturnRescuedAreas(), 42, Count=8)
+        Results = SamplingTools().CompareSample(self.InputFile, self.OutputFile, Sample)
+        SamplingTools().WriteSampleFile(self.MapFile+".samples", self.InputFile, self.OutputFile, 42, 65536, Results)
+
+        #The exact same blocks can be checked again from the file.
+        self.assertEqual(SamplingTools().ReadSampleFile(self.MapFile+".samples"), (42, 65536, Sample))
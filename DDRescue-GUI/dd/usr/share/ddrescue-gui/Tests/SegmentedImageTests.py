@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# SegmentedImage tests for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules
+import unittest
+import os
+import random
+import tempfile
+import shutil
+import json
+import time
+
+#Import test data.
+from . import SegmentedImageTestData as Data
+
+class TestSegmentedImage(unittest.TestCase):
+    def setUp(self):
+        self.TempDir = tempfile.mkdtemp()
+        self.ImageFile = os.path.join(self.TempDir, "image")
+        self.Data = os.urandom(250000)
+
+        #Write in pieces that straddle the segment boundaries.
+        self.Image = SegmentedImage.SegmentWriter(self.ImageFile, SegmentSize=Data.SegmentSize)
+
+        for Offset in range(0, 150000, 30000):
+            self.assertEqual(self.Image.write(self.Data[Offset:Offset+30000]), 30000)
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.ImageFile
+        del self.Data
+        del self.Image
+
+    def ReadIndex(self):
+        with open(self.ImageFile, "r") as File:
+            return json.load(File)
+
+    def testWrite(self):
+        self.Image.write(self.Data[150000:])
+        self.Image.close()
+
+        self.assertEqual(self.ReadIndex(), Data.ReturnFakeIndex())
+
+        for Number, Segment in enumerate(Data.ReturnFakeIndex()["Segments"]):
+            with open(os.path.join(self.TempDir, Segment["File"]), "rb") as File:
+                self.assertEqual(File.read(), self.Data[Number*Data.SegmentSize:(Number+1)*Data.SegmentSize])
+
+    def testExactMultiple(self):
+        #Don't leave an empty segment at the end.
+        self.Image.write(self.Data[150000:200000])
+        self.Image.close()
+
+        self.assertEqual(len(self.ReadIndex()["Segments"]), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.TempDir, "image.003")))
+
+    def testRead(self):
+        self.Image.write(self.Data[150000:])
+        self.Image.close()
+        self.assertTrue(SegmentedImage.Main().IsSegmentedImage(self.ImageFile))
+
+        Random = random.Random(1)
+
+        with SegmentedImage.SegmentReader(self.ImageFile) as Image:
+            self.assertEqual(Image.Size, 250000)
+            self.assertEqual(Image.read(), self.Data)
+
+            for Number in range(100):
+                Offset = Random.randint(0, 260000)
+                Length = Random.randint(0, 150000)
+
+                self.assertEqual(Image.seek(Offset), Offset)
+                self.assertEqual(Image.read(Length), self.Data[Offset:Offset+Length])
+                self.assertEqual(Image.pread(Length, Offset), self.Data[Offset:Offset+Length])
+
+    def testReadUnfinished(self):
+        #Finished segments are marked as such, and the segment being written can be read as far as it goes.
+        self.Image.File.flush()
+
+        #The first segment is finished in the background.
+        for Attempt in range(50):
+            if self.ReadIndex()["Segments"][0]["Finished"]:
+                break
+
+            time.sleep(0.1)
+
+        Index = self.ReadIndex()
+        self.assertFalse(Index["Finished"])
+        self.assertEqual([Segment["Finished"] for Segment in Index["Segments"]], [True, False])
+
+        with SegmentedImage.SegmentReader(self.ImageFile) as Image:
+            self.assertEqual(Image.read(), self.Data[:150000])
+
+        self.Image.close()
+
+    def testIsSegmentedImage(self):
+        self.Image.close()
+
+        with open(os.path.join(self.TempDir, "raw"), "wb") as File:
+            File.write(self.Data)
+
+        self.assertFalse(SegmentedImage.Main().IsSegmentedImage(os.path.join(self.TempDir, "raw")))
+        self.assertFalse(SegmentedImage.Main().IsSegmentedImage(os.path.join(self.TempDir, "None")))
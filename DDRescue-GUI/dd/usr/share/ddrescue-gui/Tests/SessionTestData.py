@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Session test data for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Functions to return test data.
+def ReturnFakeSettings():
+    return {"DDRescueVersion": "1.22", "InputFile": "/dev/sdb", "OutputFile": "/dev/sdc", "LogFile": "/tmp/recovery.log", "RecoveringData": True,
+            "CheckedSettings": True, "HashingStatus": False, "DirectAccess": "-d", "OverwriteOutputFile": "-f", "Reverse": "", "Preallocate": "",
+            "NoSplit": "", "BadSectorRetries": "-r 2", "MaxErrors": "", "ClusterSize": "-c 128", "DiskSize": "-s 500 GB", "InputFileBlockSize": "-b 512",
+            "SMARTSkipRanges": [[1048576, 65536]], "SMARTSkipDisk": "/dev/sdb", "UseCopyEngine": False, "CopyEngineHash": None, "CompressOutput": False, "SplitOutput": False,
+            "SecondOutputFile": None}
+
+def ReturnFakeSavedSettings():
+    """The settings above, without the ones that only make sense while DDRescue-GUI is running"""
+    Settings = ReturnFakeSettings()
+
+    for Key in ("DDRescueVersion", "RecoveringData", "CheckedSettings", "HashingStatus", "CopyEngineHash"):
+        del Settings[Key]
+
+    return Settings
+
+def ReturnFakeDiskInfo():
+    return {"/dev/sdb": {"Name": "/dev/sdb", "Type": "Device", "Serial": "WD-12345", "RawCapacity": "500107862016"},
+            "/dev/sdc": {"Name": "/dev/sdc", "Type": "Device", "Serial": "S2R5NX0H", "RawCapacity": "1000204886016"}}
+
+def ReturnFakeDiskInfoAfterReboot():
+    """The same Disks, but with their names swapped around"""
+    return {"/dev/sdc": {"Name": "/dev/sdc", "Type": "Device", "Serial": "WD-12345", "RawCapacity": "500107862016"},
+            "/dev/sdd": {"Name": "/dev/sdd", "Type": "Device", "Serial": "S2R5NX0H", "RawCapacity": "1000204886016"}}
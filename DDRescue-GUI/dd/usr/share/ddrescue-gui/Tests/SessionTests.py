@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*- 
+# Session tests for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules
+import unittest
+import os
+import tempfile
+import shutil
+import json
+
+#Import test data.
+from . import SessionTestData as Data
+
+class TestSession(unittest.TestCase):
+    def setUp(self):
+        self.TempDir = tempfile.mkdtemp()
+        self.SessionFile = os.path.join(self.TempDir, "state", "session.json")
+        self.Settings = Data.ReturnFakeSettings()
+        self.ExecList = ["ddrescue", "-v", "-d", "-f", "/dev/sdb", "/dev/sdc", "/tmp/recovery.log"]
+
+    def tearDown(self):
+        shutil.rmtree(self.TempDir)
+        del self.TempDir
+        del self.SessionFile
+        del self.Settings
+        del self.ExecList
+
+    def testSaveSession(self):
+        #The directory is created if needed, and nothing temporary is left behind.
+        self.assertTrue(SessionTools().SaveSession(self.Settings, "Recovering", Data.ReturnFakeDiskInfo(), ExecList=self.ExecList, SessionPath=self.SessionFile))
+        self.assertEqual(os.listdir(os.path.dirname(self.SessionFile)), ["session.json"])
+
+        with open(self.SessionFile) as File:
+            Session = json.load(File)
+
+        self.assertEqual(Session["State"], "Recovering")
+        self.assertEqual(Session["ExecList"], self.ExecList)
+        self.assertEqual(Session["Settings"], Data.ReturnFakeSavedSettings())
+        self.assertEqual(Session["Identities"]["InputFile"], {"Serial": "WD-12345", "RawCapacity": "500107862016"})
+
+    def testLoadUnfinishedSession(self):
+        for State in Session.UnfinishedStates:
+            SessionTools().SaveSession(self.Settings, State, Data.ReturnFakeDiskInfo(), SessionPath=self.SessionFile)
+            self.assertEqual(SessionTools().LoadSession(SessionPath=self.SessionFile)["Settings"], Data.ReturnFakeSavedSettings())
+
+    def testLoadFinishedSession(self):
+        #Recoveries that ended, one way or another, aren't offered for resuming.
+        for State in ("Finished", "Aborted", "Failed"):
+            SessionTools().SaveSession(self.Settings, State, Data.ReturnFakeDiskInfo(), SessionPath=self.SessionFile)
+            self.assertEqual(SessionTools().LoadSession(SessionPath=self.SessionFile), None)
+
+    def testLoadBadSession(self):
+        self.assertEqual(SessionTools().LoadSession(SessionPath=self.SessionFile), None)
+
+        os.makedirs(os.path.dirname(self.SessionFile))
+
+        with open(self.SessionFile, "w") as File:
+            File.write("{\"Version\": 1, \"State\": \"Recov")
+
+        self.assertEqual(SessionTools().LoadSession(SessionPath=self.SessionFile), None)
+
+    def testClearSession(self):
+        SessionTools().SaveSession(self.Settings, "Recovering", Data.ReturnFakeDiskInfo(), SessionPath=self.SessionFile)
+        SessionTools().ClearSession(SessionPath=self.SessionFile)
+        self.assertFalse(os.path.exists(self.SessionFile))
+
+        #Clearing it again is fine.
+        SessionTools().ClearSession(SessionPath=self.SessionFile)
+
+    def testRestoreSettings(self):
+        SessionTools().SaveSession(self.Settings, "Recovering", Data.ReturnFakeDiskInfo(), SessionPath=self.SessionFile)
+        Session = SessionTools().LoadSession(SessionPath=self.SessionFile)
+
+        self.assertEqual(SessionTools().RestoreSettings(Session, Data.ReturnFakeDiskInfo()), (Data.ReturnFakeSavedSettings(), []))
+
+    def testRestoreSettingsRenamedDisks(self):
+        #The Disks are found by their serial numbers and sizes, even though /dev/sdc is now the input.
+        SessionTools().SaveSession(self.Settings, "Recovering", Data.ReturnFakeDiskInfo(), SessionPath=self.SessionFile)
+        Settings, Missing = SessionTools().RestoreSettings(SessionTools().LoadSession(SessionPath=self.SessionFile), Data.ReturnFakeDiskInfoAfterReboot())
+
+        self.assertEqual(Missing, [])
+        self.assertEqual((Settings["InputFile"], Settings["OutputFile"]), ("/dev/sdc", "/dev/sdd"))
+
+    def testRestoreSettingsMissingDisk(self):
+        SessionTools().SaveSession(self.Settings, "Recovering", Data.ReturnFakeDiskInfo(), SessionPath=self.SessionFile)
+        DiskInfo = Data.ReturnFakeDiskInfoAfterReboot()
+        del DiskInfo["/dev/sdc"]
+
+        self.assertEqual(SessionTools().RestoreSettings(SessionTools().LoadSession(SessionPath=self.SessionFile), DiskInfo)[1], ["/dev/sdb"])
+
+    def testRestoreSettingsFiles(self):
+        #An output file that's gone is only a problem if the mapfile says there's data in it.
+        self.Settings["InputFile"] = os.path.join(self.TempDir, "input.img")
+        self.Settings["OutputFile"] = os.path.join(self.TempDir, "output.img")
+        self.Settings["LogFile"] = os.path.join(self.TempDir, "output.log")
+
+        open(self.Settings["InputFile"], "w").close()
+
+        SessionTools().SaveSession(self.Settings, "Starting", {}, SessionPath=self.SessionFile)
+        Session = SessionTools().LoadSession(SessionPath=self.SessionFile)
+
+        self.assertEqual(SessionTools().RestoreSettings(Session, {})[1], [])
+
+        open(self.Settings["LogFile"], "w").close()
+        self.assertEqual(SessionTools().RestoreSettings(Session, {})[1], [self.Settings["OutputFile"]])
+
+        os.remove(self.Settings["InputFile"])
+        self.assertEqual(SessionTools().RestoreSettings(Session, {})[1], [self.Settings["InputFile"], self.Settings["OutputFile"]])
@@ -0,0 +1,436 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Filesystem allocation maps in the Tools Package for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Reads the allocation bitmaps of ext2/3/4, FAT and NTFS filesystems, and writes a ddrescue domain mapfile (for -m) covering only the space they use.
+#Anything we can't make sense of (partition tables, gaps, other filesystems, damaged bitmaps) stays in the domain, so nothing is skipped by mistake.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules.
+import re
+
+from . import tools
+from . import compressedimage
+
+#Unallocated gaps smaller than this are read anyway, as skipping them costs ddrescue more in seeks than it saves.
+MinimumGap = 65536
+
+#Runs of whole bytes in a bitmap that are all free or all used, and single mixed bytes.
+BitmapRuns = re.compile(b"\x00+|\xff+|[\x01-\xfe]")
+
+#Begin Main Class.
+class Main():
+    def GetDomain(self, InputFile, Size):
+        """Work out which parts of InputFile (Size bytes long) the filesystems on it are using, including their metadata.
+        Returns a list of (Start, Length) ranges to recover, and the number of bytes that can be skipped"""
+        logger.info("Allocation: Main().GetDomain(): Reading the allocation maps of the filesystems on "+InputFile+"...")
+        Partitions = tools.Main().ReadPartitionTable(InputFile)
+
+        if Partitions == []:
+            #No partition table, so maybe it's a single filesystem.
+            with compressedimage.Main().OpenImage(InputFile) as Image:
+                Partitions = [{"Number": 1, "Offset": 0, "Size": Size, "Filesystem": tools.Main().GetFilesystemType(Image, 0)}]
+
+        Domain = []
+        Position = 0
+
+        with compressedimage.Main().OpenImage(InputFile) as Image:
+            for Partition in sorted(Partitions, key=lambda Partition: Partition["Offset"]):
+                Start = max(Partition["Offset"], Position)
+                End = min(Partition["Offset"] + Partition["Size"], Size)
+
+                if End <= Start:
+                    continue
+
+                Allocated = self.GetAllocatedRanges(Image, Start, End - Start, Partition["Filesystem"])
+
+                if Allocated is None:
+                    #Keep the whole partition.
+                    continue
+
+                #Keep everything between the partitions, and the used parts of this one.
+                Domain.append((Position, Start - Position))
+                Domain += Allocated
+                Position = End
+
+        Domain.append((Position, Size - Position))
+        Domain = self.MergeRanges(Domain, MinimumGap)
+        Skipped = Size - sum(Length for Start, Length in Domain)
+
+        logger.info("Allocation: Main().GetDomain(): Can skip "+unicode(Skipped)+" of "+unicode(Size)+" bytes.")
+        return Domain, Skipped
+
+    def GetAllocatedRanges(self, Image, Offset, Size, Filesystem):
+        """Return the (Start, Length) ranges used by the filesystem of type Filesystem at Offset in the open Image, including its metadata and anything past its end.
+        Returns None if the filesystem isn't supported, or its allocation map can't be read"""
+        try:
+            if Filesystem in ("ext2", "ext3", "ext4"):
+                Ranges, FilesystemSize = self.GetExtAllocation(Image, Offset)
+
+            elif Filesystem == "vfat":
+                Ranges, FilesystemSize = self.GetFATAllocation(Image, Offset)
+
+            elif Filesystem == "ntfs":
+                Ranges, FilesystemSize = self.GetNTFSAllocation(Image, Offset)
+
+            else:
+                logger.info("Allocation: Main().GetAllocatedRanges(): Can't read the allocation map of "+Filesystem+" filesystems. Keeping the whole partition at "+unicode(Offset)+"...")
+                return None
+
+        except (IOError, OSError, ValueError, IndexError, struct.error) as Error:
+            logger.warning("Allocation: Main().GetAllocatedRanges(): Couldn't read the allocation map of the "+Filesystem+" filesystem at "+unicode(Offset)+"! Keeping the whole partition. Error: "+unicode(Error))
+            return None
+
+        #Don't trust anything past the end of the partition, and keep anything the filesystem doesn't cover.
+        Ranges = [(Start, min(Length, Offset + Size - Start)) for Start, Length in Ranges if Start < Offset + Size]
+
+        if FilesystemSize < Size:
+            Ranges.append((Offset + FilesystemSize, Size - FilesystemSize))
+
+        return Ranges
+
+    def ReadAt(self, Image, Offset, Length):
+        """Read exactly Length bytes at Offset, or raise IOError if the image is too short"""
+        Data = tools.Main().ReadAt(Image, Offset, Length)
+
+        if len(Data) != Length:
+            raise IOError("Short read at "+unicode(Offset))
+
+        return Data
+
+    def BitmapToRanges(self, Bitmap, Count, UnitSize, Start):
+        """Return the (Start, Length) byte ranges of the units set in Bitmap (least significant bit first), for the first Count units.
+        Unit 0 begins at byte Start, and each unit is UnitSize bytes long"""
+        Ranges = []
+
+        for Match in BitmapRuns.finditer(Bitmap[:(Count + 7) // 8]):
+            First = Match.start() * 8
+            Byte = ord(Match.group()[0:1])
+
+            if Byte == 0x00:
+                continue
+
+            elif Byte == 0xFF:
+                Ranges.append((First, min(Match.end() * 8, Count) - First))
+
+            else:
+                for Bit in range(8):
+                    if Byte & (1 << Bit) and First + Bit < Count:
+                        Ranges.append((First + Bit, 1))
+
+        return [(Start + First * UnitSize, Length * UnitSize) for First, Length in self.MergeRanges(Ranges, 0)]
+
+    def MergeRanges(self, Ranges, Gap):
+        """Sort (Start, Length) ranges, and merge any that overlap or are no more than Gap bytes apart. Empty ranges are dropped"""
+        Merged = []
+
+        for Start, Length in sorted(Ranges):
+            if Length <= 0:
+                continue
+
+            if Merged != [] and Start - (Merged[-1][0] + Merged[-1][1]) < Gap + 1:
+                Merged[-1] = (Merged[-1][0], max(Merged[-1][1], Start + Length - Merged[-1][0]))
+
+            else:
+                Merged.append((Start, Length))
+
+        return Merged
+
+    def GetExtAllocation(self, Image, Offset):
+        """Read the block bitmaps of an ext2/3/4 filesystem. Returns the used ranges and the size of the filesystem"""
+        Superblock = self.ReadAt(Image, Offset+1024, 1024)
+
+        BlocksCount, FirstDataBlock, LogBlockSize, BlocksPerGroup = struct.unpack(b"<4xI12xII4xI", Superblock[0:36])
+        Incompatible, ReadOnlyCompatible = struct.unpack(b"<II", Superblock[96:104])
+        ReservedGDTBlocks, DescriptorSize = struct.unpack(b"<HH", Superblock[206:208] + Superblock[254:256])
+        BlockSize = 1024 << LogBlockSize
+
+        if Incompatible & 0x10:
+            #meta_bg puts the group descriptors somewhere else.
+            raise ValueError("meta_bg filesystems aren't supported")
+
+        if ReadOnlyCompatible & 0x200:
+            #bigalloc bitmaps are of clusters, not blocks.
+            raise ValueError("bigalloc filesystems aren't supported")
+
+        if Incompatible & 0x80:
+            #64-bit.
+            BlocksCount |= struct.unpack(b"<I", Superblock[336:340])[0] << 32
+
+        else:
+            DescriptorSize = 32
+
+        if BlocksPerGroup == 0 or DescriptorSize < 32:
+            raise ValueError("Damaged superblock")
+
+        Groups = (BlocksCount - FirstDataBlock + BlocksPerGroup - 1) // BlocksPerGroup
+        Descriptors = self.ReadAt(Image, Offset + (FirstDataBlock + 1) * BlockSize, Groups * DescriptorSize)
+
+        #Blocks at the start of a group that might hold a backup superblock and group descriptors.
+        GroupHeader = 1 + (Groups * DescriptorSize + BlockSize - 1) // BlockSize + ReservedGDTBlocks
+
+        #Uninitialised block bitmaps can only be trusted if the group descriptors have checksums.
+        Checksums = ReadOnlyCompatible & 0x410
+
+        Ranges = [(Offset, (FirstDataBlock + 1) * BlockSize)]
+
+        for Group in range(Groups):
+            Descriptor = Descriptors[Group*DescriptorSize:(Group+1)*DescriptorSize]
+            Bitmap, Flags = struct.unpack(b"<I14xH", Descriptor[0:20])
+
+            if DescriptorSize >= 64:
+                Bitmap |= struct.unpack(b"<I", Descriptor[32:36])[0] << 32
+
+            GroupStart = FirstDataBlock + Group * BlocksPerGroup
+            BlocksInGroup = min(BlocksPerGroup, BlocksCount - GroupStart)
+
+            if Checksums and Flags & 0x2:
+                #BLOCK_UNINIT: nothing in use apart from any backup superblock and group descriptors.
+                if self.HasBackupSuperblock(Group, ReadOnlyCompatible & 0x1):
+                    Ranges.append((Offset + GroupStart * BlockSize, min(GroupHeader, BlocksInGroup) * BlockSize))
+
+                continue
+
+            Ranges += self.BitmapToRanges(self.ReadAt(Image, Offset + Bitmap * BlockSize, BlockSize), BlocksInGroup, BlockSize, Offset + GroupStart * BlockSize)
+
+        return Ranges, BlocksCount * BlockSize
+
+    def HasBackupSuperblock(self, Group, SparseSuper):
+        """Check if an ext block group might have a backup of the superblock. With sparse_super, only groups 0, 1 and powers of 3, 5 and 7 do"""
+        if not SparseSuper or Group <= 1:
+            return True
+
+        for Base in (3, 5, 7):
+            Power = Base
+
+            while Power < Group:
+                Power *= Base
+
+            if Power == Group:
+                return True
+
+        return False
+
+    def GetFATAllocation(self, Image, Offset):
+        """Read the first FAT of a FAT12/16/32 filesystem. Returns the used ranges and the size of the filesystem"""
+        BootSector = self.ReadAt(Image, Offset, 512)
+
+        BytesPerSector, SectorsPerCluster, ReservedSectors, NumberOfFATs, RootEntries, TotalSectors16, FATSize16 = struct.unpack(b"<HBHBHH1xH", BootSector[11:24])
+        TotalSectors32, FATSize32 = struct.unpack(b"<II", BootSector[32:40])
+
+        TotalSectors = TotalSectors16 or TotalSectors32
+        FATSize = FATSize16 or FATSize32
+
+        if BytesPerSector == 0 or SectorsPerCluster == 0:
+            raise ValueError("Damaged boot sector")
+
+        RootDirectorySectors = (RootEntries * 32 + BytesPerSector - 1) // BytesPerSector
+        DataStart = ReservedSectors + NumberOfFATs * FATSize + RootDirectorySectors
+        Clusters = (TotalSectors - DataStart) // SectorsPerCluster
+        ClusterSize = SectorsPerCluster * BytesPerSector
+
+        FAT = self.ReadAt(Image, Offset + ReservedSectors * BytesPerSector, FATSize * BytesPerSector)
+
+        #The FAT type depends only on the number of clusters. Entries 0 and 1 are reserved.
+        if Clusters < 4085:
+            Entries = []
+
+            for Cluster in range(Clusters + 2):
+                Pair = struct.unpack(b"<H", FAT[Cluster*3//2:Cluster*3//2+2])[0]
+                Entries.append(Pair >> 4 if Cluster % 2 else Pair & 0xFFF)
+
+        elif Clusters < 65525:
+            Entries = struct.unpack(b"<%dH" % (Clusters + 2), FAT[:(Clusters + 2) * 2])
+
+        else:
+            Entries = [Entry & 0x0FFFFFFF for Entry in struct.unpack(b"<%dI" % (Clusters + 2), FAT[:(Clusters + 2) * 4])]
+
+        #Everything before the data area is metadata (boot sector, FATs and the FAT12/16 root directory).
+        Ranges = [(Offset, DataStart * BytesPerSector)]
+        Used = bytearray(1 if Entry else 0 for Entry in Entries[2:])
+
+        for Match in re.finditer(b"\x01+", bytes(Used)):
+            Ranges.append((Offset + DataStart * BytesPerSector + Match.start() * ClusterSize, (Match.end() - Match.start()) * ClusterSize))
+
+        return Ranges, TotalSectors * BytesPerSector
+
+    def GetNTFSAllocation(self, Image, Offset):
+        """Read the $Bitmap file of an NTFS filesystem. Returns the used ranges and the size of the filesystem"""
+        BootSector = self.ReadAt(Image, Offset, 512)
+
+        BytesPerSector, SectorsPerCluster = struct.unpack(b"<HB", BootSector[11:14])
+        TotalSectors, MFTCluster = struct.unpack(b"<QQ", BootSector[40:56])
+        ClustersPerRecord = struct.unpack(b"<b", BootSector[64:65])[0]
+
+        #Big clusters are stored as a negative power of two.
+        if SectorsPerCluster > 0x80:
+            SectorsPerCluster = 1 << (256 - SectorsPerCluster)
+
+        ClusterSize = BytesPerSector * SectorsPerCluster
+
+        if ClustersPerRecord > 0:
+            RecordSize = ClustersPerRecord * ClusterSize
+
+        else:
+            RecordSize = 1 << -ClustersPerRecord
+
+        if ClusterSize == 0 or RecordSize < 512:
+            raise ValueError("Damaged boot sector")
+
+        #$Bitmap is always MFT record 6, and the first records of the MFT are always together.
+        Record = self.ApplyFixups(self.ReadAt(Image, Offset + MFTCluster * ClusterSize + 6 * RecordSize, RecordSize), BytesPerSector)
+        Bitmap = self.ReadAttribute(Image, Offset, Record, 0x80, ClusterSize)
+        Clusters = TotalSectors // SectorsPerCluster
+
+        #The backup boot sector is in the sector after the last cluster.
+        Ranges = self.BitmapToRanges(Bitmap, Clusters, ClusterSize, Offset)
+        Ranges.append((Offset + Clusters * ClusterSize, (TotalSectors - Clusters * SectorsPerCluster + 1) * BytesPerSector))
+
+        return Ranges, (TotalSectors + 1) * BytesPerSector
+
+    def ApplyFixups(self, Record, SectorSize):
+        """Put back the bytes NTFS replaced with the update sequence number at the end of each sector of an MFT record"""
+        if Record[0:4] != b"FILE":
+            raise ValueError("Not an MFT record")
+
+        FixupOffset, FixupCount = struct.unpack(b"<HH", Record[4:8])
+        Record = bytearray(Record)
+        SequenceNumber = Record[FixupOffset:FixupOffset+2]
+
+        for Number in range(1, FixupCount):
+            End = Number * SectorSize
+
+            if Record[End-2:End] != SequenceNumber:
+                raise ValueError("Torn MFT record")
+
+            Record[End-2:End] = Record[FixupOffset+Number*2:FixupOffset+Number*2+2]
+
+        return bytes(Record)
+
+    def ReadAttribute(self, Image, Offset, Record, Type, ClusterSize):
+        """Read the contents of the unnamed attribute of Type in an MFT record"""
+        Position = struct.unpack(b"<H", Record[20:22])[0]
+
+        while Position + 16 <= len(Record):
+            AttributeType, Length, NonResident, NameLength = struct.unpack(b"<IIBB", Record[Position:Position+10])
+
+            if AttributeType == 0xFFFFFFFF or Length == 0:
+                break
+
+            if AttributeType == Type and NameLength == 0:
+                Attribute = Record[Position:Position+Length]
+
+                if not NonResident:
+                    ValueLength, ValueOffset = struct.unpack(b"<IH", Attribute[16:22])
+                    return Attribute[ValueOffset:ValueOffset+ValueLength]
+
+                RunsOffset = struct.unpack(b"<H", Attribute[32:34])[0]
+                DataSize = struct.unpack(b"<Q", Attribute[48:56])[0]
+                Data = b"".join(self.ReadAt(Image, Offset + Cluster * ClusterSize, Count * ClusterSize) if Cluster is not None else b"\x00" * (Count * ClusterSize)
+                                for Cluster, Count in self.DecodeDataRuns(Attribute[RunsOffset:]))
+
+                return Data[:DataSize]
+
+            Position += Length
+
+        raise ValueError("Attribute not found")
+
+    def DecodeDataRuns(self, Runs):
+        """Decode NTFS data runs into a list of (Cluster, Count) extents. Cluster is None for sparse runs"""
+        Extents = []
+        Position = 0
+        Cluster = 0
+
+        while Position < len(Runs) and Runs[Position:Position+1] != b"\x00":
+            Header = ord(Runs[Position:Position+1])
+            LengthSize, OffsetSize = Header & 0x0F, Header >> 4
+            Position += 1
+
+            Count = self.ReadLittleEndian(Runs[Position:Position+LengthSize], Signed=False)
+            Position += LengthSize
+
+            if OffsetSize == 0:
+                Extents.append((None, Count))
+
+            else:
+                #Each run's start is relative to the one before.
+                Cluster += self.ReadLittleEndian(Runs[Position:Position+OffsetSize], Signed=True)
+                Extents.append((Cluster, Count))
+
+            Position += OffsetSize
+
+        return Extents
+
+    def ReadLittleEndian(self, Data, Signed):
+        """Read a little-endian integer of any length"""
+        Value = 0
+
+        for Number, Byte in enumerate(bytearray(Data)):
+            Value |= Byte << (8 * Number)
+
+        if Signed and Data != b"" and bytearray(Data)[-1] & 0x80:
+            Value -= 1 << (8 * len(Data))
+
+        return Value
+
+    def MeasureReadRate(self, InputFile, Size, Length=33554432):
+        """Estimate how fast InputFile can be read, in bytes per second, by timing a read from the middle of it. Returns None if it can't be read"""
+        try:
+            with open(InputFile, "rb") as File:
+                File.seek(max(Size // 2 - Length, 0))
+                StartTime = time.time()
+                Read = len(File.read(Length))
+                Time = time.time() - StartTime
+
+        except (IOError, OSError) as Error:
+            logger.warning("Allocation: Main().MeasureReadRate(): Couldn't read "+InputFile+"! Error: "+unicode(Error))
+            return None
+
+        if Read == 0:
+            return None
+
+        return Read / max(Time, 0.001)
+
+    def WriteDomainMapfile(self, MapFile, Domain, Size):
+        """Write a ddrescue domain mapfile, where the (Start, Length) ranges in Domain are marked finished ('+') and everything else non-tried ('?').
+        ddrescue only reads the finished blocks when given it with -m"""
+        logger.info("Allocation: Main().WriteDomainMapfile(): Writing domain mapfile to "+MapFile+"...")
+        Position = 0
+
+        with open(MapFile+".tmp", "w") as File:
+            File.write("# Domain mapfile. Created by DDRescue-GUI from the filesystems' allocation maps\n")
+            File.write("# current_pos  current_status\n")
+            File.write("0x00000000     ?\n")
+            File.write("#      pos        size  status\n")
+
+            for Start, Length in Domain:
+                if Start > Position:
+                    File.write("0x%08X  0x%08X  ?\n" % (Position, Start - Position))
+
+                File.write("0x%08X  0x%08X  +\n" % (Start, Length))
+                Position = Start + Length
+
+            if Position < Size:
+                File.write("0x%08X  0x%08X  ?\n" % (Position, Size - Position))
+
+        os.rename(MapFile+".tmp", MapFile)
+
+#End Main Class.
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Evidence bundles in the Tools Package for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#An evidence bundle keeps everything about a recovery in one file: the image, a digest of every chunk of it, the mapfile, the log, the source disk's details, timings and notes.
+#The file is a header, then the image in chunks (like a compressed image, see compressedimage.py), then the other files as sections,
+#then an index of the chunks with their digests, then a JSON table of contents, then a trailer pointing to the index and table of contents.
+#It's built by streaming the existing image into it, and can be read by byte offset like the image itself.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules. os, json and time are imported here rather than set up by the GUI, because compressedimage imports this module itself when it opens an image.
+import os
+import json
+import time
+import struct
+import hashlib
+import threading
+import collections
+
+from . import compressedimage
+
+Magic = b"DDRGEVB1"
+TrailerMagic = b"DDRGEVT1"
+
+#Magic, version, chunk size.
+HeaderFormat = b"<8sH2xI16x"
+
+#Uncompressed offset, position of the chunk's data in the file, stored length, uncompressed length, method, SHA-256 of the uncompressed data.
+IndexEntryFormat = b"<QQIIB3x32s"
+
+#Magic, index position, number of chunks, image size, table of contents position and length.
+TrailerFormat = b"<8sQQQQQ"
+
+#Begin Main Class.
+class Main():
+    def IsBundle(self, Path):
+        """Check if Path is an evidence bundle"""
+        try:
+            with open(Path, "rb") as File:
+                return File.read(8) == Magic
+
+        except IOError:
+            return False
+
+    def CreateBundle(self, ImagePath, BundlePath, Metadata={}, Files={}, Compression=None, ChunkSize=1048576, ProgressHandler=None, ShouldAbort=None):
+        """Stream the image at ImagePath (which can be compressed or segmented) into a new evidence bundle at BundlePath, chunk by chunk, so no temporary copy is needed.
+        Metadata is a dictionary (like the source's DiskInfo record, timings and notes) saved in the table of contents. Files maps section names to files to include (like the mapfile and log), and missing ones are skipped.
+        Chunks that are all zeroes take no space. If Compression is given ("zlib", "lzma" or "zstd"), other chunks are compressed too.
+        ProgressHandler, if given, is called after each chunk with the bytes done and the image size. ShouldAbort, if given, is called between chunks, and the bundle is deleted if it returns True.
+        Returns the table of contents, or None if it was aborted"""
+        logger.info("Bundle: Main().CreateBundle(): Creating evidence bundle "+BundlePath+" from "+ImagePath+"...")
+
+        StartTime = time.time()
+        Index = []
+        ImageHasher = hashlib.sha512()
+        Offset = 0
+
+        with compressedimage.Main().OpenImage(ImagePath) as Image:
+            Image.seek(0, os.SEEK_END)
+            Size = Image.tell()
+            Image.seek(0)
+
+            with open(BundlePath, "wb") as Bundle:
+                Bundle.write(struct.pack(HeaderFormat, Magic, 1, ChunkSize))
+
+                for Chunk in iter(lambda: Image.read(ChunkSize), b""):
+                    if ShouldAbort is not None and ShouldAbort():
+                        logger.info("Bundle: Main().CreateBundle(): Aborted. Deleting "+BundlePath+"...")
+                        Bundle.close()
+                        os.remove(BundlePath)
+                        return None
+
+                    ImageHasher.update(Chunk)
+                    Method, Stored = self.StoreChunk(Chunk, Compression)
+
+                    #Each chunk has a header, so the chunks can still be found if the bundle wasn't finished.
+                    Bundle.write(struct.pack(compressedimage.ChunkHeaderFormat, compressedimage.ChunkMagic, Offset, len(Stored), len(Chunk), Method))
+                    Index.append((Offset, Bundle.tell(), len(Stored), len(Chunk), Method, hashlib.sha256(Chunk).digest()))
+                    Bundle.write(Stored)
+                    Offset += len(Chunk)
+
+                    if ProgressHandler is not None:
+                        ProgressHandler(Offset, Size)
+
+                Sections = []
+
+                for Name, Path in sorted(Files.items()):
+                    if Path in ("", None) or not os.path.isfile(Path):
+                        logger.warning("Bundle: Main().CreateBundle(): "+Name+" ("+unicode(Path)+") doesn't exist. Skipping it...")
+                        continue
+
+                    Sections.append(self.WriteSection(Bundle, Name, Path))
+
+                IndexPosition = Bundle.tell()
+
+                for Entry in Index:
+                    Bundle.write(struct.pack(IndexEntryFormat, *Entry))
+
+                Contents = {"Version": 1, "Created": time.time(), "ImagePath": ImagePath, "Size": Offset, "ChunkSize": ChunkSize, "ChunkDigest": "sha256",
+                            "ImageSHA512": ImageHasher.hexdigest(), "Sections": Sections, "Metadata": Metadata}
+
+                ContentsPosition = Bundle.tell()
+                ContentsData = json.dumps(Contents, indent=4, sort_keys=True).encode("utf-8")
+                Bundle.write(ContentsData)
+
+                Bundle.write(struct.pack(TrailerFormat, TrailerMagic, IndexPosition, len(Index), Offset, ContentsPosition, len(ContentsData)))
+                Bundle.flush()
+                os.fsync(Bundle.fileno())
+
+        logger.info("Bundle: Main().CreateBundle(): Finished "+BundlePath+" with "+unicode(len(Index))+" chunks, "+unicode(len(Sections))+" sections, in "+unicode(round(time.time() - StartTime, 2))+" seconds. SHA-512 of image: "+Contents["ImageSHA512"])
+        return Contents
+
+    def StoreChunk(self, Chunk, Compression):
+        """Return the method and data to store a chunk with"""
+        if Compression is not None:
+            return compressedimage.CompressChunk((Chunk, Compression, None))
+
+        if Chunk.count(b"\x00") == len(Chunk):
+            return compressedimage.Methods["zero"], b""
+
+        return compressedimage.Methods["raw"], Chunk
+
+    def WriteSection(self, Bundle, Name, Path, BlockSize=1048576):
+        """Copy the file at Path into Bundle, and return its entry for the table of contents"""
+        Position = Bundle.tell()
+        Hasher = hashlib.sha256()
+
+        with open(Path, "rb") as File:
+            for Block in iter(lambda: File.read(BlockSize), b""):
+                Hasher.update(Block)
+                Bundle.write(Block)
+
+        return {"Name": Name, "FileName": os.path.basename(Path), "Position": Position, "Length": Bundle.tell() - Position, "SHA256": Hasher.hexdigest()}
+
+#End Main Class.
+#Begin Bundle Reader Class.
+class BundleReader(compressedimage.ImageReader):
+    def __init__(self, Path, CacheSize=8):
+        """Open the evidence bundle at Path for reading. It behaves like the image inside it opened in binary mode.
+        Every chunk read is checked against its digest. The table of contents is in self.Contents, and sections can be read with GetSection()"""
+        self.File = open(Path, "rb")
+        self.Position = 0
+        self.CacheSize = CacheSize
+        self.Cache = collections.OrderedDict()
+        self.Lock = threading.Lock()
+
+        Header = self.File.read(struct.calcsize(HeaderFormat))
+
+        if len(Header) != struct.calcsize(HeaderFormat) or struct.unpack(HeaderFormat, Header)[0] != Magic:
+            self.File.close()
+            raise IOError(Path+" isn't an evidence bundle")
+
+        self.ChunkSize = struct.unpack(HeaderFormat, Header)[2]
+
+        if not self.ReadIndex():
+            self.File.close()
+            raise IOError(Path+" has no index or table of contents (it probably wasn't finished)")
+
+        #For finding chunks by offset with bisect.
+        self.Offsets = [Entry[0] for Entry in self.Index]
+
+    def ReadIndex(self):
+        """Read the index and table of contents using the trailer at the end of the file. Returns False if there isn't a valid one"""
+        TrailerSize = struct.calcsize(TrailerFormat)
+        self.File.seek(0, os.SEEK_END)
+        FileSize = self.File.tell()
+
+        if FileSize < TrailerSize:
+            return False
+
+        self.File.seek(FileSize - TrailerSize)
+        FoundMagic, IndexPosition, NumberOfChunks, self.Size, ContentsPosition, ContentsLength = struct.unpack(TrailerFormat, self.File.read(TrailerSize))
+        EntrySize = struct.calcsize(IndexEntryFormat)
+
+        if FoundMagic != TrailerMagic or IndexPosition + NumberOfChunks * EntrySize != ContentsPosition or ContentsPosition + ContentsLength != FileSize - TrailerSize:
+            return False
+
+        self.File.seek(IndexPosition)
+        IndexData = self.File.read(NumberOfChunks * EntrySize)
+        self.Index = [struct.unpack(IndexEntryFormat, IndexData[Number*EntrySize:(Number+1)*EntrySize]) for Number in range(NumberOfChunks)]
+
+        try:
+            self.Contents = json.loads(self.File.read(ContentsLength).decode("utf-8"))
+
+        except ValueError:
+            return False
+
+        return True
+
+    def GetChunk(self, Number):
+        """Get a chunk's data, checking it against its digest, and keeping the most recently used ones cached"""
+        if Number in self.Cache:
+            Data = self.Cache.pop(Number)
+
+        else:
+            Offset, FilePosition, StoredLength, Length, Method, Digest = self.Index[Number]
+            self.File.seek(FilePosition)
+            Data = compressedimage.DecompressChunk(Method, self.File.read(StoredLength), Length)
+
+            if len(Data) != Length or hashlib.sha256(Data).digest() != Digest:
+                raise IOError("Chunk at offset "+unicode(Offset)+" in evidence bundle doesn't match its digest")
+
+            if len(self.Cache) >= self.CacheSize:
+                self.Cache.popitem(last=False)
+
+        self.Cache[Number] = Data
+        return Data
+
+    def GetSection(self, Name):
+        """Return the contents of the section called Name, checking it against its digest. Raises KeyError if there isn't one"""
+        for Section in self.Contents["Sections"]:
+            if Section["Name"] == Name:
+                with self.Lock:
+                    self.File.seek(Section["Position"])
+                    Data = self.File.read(Section["Length"])
+
+                if hashlib.sha256(Data).hexdigest() != Section["SHA256"]:
+                    raise IOError("Section "+Name+" in evidence bundle doesn't match its digest")
+
+                return Data
+
+        raise KeyError(Name)
+
+    def Verify(self):
+        """Check every chunk against its digest, and return the offsets of the ones that don't match"""
+        BadChunks = []
+
+        for Number, Entry in enumerate(self.Index):
+            with self.Lock:
+                try:
+                    self.GetChunk(Number)
+
+                except IOError:
+                    BadChunks.append(Entry[0])
+
+        logger.info("Bundle: BundleReader().Verify(): "+unicode(len(BadChunks))+" of "+unicode(len(self.Index))+" chunks don't match their digests.")
+        return BadChunks
+
+#End Bundle Reader Class.
@@ -0,0 +1,538 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Compressed Image format in the Tools Package for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#The image is a header, then independently compressed chunks (each with its own small header, so the index can be rebuilt
+#if the image wasn't finished), then an index of where each chunk is, then a trailer pointing to the index.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules.
+import struct
+import zlib
+import bisect
+import socket
+import threading
+import collections
+import multiprocessing
+
+from . import segmentedimage
+
+Magic = b"DDRGCIMG"
+IndexMagic = b"DDRGIDX1"
+ChunkMagic = b"CHNK"
+
+#Magic, version, default method, chunk size.
+HeaderFormat = b"<8sHBxI16x"
+
+#Magic, uncompressed offset, stored length, uncompressed length, method.
+ChunkHeaderFormat = b"<4sQIIB3x"
+
+#Uncompressed offset, position of the chunk's data in the file, stored length, uncompressed length, method.
+IndexEntryFormat = b"<QQIIB3x"
+
+#Magic, index position, number of chunks, uncompressed size.
+TrailerFormat = b"<8sQQQ"
+
+#Chunk storage methods.
+Methods = {"zero": 0, "raw": 1, "zlib": 2, "lzma": 3, "zstd": 4}
+
+#The cheapest level of each compressor, for when the CPU can't keep up.
+FastestLevels = {"zlib": 1, "lzma": 0, "zstd": 1}
+
+def ImportCompressor(Compression):
+    """Import the module for Compression, or return None if it isn't installed"""
+    try:
+        if Compression == "zlib":
+            return zlib
+
+        elif Compression == "lzma":
+            try:
+                import lzma
+
+            except ImportError:
+                from backports import lzma
+
+            return lzma
+
+        elif Compression == "zstd":
+            import zstandard
+            return zstandard
+
+    except ImportError:
+        return None
+
+def CompressChunk(Args):
+    """Compress one chunk. Runs in the worker processes, so it has to be a module-level function.
+    Returns the method actually used and the data to store"""
+    Data, Compression, Level = Args
+
+    #Empty areas of the disk cost nothing.
+    if Data.count(b"\x00") == len(Data):
+        return Methods["zero"], b""
+
+    Module = ImportCompressor(Compression)
+
+    if Compression == "zlib":
+        Stored = Module.compress(Data, Level or 6)
+
+    elif Compression == "lzma":
+        Stored = Module.compress(Data, preset=(1 if Level is None else Level))
+
+    else:
+        Stored = Module.ZstdCompressor(level=Level or 3).compress(Data)
+
+    #Don't waste space and time on data that doesn't compress.
+    if len(Stored) >= len(Data):
+        return Methods["raw"], Data
+
+    return Methods[Compression], Stored
+
+def DecompressChunk(Method, Stored, Length):
+    """Get a chunk's data back"""
+    if Method == Methods["zero"]:
+        return b"\x00" * Length
+
+    elif Method == Methods["raw"]:
+        return Stored
+
+    elif Method == Methods["zlib"]:
+        return zlib.decompress(Stored)
+
+    elif Method == Methods["lzma"]:
+        return ImportCompressor("lzma").decompress(Stored)
+
+    elif Method == Methods["zstd"]:
+        return ImportCompressor("zstd").ZstdDecompressor().decompress(Stored, max_output_size=Length)
+
+    raise IOError("Unknown compression method "+unicode(Method)+" in compressed image")
+
+#Begin Main Class.
+class Main():
+    def GetBestCompression(self):
+        """Use zstd if it's installed, as it's much faster than zlib for the same ratio. Otherwise use zlib, which is always available"""
+        if ImportCompressor("zstd") is not None:
+            return "zstd"
+
+        return "zlib"
+
+    def IsCompressedImage(self, Path):
+        """Check if Path is one of our compressed images"""
+        try:
+            with open(Path, "rb") as File:
+                return File.read(8) == Magic
+
+        except IOError:
+            return False
+
+    def ImportBundle(self):
+        """Import the bundle module (it can't be imported at the top, because it uses this one), through ImportTool() so it's set up like the GUI sets up the others"""
+        from . import tools
+        return tools.Main().ImportTool("bundle")
+
+    def IsVirtualImage(self, Path):
+        """Check if Path is an image that can't be mounted directly (a compressed or segmented image, or an evidence bundle), and has to be served over NBD instead"""
+        bundle = self.ImportBundle()
+
+        return self.IsCompressedImage(Path) or segmentedimage.Main().IsSegmentedImage(Path) or bundle.Main().IsBundle(Path)
+
+    def OpenImage(self, Path):
+        """Open an image for reading, decompressing it, joining its segments or taking it out of an evidence bundle transparently, so it can be read by byte offset whatever its format"""
+        bundle = self.ImportBundle()
+
+        if self.IsCompressedImage(Path):
+            return ImageReader(Path)
+
+        elif bundle.Main().IsBundle(Path):
+            return bundle.BundleReader(Path)
+
+        elif segmentedimage.Main().IsSegmentedImage(Path):
+            return segmentedimage.SegmentReader(Path)
+
+        return open(Path, "rb")
+
+#End Main Class.
+#Begin Image Writer Class.
+class ImageWriter():
+    def __init__(self, Path, Compression="auto", Level=None, ChunkSize=1048576, Processes=None):
+        """Create a compressed image at Path. Chunks are compressed by a pool of Processes worker processes (default: one per spare CPU core)"""
+        if Compression == "auto":
+            Compression = Main().GetBestCompression()
+
+        if ImportCompressor(Compression) is None:
+            raise ValueError("Compression "+Compression+" isn't available")
+
+        self.Compression = Compression
+        self.Level = Level
+        self.NormalLevel = Level
+        self.ChunkSize = ChunkSize
+
+        #Leave a core for reading and writing.
+        if Processes is None:
+            Processes = max(multiprocessing.cpu_count() - 1, 1)
+
+        logger.info("CompressedImage: ImageWriter().__init__(): Creating "+Compression+" compressed image "+Path+" with "+unicode(Processes)+" compression processes...")
+
+        self.File = open(Path, "wb")
+        self.File.write(struct.pack(HeaderFormat, Magic, 1, Methods[Compression], ChunkSize))
+
+        self.Pool = multiprocessing.Pool(Processes)
+
+        #Limit how many chunks can be waiting, so memory use stays bounded if the destination is slow.
+        self.MaxPending = Processes * 4
+        self.Pending = collections.deque()
+
+        self.Buffered = []
+        self.BufferedLength = 0
+        self.Offset = 0
+        self.Index = []
+        self.closed = False
+
+    def write(self, Data):
+        """Add Data to the image. Data is copied, so the caller can reuse its buffer"""
+        Data = bytes(Data)
+        self.Buffered.append(Data)
+        self.BufferedLength += len(Data)
+
+        while self.BufferedLength >= self.ChunkSize:
+            Joined = b"".join(self.Buffered)
+            self.Submit(Joined[:self.ChunkSize])
+            self.Buffered = [Joined[self.ChunkSize:]]
+            self.BufferedLength -= self.ChunkSize
+
+        return len(Data)
+
+    def SetThrottled(self, Throttled):
+        """Use the fastest compression level for new chunks while Throttled is True, and the level we were created with otherwise.
+        Each chunk is compressed on its own, so the image can mix levels"""
+        if Throttled:
+            self.Level = FastestLevels[self.Compression]
+
+        else:
+            self.Level = self.NormalLevel
+
+    def Submit(self, Chunk):
+        """Queue a chunk for compression, and write out finished ones if too many are waiting"""
+        self.Pending.append((self.Offset, len(Chunk), self.Pool.apply_async(CompressChunk, ((Chunk, self.Compression, self.Level),))))
+        self.Offset += len(Chunk)
+
+        while len(self.Pending) > self.MaxPending:
+            self.WriteChunk()
+
+    def WriteChunk(self):
+        """Write the oldest queued chunk, waiting for it to be compressed if needed. Chunks are always written in order"""
+        Offset, Length, Result = self.Pending.popleft()
+        Method, Stored = Result.get()
+
+        self.File.write(struct.pack(ChunkHeaderFormat, ChunkMagic, Offset, len(Stored), Length, Method))
+        self.Index.append((Offset, self.File.tell(), len(Stored), Length, Method))
+        self.File.write(Stored)
+
+    def close(self):
+        """Write the remaining data, the index and the trailer"""
+        if self.BufferedLength > 0:
+            self.Submit(b"".join(self.Buffered))
+            self.Buffered = []
+            self.BufferedLength = 0
+
+        while self.Pending:
+            self.WriteChunk()
+
+        self.Pool.close()
+        self.Pool.join()
+
+        IndexPosition = self.File.tell()
+
+        for Entry in self.Index:
+            self.File.write(struct.pack(IndexEntryFormat, *Entry))
+
+        self.File.write(struct.pack(TrailerFormat, IndexMagic, IndexPosition, len(self.Index), self.Offset))
+        self.File.flush()
+        os.fsync(self.File.fileno())
+        self.File.close()
+        self.closed = True
+
+        logger.info("CompressedImage: ImageWriter().close(): Finished image with "+unicode(len(self.Index))+" chunks, "+unicode(self.Offset)+" bytes uncompressed, "+unicode(IndexPosition)+" bytes compressed.")
+
+    def terminate(self):
+        """Give up without finishing the image"""
+        self.Pool.terminate()
+        self.File.close()
+        self.closed = True
+
+#End Image Writer Class.
+#Begin Image Reader Class.
+class ImageReader():
+    def __init__(self, Path, CacheSize=8):
+        """Open the compressed image at Path for reading. It behaves like a normal file opened in binary mode"""
+        self.File = open(Path, "rb")
+        self.Position = 0
+        self.CacheSize = CacheSize
+        self.Cache = collections.OrderedDict()
+        self.Lock = threading.Lock()
+
+        Header = self.File.read(struct.calcsize(HeaderFormat))
+
+        if len(Header) != struct.calcsize(HeaderFormat) or struct.unpack(HeaderFormat, Header)[0] != Magic:
+            self.File.close()
+            raise IOError(Path+" isn't a compressed image")
+
+        self.ChunkSize = struct.unpack(HeaderFormat, Header)[3]
+
+        if not self.ReadIndex():
+            logger.warning("CompressedImage: ImageReader().__init__(): "+Path+" has no index (it probably wasn't finished). Rebuilding it from the chunks...")
+            self.RebuildIndex()
+
+        #For finding chunks by offset with bisect.
+        self.Offsets = [Entry[0] for Entry in self.Index]
+
+    def ReadIndex(self):
+        """Read the index using the trailer at the end of the file. Returns False if there isn't a valid one"""
+        TrailerSize = struct.calcsize(TrailerFormat)
+        self.File.seek(0, os.SEEK_END)
+        FileSize = self.File.tell()
+
+        if FileSize < TrailerSize:
+            return False
+
+        self.File.seek(FileSize - TrailerSize)
+        TrailerMagic, IndexPosition, NumberOfChunks, self.Size = struct.unpack(TrailerFormat, self.File.read(TrailerSize))
+        EntrySize = struct.calcsize(IndexEntryFormat)
+
+        if TrailerMagic != IndexMagic or IndexPosition + NumberOfChunks * EntrySize != FileSize - TrailerSize:
+            return False
+
+        self.File.seek(IndexPosition)
+        IndexData = self.File.read(NumberOfChunks * EntrySize)
+        self.Index = [struct.unpack(IndexEntryFormat, IndexData[Number*EntrySize:(Number+1)*EntrySize]) for Number in range(NumberOfChunks)]
+        return True
+
+    def RebuildIndex(self):
+        """Find the chunks by walking their headers, stopping at the first incomplete one"""
+        self.Index = []
+        self.Size = 0
+        HeaderSize = struct.calcsize(ChunkHeaderFormat)
+        self.File.seek(0, os.SEEK_END)
+        FileSize = self.File.tell()
+        Position = struct.calcsize(HeaderFormat)
+
+        while Position + HeaderSize <= FileSize:
+            self.File.seek(Position)
+            Header = struct.unpack(ChunkHeaderFormat, self.File.read(HeaderSize))
+
+            if Header[0] != ChunkMagic or Header[1] != self.Size or Position + HeaderSize + Header[2] > FileSize:
+                break
+
+            self.Index.append((Header[1], Position + HeaderSize, Header[2], Header[3], Header[4]))
+            self.Size += Header[3]
+            Position += HeaderSize + Header[2]
+
+    def GetChunk(self, Number):
+        """Get a chunk's uncompressed data, keeping the most recently used ones cached"""
+        if Number in self.Cache:
+            Data = self.Cache.pop(Number)
+
+        else:
+            Offset, FilePosition, StoredLength, Length, Method = self.Index[Number]
+            self.File.seek(FilePosition)
+            Data = DecompressChunk(Method, self.File.read(StoredLength), Length)
+
+            if len(Data) != Length:
+                raise IOError("Chunk at offset "+unicode(Offset)+" in compressed image is damaged")
+
+            if len(self.Cache) >= self.CacheSize:
+                self.Cache.popitem(last=False)
+
+        self.Cache[Number] = Data
+        return Data
+
+    def ReadAt(self, Offset, Length):
+        """Read up to Length bytes at Offset. The caller must hold self.Lock"""
+        Length = max(min(Length, self.Size - Offset), 0)
+        Pieces = []
+
+        while Length > 0:
+            Number = bisect.bisect_right(self.Offsets, Offset) - 1
+            Data = self.GetChunk(Number)
+            Start = Offset - self.Offsets[Number]
+            Piece = Data[Start:Start+Length]
+            Pieces.append(Piece)
+            Offset += len(Piece)
+            Length -= len(Piece)
+
+        return b"".join(Pieces)
+
+    def read(self, Length=-1):
+        """Read up to Length bytes (or everything) from the current position"""
+        with self.Lock:
+            if Length < 0:
+                Length = self.Size
+
+            Data = self.ReadAt(self.Position, Length)
+            self.Position += len(Data)
+            return Data
+
+    def pread(self, Length, Offset):
+        """Read Length bytes at Offset without moving the current position (used by the NBD server)"""
+        with self.Lock:
+            return self.ReadAt(Offset, Length)
+
+    def seek(self, Offset, Whence=0):
+        if Whence == os.SEEK_CUR:
+            Offset += self.Position
+
+        elif Whence == os.SEEK_END:
+            Offset += self.Size
+
+        self.Position = max(Offset, 0)
+        return self.Position
+
+    def tell(self):
+        return self.Position
+
+    def close(self):
+        self.File.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *Args):
+        self.close()
+
+#End Image Reader Class.
+#Begin NBD Server Class.
+class NBDServer(threading.Thread):
+    def __init__(self, ImagePath, SocketPath):
+        """Serve a compressed or segmented image read-only over the NBD protocol on a Unix socket, so nbd-client can attach it to /dev/nbdX and it can be mounted.
+        Only the fixed newstyle handshake with NBD_OPT_EXPORT_NAME is supported, which every nbd-client since 3.10 can fall back to"""
+        self.Reader = Main().OpenImage(ImagePath)
+        self.SocketPath = SocketPath
+        self.Listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.Listener.bind(SocketPath)
+        self.Listener.listen(1)
+
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.start()
+
+    def run(self):
+        """Serve one client until it disconnects"""
+        try:
+            Connection = self.Listener.accept()[0]
+
+        except socket.error:
+            #Stopped before anything connected.
+            return
+
+        try:
+            if self.Handshake(Connection):
+                self.Serve(Connection)
+
+        except (socket.error, struct.error, IOError) as Error:
+            logger.error("CompressedImage: NBDServer().run(): Error serving image: "+unicode(Error))
+
+        finally:
+            Connection.close()
+
+    def ReceiveAll(self, Connection, Length):
+        Data = b""
+
+        while len(Data) < Length:
+            Received = Connection.recv(Length - len(Data))
+
+            if Received == b"":
+                raise socket.error("Client disconnected")
+
+            Data += Received
+
+        return Data
+
+    def Handshake(self, Connection):
+        """Negotiate an export with the client. Returns False if it gave up"""
+        #NBDMAGIC, IHAVEOPT, flags: fixed newstyle | no zeroes.
+        Connection.sendall(b"NBDMAGIC" + struct.pack(b">QH", 0x49484156454F5054, 0x3))
+        ClientFlags = struct.unpack(b">I", self.ReceiveAll(Connection, 4))[0]
+
+        while True:
+            OptionMagic, Option, Length = struct.unpack(b">QII", self.ReceiveAll(Connection, 16))
+            self.ReceiveAll(Connection, Length)
+
+            if Option == 1:
+                #NBD_OPT_EXPORT_NAME. Send the size and flags: has flags | read only | can flush.
+                Reply = struct.pack(b">QH", self.Reader.Size, 0x1 | 0x2 | 0x4)
+
+                if not ClientFlags & 0x2:
+                    Reply += b"\x00" * 124
+
+                Connection.sendall(Reply)
+                return True
+
+            elif Option == 2:
+                #NBD_OPT_ABORT.
+                return False
+
+            #Anything else: NBD_REP_ERR_UNSUP, so the client falls back to NBD_OPT_EXPORT_NAME.
+            Connection.sendall(struct.pack(b">QIII", 0x3e889045565a9, Option, 0x80000001, 0))
+
+    def Serve(self, Connection):
+        """Answer requests until the client disconnects"""
+        while True:
+            RequestMagic, Flags, Type, Handle, Offset, Length = struct.unpack(b">IHHQQI", self.ReceiveAll(Connection, 28))
+
+            if RequestMagic != 0x25609513 or Type == 2:
+                #Bad request or NBD_CMD_DISC.
+                return
+
+            if Type == 0:
+                #NBD_CMD_READ.
+                try:
+                    Data = self.Reader.pread(Length, Offset)
+                    Connection.sendall(struct.pack(b">IIQ", 0x67446698, 0, Handle) + Data + b"\x00" * (Length - len(Data)))
+
+                except IOError as Error:
+                    logger.error("CompressedImage: NBDServer().Serve(): Couldn't read "+unicode(Length)+" bytes at "+unicode(Offset)+": "+unicode(Error))
+                    Connection.sendall(struct.pack(b">IIQ", 0x67446698, 5, Handle))
+
+            elif Type == 3:
+                #NBD_CMD_FLUSH. Nothing to do.
+                Connection.sendall(struct.pack(b">IIQ", 0x67446698, 0, Handle))
+
+            else:
+                #Writes and everything else: EPERM, as the image is read-only.
+                if Type == 1:
+                    self.ReceiveAll(Connection, Length)
+
+                Connection.sendall(struct.pack(b">IIQ", 0x67446698, 1, Handle))
+
+    def Stop(self):
+        """Stop serving and clean up"""
+        try:
+            self.Listener.shutdown(socket.SHUT_RDWR)
+
+        except socket.error:
+            pass
+
+        self.Listener.close()
+        self.Reader.close()
+
+        if os.path.exists(self.SocketPath):
+            os.remove(self.SocketPath)
+
+#End NBD Server Class.
@@ -0,0 +1,574 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copy Engine in the Tools Package for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules.
+import mmap
+import io
+import errno
+import hashlib
+import stat
+import fcntl
+import ctypes
+import ctypes.util
+import Queue
+
+from . import compressedimage
+from . import segmentedimage
+
+#posix_fadvise() advice to drop a file's pages from the page cache (Linux's value). Python 2's os module doesn't have posix_fadvise(), so it's called through libc.
+PosixFadvDontNeed = 4
+
+#Begin Main Class.
+class Main():
+    def Copy(self, InputFile, OutputFile, MapFile, BlockSize=1048576, NumberOfBuffers=4, HashName="sha512", ProgressHandler=None, ShouldAbort=None, MapfileInterval=5, Compression=None, SegmentSize=None, SkipBadBlocks=False, ExtraOutputs=(), IsThrottled=None, Sparse=False, Verify=False, VerifyRegionSize=67108864, SectorSize=512):
+        """Copy InputFile to OutputFile without ddrescue, for drives that read cleanly.
+        One thread reads BlockSize blocks (using O_DIRECT where possible) into a pool of NumberOfBuffers reusable, page-aligned buffers, while another hashes them and one per destination writes them.
+        ExtraOutputs is a list of (OutputFile, MapFile) pairs to write at the same time, so the source is only read once. A buffer is only reused once every destination has written it, so the slowest destination sets the pace.
+        A ddrescue-compatible mapfile is kept up to date for each destination every MapfileInterval seconds, so if there's a read error, ddrescue can carry on from where we stopped.
+        ProgressHandler, if given, is called about twice a second with the number of bytes copied (to the slowest destination), the total size, and the current and average read rates (bytes/second).
+        ShouldAbort, if given, is called between blocks, and the copy stops if it returns True.
+        If Compression is given ("auto", "zlib", "lzma" or "zstd"), OutputFile is written as a compressed image (see compressedimage.py).
+        IsThrottled, if given, is called between blocks, and while it returns True, compressed images use their fastest compression level so the CPU keeps up with the disk.
+        If Sparse is True, blocks of zeroes are left as holes in outputs that are new, empty regular files, instead of being written.
+        If Verify is True, every VerifyRegionSize bytes written to a plain file or device are flushed to it, then read back (bypassing the page cache) and checked by another thread while the copy carries on.
+        If SegmentSize is given instead, OutputFile is written as a segmented image, with segments of SegmentSize bytes (see segmentedimage.py).
+        If SkipBadBlocks is True, a block with a read error is re-read in smaller and smaller pieces, down to SectorSize (the input's logical sector size), instead of stopping.
+        Only the sectors that still can't be read are filled with zeroes and marked bad in the mapfile (needed for compressed and segmented images, as ddrescue can't write to them).
+        Returns a dictionary with Result ("Success", "ReadError", "WriteError" or "Aborted"), CopiedBytes, BadRanges, Size, Time, Hash (of what was read, only set if everything was copied), and ZeroBytes and DataBytes (how much of what was read was and wasn't all zeroes).
+        It also has Destinations, a list with the OutputFile, MapFile, Result, CopiedBytes, SparseBytes (left as holes), Time, Throughput (bytes/second), Error and Hash (of what was written to that destination, only set if it all was) of each destination,
+        and VerifiedBytes, UnverifiedBytes (read back from the page cache, because it couldn't be bypassed, so not really checked) and BadRegions ((Start, Length) regions that didn't read back the same as they were written) if Verify is True."""
+        Destinations = [(OutputFile, MapFile)] + list(ExtraOutputs)
+
+        logger.info("CopyEngine: Main().Copy(): Copying "+InputFile+" to "+", ".join(Destination[0] for Destination in Destinations)+" with "+unicode(NumberOfBuffers)+" buffers of "+unicode(BlockSize)+" bytes...")
+
+        #O_DIRECT needs reads aligned to the sector size, so keep the block size a multiple of the page size.
+        BlockSize = max(BlockSize - BlockSize % mmap.PAGESIZE, mmap.PAGESIZE)
+
+        InputFD = self.OpenInput(InputFile)
+        Outputs = []
+
+        try:
+            for Destination, DestinationMapFile in Destinations:
+                Outputs.append(self.OpenOutput(Destination, Compression, SegmentSize))
+
+            #Only leave holes in files we're filling from empty, or old data would show through them.
+            SparseOutputs = [Sparse and self.CanBeSparse(Output) for Output in Outputs]
+
+            Size = os.lseek(InputFD, 0, os.SEEK_END)
+            os.lseek(InputFD, 0, os.SEEK_SET)
+
+            self.Result = {"Result": "Success", "CopiedBytes": 0, "BadRanges": [], "Size": Size, "Time": 0, "Hash": None, "Error": None, "ZeroBytes": 0, "DataBytes": 0, "Destinations": []}
+
+            for Destination, DestinationMapFile in Destinations:
+                self.Result["Destinations"].append({"OutputFile": Destination, "MapFile": DestinationMapFile, "Result": "Success", "CopiedBytes": 0, "SparseBytes": 0, "Time": 0, "Throughput": 0, "Error": None, "Hash": None, "VerifiedBytes": 0, "UnverifiedBytes": 0, "BadRegions": []})
+
+            #Buffers go round in a loop: FreeBuffers -> reader -> each consumer's queue -> consumers -> FreeBuffers (once every consumer is done with them).
+            FreeBuffers = Queue.Queue()
+
+            for Number in range(NumberOfBuffers):
+                #Anonymous mmaps are page-aligned, as O_DIRECT requires.
+                FreeBuffers.put(mmap.mmap(-1, BlockSize))
+
+            #Blocks are compared with this to find ones that are all zeroes. The kernel backs it with its shared zero page, so it costs no memory.
+            self.ZeroBuffer = mmap.mmap(-1, BlockSize)
+
+            #One queue for the hasher, and one per destination.
+            Queues = [Queue.Queue(NumberOfBuffers) for Number in range(len(Destinations) + 1)]
+            self.BufferUsers = {}
+            self.BufferLock = threading.Lock()
+
+            Hasher = hashlib.new(HashName)
+            StartTime = time.time()
+
+            Threads = [threading.Thread(target=self.ReadBlocks, args=(InputFD, Size, BlockSize, FreeBuffers, Queues, ShouldAbort, SkipBadBlocks, SectorSize)),
+                       threading.Thread(target=self.HashBlocks, args=(Hasher, FreeBuffers, Queues[0]))]
+
+            for Number, Output in enumerate(Outputs):
+                #Compressed and segmented images aren't written as they were read, so they can't be checked block by block.
+                Regions = Queue.Queue() if Verify and isinstance(Output, io.FileIO) else None
+
+                Threads.append(threading.Thread(target=self.WriteBlocks, args=(Number, Output, Size, FreeBuffers, Queues[Number+1], MapfileInterval, StartTime, IsThrottled, SparseOutputs[Number], Regions, VerifyRegionSize, HashName)))
+
+                if Regions is not None:
+                    Threads.append(threading.Thread(target=self.VerifyRegions, args=(Number, Regions, BlockSize)))
+
+            for Thread in Threads:
+                Thread.daemon = True
+                Thread.start()
+
+            self.WaitForThreads(Threads, Size, ProgressHandler, StartTime)
+
+        finally:
+            os.close(InputFD)
+
+            #The writers close their outputs when they finish. This only matters if we didn't get that far.
+            for Output in Outputs:
+                if not Output.closed:
+                    Output.close()
+
+        self.Result["Time"] = time.time() - StartTime
+        self.Result["CopiedBytes"] = min(Destination["CopiedBytes"] for Destination in self.Result["Destinations"])
+
+        for Destination in self.Result["Destinations"]:
+            if Destination["Result"] != "Success" and self.Result["Result"] == "Success":
+                self.Result["Result"] = Destination["Result"]
+                self.Result["Error"] = self.Result["Error"] or Destination["Error"]
+
+            #Leave ddrescue an accurate mapfile, whatever happened.
+            self.WriteMapfile(Destination["MapFile"], Destination["CopiedBytes"], Size, self.Result["BadRanges"])
+
+            logger.info("CopyEngine: Main().Copy(): "+Destination["OutputFile"]+": "+Destination["Result"]+", copied "+unicode(Destination["CopiedBytes"])+" bytes in "+unicode(round(Destination["Time"], 2))+" seconds ("+unicode(int(Destination["Throughput"]))+" bytes/second).")
+
+            if Verify:
+                logger.info("CopyEngine: Main().Copy(): "+Destination["OutputFile"]+": Read back and checked "+unicode(Destination["VerifiedBytes"])+" bytes, "+unicode(Destination["UnverifiedBytes"])+" bytes only from the page cache, "+unicode(len(Destination["BadRegions"]))+" regions didn't match.")
+
+        if self.Result["Result"] == "Success" and self.Result["BadRanges"] == []:
+            self.Result["Hash"] = Hasher.hexdigest()
+
+        logger.info("CopyEngine: Main().Copy(): Finished with result "+self.Result["Result"]+" after copying "+unicode(self.Result["CopiedBytes"])+" of "+unicode(Size)+" bytes in "+unicode(round(self.Result["Time"], 2))+" seconds.")
+        return self.Result
+
+    def OpenOutput(self, OutputFile, Compression, SegmentSize):
+        """Open OutputFile for writing, as a compressed image, a segmented image, or a plain file/device"""
+        if Compression is not None:
+            return compressedimage.ImageWriter(OutputFile, Compression=Compression)
+
+        elif SegmentSize is not None:
+            return segmentedimage.SegmentWriter(OutputFile, SegmentSize=SegmentSize)
+
+        #We always copy from the start, so don't leave the end of an old, longer file behind. Devices ignore O_TRUNC.
+        return io.FileIO(os.open(OutputFile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644), "wb")
+
+    def CanBeSparse(self, Output):
+        """Check if Output is an empty regular file, so holes can be left in it"""
+        if not isinstance(Output, io.FileIO):
+            return False
+
+        Info = os.fstat(Output.fileno())
+        return stat.S_ISREG(Info.st_mode) and Info.st_size == 0
+
+    def WaitForThreads(self, Threads, Size, ProgressHandler, StartTime):
+        """Wait for the reader and consumers to finish, sending progress to ProgressHandler about twice a second"""
+        LastProgress = StartTime
+        LastCopiedBytes = 0
+
+        for Thread in Threads:
+            while Thread.is_alive():
+                Thread.join(0.5)
+                Now = time.time()
+
+                if ProgressHandler is not None and Now - LastProgress >= 0.5:
+                    CopiedBytes = min(Destination["CopiedBytes"] for Destination in self.Result["Destinations"])
+                    ProgressHandler(CopiedBytes, Size, (CopiedBytes - LastCopiedBytes) / (Now - LastProgress), CopiedBytes / (Now - StartTime))
+                    LastProgress = Now
+                    LastCopiedBytes = CopiedBytes
+
+    def GetSize(self, File):
+        """Get the size of File (a device or a file) in bytes"""
+        with open(File, "rb") as Input:
+            Input.seek(0, os.SEEK_END)
+            return Input.tell()
+
+    def OpenInput(self, InputFile):
+        """Open InputFile for reading, bypassing the page cache if the OS and filesystem allow it"""
+        if Linux:
+            try:
+                return os.open(InputFile, os.O_RDONLY | os.O_DIRECT)
+
+            except OSError as Error:
+                #Some filesystems (eg tmpfs) don't support O_DIRECT.
+                if Error.errno != errno.EINVAL:
+                    raise
+
+                logger.warning("CopyEngine: Main().OpenInput(): "+InputFile+" doesn't support O_DIRECT. Falling back to buffered reads...")
+
+        return os.open(InputFile, os.O_RDONLY)
+
+    def ReadBlocks(self, InputFD, Size, BlockSize, FreeBuffers, Queues, ShouldAbort, SkipBadBlocks, SectorSize=512):
+        """Read blocks into free buffers and pass them to every consumer until the end of the input, a read error, an abort, or all the destinations failing.
+        Each block is passed as (Position, Buffer, Length, Zero), where Zero says if it's all zeroes. Always finishes by putting a (Position, None, Status, False) marker in every queue"""
+        Input = io.FileIO(InputFD, "rb", closefd=False)
+        Position = 0
+        Status = "Success"
+
+        while Position < Size:
+            Buffer = FreeBuffers.get()
+
+            if ShouldAbort is not None and ShouldAbort():
+                Status = "Aborted"
+                break
+
+            #Don't read the rest of the disk if there's nowhere left to write it.
+            if all(Destination["Result"] == "WriteError" for Destination in self.Result["Destinations"]):
+                Status = "WriteError"
+                break
+
+            try:
+                Length = Input.readinto(Buffer)
+
+            except (IOError, OSError) as Error:
+                self.Result["Error"] = unicode(Error)
+
+                if not SkipBadBlocks:
+                    logger.error("CopyEngine: Main().ReadBlocks(): Read error at byte "+unicode(Position)+": "+unicode(Error)+". Stopping here...")
+                    Status = "ReadError"
+                    break
+
+                #Salvage what we can of the block, remember which sectors are bad, and carry on after it.
+                logger.error("CopyEngine: Main().ReadBlocks(): Read error at byte "+unicode(Position)+": "+unicode(Error)+". Reading this block in smaller pieces...")
+                Length = min(BlockSize, Size - Position)
+                BadRanges = self.ReadBadBlock(Input, Buffer, Position, Length, SectorSize)
+                Input.seek(Position + Length)
+                self.Result["BadRanges"] += BadRanges
+                Zero = False
+
+                logger.error("CopyEngine: Main().ReadBlocks(): "+unicode(sum(Range[1] for Range in BadRanges))+" bytes of the block at byte "+unicode(Position)+" couldn't be read. They were filled with zeroes.")
+
+            else:
+                #Comparing buffers is a memcmp, so this is about as cheap as reading the block from memory once.
+                Zero = Length > 0 and buffer(Buffer, 0, Length) == buffer(self.ZeroBuffer, 0, Length)
+
+                if Zero:
+                    self.Result["ZeroBytes"] += Length
+
+                else:
+                    self.Result["DataBytes"] += Length
+
+            if Length == 0:
+                #The input is shorter than it said it was. Let ddrescue deal with the rest.
+                logger.error("CopyEngine: Main().ReadBlocks(): Input ended early at byte "+unicode(Position)+". Stopping here...")
+                Status = "ReadError"
+                break
+
+            with self.BufferLock:
+                self.BufferUsers[id(Buffer)] = len(Queues)
+
+            for Blocks in Queues:
+                Blocks.put((Position, Buffer, Length, Zero))
+
+            Position += Length
+
+        for Blocks in Queues:
+            Blocks.put((Position, None, Status, False))
+
+    def ReadBadBlock(self, Input, Buffer, Position, Length, SectorSize):
+        """Read the block at Position, which gave a read error, into Buffer in halves, then quarters, and so on down to SectorSize, so only the sectors that really can't be read are lost.
+        Those are filled with zeroes. Returns the (Start, Length) ranges that couldn't be read, in order"""
+        BadRanges = []
+        Pieces = [(0, Length)]
+
+        #O_DIRECT needs page-aligned buffers a whole number of sectors long, so read each piece into a spare mmap of the right size.
+        Spares = {}
+
+        while Pieces:
+            Start, PieceLength = Pieces.pop(0)
+            SpareLength = -(-PieceLength // SectorSize) * SectorSize
+
+            if SpareLength not in Spares:
+                Spares[SpareLength] = mmap.mmap(-1, SpareLength)
+
+            try:
+                Input.seek(Position + Start)
+                Read = min(Input.readinto(Spares[SpareLength]), PieceLength)
+
+            except (IOError, OSError):
+                Half = PieceLength // 2 - (PieceLength // 2) % SectorSize
+
+                if Half > 0:
+                    Pieces[0:0] = [(Start, Half), (Start + Half, PieceLength - Half)]
+                    continue
+
+                Read = 0
+
+            Buffer[Start:Start+Read] = Spares[SpareLength][:Read]
+
+            #Whatever's left of the piece couldn't be read.
+            if Read < PieceLength:
+                Buffer[Start+Read:Start+PieceLength] = b"\x00" * (PieceLength - Read)
+
+                if BadRanges != [] and sum(BadRanges[-1]) == Position + Start + Read:
+                    BadRanges[-1] = (BadRanges[-1][0], BadRanges[-1][1] + PieceLength - Read)
+
+                else:
+                    BadRanges.append((Position + Start + Read, PieceLength - Read))
+
+        for Spare in Spares.values():
+            Spare.close()
+
+        return BadRanges
+
+    def ReleaseBuffer(self, Buffer, FreeBuffers):
+        """Give Buffer back to the reader once every consumer has finished with it"""
+        with self.BufferLock:
+            self.BufferUsers[id(Buffer)] -= 1
+
+            if self.BufferUsers[id(Buffer)] == 0:
+                FreeBuffers.put(Buffer)
+
+    def HashBlocks(self, Hasher, FreeBuffers, Blocks):
+        """Hash the blocks the reader passes us, in order"""
+        while True:
+            Position, Buffer, Length, Zero = Blocks.get()
+
+            if Buffer is None:
+                return
+
+            Hasher.update(buffer(Buffer, 0, Length))
+            self.ReleaseBuffer(Buffer, FreeBuffers)
+
+    def WriteBlocks(self, Number, Output, Size, FreeBuffers, Blocks, MapfileInterval, StartTime, IsThrottled=None, Sparse=False, Regions=None, VerifyRegionSize=67108864, HashName="sha512"):
+        """Write the blocks the reader passes us, in order, to Output (a file object), and keep destination Number's mapfile up to date.
+        Everything written is hashed with HashName, and the destination's Hash is set if it all was.
+        If Sparse is True, skip over blocks of zeroes, leaving holes. After a write error, keep taking blocks (without writing them), so the other destinations can carry on.
+        If Regions (a queue) is given, every VerifyRegionSize bytes are flushed to the disk and passed to VerifyRegions() as (Start, Length, Digest), with None at the end"""
+        Destination = self.Result["Destinations"][Number]
+        LastMapfile = StartTime
+
+        #MD5 is only used to spot accidental corruption here, and it's quicker than SHA-512.
+        RegionStart = 0
+        RegionHasher = hashlib.md5()
+
+        #Hash what this destination was given, not what was read, so a destination that missed something doesn't get the input's hash.
+        Hasher = hashlib.new(HashName)
+
+        while True:
+            Position, Buffer, Length, Zero = Blocks.get()
+
+            if Buffer is None:
+                break
+
+            if IsThrottled is not None and isinstance(Output, compressedimage.ImageWriter):
+                Output.SetThrottled(IsThrottled())
+
+            if Destination["Result"] == "Success":
+                Written = 0
+
+                try:
+                    if Sparse and Zero:
+                        Output.seek(Length, os.SEEK_CUR)
+                        Destination["SparseBytes"] += Length
+
+                    else:
+                        while Written < Length:
+                            Written += Output.write(buffer(Buffer, Written, Length - Written))
+
+                    Destination["CopiedBytes"] = Position + Length
+
+                    #A hole reads back as zeroes, so it hashes the same as the block would have.
+                    Hasher.update(buffer(Buffer, 0, Length))
+
+                    if Regions is not None:
+                        RegionHasher.update(buffer(Buffer, 0, Length))
+
+                        if Destination["CopiedBytes"] - RegionStart >= VerifyRegionSize:
+                            self.FinishRegion(Output, Regions, RegionStart, Destination["CopiedBytes"], RegionHasher, Sparse)
+                            RegionStart = Destination["CopiedBytes"]
+                            RegionHasher = hashlib.md5()
+
+                except (IOError, OSError) as Error:
+                    logger.error("CopyEngine: Main().WriteBlocks(): Write error on "+Destination["OutputFile"]+" at byte "+unicode(Position)+": "+unicode(Error)+". Stopping writing to it...")
+                    Destination["Result"] = "WriteError"
+                    Destination["Error"] = unicode(Error)
+
+            self.ReleaseBuffer(Buffer, FreeBuffers)
+
+            #Compressed and segmented images can't be resumed by ddrescue, so they only get a mapfile at the end, once everything is on the disk.
+            if Destination["Result"] == "Success" and isinstance(Output, io.FileIO) and time.time() - LastMapfile >= MapfileInterval:
+                #Only mark blocks as finished once they're really on the disk.
+                try:
+                    self.SyncOutput(Output)
+
+                except (IOError, OSError) as Error:
+                    logger.error("CopyEngine: Main().WriteBlocks(): Couldn't flush "+Destination["OutputFile"]+" to the disk: "+unicode(Error)+". Stopping writing to it...")
+                    Destination["Result"] = "WriteError"
+                    Destination["Error"] = unicode(Error)
+
+                else:
+                    self.WriteMapfile(Destination["MapFile"], Destination["CopiedBytes"], Size, self.Result["BadRanges"])
+
+                LastMapfile = time.time()
+
+        #Buffer is None, and Length is the reader's status.
+        if Destination["Result"] == "Success":
+            Destination["Result"] = Length
+
+        #Make sure everything is on the disk before saying how long it took.
+        try:
+            if isinstance(Output, io.FileIO):
+                #Seeking past the end doesn't make the file any longer, so a hole at the end needs this.
+                if Sparse:
+                    Output.truncate(Destination["CopiedBytes"])
+
+                os.fsync(Output.fileno())
+
+            Output.close()
+
+        except (IOError, OSError) as Error:
+            logger.error("CopyEngine: Main().WriteBlocks(): Couldn't finish writing to "+Destination["OutputFile"]+": "+unicode(Error)+"!")
+            Destination["Result"] = "WriteError"
+            Destination["Error"] = unicode(Error)
+
+        #Check the last region too, now it's on the disk. Nothing after a write error is worth checking.
+        if Regions is not None:
+            if Destination["Result"] != "WriteError" and Destination["CopiedBytes"] > RegionStart:
+                Regions.put((RegionStart, Destination["CopiedBytes"] - RegionStart, RegionHasher.digest()))
+
+            Regions.put(None)
+
+        #The hash is only meaningful if every byte was read and written.
+        if Destination["Result"] == "Success" and self.Result["BadRanges"] == []:
+            Destination["Hash"] = Hasher.hexdigest()
+
+        Destination["Time"] = time.time() - StartTime
+        Destination["Throughput"] = Destination["CopiedBytes"] / max(Destination["Time"], 0.001)
+
+    def FinishRegion(self, Output, Regions, Start, End, Hasher, Sparse):
+        """Make sure the bytes from Start to End are on the disk, then give the region to VerifyRegions() to read back"""
+        #A region can end in a hole, so make the file long enough to read it all back.
+        if Sparse:
+            Output.truncate(End)
+
+        self.SyncOutput(Output)
+        Regions.put((Start, End - Start, Hasher.digest()))
+
+    def SyncOutput(self, Output):
+        """Make sure everything written to Output (a plain file or device) so far is on the disk"""
+        #macOS doesn't have fdatasync().
+        if hasattr(os, "fdatasync"):
+            os.fdatasync(Output.fileno())
+
+        else:
+            os.fsync(Output.fileno())
+
+    def VerifyRegions(self, Number, Regions, BlockSize):
+        """Read back each region WriteBlocks() finishes from destination Number, bypassing the page cache, and check it matches what was written.
+        Regions that don't match (or can't be read) are added to the destination's BadRegions. Regions that match, but could only be read from the page cache, are counted as UnverifiedBytes"""
+        Destination = self.Result["Destinations"][Number]
+        Buffer = mmap.mmap(-1, BlockSize)
+        Input = None
+
+        try:
+            while True:
+                Region = Regions.get()
+
+                if Region is None:
+                    break
+
+                Start, Length, Digest = Region
+                Hasher = hashlib.md5()
+                Remaining = Length
+
+                try:
+                    if Input is None:
+                        Input = io.FileIO(self.OpenInput(Destination["OutputFile"]), "rb")
+                        Direct = bool(fcntl.fcntl(Input.fileno(), fcntl.F_GETFL) & getattr(os, "O_DIRECT", 0))
+
+                    #Without O_DIRECT, the region has to be dropped from the page cache, or we'd only be checking memory. It's been flushed, so the kernel can forget it.
+                    Bypassed = Direct or self.DropCache(Input.fileno(), Start, Length)
+                    Input.seek(Start)
+
+                    while Remaining > 0:
+                        Read = min(Input.readinto(Buffer), Remaining)
+
+                        if Read == 0:
+                            break
+
+                        Hasher.update(buffer(Buffer, 0, Read))
+                        Remaining -= Read
+
+                except (IOError, OSError) as Error:
+                    logger.error("CopyEngine: Main().VerifyRegions(): Couldn't read back "+unicode(Length)+" bytes at byte "+unicode(Start)+" of "+Destination["OutputFile"]+": "+unicode(Error)+"!")
+                    Destination["BadRegions"].append((Start, Length))
+                    continue
+
+                if Remaining > 0 or Hasher.digest() != Digest:
+                    logger.error("CopyEngine: Main().VerifyRegions(): The "+unicode(Length)+" bytes at byte "+unicode(Start)+" of "+Destination["OutputFile"]+" didn't read back the same as they were written!")
+                    Destination["BadRegions"].append((Start, Length))
+
+                elif Bypassed:
+                    Destination["VerifiedBytes"] += Length
+
+                else:
+                    logger.warning("CopyEngine: Main().VerifyRegions(): Couldn't bypass the page cache to read back the "+unicode(Length)+" bytes at byte "+unicode(Start)+" of "+Destination["OutputFile"]+". Counting them as unverified...")
+                    Destination["UnverifiedBytes"] += Length
+
+        finally:
+            if Input is not None:
+                Input.close()
+
+    def DropCache(self, FD, Offset, Length):
+        """Ask the kernel to forget its cached copy of part of a file, so reading it comes from the disk.
+        Returns True if it worked, or False if it can't be done (eg on macOS, which doesn't have posix_fadvise())"""
+        try:
+            LibC = ctypes.CDLL(ctypes.util.find_library("c"))
+
+            #The 64-bit version takes 64-bit offsets even on 32-bit systems like the Raspberry Pi's.
+            Fadvise = getattr(LibC, "posix_fadvise64", None) or LibC.posix_fadvise
+
+        except (OSError, AttributeError):
+            return False
+
+        Fadvise.argtypes = [ctypes.c_int, ctypes.c_int64, ctypes.c_int64, ctypes.c_int]
+
+        #posix_fadvise() returns an error number rather than setting errno.
+        return Fadvise(FD, Offset, Length, PosixFadvDontNeed) == 0
+
+    def WriteMapfile(self, MapFile, CopiedBytes, Size, BadRanges=()):
+        """Write a ddrescue mapfile saying the first CopiedBytes bytes are finished (apart from any (Start, Length) BadRanges) and the rest hasn't been tried.
+        The file is replaced atomically, so ddrescue never sees a half-written one. Nothing is written if MapFile is empty (the user chose not to use one)"""
+        if MapFile in ("", None):
+            return
+
+        with open(MapFile+".tmp", "w") as File:
+            File.write("# Rescue Logfile. Created by DDRescue-GUI's copy engine\n")
+            File.write("# current_pos  current_status\n")
+
+            if CopiedBytes >= Size:
+                File.write("0x%08X     +\n" % Size)
+
+            else:
+                File.write("0x%08X     ?\n" % CopiedBytes)
+
+            File.write("#      pos        size  status\n")
+
+            Position = 0
+
+            for Start, Length in sorted(BadRanges):
+                if Start >= CopiedBytes:
+                    break
+
+                if Start > Position:
+                    File.write("0x%08X  0x%08X  +\n" % (Position, Start - Position))
+
+                File.write("0x%08X  0x%08X  -\n" % (Start, Length))
+                Position = Start + Length
+
+            if CopiedBytes > Position:
+                File.write("0x%08X  0x%08X  +\n" % (Position, CopiedBytes - Position))
+
+            if CopiedBytes < Size:
+                File.write("0x%08X  0x%08X  ?\n" % (CopiedBytes, Size - CopiedBytes))
+
+        os.rename(MapFile+".tmp", MapFile)
+
+#End Main Class.
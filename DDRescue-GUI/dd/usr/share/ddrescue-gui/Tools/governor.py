@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Thermal and throttle governor in the Tools Package for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#The governor watches the temperature and the Raspberry Pi firmware's throttle flags, so a slow recovery can be blamed on the right thing.
+#While the board is throttled, work that competes with imaging for the CPU (compression) is cut back.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules.
+import threading
+
+from . import tools
+
+ThermalPath = "/sys/class/thermal"
+
+#Newer Raspberry Pi kernels have the firmware's throttle flags in sysfs. Older ones need vcgencmd.
+ThrottlePath = "/sys/devices/platform/soc/soc:firmware/get_throttled"
+
+#Firmware throttle flags that are set while the condition lasts. The same flags shifted left by 16 say it has happened since boot.
+ThrottleFlags = [(0x1, "under-voltage"), (0x2, "ARM frequency capped"), (0x4, "throttled"), (0x8, "soft temperature limit")]
+
+#The Raspberry Pi 3 starts throttling at 80 degrees C, even if the firmware flags can't be read.
+TemperatureLimit = 80.0
+
+#How many samples to keep in the history.
+HistoryLength = 720
+
+#Begin Main Class.
+class Main():
+    def ReadTemperature(self, Path=ThermalPath):
+        """Return the highest temperature (in degrees C) of the thermal zones in Path, or in the file Path, or None if it can't be read"""
+        if os.path.isdir(Path):
+            Files = [os.path.join(Path, Zone, "temp") for Zone in sorted(os.listdir(Path)) if Zone.startswith("thermal_zone")]
+
+        else:
+            Files = [Path]
+
+        Temperatures = []
+
+        for File in Files:
+            try:
+                with open(File, "r") as Temperature:
+                    #In thousandths of a degree.
+                    Temperatures.append(int(Temperature.read().strip()) / 1000)
+
+            except (IOError, OSError, ValueError):
+                continue
+
+        if Temperatures == []:
+            return None
+
+        return max(Temperatures)
+
+    def ReadThrottleFlags(self, Path=ThrottlePath):
+        """Return the firmware's throttle flags from Path, or None if they can't be read.
+        Path has the flags in hex, with or without "throttled=" in front like vcgencmd prints. If Path is the default and doesn't exist, ask vcgencmd instead"""
+        if Path == ThrottlePath and not os.path.exists(Path):
+            Retval, Output = tools.Main().StartProcess(["vcgencmd", "get_throttled"], ReturnOutput=True, Timeout=5)
+
+            if Retval != 0:
+                return None
+
+        else:
+            try:
+                with open(Path, "r") as Flags:
+                    Output = Flags.read()
+
+            except (IOError, OSError):
+                return None
+
+        Flags = Output.strip()
+
+        if Flags.startswith("throttled="):
+            Flags = Flags.split("=", 1)[1]
+
+        try:
+            return int(Flags, 16)
+
+        except ValueError:
+            logger.warning("Governor: Main().ReadThrottleFlags(): Couldn't understand throttle flags: "+Output.strip())
+            return None
+
+    def DescribeThrottleFlags(self, Flags):
+        """Return the names of the conditions in Flags that are happening now"""
+        return [Name for Flag, Name in ThrottleFlags if Flags is not None and Flags & Flag]
+
+    def IsThrottled(self, Temperature, Flags):
+        """Check if the board is being slowed down now, from its Temperature and throttle Flags"""
+        return self.DescribeThrottleFlags(Flags) != [] or (Temperature is not None and Temperature >= TemperatureLimit)
+
+#End Main Class.
+
+#Begin Governor Thread.
+class Governor(threading.Thread):
+    def __init__(self, ThermalPath=ThermalPath, ThrottlePath=ThrottlePath, Interval=5, ChangeHandler=None):
+        """Sample the temperature and throttle flags every Interval seconds until Stop() is called.
+        ChangeHandler, if given, is called (in this thread) with the sample every time the board starts or stops being throttled"""
+        self.ThermalPath = ThermalPath
+        self.ThrottlePath = ThrottlePath
+        self.Interval = Interval
+        self.ChangeHandler = ChangeHandler
+
+        #Each sample has the Time, Temperature, Flags, Throttled and the ReadRate last given to RecordReadRate().
+        self.History = []
+        self.ReadRate = None
+        self.Throttled = False
+        self.Stopped = threading.Event()
+
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.start()
+
+    def run(self):
+        """Main body of the thread, started with self.start()"""
+        logger.info("Governor: Governor().run(): Watching "+self.ThermalPath+" and "+self.ThrottlePath+" every "+unicode(self.Interval)+" seconds...")
+
+        while not self.Stopped.is_set():
+            self.Sample()
+            self.Stopped.wait(self.Interval)
+
+    def Sample(self):
+        """Take a sample, add it to the history, and tell ChangeHandler if the board has started or stopped being throttled"""
+        Temperature = Main().ReadTemperature(self.ThermalPath)
+        Flags = Main().ReadThrottleFlags(self.ThrottlePath)
+
+        Sample = {"Time": time.time(), "Temperature": Temperature, "Flags": Flags, "Throttled": Main().IsThrottled(Temperature, Flags), "ReadRate": self.ReadRate}
+
+        self.History.append(Sample)
+        del self.History[:-HistoryLength]
+
+        if Sample["Throttled"] != self.Throttled:
+            self.Throttled = Sample["Throttled"]
+
+            if self.Throttled:
+                logger.warning("Governor: Governor().Sample(): Throttling started ("+self.DescribeSample(Sample)+"), read rate "+unicode(self.ReadRate)+". Cutting back on compression...")
+
+            else:
+                logger.info("Governor: Governor().Sample(): Throttling stopped ("+self.DescribeSample(Sample)+"), read rate "+unicode(self.ReadRate)+".")
+
+            if self.ChangeHandler is not None:
+                self.ChangeHandler(Sample)
+
+        return Sample
+
+    def DescribeSample(self, Sample):
+        """Describe a sample for the log and the output box"""
+        Description = Main().DescribeThrottleFlags(Sample["Flags"])
+
+        if Sample["Temperature"] is not None:
+            Description.append(unicode(round(Sample["Temperature"], 1))+" degrees C")
+
+        return ", ".join(Description) or "no sensors"
+
+    def RecordReadRate(self, ReadRate):
+        """Record the current read rate, so it's saved with the next sample"""
+        self.ReadRate = ReadRate
+
+    def Stop(self):
+        """Stop sampling"""
+        self.Stopped.set()
+
+#End Governor Thread.
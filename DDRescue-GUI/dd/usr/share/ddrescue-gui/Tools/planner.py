@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Multi-pass recovery planner in the Tools Package for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#The planner runs ddrescue several times on the same mapfile, getting the easy data first and leaving the slow, damaged areas until last.
+#Which stage runs next depends only on what the mapfile says is left, so a recovery that was stopped part way through carries on sensibly.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Mapfile block statuses. '?' is non-tried, '*' non-trimmed, '/' non-scraped (non-split on older versions of ddrescue), '-' bad sector and '+' finished.
+Statuses = "?*/-+"
+
+#The stages, in order. Each one only runs if there's data in one of its Statuses, and is stopped when its TimeBudget (in seconds) runs out.
+#Options replace the user's reverse, no-split/no-scrape and retry settings for that stage. The retry budget grows as the easy data runs out.
+Stages = [{"Name": "Fast pass", "Options": {"Reverse": "", "NoSplit": "-n", "BadSectorRetries": "-r 0"}, "Statuses": "?", "TimeBudget": 4 * 3600},
+          {"Name": "Reverse pass", "Options": {"Reverse": "-R", "NoSplit": "-n", "BadSectorRetries": "-r 0"}, "Statuses": "?", "TimeBudget": 2 * 3600},
+          {"Name": "Trimming and scraping", "Options": {"Reverse": "", "NoSplit": "", "BadSectorRetries": "-r 0"}, "Statuses": "?*/", "TimeBudget": 4 * 3600},
+          {"Name": "Retrying bad sectors once", "Options": {"Reverse": "", "NoSplit": "", "BadSectorRetries": "-r 1"}, "Statuses": "*/-", "TimeBudget": 2 * 3600},
+          {"Name": "Retrying bad sectors 3 times", "Options": {"Reverse": "-R", "NoSplit": "", "BadSectorRetries": "-r 3"}, "Statuses": "*/-", "TimeBudget": 4 * 3600},
+          {"Name": "Retrying bad sectors 8 times", "Options": {"Reverse": "", "NoSplit": "", "BadSectorRetries": "-r 8"}, "Statuses": "*/-", "TimeBudget": 8 * 3600}]
+
+#Begin Main Class.
+class Main():
+    def ReadMapfile(self, MapFile):
+        """Read a ddrescue mapfile, and return a list of (Start, Size, Status) blocks. Lines that aren't blocks (like comments, the current position, or hashes added by HashWindow) are ignored"""
+        Blocks = []
+
+        with open(MapFile, "r") as File:
+            for Line in File:
+                Parts = Line.split()
+
+                if len(Parts) != 3 or Parts[0][0] == "#" or len(Parts[2]) != 1 or Parts[2] not in Statuses:
+                    continue
+
+                try:
+                    Blocks.append((int(Parts[0], 16), int(Parts[1], 16), Parts[2]))
+
+                except ValueError:
+                    #Not a block after all.
+                    continue
+
+        return Blocks
+
+    def SummariseMapfile(self, MapFile):
+        """Return the number of bytes in each status in MapFile. Returns None if the mapfile doesn't exist or can't be read yet"""
+        try:
+            Blocks = self.ReadMapfile(MapFile)
+
+        except (IOError, OSError):
+            return None
+
+        Summary = dict((Status, 0) for Status in Statuses)
+
+        for Start, Size, Status in Blocks:
+            Summary[Status] += Size
+
+        return Summary
+
+    def GetNextStage(self, Summary, FinishedStages=()):
+        """Return the first stage that hasn't been run yet and still has data to work on, or None if the recovery is done.
+        Summary is from SummariseMapfile(). If there's no mapfile yet, start from the beginning"""
+        for Stage in Stages:
+            if Stage["Name"] in FinishedStages:
+                continue
+
+            if Summary is None or sum(Summary[Status] for Status in Stage["Statuses"]) > 0:
+                return Stage
+
+        return None
+
+#End Main Class.
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Partition and gap imaging in the Tools Package for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#A disk is split into regions: its partitions, and the gaps before, between and after them (which may hold boot code, partition tables or deleted data).
+#Chosen regions are imaged one at a time, in the order they are on the disk, each to its own output file, mapfile and hash file.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules.
+import hashlib
+
+from . import tools
+
+#Begin Main Class.
+class Main():
+    def GetRegions(self, InputFile, Size):
+        """Return the partitions of InputFile (Size bytes long), and the gaps around them, in the order they are on the disk.
+        Each region is a dictionary with the Name, Type ("Partition" or "Gap"), Number, Offset, Size and Filesystem. Returns an empty list if there's no partition table"""
+        Partitions = tools.Main().ReadPartitionTable(InputFile)
+
+        if Partitions == []:
+            return []
+
+        Regions = []
+        Position = 0
+
+        for Partition in sorted(Partitions, key=lambda Partition: Partition["Offset"]):
+            if Partition["Offset"] > Position:
+                Regions.append(self.MakeGap(len([Region for Region in Regions if Region["Type"] == "Gap"]) + 1, Position, Partition["Offset"] - Position))
+
+            Regions.append({"Name": "Partition "+unicode(Partition["Number"]), "Type": "Partition", "Number": Partition["Number"], "Offset": Partition["Offset"],
+                            "Size": Partition["Size"], "Filesystem": Partition["Filesystem"]})
+
+            Position = max(Position, Partition["Offset"] + Partition["Size"])
+
+        if Size > Position:
+            Regions.append(self.MakeGap(len([Region for Region in Regions if Region["Type"] == "Gap"]) + 1, Position, Size - Position))
+
+        return Regions
+
+    def MakeGap(self, Number, Offset, Size):
+        return {"Name": "Unpartitioned space "+unicode(Number), "Type": "Gap", "Number": Number, "Offset": Offset, "Size": Size, "Filesystem": "None"}
+
+    def ScheduleRegions(self, Regions):
+        """Put Regions in the order they are on the disk, so the disk only has to seek forwards between them"""
+        return sorted(Regions, key=lambda Region: Region["Offset"])
+
+    def GetRegionPaths(self, Region, OutputFile, LogFile):
+        """Get the output file and mapfile for Region, named after OutputFile and LogFile (like image-partition1.img and image-partition1.log).
+        The mapfile is empty if LogFile is"""
+        if Region["Type"] == "Partition":
+            Suffix = "-partition"+unicode(Region["Number"])
+
+        else:
+            Suffix = "-gap"+unicode(Region["Number"])
+
+        Paths = []
+
+        for Path in (OutputFile, LogFile):
+            if Path == "":
+                Paths.append("")
+                continue
+
+            Base, Extension = os.path.splitext(Path)
+            Paths.append(Base+Suffix+Extension)
+
+        return Paths[0], Paths[1]
+
+    def HashFile(self, Path, HashName="sha512", BlockSize=1048576):
+        """Hash the file at Path"""
+        Hasher = hashlib.new(HashName)
+
+        with open(Path, "rb") as File:
+            for Block in iter(lambda: File.read(BlockSize), b""):
+                Hasher.update(Block)
+
+        return Hasher.hexdigest()
+
+    def WriteHashFile(self, Path, Hash, HashName="sha512"):
+        """Write Hash to Path.sha512 (or whatever HashName is), in the format sha512sum -c can check"""
+        logger.info("Regions: Main().WriteHashFile(): Writing "+HashName+" hash of "+Path+"...")
+
+        with open(Path+"."+HashName, "w") as File:
+            File.write(Hash+"  "+os.path.basename(Path)+"\n")
+
+#End Main Class.
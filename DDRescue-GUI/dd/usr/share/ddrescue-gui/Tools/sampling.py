@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Sample-based verification in the Tools Package for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#Rather than hashing the whole input and output (hours on a big disk), compare a random sample of blocks and say how many could differ.
+#The sample is chosen from a recorded seed and written out in full, so anyone can check the same blocks again.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules.
+import bisect
+import math
+import random
+
+from . import compressedimage
+from . import planner
+
+#How many blocks to compare, and how big they are. 2000 blocks of 64 KiB is 125 MiB from each side, which a disk reads in a few minutes even with seeking.
+DefaultSampleCount = 2000
+DefaultBlockSize = 65536
+
+#Begin Main Class.
+class Main():
+    def GetRescuedAreas(self, MapFile, Size):
+        """Return the (Start, Size) areas ddrescue rescued according to MapFile.
+        Only these are sampled, because the output is expected to differ from the input everywhere else. If there's no mapfile, the whole input (Size bytes) is used"""
+        if MapFile == "" or not os.path.isfile(MapFile):
+            return [(0, Size)]
+
+        return [(Start, Length) for Start, Length, Status in planner.Main().ReadMapfile(MapFile) if Status == "+" and Length > 0]
+
+    def NewSeed(self):
+        """Return a new random seed for ChooseSample()"""
+        return random.SystemRandom().randint(0, 2**32 - 1)
+
+    def ChooseSample(self, Areas, Seed, Count=DefaultSampleCount, BlockSize=DefaultBlockSize):
+        """Choose up to Count different blocks from Areas at random, using Seed, and return their (Offset, Length) in order of Offset, so they're read mostly sequentially.
+        Each area is split into blocks of BlockSize (the last one may be shorter), so bigger areas get more of the sample"""
+        Starts = []
+        Blocks = 0
+
+        #Number the blocks in all the areas one after the other, so they can be picked with one number each.
+        for Start, Size in Areas:
+            Starts.append(Blocks)
+            Blocks += int(math.ceil(Size / BlockSize))
+
+        Sample = []
+
+        for Block in random.Random(Seed).sample(xrange(Blocks), min(Count, Blocks)):
+            Area = bisect.bisect_right(Starts, Block) - 1
+            Start, Size = Areas[Area]
+            Offset = Start + (Block - Starts[Area]) * BlockSize
+            Sample.append((Offset, min(BlockSize, Start + Size - Offset)))
+
+        return sorted(Sample)
+
+    def CompareSample(self, InputFile, OutputFile, Sample):
+        """Read each block in Sample from InputFile and OutputFile, and return a list of (Offset, Length, Result).
+        Result is "Match", "Mismatch", or "Unreadable" if the block can't be read from the input any more"""
+        Results = []
+
+        #Compare with what's inside compressed and segmented images.
+        with open(InputFile, "rb") as Input:
+            with compressedimage.Main().OpenImage(OutputFile) as Output:
+                for Offset, Length in Sample:
+                    try:
+                        Input.seek(Offset)
+                        Original = Input.read(Length)
+
+                    except (IOError, OSError) as Error:
+                        logger.warning("Sampling: Main().CompareSample(): Couldn't read "+unicode(Length)+" bytes at "+unicode(Offset)+" from "+InputFile+"! Error: "+unicode(Error))
+                        Results.append((Offset, Length, "Unreadable"))
+                        continue
+
+                    Output.seek(Offset)
+
+                    if Output.read(Length) == Original:
+                        Results.append((Offset, Length, "Match"))
+
+                    else:
+                        logger.warning("Sampling: Main().CompareSample(): The "+unicode(Length)+" bytes at "+unicode(Offset)+" differ!")
+                        Results.append((Offset, Length, "Mismatch"))
+
+        return Results
+
+    def GetUpperBound(self, Checked, Mismatches, Confidence=0.95):
+        """Return the highest fraction of blocks that could differ, with the given Confidence, after finding Mismatches in Checked blocks chosen at random.
+        This is the exact (Clopper-Pearson) upper bound, found by bisection so nothing outside the standard library is needed"""
+        if Checked == 0:
+            return 1.0
+
+        if Mismatches >= Checked:
+            return 1.0
+
+        #With no mismatches, there's a simple formula.
+        if Mismatches == 0:
+            return 1 - (1 - Confidence) ** (1 / Checked)
+
+        Low, High = Mismatches / Checked, 1.0
+
+        for Step in range(60):
+            Middle = (Low + High) / 2
+
+            if self.GetBinomialCDF(Mismatches, Checked, Middle) > 1 - Confidence:
+                Low = Middle
+
+            else:
+                High = Middle
+
+        return High
+
+    def GetBinomialCDF(self, Successes, Trials, Probability):
+        """Return the chance of at most Successes in Trials, if each succeeds with Probability. Worked out with logarithms, so large numbers of Trials don't overflow"""
+        Total = 0.0
+
+        for Number in range(Successes + 1):
+            Total += math.exp(math.lgamma(Trials + 1) - math.lgamma(Number + 1) - math.lgamma(Trials - Number + 1)
+                              + Number * math.log(Probability) + (Trials - Number) * math.log(1 - Probability))
+
+        return Total
+
+    def SummariseResults(self, Results, Confidence=0.95):
+        """Return the number of blocks Checked, the Mismatches and Unreadable blocks, and the UpperBound from GetUpperBound(). Unreadable blocks don't count as checked"""
+        Mismatches = len([Result for Result in Results if Result[2] == "Mismatch"])
+        Unreadable = len([Result for Result in Results if Result[2] == "Unreadable"])
+        Checked = len(Results) - Unreadable
+
+        return {"Checked": Checked, "Mismatches": Mismatches, "Unreadable": Unreadable, "UpperBound": self.GetUpperBound(Checked, Mismatches, Confidence), "Confidence": Confidence}
+
+    def WriteSampleFile(self, Path, InputFile, OutputFile, Seed, BlockSize, Results):
+        """Write the seed, block size and every block checked (with its result) to Path, so the same check can be repeated"""
+        logger.info("Sampling: Main().WriteSampleFile(): Writing the sample to "+Path+"...")
+
+        with open(Path, "w") as File:
+            File.write("# DDRescue-GUI sample verification\n")
+            File.write("# Input: "+InputFile+"\n")
+            File.write("# Output: "+OutputFile+"\n")
+            File.write("# Seed: "+unicode(Seed)+"\n")
+            File.write("# Block size: "+unicode(BlockSize)+"\n")
+            File.write("# Offset  Length  Result\n")
+
+            for Offset, Length, Result in Results:
+                File.write("0x%08X  0x%08X  %s\n" % (Offset, Length, Result))
+
+    def ReadSampleFile(self, Path):
+        """Read the Seed, BlockSize and (Offset, Length) blocks back from a file written by WriteSampleFile(), so the same blocks can be checked again"""
+        Seed = None
+        BlockSize = None
+        Sample = []
+
+        with open(Path, "r") as File:
+            for Line in File:
+                if Line.startswith("# Seed: "):
+                    Seed = int(Line.split(": ", 1)[1])
+
+                elif Line.startswith("# Block size: "):
+                    BlockSize = int(Line.split(": ", 1)[1])
+
+                elif not Line.startswith("#") and len(Line.split()) == 3:
+                    Offset, Length, Result = Line.split()
+                    Sample.append((int(Offset, 16), int(Length, 16)))
+
+        return Seed, BlockSize, Sample
+
+#End Main Class.
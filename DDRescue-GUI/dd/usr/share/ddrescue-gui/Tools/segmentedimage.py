@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Segmented Image format in the Tools Package for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#The image is split into fixed-size segments (image.001, image.002, ...) so it fits on FAT32 destinations.
+#The output file itself is a small JSON index listing the segments, which is rewritten every time a segment is started or finished.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+#Import modules.
+import json
+import bisect
+import threading
+import Queue
+
+IndexFormat = "DDRescue-GUI Segmented Image"
+
+#Just under FAT32's 4 GB file size limit, and a multiple of any sensible block size.
+DefaultSegmentSize = 4095 * 1048576
+
+#Begin Main Class.
+class Main():
+    def IsSegmentedImage(self, Path):
+        """Check if Path is the index of one of our segmented images"""
+        try:
+            #Indexes are tiny. Don't try to parse big files.
+            if os.path.getsize(Path) > 1048576:
+                return False
+
+            with open(Path, "r") as File:
+                return json.load(File).get("Format") == IndexFormat
+
+        except (IOError, OSError, ValueError, AttributeError):
+            return False
+
+    def GetSegmentFile(self, Path, Number):
+        """Get the file name of segment Number (counting from 1) of the image at Path"""
+        return Path+".%03d" % Number
+
+#End Main Class.
+#Begin Segment Writer Class.
+class SegmentWriter():
+    def __init__(self, Path, SegmentSize=DefaultSegmentSize):
+        """Create a segmented image with its index at Path. Each segment is flushed to disk and marked finished in the background as soon as it fills,
+        so finished segments can be copied or verified while later ones are still being written"""
+        logger.info("SegmentedImage: SegmentWriter().__init__(): Creating segmented image "+Path+" with "+unicode(SegmentSize)+" byte segments...")
+
+        self.Path = Path
+        self.SegmentSize = SegmentSize
+        self.Segments = []
+        self.File = None
+        self.SegmentPosition = 0
+        self.Size = 0
+        self.closed = False
+
+        self.IndexLock = threading.Lock()
+        self.WriteIndex(Finished=False)
+
+        #Segments waiting to be flushed and closed.
+        self.FinishedSegments = Queue.Queue()
+        self.Finaliser = threading.Thread(target=self.FinaliseSegments)
+        self.Finaliser.daemon = True
+        self.Finaliser.start()
+
+    def write(self, Data):
+        """Add Data to the image, starting new segments as needed"""
+        Written = 0
+
+        while Written < len(Data):
+            if self.File is None or self.SegmentPosition == self.SegmentSize:
+                self.StartSegment()
+
+            Length = min(len(Data) - Written, self.SegmentSize - self.SegmentPosition)
+            self.File.write(buffer(Data, Written, Length))
+            self.SegmentPosition += Length
+            self.Size += Length
+            Written += Length
+
+        return Written
+
+    def StartSegment(self):
+        """Hand the current segment (if any) to the finaliser, and start the next one"""
+        if self.File is not None:
+            self.FinishedSegments.put((len(self.Segments) - 1, self.File, self.SegmentPosition))
+
+        SegmentFile = Main().GetSegmentFile(self.Path, len(self.Segments) + 1)
+        logger.debug("SegmentedImage: SegmentWriter().StartSegment(): Starting segment "+SegmentFile+"...")
+
+        self.File = open(SegmentFile, "wb")
+        self.SegmentPosition = 0
+
+        with self.IndexLock:
+            self.Segments.append({"File": os.path.basename(SegmentFile), "Size": None, "Finished": False})
+
+        self.WriteIndex(Finished=False)
+
+    def FinaliseSegments(self):
+        """Flush and close finished segments, and mark them finished in the index. Runs in its own thread"""
+        while True:
+            Segment = self.FinishedSegments.get()
+
+            if Segment is None:
+                return
+
+            Number, File, Size = Segment
+            File.flush()
+            os.fsync(File.fileno())
+            File.close()
+
+            with self.IndexLock:
+                self.Segments[Number]["Size"] = Size
+                self.Segments[Number]["Finished"] = True
+
+            self.WriteIndex(Finished=False)
+            logger.info("SegmentedImage: SegmentWriter().FinaliseSegments(): Finished segment "+self.Segments[Number]["File"]+".")
+
+    def WriteIndex(self, Finished):
+        """Replace the index atomically, so readers never see half of it"""
+        with self.IndexLock:
+            Index = {"Format": IndexFormat, "Version": 1, "SegmentSize": self.SegmentSize, "Finished": Finished, "Size": self.Size if Finished else None, "Segments": self.Segments}
+
+            with open(self.Path+".tmp", "w") as File:
+                File.write(unicode(json.dumps(Index, indent=4, sort_keys=True)))
+                File.flush()
+                os.fsync(File.fileno())
+
+            os.rename(self.Path+".tmp", self.Path)
+
+    def close(self):
+        """Finish the last segment and write the final index"""
+        if self.File is not None:
+            self.FinishedSegments.put((len(self.Segments) - 1, self.File, self.SegmentPosition))
+            self.File = None
+
+        self.FinishedSegments.put(None)
+        self.Finaliser.join()
+        self.WriteIndex(Finished=True)
+        self.closed = True
+
+        logger.info("SegmentedImage: SegmentWriter().close(): Finished image with "+unicode(len(self.Segments))+" segments, "+unicode(self.Size)+" bytes.")
+
+#End Segment Writer Class.
+#Begin Segment Reader Class.
+class SegmentReader():
+    def __init__(self, Path):
+        """Open the segmented image with its index at Path for reading, as one stream. It behaves like a normal file opened in binary mode.
+        Segments that are still being written can be read up to their current size"""
+        with open(Path, "r") as File:
+            Index = json.load(File)
+
+        if Index.get("Format") != IndexFormat:
+            raise IOError(Path+" isn't a segmented image index")
+
+        self.Position = 0
+        self.Lock = threading.Lock()
+        self.Files = []
+        self.Offsets = []
+        self.Size = 0
+
+        for Segment in Index["Segments"]:
+            SegmentFile = os.path.join(os.path.dirname(Path), Segment["File"])
+
+            if not os.path.exists(SegmentFile):
+                logger.warning("SegmentedImage: SegmentReader().__init__(): Segment "+SegmentFile+" is missing! The image will end before it...")
+                break
+
+            self.Files.append(open(SegmentFile, "rb"))
+            self.Offsets.append(self.Size)
+            self.Size += os.path.getsize(SegmentFile)
+
+    def ReadAt(self, Offset, Length):
+        """Read up to Length bytes at Offset, across segments if needed. The caller must hold self.Lock"""
+        Length = max(min(Length, self.Size - Offset), 0)
+        Pieces = []
+
+        while Length > 0:
+            Number = bisect.bisect_right(self.Offsets, Offset) - 1
+            self.Files[Number].seek(Offset - self.Offsets[Number])
+            Piece = self.Files[Number].read(Length)
+
+            if Piece == b"":
+                raise IOError("Segment "+unicode(Number + 1)+" of segmented image is shorter than expected")
+
+            Pieces.append(Piece)
+            Offset += len(Piece)
+            Length -= len(Piece)
+
+        return b"".join(Pieces)
+
+    def read(self, Length=-1):
+        """Read up to Length bytes (or everything) from the current position"""
+        with self.Lock:
+            if Length < 0:
+                Length = self.Size
+
+            Data = self.ReadAt(self.Position, Length)
+            self.Position += len(Data)
+            return Data
+
+    def pread(self, Length, Offset):
+        """Read Length bytes at Offset without moving the current position (used by the NBD server)"""
+        with self.Lock:
+            return self.ReadAt(Offset, Length)
+
+    def seek(self, Offset, Whence=0):
+        if Whence == os.SEEK_CUR:
+            Offset += self.Position
+
+        elif Whence == os.SEEK_END:
+            Offset += self.Size
+
+        self.Position = max(Offset, 0)
+        return self.Position
+
+    def tell(self):
+        return self.Position
+
+    def close(self):
+        for File in self.Files:
+            File.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *Args):
+        self.close()
+
+#End Segment Reader Class.
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Session journal in the Tools Package for DDRescue-GUI Version 1.7
+# This file is part of DDRescue-GUI.
+# Copyright (C) 2013-2017 Hamish McIntyre-Bhatty
+# DDRescue-GUI is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License version 3 or,
+# at your option, any later version.
+#
+# DDRescue-GUI is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with DDRescue-GUI.  If not, see <http://www.gnu.org/licenses/>.
+
+#The session journal records the settings of the current recovery every time its state changes, so it can be resumed after a crash or power cut.
+#It's replaced atomically and flushed all the way to the disk each time, so there's always either the old journal or the new one, never half of one.
+
+#Do future imports to prepare to support python 3. Use unicode strings rather than ASCII strings, as they fix potential problems.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+DefaultSessionPath = "/var/lib/ddrescue-gui/session.json"
+
+#States that mean the recovery was still going when DDRescue-GUI stopped.
+UnfinishedStates = ("Starting", "Recovering")
+
+#Settings that only make sense while DDRescue-GUI is running, so aren't saved.
+TransientSettings = ("DDRescueVersion", "RecoveringData", "CheckedSettings", "HashingStatus", "CopyEngineHash")
+
+#Begin Main Class.
+class Main():
+    def SaveSession(self, Settings, State, DiskInfo={}, ExecList=None, Resumable=True, SessionPath=DefaultSessionPath):
+        """Save Settings and the recovery's State to the journal. Devices are saved with their serial numbers and sizes, so they can be found again if their names change after a reboot.
+        ExecList is the ddrescue command being run, if any, and Resumable says if ddrescue can carry on from the mapfile"""
+        logger.info("Session: Main().SaveSession(): Saving session with state "+State+" to "+SessionPath+"...")
+
+        Session = {"Version": 1, "State": State, "Updated": time.time(), "Resumable": Resumable, "ExecList": ExecList,
+                   "Settings": dict((Key, Value) for Key, Value in Settings.items() if Key not in TransientSettings),
+                   "Identities": {}}
+
+        for Key in ("InputFile", "OutputFile"):
+            if Settings.get(Key) in DiskInfo:
+                Session["Identities"][Key] = {"Serial": DiskInfo[Settings[Key]].get("Serial", "Unknown"), "RawCapacity": DiskInfo[Settings[Key]].get("RawCapacity", "Unknown")}
+
+        try:
+            if not os.path.isdir(os.path.dirname(SessionPath)):
+                os.makedirs(os.path.dirname(SessionPath))
+
+            #Flush the journal and the rename to the disk, or a power cut could still lose them.
+            with open(SessionPath+".tmp", "w") as SessionFile:
+                SessionFile.write(unicode(json.dumps(Session, indent=4, sort_keys=True)))
+                SessionFile.flush()
+                os.fsync(SessionFile.fileno())
+
+            os.rename(SessionPath+".tmp", SessionPath)
+
+            Directory = os.open(os.path.dirname(SessionPath), os.O_RDONLY)
+
+            try:
+                os.fsync(Directory)
+
+            finally:
+                os.close(Directory)
+
+        except (IOError, OSError) as Error:
+            logger.warning("Session: Main().SaveSession(): Couldn't save the session journal! Error: "+unicode(Error))
+            return False
+
+        return True
+
+    def LoadSession(self, SessionPath=DefaultSessionPath):
+        """Return the journal of a recovery that didn't finish, or None if there isn't one"""
+        try:
+            with open(SessionPath) as SessionFile:
+                Session = json.load(SessionFile)
+
+            if Session["Version"] != 1 or not isinstance(Session["Settings"], dict):
+                logger.warning("Session: Main().LoadSession(): Ignoring session journal with unknown version...")
+                return None
+
+        except (IOError, OSError):
+            logger.info("Session: Main().LoadSession(): No session journal at "+SessionPath+"...")
+            return None
+
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Session: Main().LoadSession(): Session journal at "+SessionPath+" is damaged! Ignoring it...")
+            return None
+
+        if Session["State"] not in UnfinishedStates:
+            logger.info("Session: Main().LoadSession(): Last session ended normally with state "+Session["State"]+"...")
+            return None
+
+        logger.info("Session: Main().LoadSession(): Found unfinished session with state "+Session["State"]+"...")
+        return Session
+
+    def ClearSession(self, SessionPath=DefaultSessionPath):
+        """Remove the journal, so the recovery isn't offered for resuming again"""
+        logger.info("Session: Main().ClearSession(): Removing session journal "+SessionPath+"...")
+
+        try:
+            os.remove(SessionPath)
+
+        except OSError:
+            pass
+
+    def FindDisk(self, Identity, DiskInfo):
+        """Find the Disk with the serial number and size in Identity, or return None if it isn't connected"""
+        if Identity["Serial"] == "Unknown" or Identity["RawCapacity"] in ("Unknown", "N/A"):
+            return None
+
+        for Disk in sorted(DiskInfo):
+            if DiskInfo[Disk].get("Serial") == Identity["Serial"] and DiskInfo[Disk].get("RawCapacity") == Identity["RawCapacity"]:
+                return Disk
+
+        return None
+
+    def RestoreSettings(self, Session, DiskInfo):
+        """Work out the settings to resume Session with, using the current names of its Disks.
+        Returns the settings and a list of the inputs and outputs that can't be found"""
+        Settings = dict(Session["Settings"])
+        Missing = []
+
+        for Key in ("InputFile", "OutputFile"):
+            Path = Settings[Key]
+
+            if Key in Session["Identities"]:
+                #The Disk may have a new name after a reboot, or a different Disk may now have its old name.
+                Disk = self.FindDisk(Session["Identities"][Key], DiskInfo)
+
+                if Disk is None:
+                    if Path in DiskInfo and Session["Identities"][Key]["Serial"] == "Unknown":
+                        #Couldn't identify it last time either, so trust the name.
+                        continue
+
+                    logger.warning("Session: Main().RestoreSettings(): Couldn't find "+Path+" ("+Key+")!")
+                    Missing.append(Path)
+
+                elif Disk != Path:
+                    logger.info("Session: Main().RestoreSettings(): "+Path+" ("+Key+") is now called "+Disk+"...")
+                    Settings[Key] = Disk
+
+            elif not os.path.exists(Path) and (Key == "InputFile" or os.path.exists(Settings["LogFile"])):
+                #A missing output file is only a problem if the mapfile says some data is already in it.
+                logger.warning("Session: Main().RestoreSettings(): Couldn't find "+Path+" ("+Key+")!")
+                Missing.append(Path)
+
+        return Settings, Missing
+
+#End Main Class.
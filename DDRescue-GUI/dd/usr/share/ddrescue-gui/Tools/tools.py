@@ -21,26 +21,104 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import threading
+import importlib
+import sys
+
+#The cached mount table, and what we use to find out when it changes (see Main().GetMountTable()).
+MountTable = None
+MountsFile = None
+MountsPoller = None
+
+#Created here rather than on first use, so threads calling GetMountTable() at the same time (e.g. from UnmountDisks()) can't each make their own.
+MountTableLock = threading.Lock()
+
+#The global variables each of the other Tools modules needs. They're only imported when they're first used, to keep startup fast (see Main().ImportTool()).
+ToolGlobals = {}
+ToolGlobals["copyengine"] = ["os", "threading", "time", "logger", "Linux"]
+ToolGlobals["compressedimage"] = ["os", "logger"]
+ToolGlobals["segmentedimage"] = ["os", "logger"]
+ToolGlobals["session"] = ["os", "json", "time", "logger"]
+ToolGlobals["planner"] = []
+ToolGlobals["allocation"] = ["os", "time", "struct", "logger"]
+ToolGlobals["governor"] = ["os", "time", "logger"]
+ToolGlobals["regions"] = ["os", "logger"]
+ToolGlobals["sampling"] = ["os", "logger"]
+ToolGlobals["bundle"] = ["logger"]
+
 #Begin Main Class.
 class Main():
-    def StartProcess(self, Command, ReturnOutput=False):
-        """Start a given process, and return output and return value if needed"""
-        logger.debug("Tools: Main().StartProcess(): Starting process: "+Command)
-        runcmd = subprocess.Popen("LC_ALL=C "+Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
+    def StartProcess(self, Command, ReturnOutput=False, Timeout=None, OutputHandler=None):
+        """Start a given process, and return output and return value if needed.
+        Command is either a list of arguments, which is run directly, or a string, which is run through the shell.
+        Output is read as it arrives, and each line is passed to OutputHandler as well, if given.
+        If the process is still running after Timeout seconds, it is killed, along with anything it started, and the return value is -9.
+        """
+        #Byte strings (eg paths from os.listdir()) might not be ASCII, so decode them to make the string we log.
+        if isinstance(Command, list):
+            CommandString = ' '.join(Argument if isinstance(Argument, unicode) else Argument.decode("UTF-8", "replace") for Argument in Command)
+            Shell = False
+
+        else:
+            CommandString = Command if isinstance(Command, unicode) else Command.decode("UTF-8", "replace")
+            Shell = True
+
+        logger.debug("Tools: Main().StartProcess(): Starting process: "+CommandString)
+
+        #Set the locale through the environment, rather than through the shell.
+        Environment = dict(os.environ)
+        Environment["LC_ALL"] = "C"
+
+        #Only unicode strings need encoding. Byte strings are passed on as they are.
+        if isinstance(Command, list):
+            Command = [Argument.encode("UTF-8") if isinstance(Argument, unicode) else Argument for Argument in Command]
+
+        elif isinstance(Command, unicode):
+            Command = Command.encode("UTF-8")
+
+        #Put the process in its own process group if it might need to be killed, so we can kill anything it starts as well.
+        if Timeout != None:
+            PreExecFunction = os.setsid
+
+        else:
+            PreExecFunction = None
+
+        try:
+            runcmd = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=Shell, env=Environment, preexec_fn=PreExecFunction)
+
+        except OSError as Error:
+            #The program couldn't be run (eg it isn't installed). Behave like the shell would.
+            logger.error("Tools: Main().StartProcess(): Couldn't start process: "+CommandString+"! Error: "+unicode(Error))
+            Retval, Output = 127, unicode(Error)+"\n"
+
+            if ReturnOutput == False:
+                return Retval
+
+            else:
+                return Retval, Output
 
-        while runcmd.poll() == None:
-            time.sleep(0.25)
+        if Timeout != None:
+            Timer = threading.Timer(Timeout, self.KillProcessGroup, [runcmd, CommandString, Timeout])
+            Timer.daemon = True
+            Timer.start()
 
-        #Save runcmd.stdout.readlines, and runcmd.returncode, as they tend to reset fairly quickly. Handle unicode properly.
+        #Read the output as it arrives, so the process can never block on a full pipe. Handle unicode properly.
         Output = []
 
-        for line in runcmd.stdout.readlines():
-            Output.append(line.decode("UTF-8", errors="ignore"))
+        for line in iter(runcmd.stdout.readline, b""):
+            line = line.decode("UTF-8", errors="ignore")
+            Output.append(line)
 
-        Retval = int(runcmd.returncode)
+            if OutputHandler != None:
+                OutputHandler(line)
+
+        Retval = int(runcmd.wait())
+
+        if Timeout != None:
+            Timer.cancel()
 
         #Log this info in a debug message.
-        logger.debug("Tools: Main().StartProcess(): Process: "+Command+": Return Value: "+unicode(Retval)+", Output: \"\n\n"+''.join(Output)+"\"\n")
+        logger.debug("Tools: Main().StartProcess(): Process: "+CommandString+": Return Value: "+unicode(Retval)+", Output: \"\n\n"+''.join(Output)+"\"\n")
 
         if ReturnOutput == False:
             #Return the return code back to whichever function ran this process, so it can handle any errors.
@@ -50,6 +128,18 @@ class Main():
             #Return the return code, as well as the output.
             return Retval, ''.join(Output)
 
+    def KillProcessGroup(self, Process, CommandString, Timeout):
+        """Kill a process started by StartProcess() that has run for too long, along with anything it started"""
+        logger.error("Tools: Main().KillProcessGroup(): Process: "+CommandString+" didn't finish within "+unicode(Timeout)+" seconds! Killing it...")
+
+        try:
+            #9 is SIGKILL.
+            os.killpg(Process.pid, 9)
+
+        except OSError:
+            #It has already finished.
+            pass
+
     def CreateUniqueKey(self, Dict, Data, Length):
         """Create a unqiue dictionary key of Length for dictionary Dict for the item Data.
         The unique key is created by adding a number on the the end of Data, while keeping it at the correct length.
@@ -92,7 +182,7 @@ class Main():
         """Send a notification, created to reduce clutter in the rest of the code."""
         if Linux:
             #Use notify-send. *** Sometimes doesn't work as root. Find uid of logged-in user? ***
-            self.StartProcess(Command="notify-send 'DDRescue-GUI' '"+Message+"' -i /usr/share/pixmaps/ddrescue-gui.png", ReturnOutput=False)
+            self.StartProcess(Command=["notify-send", "DDRescue-GUI", Message, "-i", "/usr/share/pixmaps/ddrescue-gui.png"], ReturnOutput=False)
 
         else:
             #Use Cocoadialog. (use subprocess to avoid blocking GUI thread.)
@@ -108,22 +198,27 @@ class Main():
 
             if OutputFileType == "Device":
                 if Linux:
-                    Retval, Output = self.StartProcess(Command="kpartx -l "+Settings["OutputFile"], ReturnOutput=True)
-                    Output = Output.split("\n")
+                    Retval, Output = self.GetImagePartitions(Settings["OutputFile"])
+
+                    #If there's no partition table, we can only mount it as a partition.
+                    if Output == []:
+                        OutputFileType = "Partition"
 
                 else:
-                    Retval, Output = self.MacRunHdiutil(Options="imageinfo "+Settings["OutputFile"]+" -plist", Disk=Settings["OutputFile"])
+                    Retval, Output = self.MacRunHdiutil(Options=["imageinfo", Settings["OutputFile"], "-plist"], Disk=Settings["OutputFile"])
 
         else:
             if Linux:
-                #If list of partitions is empty (or 1 partition), we have a partition.
-                Retval, Output = self.StartProcess(Command="kpartx -l "+Settings["OutputFile"], ReturnOutput=True)
-                Output = Output.split("\n")
+                #If there's no partition table, we have a partition.
+                Retval, Output = self.GetImagePartitions(Settings["OutputFile"])
 
             else:
-                Retval, Output = self.MacRunHdiutil(Options="imageinfo "+Settings["OutputFile"]+" -plist", Disk=Settings["OutputFile"])
+                Retval, Output = self.MacRunHdiutil(Options=["imageinfo", Settings["OutputFile"], "-plist"], Disk=Settings["OutputFile"])
+
+            if Linux and Output == []:
+                OutputFileType = "Partition"
 
-            if Output == [""] or len(Output) == 1 or "whole disk" in Output:
+            elif not Linux and (Output == [""] or len(Output) == 1 or "whole disk" in Output):
                 OutputFileType = "Partition"
 
             else:
@@ -135,6 +230,226 @@ class Main():
 
         return OutputFileType, Retval, Output
 
+    def ImportTool(self, Name):
+        """Import the named Tools module (e.g. "copyengine") and return it. Make our global variables accessible inside it, and inside any other Tools modules it imported"""
+        Module = importlib.import_module("Tools."+Name)
+
+        for Other in ToolGlobals:
+            if "Tools."+Other in sys.modules:
+                for Global in ToolGlobals[Other]:
+                    setattr(sys.modules["Tools."+Other], Global, globals()[Global])
+
+        return Module
+
+    def ReadPartitionTable(self, ImagePath, SectorSize=512):
+        """Read the MBR or GPT partition table (including logical partitions) from the start of a disk image, without any external tools.
+        Returns a list of dictionaries with the Number, Offset and Size (in bytes), Scheme and Filesystem of each partition.
+        An empty list means there's no partition table, so the image is probably of a single partition."""
+        logger.info("Tools: Main().ReadPartitionTable(): Reading partition table of "+ImagePath+"...")
+        Partitions = []
+
+        #Compressed and segmented images are read through a reader that makes them look like one plain image.
+        with self.ImportTool("compressedimage").Main().OpenImage(ImagePath) as Image:
+            BootSector = self.ReadAt(Image, 0, SectorSize)
+
+            if len(BootSector) < 512 or BootSector[510:512] != b"\x55\xaa":
+                logger.info("Tools: Main().ReadPartitionTable(): No boot signature. Returning no partitions...")
+                return Partitions
+
+            Entries = [struct.unpack(b"<B3xB3xII", BootSector[446+16*Number:462+16*Number]) for Number in range(4)]
+
+            #Use the GPT if there's a protective MBR (type 0xEE). Images of 4Kn disks have the header at byte 4096.
+            if 0xEE in [Entry[1] for Entry in Entries]:
+                for GPTSectorSize in (SectorSize, 4096):
+                    Partitions = self.ReadGPT(Image, GPTSectorSize)
+
+                    if Partitions != []:
+                        break
+
+            #FAT and NTFS boot sectors also end in 0x55AA, so check this isn't a filesystem before trusting the table.
+            elif self.GetFilesystemType(Image, 0) == "Unknown":
+                for Number, (Status, Type, Start, Length) in enumerate(Entries, 1):
+                    if Status not in (0x00, 0x80):
+                        #Not a valid partition table.
+                        return []
+
+                    if Type == 0 or Length == 0:
+                        continue
+
+                    if Type in (0x05, 0x0F, 0x85):
+                        #Extended partition. Follow the chain of EBRs to find the logical partitions.
+                        Partitions += self.ReadEBRChain(Image, Start, SectorSize)
+                        continue
+
+                    Partitions.append({"Number": Number, "Offset": Start * SectorSize, "Size": Length * SectorSize, "Scheme": "MBR"})
+
+            for Partition in Partitions:
+                Partition["Filesystem"] = self.GetFilesystemType(Image, Partition["Offset"])
+
+        logger.info("Tools: Main().ReadPartitionTable(): Found "+unicode(len(Partitions))+" partitions.")
+
+        return sorted(Partitions, key=lambda Partition: Partition["Number"])
+
+    def ReadAt(self, File, Offset, Length):
+        """Read Length bytes at Offset in File (or fewer, if it's too short)"""
+        File.seek(Offset)
+        return File.read(Length)
+
+    def ReadEBRChain(self, Image, ExtendedStart, SectorSize):
+        """Read the logical partitions inside an extended partition starting at sector ExtendedStart, numbered from 5"""
+        Partitions = []
+        EBRSector = ExtendedStart
+        Seen = []
+
+        #Guard against loops in damaged tables.
+        while EBRSector not in Seen and len(Seen) < 128:
+            Seen.append(EBRSector)
+            EBR = self.ReadAt(Image, EBRSector * SectorSize, SectorSize)
+
+            if len(EBR) < 512 or EBR[510:512] != b"\x55\xaa":
+                break
+
+            Type, Start, Length = struct.unpack(b"<4xB3xII", EBR[446:462])
+            NextType, NextStart = struct.unpack(b"<4xB3xI4x", EBR[462:478])
+
+            if Type != 0 and Length != 0:
+                #Logical partitions are relative to their own EBR.
+                Partitions.append({"Number": 5 + len(Partitions), "Offset": (EBRSector + Start) * SectorSize, "Size": Length * SectorSize, "Scheme": "MBR"})
+
+            if NextType == 0 or NextStart == 0:
+                break
+
+            #The next EBR is relative to the start of the extended partition.
+            EBRSector = ExtendedStart + NextStart
+
+        return Partitions
+
+    def ReadGPT(self, Image, SectorSize):
+        """Read the partitions from a GPT"""
+        Partitions = []
+        Header = self.ReadAt(Image, SectorSize, 92)
+
+        if Header[0:8] != b"EFI PART":
+            logger.warning("Tools: Main().ReadGPT(): No GPT header with "+unicode(SectorSize)+" byte sectors! Returning no partitions...")
+            return Partitions
+
+        EntriesStart, NumberOfEntries, EntrySize = struct.unpack(b"<QII", Header[72:88])
+
+        #Sanity check, so a damaged header can't make us read the whole image.
+        if EntrySize < 128 or NumberOfEntries * EntrySize > 1048576:
+            logger.warning("Tools: Main().ReadGPT(): GPT header looks damaged! Returning no partitions...")
+            return Partitions
+
+        Entries = self.ReadAt(Image, EntriesStart * SectorSize, NumberOfEntries * EntrySize)
+
+        for Number in range(NumberOfEntries):
+            Entry = Entries[Number*EntrySize:(Number+1)*EntrySize]
+
+            #Unused entries have a zeroed type GUID.
+            if len(Entry) < 128 or Entry[0:16] == b"\x00" * 16:
+                continue
+
+            FirstLBA, LastLBA = struct.unpack(b"<QQ", Entry[32:48])
+            Partitions.append({"Number": Number + 1, "Offset": FirstLBA * SectorSize, "Size": (LastLBA - FirstLBA + 1) * SectorSize, "Scheme": "GPT"})
+
+        return Partitions
+
+    def GetFilesystemType(self, Image, Offset):
+        """Identify the filesystem at Offset in the open Image from its magic number, or return "Unknown" """
+        Superblock = self.ReadAt(Image, Offset, 4096)
+
+        if len(Superblock) < 1024:
+            return "Unknown"
+
+        if Superblock[3:11] == b"NTFS    ":
+            return "ntfs"
+
+        elif Superblock[3:11] == b"EXFAT   ":
+            return "exfat"
+
+        elif Superblock[0:4] == b"XFSB":
+            return "xfs"
+
+        elif Superblock[510:512] == b"\x55\xaa" and Superblock[82:87] == b"FAT32":
+            return "vfat"
+
+        elif Superblock[510:512] == b"\x55\xaa" and Superblock[54:57] == b"FAT":
+            return "vfat"
+
+        elif len(Superblock) >= 1160 and Superblock[1080:1082] == b"\x53\xef":
+            #ext2/3/4. Tell them apart by their feature flags.
+            Compatible, Incompatible = struct.unpack(b"<I4xI", Superblock[1116:1128])
+
+            if Incompatible & 0x2C0:
+                #Extents, 64-bit or flex_bg.
+                return "ext4"
+
+            elif Compatible & 0x4:
+                #Has a journal.
+                return "ext3"
+
+            return "ext2"
+
+        elif Superblock[1024:1026] in (b"H+", b"HX"):
+            return "hfsplus"
+
+        elif len(Superblock) == 4096 and Superblock[4086:4096] in (b"SWAPSPACE2", b"SWAP-SPACE"):
+            return "swap"
+
+        elif self.ReadAt(Image, Offset+65600, 8) == b"_BHRfS_M":
+            return "btrfs"
+
+        elif self.ReadAt(Image, Offset+32769, 5) == b"CD001":
+            return "iso9660"
+
+        return "Unknown"
+
+    def GetImagePartitions(self, ImagePath):
+        """Get the partitions in a disk image, and a return value (0 for success, 1 if the image couldn't be read)"""
+        try:
+            return 0, self.ReadPartitionTable(ImagePath)
+
+        except (IOError, OSError, struct.error) as Error:
+            logger.error("Tools: Main().GetImagePartitions(): Couldn't read partition table of "+ImagePath+"! Error: "+unicode(Error))
+            return 1, []
+
+    def AttachImageToNBD(self, ImagePath):
+        """Attach a compressed or segmented image to a free /dev/nbdX device (read-only), using our NBD server and nbd-client, so it can be mounted.
+        Returns the device and the server (to pass to DetachNBD() later), or (None, None) if it couldn't be attached."""
+        logger.info("Tools: Main().AttachImageToNBD(): Attaching "+ImagePath+" to an NBD device...")
+
+        self.StartProcess(["modprobe", "nbd"])
+
+        #NBD devices that are in use have a pid file.
+        Devices = [Name for Name in os.listdir("/sys/block") if re.match("nbd[0-9]+$", Name) and not os.path.exists("/sys/block/"+Name+"/pid")]
+
+        if Devices == []:
+            logger.error("Tools: Main().AttachImageToNBD(): No free NBD devices! Is the nbd module available?")
+            return None, None
+
+        Device = "/dev/"+sorted(Devices, key=lambda Name: int(Name[3:]))[0]
+        SocketPath = "/tmp/ddrescue-gui-"+Device.split("/")[-1]+".sock"
+
+        if os.path.exists(SocketPath):
+            os.remove(SocketPath)
+
+        Server = self.ImportTool("compressedimage").NBDServer(ImagePath, SocketPath)
+
+        if self.StartProcess(["nbd-client", "-unix", SocketPath, Device, "-readonly"]) != 0:
+            logger.error("Tools: Main().AttachImageToNBD(): nbd-client failed to attach "+ImagePath+" to "+Device+"!")
+            Server.Stop()
+            return None, None
+
+        logger.info("Tools: Main().AttachImageToNBD(): Attached "+ImagePath+" to "+Device+".")
+        return Device, Server
+
+    def DetachNBD(self, Device, Server):
+        """Detach an image attached with AttachImageToNBD(), and stop its server"""
+        logger.info("Tools: Main().DetachNBD(): Detaching "+Device+"...")
+        Retval = self.StartProcess(["nbd-client", "-d", Device])
+        Server.Stop()
+        return Retval
+
     def MacGetDevNameAndMountPoint(self, Output):
         """Get the device name and mount point of an output file, given output from hdiutil mount -plist"""
         #Parse the plist (Property List).
@@ -154,25 +469,98 @@ class Main():
         return MountedDisk["dev-entry"], MountedDisk["mount-point"], True
 
     def MacRunHdiutil(self, Options, Disk):
-        """Runs hdiutil on behalf of the rest of the program when called. Tries to handle and fix hdiutil errors if they occur."""
-        Retval, Output = self.StartProcess(Command="hdiutil "+Options, ReturnOutput=True)
+        """Runs hdiutil on behalf of the rest of the program when called. Tries to handle and fix hdiutil errors if they occur.
+        Options is a list of arguments, or a string of arguments separated by spaces."""
+        if not isinstance(Options, list):
+            Options = Options.split()
+
+        Retval, Output = self.StartProcess(Command=["hdiutil"]+Options, ReturnOutput=True)
 
         #Handle this common error.
         if "Resource temporarily unavailable" in Output or Retval != 0:
             #Fix by detaching any disk images.
             #Try to find any disk images that are attached, and detach them (if there are any). *** Doesn't work on older versions of OS X but fix in next release. ***
-            for Line in self.StartProcess(Command="diskutil list", ReturnOutput=True)[1].split("\n"):
+            for Line in self.StartProcess(Command=["diskutil", "list"], ReturnOutput=True)[1].split("\n"):
                 try:
                     if ' '.join(Line.split()[1:3]) == "(disk image):":
-                        self.StartProcess(Command="hdiutil detach "+Line.split()[0])
+                        self.StartProcess(Command=["hdiutil", "detach", Line.split()[0]])
 
                 except: pass
 
             #Try again.
-            Retval, Output = self.StartProcess(Command="hdiutil "+Options, ReturnOutput=True)
+            Retval, Output = self.StartProcess(Command=["hdiutil"]+Options, ReturnOutput=True)
 
         return Retval, Output
 
+    def UnescapeMountInfo(self, Field):
+        """Undo the octal escapes (eg "\\040" for a space) the kernel uses in /proc/self/mountinfo, and decode the result"""
+        return re.sub(br"\\([0-7]{3})", lambda Match: chr(int(Match.group(1), 8)), Field).decode("UTF-8", "ignore")
+
+    def ParseMountInfo(self, MountInfo):
+        """Parse the contents of /proc/self/mountinfo (Linux only).
+        Returns a dictionary of lists of mountpoints keyed by source device, and a dictionary of source devices keyed by mountpoint."""
+        BySource = {}
+        ByMountPoint = {}
+
+        #Work on bytes, as the escapes are for bytes of UTF-8 encoded paths.
+        if isinstance(MountInfo, unicode):
+            MountInfo = MountInfo.encode("UTF-8")
+
+        for Line in MountInfo.split(b"\n"):
+            #Fields are: mount ID, parent ID, major:minor, root, mountpoint, options, optional fields, "-", filesystem type, source, superblock options.
+            Fields = Line.split()
+
+            if b"-" not in Fields:
+                continue
+
+            Separator = Fields.index(b"-")
+            MountPoint = self.UnescapeMountInfo(Fields[4])
+            Source = self.UnescapeMountInfo(Fields[Separator+2])
+
+            #Later mounts hide earlier ones at the same mountpoint, so the last one wins.
+            BySource.setdefault(Source, []).append(MountPoint)
+            ByMountPoint[MountPoint] = Source
+
+        return BySource, ByMountPoint
+
+    def ParseMountOutput(self, MountOutput):
+        """Parse the output of the mount command into the same form as ParseMountInfo() (used on OS X)"""
+        BySource = {}
+        ByMountPoint = {}
+
+        for Line in MountOutput.split("\n"):
+            SplitLine = Line.split()
+
+            if len(SplitLine) > 2:
+                BySource.setdefault(SplitLine[0], []).append(SplitLine[2])
+                ByMountPoint[SplitLine[2]] = SplitLine[0]
+
+        return BySource, ByMountPoint
+
+    def GetMountTable(self):
+        """Get the mount table, indexed by source device and by mountpoint (see ParseMountInfo()).
+        On Linux this is cached, and only read again when /proc/self/mounts tells us the mounts have changed. On OS X the mount command is run every time."""
+        global MountTable, MountsFile, MountsPoller
+
+        if not Linux:
+            return self.ParseMountOutput(self.StartProcess(["mount"], ReturnOutput=True)[1])
+
+        with MountTableLock:
+            if MountsPoller == None:
+                #The kernel flags /proc/self/mounts with POLLERR|POLLPRI whenever something is mounted or unmounted.
+                MountsFile = open("/proc/self/mounts")
+                MountsPoller = select.poll()
+                MountsPoller.register(MountsFile, select.POLLERR | select.POLLPRI)
+
+            #Check for changes before reading, so we can't miss one that happens while we read.
+            if MountsPoller.poll(0) != [] or MountTable == None:
+                logger.debug("Tools: Main().GetMountTable(): Mounts have changed. Reading /proc/self/mountinfo...")
+
+                with open("/proc/self/mountinfo") as MountInfoFile:
+                    MountTable = self.ParseMountInfo(MountInfoFile.read())
+
+            return MountTable
+
     def IsMounted(self, Partition, MountPoint=None):
         """Checks if the given partition is mounted.
         Partition is the given partition to check.
@@ -181,20 +569,14 @@ class Main():
         """
         if MountPoint == None:
             logger.debug("Tools: Main().IsMounted(): Checking if "+Partition+" is mounted...")
-            MountInfo = self.StartProcess("mount", ReturnOutput=True)[1]
-
-            Mounted = False
+            BySource, ByMountPoint = self.GetMountTable()
 
             #OS X fix: Handle paths with /tmp in them, as paths with /private/tmp.
             if not Linux and "/tmp" in Partition:
                 Partition = Partition.replace("/tmp", "/private/tmp")
 
             #Linux fix: Accept any mountpoint when called with just one argument.
-            for Line in MountInfo.split("\n"):
-                if len(Line) != 0:
-                    if Line.split()[0] == Partition or Line.split()[2] == Partition:
-                        Mounted = True
-                        break
+            Mounted = (Partition in BySource or Partition in ByMountPoint)
 
         else:
             #Check where it's mounted to.
@@ -222,16 +604,11 @@ class Main():
         Otherwise, return None"""
         logger.info("Tools: Main().GetMountPointOf(): Trying to get mount point of partition "+Partition+"...")
 
-        MountInfo = self.StartProcess("mount", ReturnOutput=True)[1]
+        BySource = self.GetMountTable()[0]
         MountPoint = None
 
-        for Line in MountInfo.split("\n"):
-            SplitLine = Line.split()
-
-            if len(SplitLine) != 0:
-                if Partition == SplitLine[0]:
-                    MountPoint = SplitLine[2]
-                    break
+        if Partition in BySource:
+            MountPoint = BySource[Partition][0]
 
         if MountPoint != None:
             logger.info("Tools: Main().GetMountPointOf(): Found it! MountPoint is "+MountPoint+"...")
@@ -254,7 +631,7 @@ class Main():
         else:
             logger.info("Tools: Main().MountPartition(): Preparing to mount "+Partition+" at "+MountPoint+" with no extra options...")
             
-        MountInfo = self.StartProcess("mount", ReturnOutput=True)[1]
+        ByMountPoint = self.GetMountTable()[1]
 
         #There is a partition mounted here. Check if our partition is already mounted in the right place.
         if MountPoint == self.GetMountPointOf(Partition):
@@ -262,7 +639,7 @@ class Main():
             logger.debug("Tools: Main().MountPartition(): Partition: "+Partition+" was already mounted at: "+MountPoint+". Continuing...")
             return 0
 
-        elif MountPoint in MountInfo:
+        elif MountPoint in ByMountPoint:
             #Something else is in the way. Unmount that partition, and continue.
             logger.warning("Tools: Main().MountPartition(): Unmounting filesystem in the way at "+MountPoint+"...")
             if self.UnmountDisk(MountPoint) != 0:
@@ -276,10 +653,10 @@ class Main():
         #Mount the device to the mount point.
         #Use diskutil on OS X.
         if Linux:
-            Retval = self.StartProcess("mount "+Options+" "+Partition+" "+MountPoint)
+            Retval = self.StartProcess(["mount"]+Options.split()+[Partition, MountPoint])
 
         else:
-            Retval = self.StartProcess("diskutil mount "+Options+" "+" -mountPoint "+MountPoint+" "+Partition)
+            Retval = self.StartProcess(["diskutil", "mount"]+Options.split()+["-mountPoint", MountPoint, Partition])
 
         if Retval == 0:
             logger.debug("Tools: Main().MountPartition(): Successfully mounted partition!")
@@ -306,10 +683,10 @@ class Main():
 
             #Unmount it.
             if Linux:
-                Retval = self.StartProcess(Command="umount "+Disk, ReturnOutput=False)
+                Retval = self.StartProcess(Command=["umount", Disk], ReturnOutput=False)
 
             else:
-                Retval = self.StartProcess(Command="diskutil umount "+Disk, ReturnOutput=False)
+                Retval = self.StartProcess(Command=["diskutil", "umount", Disk], ReturnOutput=False)
 
             #Check that this worked okay.
             if Retval != 0:
@@ -322,6 +699,50 @@ class Main():
         #Return the return value
         return Retval
 
+    def UnmountDisks(self, Disks, MaxWorkers=4):
+        """Unmount the given disks concurrently, using at most MaxWorkers threads.
+        Returns a dictionary of return values keyed by disk, once all of them have finished."""
+        logger.info("Tools: Main().UnmountDisks(): Unmounting "+', '.join(Disks)+" with up to "+unicode(MaxWorkers)+" workers...")
+
+        Pending = []
+
+        for Disk in Disks:
+            if Disk not in Pending:
+                Pending.append(Disk)
+
+        Results = {}
+        Lock = threading.Lock()
+
+        def Worker():
+            while True:
+                with Lock:
+                    if Pending == []:
+                        return
+
+                    Disk = Pending.pop(0)
+
+                Retval = self.UnmountDisk(Disk)
+
+                with Lock:
+                    Results[Disk] = Retval
+
+        Workers = []
+
+        for Number in range(min(MaxWorkers, len(Pending))):
+            Workers.append(threading.Thread(target=Worker))
+            Workers[-1].start()
+
+        for Thread in Workers:
+            Thread.join()
+
+        #Try anything that failed once more, as it may have had one of the others mounted inside it.
+        for Disk in Results:
+            if Results[Disk] != 0:
+                logger.info("Tools: Main().UnmountDisks(): Trying to unmount "+Disk+" again...")
+                Results[Disk] = self.UnmountDisk(Disk)
+
+        return Results
+
     def EmergencyExit(self, Message):
         """Handle emergency exits. Warn the user, log, and exit to terminal with the given message"""
         logger.critical("CoreTools: Main().EmergencyExit(): Emergency exit has been triggered! Giving user message dialog and saving the logfile...")
@@ -353,7 +774,7 @@ class Main():
                 Dlg.ShowModal()
                 Dlg.Destroy()
 
-        self.StartProcess("mv -v /tmp/ddrescue-gui.log "+LogFile)
+        self.StartProcess(["mv", "-v", "/tmp/ddrescue-gui.log", LogFile])
 
         #Exit.
         Dlg = wx.MessageDialog(None, "Done. DDRescue-GUI will now exit.", "DDRescue-GUI - Emergency Exit!", wx.OK | wx.ICON_INFORMATION)
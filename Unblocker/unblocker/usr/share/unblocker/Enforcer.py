@@ -0,0 +1,208 @@
+#!/usr/bin/python
+
+import sys
+import os
+import time
+import json
+import socket
+import select
+import signal
+import syslog
+import getopt
+
+from Unblocker import status, setro, read_sysfs, EnforcerState
+
+
+#from <linux/netlink.h>. Group 1 gets the kernel's own uevents, before udev has run any rules.
+NETLINK_KOBJECT_UEVENT = 15
+
+def usage():
+        print '''Usage: Enforcer.py [options]
+
+        Marks new block devices read-only as soon as the kernel announces them,
+        and logs how long each one was writable for.
+
+        -l, --loop           Also block loop devices (for testing)
+        -r, --replay FILE    Handle the uevents in FILE instead of listening, eg:
+                                 ACTION=add
+                                 DEVPATH=/devices/virtual/block/loop0
+                                 SUBSYSTEM=block
+                                 DEVNAME=loop0
+                                 DEVTYPE=disk
+                             with a blank line between events
+        -s, --state FILE     Where to keep the state (default %s)
+        -h, --help           Show this help
+        ''' % EnforcerState
+
+def log(message):
+        syslog.syslog(message)
+        print "%s %s" % (time.strftime('%H:%M:%S'), message)
+
+def parse_uevent(fields):#turns the fields of a uevent into a dictionary, or None if it isn't a kernel block device event
+        event = {}
+        for field in fields:
+                if '=' in field:
+                        key, value = field.split('=', 1)
+                        event[key] = value
+
+        if event.get('SUBSYSTEM') != 'block' or 'DEVNAME' not in event or 'ACTION' not in event:
+                return None
+
+        return event
+
+def read_uevents(filename):#reads synthetic uevents from a file, one KEY=VALUE per line, separated by blank lines
+        with open(filename, 'r') as eventfile:
+                blocks = eventfile.read().split('\n\n')
+
+        events = []
+        for block in blocks:
+                event = parse_uevent(block.strip().split('\n'))
+                if event is not None:
+                        events.append(event)
+
+        return events
+
+def wants_blocking(event, state, include_loop):#decides whether this event means a writable device has appeared
+        name = event['DEVNAME'].split('/')[-1]
+        if name.startswith(('ram', 'zram')):
+                return False
+
+        if name.startswith('loop'):
+                if not include_loop:
+                        return False
+                #loop devices always exist, and announce a file being attached with a change event
+                if event['ACTION'] == 'change' and name not in state and read_sysfs('/sys' + event.get('DEVPATH', '') + '/size') not in ('', '0'):
+                        return True
+
+        if event['ACTION'] == 'add':
+                return True
+
+        #the kernel marked a disk as read-write again
+        return event['ACTION'] == 'change' and event.get('DISK_RO') == '0'
+
+def wait_for_node(path, timeout = 1.0):#devtmpfs normally creates the node before the uevent, but don't rely on it
+        end = time.time() + timeout
+        while not os.path.exists(path):
+                if time.time() > end:
+                        return False
+                time.sleep(0.001)
+
+        return True
+
+def enforce(event, received, state, include_loop = False):#blocks the device in event, which arrived at time received, and records the latency in state
+        name = event['DEVNAME'].split('/')[-1]
+
+        if event['ACTION'] == 'remove' or (name.startswith('loop') and event.get('DISK_MEDIA_CHANGE') == '1' and read_sysfs('/sys' + event.get('DEVPATH', '') + '/size') in ('', '0')):
+                if name in state:
+                        del state[name]
+                        log("%s: removed" % name)
+                        return True
+                return False
+
+        if not wants_blocking(event, state, include_loop):
+                return False
+
+        #block the parent disk too, like wrtblk does
+        names = [name]
+        if event.get('DEVTYPE') == 'partition':
+                names.append(os.path.basename(os.path.dirname(event.get('DEVPATH', ''))))
+
+        for device in names:
+                path = '/dev/' + device
+                if not wait_for_node(path):
+                        log("%s: device node didn't appear, couldn't block it!" % device)
+                        continue
+
+                if status(path) != '1':
+                        setro(path, 1)
+
+                readonly = status(path) == '1'
+                latency = (time.time() - received) * 1000
+                state[device] = {'readonly': readonly, 'latency_ms': round(latency, 3), 'attached': received, 'seqnum': event.get('SEQNUM', '')}
+
+                if readonly:
+                        log("%s: read-only %.3f ms after %s" % (device, latency, event['ACTION']))
+                else:
+                        log("%s: FAILED to make read-only, still writable after %.3f ms!" % (device, latency))
+
+        return True
+
+def save_state(state, statefile):#replaces the state file in one go so readers never see half of it
+        directory = os.path.dirname(statefile)
+        if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+
+        with open(statefile + '.tmp', 'w') as tmpfile:
+                json.dump({'pid': os.getpid(), 'updated': time.time(), 'devices': state}, tmpfile, indent = 4, sort_keys = True)
+
+        os.rename(statefile + '.tmp', statefile)
+
+def listen(state, statefile, include_loop):
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+        #a big buffer, so a dock full of disks arriving at once doesn't overflow it
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        sock.bind((0, 1))
+        log("Listening for new block devices")
+
+        while True:
+                try:
+                        data = sock.recv(65536)
+                except socket.error as error:
+                        log("Couldn't receive uevent: %s" % error)
+                        continue
+
+                received = time.time()
+                event = parse_uevent(data.split('\0'))
+                if event is not None and enforce(event, received, state, include_loop):
+                        save_state(state, statefile)
+
+def main():
+        try:
+                opts, args = getopt.getopt(sys.argv[1:], 'lr:s:h', ['loop', 'replay=', 'state=', 'help'])
+        except getopt.GetoptError as error:
+                print str(error)
+                usage()
+                sys.exit(2)
+
+        include_loop = False
+        replay = None
+        statefile = EnforcerState
+
+        for opt, arg in opts:
+                if opt in ('-l', '--loop'):
+                        include_loop = True
+                elif opt in ('-r', '--replay'):
+                        replay = arg
+                elif opt in ('-s', '--state'):
+                        statefile = arg
+                elif opt in ('-h', '--help'):
+                        usage()
+                        sys.exit(0)
+
+        if os.geteuid() != 0:
+                print "You need root permissions to execute this program"
+                sys.exit(1)
+
+        syslog.openlog('unblocker-enforcer')
+        #exit cleanly on SIGTERM, so the state file is removed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        state = {}
+
+        try:
+                if replay is not None:
+                        for event in read_uevents(replay):
+                                if enforce(event, time.time(), state, include_loop):
+                                        save_state(state, statefile)
+                else:
+                        save_state(state, statefile)
+                        listen(state, statefile, include_loop)
+        except KeyboardInterrupt:
+                pass
+        finally:
+                if replay is None and os.path.exists(statefile):
+                        os.remove(statefile)
+
+        print "Bye!"
+
+if __name__ == "__main__":
+        main()
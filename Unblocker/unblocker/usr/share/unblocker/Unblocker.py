@@ -2,11 +2,21 @@
 
 import sys
 import os
-import subprocess
+import glob
+import fcntl
+import struct
+import json
 
 
 ResourcePath = '/usr/share/unblocker'
 
+#ioctls from <linux/fs.h>, so we don't have to fork blockdev every time.
+BLKROSET = 0x125D
+BLKROGET = 0x125E
+
+#written by Enforcer.py while it's running
+EnforcerState = '/run/unblocker/enforcer.json'
+
 '''def super():
         user = os.geteuid()
         if user == 0:
@@ -15,23 +25,119 @@ ResourcePath = '/usr/share/unblocker'
                 print("You need root permissions to execute this program")
                 sys.exit(1)'''
 
-def menu():
-        a1 = '/dev/sda1'
-        b1 = '/dev/sdb1'
+def menu(table):
+        enforcer = enforcer_state()
+        print('')
+        if enforcer is None:
+                print("Enforcer: not running")
+        else:
+                print("Enforcer: running (pid %s)" % enforcer['pid'])
+
+        print("  #  Device         Size      Status     Enforced       Model")
+        for number, device in enumerate(table):
+                if device['partition']:
+                        name = '  ' + device['path']
+                else:
+                        name = device['path']
+                enforced = ''
+                if enforcer is not None and device['path'][5:] in enforcer['devices']:
+                        enforced = "in %.1f ms" % enforcer['devices'][device['path'][5:]]['latency_ms']
+                print "%3d  %-14s %-9s %-10s %-14s %s" % (number, name, device['size'], statusmenu(device['path'], device['flags']), enforced, device['model'])
+
         print('''
-        0) Unblock/Block sda1 
-        1) Unblock/Block sdb1
-        2) Exit
+        <numbers>    Unblock/Block those devices, eg: 0 3 4
+        b <numbers>  Block those devices
+        u <numbers>  Unblock those devices
+        r            Refresh the list
+        q            Exit
+        Choosing a whole disk changes all of its partitions as well.
         ''')
-        print("Currently")
-        result1 = statusmenu(a1)
-        print "sda1: %s " % result1
-        result2 = statusmenu(b1)
-        print "sdb1: %s " % result2
-        
+
         choicemenu = raw_input("Please select from the menu above: ")
         return choicemenu
 
+def enforcer_state(statefile = EnforcerState):#what the enforcer has blocked and how quickly, or None if it isn't running
+        try:
+                with open(statefile, 'r') as state:
+                        return json.load(state)
+        except (IOError, ValueError):
+                return None
+
+def read_sysfs(path):
+        try:
+                with open(path, 'r') as sysfile:
+                        return sysfile.read().strip()
+        except IOError:
+                return ''
+
+def human_size(sectors):#size in 512 byte sectors, as sysfs reports it
+        size = float(sectors) * 512
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+                if size < 1000:
+                        break
+                size = size / 1000
+        return "%.1f %s" % (size, unit)
+
+def device_table(sysblock = '/sys/block'):#lists every disk followed by its partitions, with their model, size and read-only state
+        flags = readonly_flags(sysblock)
+        table = []
+        for diskpath in sorted(glob.glob(sysblock + '/*')):
+                disk = os.path.basename(diskpath)
+                sectors = read_sysfs(diskpath + '/size')
+                #skip ramdisks, and empty drives like card readers with no card in them
+                if disk.startswith(('ram', 'zram')) or sectors in ('', '0'):
+                        continue
+
+                model = ' '.join([read_sysfs(diskpath + '/device/vendor'), read_sysfs(diskpath + '/device/model')]).strip()
+                table.append({'path': '/dev/' + disk, 'size': human_size(sectors), 'model': model or 'Unknown', 'partition': False, 'flags': flags, 'partitions': []})
+                disktable = table[-1]
+                for partpath in sorted(glob.glob(diskpath + '/' + disk + '*/partition'), key = lambda partpath: int(read_sysfs(partpath) or 0)):
+                        part = os.path.basename(os.path.dirname(partpath))
+                        table.append({'path': '/dev/' + part, 'size': human_size(read_sysfs(os.path.dirname(partpath) + '/size')), 'model': '', 'partition': True, 'flags': flags, 'partitions': []})
+                        disktable['partitions'].append('/dev/' + part)
+
+        return table
+
+def parse_choice(choicemenu, table):#turns the user's choice into an action and a list of devices, or None if it doesn't make sense
+        words = choicemenu.replace(',', ' ').split()
+        action = 'toggle'
+        if words and words[0] in ('b', 'u'):
+                action = {'b': 'block', 'u': 'unblock'}[words[0]]
+                words = words[1:]
+
+        if not words:
+                return None
+
+        chosen = []
+        for word in words:
+                if not word.isdigit() or int(word) >= len(table):
+                        return None
+                chosen.append(table[int(word)])
+
+        return action, chosen
+
+def apply_changes(action, chosen):#blocks/unblocks the chosen devices (and partitions of chosen disks) as one batch
+        changes = []
+        for device in chosen:
+                if action == 'toggle':
+                        readonly = int(status(device['path']) != '1')
+                else:
+                        readonly = int(action == 'block')
+
+                for path in [device['path']] + device['partitions']:
+                        if path not in [change[0] for change in changes]:
+                                changes.append((path, readonly))
+
+        failed = 0
+        for path, readonly in changes:
+                if setro(path, readonly):
+                        print "%s: %s" % (path, ['Unblocked', 'Blocked'][readonly])
+                else:
+                        failed += 1
+
+        print "%d change(s) made, %d failed." % (len(changes) - failed, failed)
+        return failed
+
 def file_check(filename):#checks if the file inserted exists
     try:
         open(filename, 'r')
@@ -40,95 +146,90 @@ def file_check(filename):#checks if the file inserted exists
         print "This file doesn't seem to exist"
     return 0
 
-def statusmenu(disk):
-        resultmenu = subprocess.Popen(['blockdev', '--getro', disk], stdout = subprocess.PIPE).communicate()[0]
-        resultmenu = resultmenu[:1]
-        if resultmenu == '1':
-              resultmenu = "Blocked"
+def readonly_flags(sysblock = '/sys/block'):#reads the read-only flag of every disk and partition in one go
+        flags = {}
+        for path in glob.glob(sysblock + '/*/ro') + glob.glob(sysblock + '/*/*/ro'):
+                try:
+                        with open(path, 'r') as rofile:
+                                flags['/dev/' + os.path.basename(os.path.dirname(path))] = rofile.read()[:1]
+                except IOError:
+                        continue
+
+        return flags
+
+def statusmenu(disk, flags = None):
+        if flags is None:
+                flags = readonly_flags()
+
+        if disk not in flags:
+                resultmenu = "Not found"
+        elif flags[disk] == '1':
+                resultmenu = "Blocked"
         else:
-              resultmenu = "Unblocked"
-              
+                resultmenu = "Unblocked"
+
         return resultmenu
 
 def status(disk):
-        result = subprocess.Popen(['blockdev', '--getro', disk], stdout = subprocess.PIPE).communicate()[0]
-        result = result[:1]
-        return result
+        try:
+                fd = os.open(disk, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError as error:
+                print "Couldn't open %s: %s" % (disk, error.strerror)
+                return ''
+
+        try:
+                result = struct.unpack('i', fcntl.ioctl(fd, BLKROGET, struct.pack('i', 0)))[0]
+        except IOError as error:
+                print "Couldn't read the status of %s: %s" % (disk, error.strerror)
+                return ''
+        finally:
+                os.close(fd)
+
+        return str(result)
+
+def setro(disk, readonly):
+        try:
+                fd = os.open(disk, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError as error:
+                print "Couldn't open %s: %s" % (disk, error.strerror)
+                return False
+
+        try:
+                fcntl.ioctl(fd, BLKROSET, struct.pack('i', readonly))
+        except IOError as error:
+                print "Couldn't change %s: %s" % (disk, error.strerror)
+                return False
+        finally:
+                os.close(fd)
+
+        return True
 
 def unblock(disk):
-        unbldisk = subprocess.Popen(['blockdev', '--setrw', disk], stdout = subprocess.PIPE).communicate()[0]
+        setro(disk, 0)
         return
 
 def block(disk):
-        blkdisk = subprocess.Popen(['blockdev', '--setro', disk], stdout = subprocess.PIPE).communicate()[0]
+        setro(disk, 1)
         return
 
 def main ():
-        a = '/dev/sda1'
-        b = '/dev/sdb1'
-        choicemenu = menu()
-        while choicemenu is not "2":        
-                if choicemenu == "0":
-                        print("Checking the status of the Disk")
-                        diska = status(a)
-                        if diska == '1':
-                                print("Disk is Readonly")
-                                print("Unblocking...")
-                                unblock(a)
-                                print("Unblocked")
-                        else:
-                                print("Disk is Readble")
-                                print("Blocking...")
-                                block(a)
-                                print("Blocked")
-
-                        choicemenu = menu()
-                elif choicemenu == "1":
-                        print("Checking the status of the Disk")
-                        diska = status(b)
-                        if diska == '1':
-                                print("Disk is Readonly")
-                                print("Unblocking...")
-                                unblock(b)
-                                print("Unblocked")
-                        else:
-                                print("Disk is Readble")
-                                print("Blocking...")
-                                block(b)
-                                print("Blocked")
-
-                        choicemenu = menu()
-
-                #elif choicemenu == "2":
-                        '''print("insert the dev block, eg: /dev/sdb2")
-                        c1 = raw_input()
-                        c2 = file_check(c1)
-
-                        while c2 == 0:
-                                print "insert the dev block, eg: /dev/sdb2"
-                                c1 = raw_input()
-                                c2 = file_check(c1)
-                                
-                        print("Checking the status of the Disk")
-                        diska = status(c2)
-                        if diska == '1':
-                                print("Disk is Readonly")
-                                print("Unblocking...")
-                                unblock(a)
-                                print("Unblocked")
-                        else:
-                                print("Disk is Readble")
-                                print("Blocking...")
-                                block(a)
-                                print("Blocked")
-                        choicemenu = menu()
-                        '''
+        table = device_table()
+        choicemenu = menu(table)
+        while choicemenu != "q":
+                if choicemenu == "r":
+                        table = device_table()
                 else:
-                        print "wrong choice"
+                        choice = parse_choice(choicemenu, table)
+                        if choice is None:
+                                print "wrong choice"
+                        else:
+                                action, chosen = choice
+                                apply_changes(action, chosen)
+                                table = device_table()
+
+                choicemenu = menu(table)
         print "Bye!"
         raw_input()
-                       
-                        
 
 if __name__ == "__main__":
         main()